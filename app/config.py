@@ -19,6 +19,63 @@ class Settings(BaseSettings):
     DB_POOL_TIMEOUT: int = 30
     DB_POOL_RECYCLE: int = 1800
 
+    # In-process cache of the homepage cards/charts context, keyed by (lang, trade_date, data version).
+    # Writes bump the data version; the TTL bounds staleness across workers. 0 disables.
+    DASHBOARD_CACHE_TTL_SECONDS: int = 60
+    DASHBOARD_CACHE_MAX_ENTRIES: int = 16
+
+    # index_realtime_snapshot partitions (monthly by trade_date), see app.services.snapshot_partitions.
+    # Raw rows are kept for SNAPSHOT_RAW_RETENTION_DAYS, older days keep one row per rollup interval.
+    # SNAPSHOT_RETENTION_MONTHS drops whole monthly partitions older than that; 0 keeps them forever.
+    SNAPSHOT_PARTITION_MONTHS_AHEAD: int = 2
+    SNAPSHOT_RAW_RETENTION_DAYS: int = 14
+    SNAPSHOT_ROLLUP_INTERVAL_MINUTES: int = 15
+    SNAPSHOT_RETENTION_MONTHS: int = 0
+
+    # Rows per COPY chunk when bulk loading minute klines (index_kline_source_record), see app.services.kline_loader.
+    KLINE_LOAD_CHUNK_SIZE: int = 5000
+
+    # Visit logs are buffered and written in batches, see app.web.visit_logs.
+    # Flush every VISIT_LOG_FLUSH_INTERVAL_MS or once VISIT_LOG_BATCH_SIZE entries wait; at most VISIT_LOG_BUFFER_SIZE
+    # entries are held (oldest dropped beyond that).
+    VISIT_LOG_FLUSH_INTERVAL_MS: int = 1000
+    VISIT_LOG_BATCH_SIZE: int = 200
+    VISIT_LOG_BUFFER_SIZE: int = 10000
+    # Global and daily visit/login counters are spread over this many rows (user_activity_counter_shard and, per day,
+    # user_activity_counter_daily_shard), see app.web.activity_counter. The homepage visit count is cached
+    # in-process and refreshed in the background.
+    ACTIVITY_COUNTER_SHARDS: int = 16
+    ACTIVITY_COUNT_REFRESH_SECONDS: float = 30.0
+
+    # Per-request SQL profiling, see app.services.query_profiler / app.web.request_profiling.
+    # DB_PROFILING_ENABLED adds a Server-Timing header (db time + statement count) and a log line per request.
+    # Statements slower than DB_SLOW_QUERY_MS (0 disables) are logged; DB_EXPLAIN_SAMPLE_RATE (0..1) of the slow
+    # SELECTs in a request are re-run with EXPLAIN ANALYZE and the plan is logged (at most one per request).
+    DB_PROFILING_ENABLED: bool = True
+    DB_SLOW_QUERY_MS: float = 500.0
+    DB_EXPLAIN_SAMPLE_RATE: float = 0.0
+
+    # Manual job runs (/api/jobs/run) are queued in job_run and executed by a worker pool, see app.services.job_queue.
+    # JOB_QUEUE_WORKERS=0 leaves queued runs to other processes. Concurrent runs are capped per concurrency key of
+    # the job handler (app.jobs.registry, scheduled runs count too); JOB_QUEUE_CONCURRENCY overrides the cap per key,
+    # e.g. "refresh_home_global_quotes=2,eastmoney_kline=1".
+    # Active runs refresh a heartbeat every JOB_RUN_HEARTBEAT_SECONDS; runs without one for JOB_RUN_ORPHAN_SECONDS
+    # (crashed or killed process) are marked failed, see app.services.job_heartbeat. On shutdown, queued runs in
+    # progress get JOB_QUEUE_SHUTDOWN_SECONDS to finish and are then marked failed (interrupted).
+    JOB_QUEUE_WORKERS: int = 2
+    JOB_QUEUE_POLL_SECONDS: float = 5.0
+    JOB_QUEUE_CONCURRENCY: str = ""
+    JOB_QUEUE_SHUTDOWN_SECONDS: float = 20.0
+    JOB_RUN_HEARTBEAT_SECONDS: float = 30.0
+    JOB_RUN_ORPHAN_SECONDS: int = 300
+
+    # Raw upstream responses in snapshot payloads, see app.services.raw_payloads.
+    # RAW_PAYLOAD_POLICY: "SOURCE=mode" pairs, "*" for the default. Modes: blob (deduplicated,
+    # compressed raw_payload_blob row), inline (embedded in the payload as before), drop.
+    # Example: "*=blob,TENCENT=drop"
+    RAW_PAYLOAD_POLICY: str = "*=blob"
+    RAW_PAYLOAD_COMPRESSION: str = "zstd"  # zstd / zlib / none (zstd falls back to zlib without zstandard)
+
     # If you expose behind reverse proxy at /market-turnover
     BASE_PATH: str = ""  # e.g. "/market-turnover"
 
@@ -26,6 +83,9 @@ class Settings(BaseSettings):
     BASIC_AUTH_PASS: str | None = None
     AUTH_SECRET_KEY: str = "dev-only-change-me"
     AUTH_SESSION_MAX_AGE_SECONDS: int = 7 * 24 * 3600
+    # In-process cache of the logged-in user (app.web.auth.session_user_cache). 0 disables.
+    AUTH_USER_CACHE_TTL_SECONDS: int = 30
+    AUTH_USER_CACHE_MAX_ENTRIES: int = 1024
 
     DATABASE_URL: str | None = None
     POSTGRES_DB: str | None = None
@@ -66,6 +126,27 @@ class Settings(BaseSettings):
     # Optional SOCKS/HTTP proxy for Eastmoney requests only.
     # Example: socks5://127.0.0.1:1080
     EASTMONEY_PROXY_URL: str | None = None
+    # Failed secid lookups (suggest API) are not retried for this long.
+    EASTMONEY_SECID_NEGATIVE_TTL_SECONDS: int = 600
+
+    # Shared pooled HTTP clients for all sources (one keep-alive pool per host).
+    # HTTP_PROXY_MAP: per host suffix, e.g. "eastmoney.com=socks5://127.0.0.1:1080,tushare.pro=http://proxy:3128"
+    # HTTP_PROXY_URL: default proxy for every other host. HTTP/2 is used only when the h2 package is installed.
+    HTTP_PROXY_URL: str | None = None
+    HTTP_PROXY_MAP: str = ""
+    HTTP2_ENABLED: bool = True
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+
+    # Outbound pacing for all *.eastmoney.com requests (token bucket + concurrent request cap).
+    EASTMONEY_RATE_PER_SECOND: float = 2.0
+    EASTMONEY_RATE_BURST: int = 3
+    EASTMONEY_MAX_CONCURRENCY: int = 3
+
+    # Thread pool size for job fetch fan-out, and the concurrent request cap for other hosts.
+    FETCH_FANOUT_WORKERS: int = 8
+    FETCH_HOST_MAX_CONCURRENCY: int = 4
 
     # Insight generation
     INSIGHT_LLM_PROVIDER: str = "openai"  # openai / gemini
@@ -9,9 +9,11 @@ from sqlalchemy import (
     Date,
     DateTime,
     Enum,
+    Float,
     ForeignKey,
     Index,
     Integer,
+    LargeBinary,
     String,
     Text,
     Time,
@@ -251,6 +253,35 @@ Index("ix_index_quote_history_index_date", IndexQuoteHistory.index_id, IndexQuot
 Index("ix_index_quote_history_trade_session", IndexQuoteHistory.trade_date, IndexQuoteHistory.session)
 
 
+class TurnoverRollingStats(Base):
+    __tablename__ = "turnover_rolling_stats"
+
+    # Incrementally maintained turnover aggregates per (series, session); see app.services.turnover_stats.
+    # series_key: "index:<index_id>" (index_quote_history) or "turnover_fact:HSI" (turnover_fact).
+
+    series_key = Column(String(64), primary_key=True)
+    session = Column(Enum(SessionType, name="sessiontype", values_callable=_enum_values), primary_key=True)
+
+    peak_turnover = Column(BigInteger, nullable=True)  # all-time max turnover
+    peak_trade_date = Column(Date, nullable=True)
+    price_high = Column(Integer, nullable=True)  # all-time max last (*100); index series only
+    price_high_trade_date = Column(Date, nullable=True)
+    latest_trade_date = Column(Date, nullable=True)
+
+    # Sums/counts over the latest N trading days that have turnover (newest first).
+    sum_5 = Column(BigInteger, nullable=False, default=0)
+    cnt_5 = Column(Integer, nullable=False, default=0)
+    sum_10 = Column(BigInteger, nullable=False, default=0)
+    cnt_10 = Column(Integer, nullable=False, default=0)
+    sum_20 = Column(BigInteger, nullable=False, default=0)
+    cnt_20 = Column(Integer, nullable=False, default=0)
+    sum_30 = Column(BigInteger, nullable=False, default=0)
+    cnt_30 = Column(Integer, nullable=False, default=0)
+    max_30 = Column(BigInteger, nullable=True)
+
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+
+
 class IndexIntradayBar(Base):
     __tablename__ = "index_intraday_bar"
     __table_args__ = (
@@ -292,10 +323,13 @@ Index(
 class IndexRealtimeSnapshot(Base):
     __tablename__ = "index_realtime_snapshot"
     # Append-only table: keep every snapshot row, never overwrite.
+    # Monthly RANGE partitions on trade_date (migration 0015, app.services.snapshot_partitions),
+    # so trade_date is part of the primary key.
+    __table_args__ = {"postgresql_partition_by": "RANGE (trade_date)"}
 
-    id = Column(Integer, primary_key=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     index_id = Column(Integer, ForeignKey("market_index.id", ondelete="CASCADE"), nullable=False)
-    trade_date = Column(Date, nullable=False)
+    trade_date = Column(Date, primary_key=True, nullable=False)
     session = Column(Enum(SessionType, name="sessiontype", values_callable=_enum_values), nullable=False)
 
     last = Column(Integer, nullable=False)  # *100
@@ -360,18 +394,66 @@ Index(
 )
 
 
+class RawPayloadBlob(Base):
+    __tablename__ = "raw_payload_blob"
+
+    # Content-addressed raw upstream responses; snapshot payloads reference them as {"raw_ref": sha256}.
+    # See app.services.raw_payloads (dedup by hash, zstd/zlib compression, per-source policy).
+
+    sha256 = Column(String(64), primary_key=True)  # of the canonical JSON text
+    encoding = Column(String(8), nullable=False)  # zstd / zlib / none
+    size_bytes = Column(Integer, nullable=False)  # canonical JSON size
+    stored_bytes = Column(Integer, nullable=False)
+    content = Column(LargeBinary, nullable=False)
+    source = Column(String(32), nullable=True)  # first writer
+
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_seen_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+Index("ix_raw_payload_blob_last_seen", RawPayloadBlob.last_seen_at)
+
+
 class JobRun(Base):
     __tablename__ = "job_run"
 
     id = Column(Integer, primary_key=True)
     job_name = Column(String(64), nullable=False)
+    queued_at = Column(DateTime(timezone=True), nullable=True)  # set for runs enqueued via app.services.job_queue
     started_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     finished_at = Column(DateTime(timezone=True), nullable=True)
-    status = Column(String(16), nullable=False, default="running")  # running/success/failed/partial
+    status = Column(String(16), nullable=False, default="running")  # queued/running/timed_out/success/failed/partial/skipped
+    # Process running it and its last heartbeat (app.services.job_heartbeat); stale active rows are failed as orphans.
+    claimed_by = Column(String(96), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
     summary = Column(JSONB, nullable=True)
     error = Column(Text, nullable=True)
 
 
+class JobRunTiming(Base):
+    __tablename__ = "job_run_timing"
+
+    # One row per instrumented phase of a run (app.services.job_timing), same data as summary["timings"].
+    # Counters are attributed to the innermost span; seconds are inclusive of nested spans.
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    job_run_id = Column(Integer, ForeignKey("job_run.id", ondelete="CASCADE"), nullable=False)
+    job_name = Column(String(64), nullable=False)
+    phase = Column(String(64), nullable=False)  # e.g. fetch, http:push2.eastmoney.com, resolve.turnover_facts, (other)
+    calls = Column(Integer, nullable=False, default=0)
+    seconds = Column(Float, nullable=False, default=0)
+    http_requests = Column(Integer, nullable=False, default=0)
+    http_bytes = Column(BigInteger, nullable=False, default=0)
+    db_statements = Column(Integer, nullable=False, default=0)
+    db_commits = Column(Integer, nullable=False, default=0)
+    row_count = Column(BigInteger, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+Index("ix_job_run_timing_run", JobRunTiming.job_run_id)
+Index("ix_job_run_timing_job_phase", JobRunTiming.job_name, JobRunTiming.phase, JobRunTiming.created_at.desc())
+
+
 class JobDefinition(Base):
     __tablename__ = "job_definition"
 
@@ -4,6 +4,9 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.config import settings
+from app.services.job_timing import install_db_counters
+from app.services.prometheus import gauge
+from app.services.query_profiler import install_query_profiler
 
 # NOTE:
 # Default SQLAlchemy QueuePool is small (pool_size=5). This app has:
@@ -20,6 +23,29 @@ engine = create_engine(
     pool_recycle=getattr(settings, "DB_POOL_RECYCLE", 1800),
 )
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+# Per-run statement / commit counts for JobRun.summary["timings"] (no-op outside job runs).
+install_db_counters(engine)
+# Per-request statement count / DB time / rows and slow query logging (app.web.request_profiling).
+install_query_profiler(engine)
+
+
+# Pool saturation at /metrics: checked_out reaching pool_size + max_overflow means requests wait on DB_POOL_TIMEOUT.
+gauge(
+    "db_pool_connections",
+    "SQLAlchemy pool connections by state (overflow = opened beyond pool_size).",
+    lambda: {
+        ("checked_out",): engine.pool.checkedout(),
+        ("checked_in",): engine.pool.checkedin(),
+        ("overflow",): max(0, engine.pool.overflow()),
+    },
+    ("state",),
+)
+gauge(
+    "db_pool_limit",
+    "Configured pool_size and max_overflow.",
+    lambda: {("pool_size",): engine.pool.size(), ("max_overflow",): getattr(settings, "DB_MAX_OVERFLOW", 40)},
+    ("setting",),
+)
 
 
 def get_db():
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import contextvars
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Job handler registry.
+# Handlers register with @job(...) and are looked up by job_name (job_definition.handler_name) in run_job.
+# A handler is `handler(db, params) -> (status, summary)`; its spec carries the execution policy:
+#   params          - params schema (same shape as job_definition.params_schema), used when the DB row has none
+#   timeout_seconds - wall-clock limit; the handler then runs in its own thread + session (see run_handler).
+#                     Only for jobs that are safe to abandon (idempotent fetch + upsert): a timed-out handler
+#                     keeps running, and until it exits it still counts toward its concurrency key, so the
+#                     next scheduled / queued run of the key is skipped instead of overlapping it.
+#                     Backfills, bulk loads and DDL maintenance run without a timeout, inline.
+#   retries         - extra attempts after an exception, with exponential backoff from retry_backoff_seconds
+#   concurrency_key - jobs sharing a key share one concurrency limit in the job queue (default: the job name),
+#                     e.g. every job pulling Eastmoney klines uses "eastmoney_kline"
+#   max_concurrency - runs of the key allowed at once (JOB_QUEUE_CONCURRENCY overrides it)
+
+JobHandler = Callable[[Session, dict | None], tuple[str, dict]]
+
+
+class JobTimeoutError(RuntimeError):
+    def __init__(self, message: str, worker: threading.Thread) -> None:
+        super().__init__(message)
+        self.worker = worker  # the abandoned handler thread, still running
+
+
+@dataclass(frozen=True, slots=True)
+class JobSpec:
+    name: str
+    handler: JobHandler
+    params: tuple[dict, ...] = ()
+    timeout_seconds: float | None = None
+    retries: int = 0
+    retry_backoff_seconds: float = 30.0
+    concurrency_key: str = ""
+    max_concurrency: int = 1
+
+    @property
+    def key(self) -> str:
+        return self.concurrency_key or self.name
+
+
+_registry: dict[str, JobSpec] = {}
+
+_abandoned_lock = threading.Lock()
+_abandoned: dict[str, set[threading.Thread]] = {}  # concurrency key -> timed-out handler threads still alive
+
+
+def job(
+    name: str,
+    *,
+    params: list[dict] | tuple[dict, ...] = (),
+    timeout_seconds: float | None = None,
+    retries: int = 0,
+    retry_backoff_seconds: float = 30.0,
+    concurrency_key: str = "",
+    max_concurrency: int = 1,
+) -> Callable[[JobHandler], JobHandler]:
+    def decorator(handler: JobHandler) -> JobHandler:
+        if name in _registry:
+            raise ValueError(f"Duplicate job handler: {name}")
+        _registry[name] = JobSpec(
+            name=name,
+            handler=handler,
+            params=tuple(params),
+            timeout_seconds=timeout_seconds,
+            retries=max(0, retries),
+            retry_backoff_seconds=retry_backoff_seconds,
+            concurrency_key=concurrency_key,
+            max_concurrency=max(1, max_concurrency),
+        )
+        return handler
+
+    return decorator
+
+
+def find_job(name: str) -> JobSpec | None:
+    return _registry.get(name)
+
+
+def get_job(name: str) -> JobSpec:
+    spec = _registry.get(name)
+    if spec is None:
+        raise ValueError(f"Unknown job_name: {name}")
+    return spec
+
+
+def registered_jobs() -> list[JobSpec]:
+    return sorted(_registry.values(), key=lambda s: s.name)
+
+
+def job_names_for_key(key: str) -> list[str]:
+    return sorted(s.name for s in _registry.values() if s.key == key)
+
+
+def job_concurrency_limit(key: str) -> int:
+    """JOB_QUEUE_CONCURRENCY "key=n" entry, else the registered handlers' max_concurrency."""
+
+    for part in (settings.JOB_QUEUE_CONCURRENCY or "").split(","):
+        name, _, value = part.partition("=")
+        if name.strip() == key:
+            try:
+                return max(1, int(value.strip()))
+            except ValueError:
+                break
+    specs = [find_job(name) for name in job_names_for_key(key)]
+    return min((spec.max_concurrency for spec in specs if spec is not None), default=1)
+
+
+def abandoned_handlers(key: str) -> int:
+    """Timed-out handlers of the concurrency key still running in this process."""
+
+    with _abandoned_lock:
+        threads = _abandoned.get(key)
+        if not threads:
+            return 0
+        threads.difference_update([t for t in threads if not t.is_alive()])
+        return len(threads)
+
+
+def _call_with_timeout(spec: JobSpec, params: dict | None) -> tuple[str, dict]:
+    # Python threads cannot be killed: on timeout the handler keeps running in its daemon thread with its
+    # own session (closed when it returns) and the run is reported as failed; later writes still land.
+    outcome: dict = {}
+
+    def target() -> None:
+        session = SessionLocal()
+        try:
+            outcome["value"] = spec.handler(session, params)
+        except BaseException as e:  # re-raised in the caller's thread
+            outcome["error"] = e
+        finally:
+            session.close()
+
+    # Copy the caller's context so the handler thread reports into the run's timing collector.
+    worker = threading.Thread(target=contextvars.copy_context().run, args=(target,), name=f"job:{spec.name}", daemon=True)
+    worker.start()
+    worker.join(spec.timeout_seconds)
+    if worker.is_alive():
+        with _abandoned_lock:
+            _abandoned.setdefault(spec.key, set()).add(worker)
+        raise JobTimeoutError(f"{spec.name} did not finish within {spec.timeout_seconds:g}s", worker)
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["value"]
+
+
+def run_handler(spec: JobSpec, db: Session, params: dict | None) -> tuple[str, dict]:
+    """Call the handler with the spec's timeout and retry policy. Timeouts are not retried.
+
+    Returns "skipped" while timed-out handlers of the same concurrency key still fill its limit."""
+
+    busy = abandoned_handlers(spec.key)
+    if busy >= job_concurrency_limit(spec.key):
+        logger.warning("Job %s skipped: %s timed-out run(s) of %s still running", spec.name, busy, spec.key)
+        return "skipped", {"reason": "previous run timed out and is still running", "concurrency_key": spec.key}
+
+    attempt = 0
+    while True:
+        try:
+            if spec.timeout_seconds:
+                status, summary = _call_with_timeout(spec, params)
+            else:
+                status, summary = spec.handler(db, params)
+        except JobTimeoutError:
+            raise
+        except Exception as e:
+            if attempt >= spec.retries:
+                raise
+            db.rollback()
+            delay = spec.retry_backoff_seconds * (2**attempt)
+            attempt += 1
+            logger.warning("Job %s failed (attempt %s/%s), retrying in %.0fs: %s", spec.name, attempt, spec.retries + 1, delay, e)
+            time.sleep(delay)
+            continue
+        if attempt and isinstance(summary, dict):
+            summary = {**summary, "attempts": attempt + 1}
+        return status, summary
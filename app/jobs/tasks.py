@@ -1,40 +1,46 @@
 from __future__ import annotations
 
+import logging
+import threading
 import traceback
-import random
 import time as pytime
 from dataclasses import asdict
+from functools import partial
+from typing import TYPE_CHECKING
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 
-from sqlalchemy.dialects.postgresql import insert as pg_insert
-from sqlalchemy.orm import Session
+import sqlalchemy as sa
+from sqlalchemy.orm import Session, defer
 
 from datetime import date, time
 
 from app.config import settings
-from app.db.models import IndexKlineSourceRecord, IndexQuoteSourceRecord, JobRun, HsiQuoteFact, KlineInterval, SessionType, TurnoverSourceRecord, IndexQuoteHistory, IndexRealtimeApiSnapshot, IndexRealtimeSnapshot
+from app.jobs.registry import JobTimeoutError, get_job, job, run_handler
+from app.db.session import SessionLocal
+from app.db.models import IndexKlineSourceRecord, IndexQuoteSourceRecord, JobRun, JobRunTiming, HsiQuoteFact, KlineInterval, SessionType, TurnoverSourceRecord, IndexQuoteHistory, IndexRealtimeApiSnapshot, IndexRealtimeSnapshot
 from app.services.index_quote_resolver import (
-    add_index_source_record,
+    bulk_add_index_source_records,
+    bulk_ingest_index_quotes,
     ensure_market_index,
     normalize_index_code,
-    upsert_index_history_from_sources,
     upsert_realtime_snapshot,
 )
 from app.services.resolver import upsert_fact_from_sources
-from app.services.intraday_bars import upsert_intraday_bar
-from app.sources.hkex import fetch_hkex_latest_table
-from app.sources.aastocks import fetch_midday_turnover
-from app.sources.aastocks_index import fetch_hsi_snapshot
-from app.sources.tushare_index import TushareIndexDaily, daily_row_asof, fetch_index_daily_history, fetch_latest_index_daily
-from app.sources.tencent_index import fetch_index_daily_history as fetch_tencent_index_daily_history
-from app.sources.eastmoney_index import fetch_minute_kline, aggregate_halfday_and_fullday_amount
-from app.sources.eastmoney_intraday import fetch_intraday_snapshot as fetch_eastmoney_intraday_snapshot
-from app.sources.eastmoney_realtime import default_codes as eastmoney_realtime_default_codes, fetch_realtime_snapshot as fetch_eastmoney_realtime_snapshot
-from app.sources.tushare_kline import fetch_index_kline
-from app.services.tencent_quote import fetch_quotes
+from app.services.fact_resolution import resolve_index_history, resolve_turnover_facts
+from app.services.intraday_bars import upsert_intraday_bars
 from app.services.trade_corridor import get_trade_corridor_highlights_mock
 from app.services.app_cache import upsert_cache
+from app.services.rate_limit import fan_out
+from app.services.dashboard_state import mark_dashboard_dirty, refresh_dashboard_state
+from app.services.minute_kline import store_minute_kline
+from app.services.snapshot_partitions import maintain_realtime_snapshots
+from app.services.raw_payloads import apply_raw_policy
+from app.services.kline_loader import bulk_load_kline_rows
+from app.services.job_timing import TimingCollector, collect_timings
+from app.services.job_heartbeat import PROCESS_ID
+from app.services.prometheus import JOB_RUNS, JOB_SECONDS
+from app.services.turnover_stats import update_index_turnover_stats
 from app.services.insight_service import (
     build_insight_snapshot_payload,
     call_insight_llm,
@@ -44,6 +50,13 @@ from app.services.insight_service import (
     get_fallback_insight_text,
 )
 
+# Source modules (HTML parsers, tushare, numpy, ...) are imported inside the handlers that use them,
+# so the scheduler / web process only loads the sources of the jobs it actually runs.
+if TYPE_CHECKING:
+    from app.sources.tushare_index import TushareIndexDaily
+
+logger = logging.getLogger(__name__)
+
 
 def _persist_tushare_rows(
     db: Session,
@@ -51,6 +64,8 @@ def _persist_tushare_rows(
     rows: list[TushareIndexDaily],
     skip_existing_source: bool,
 ) -> dict[str, int]:
+    from app.sources.tushare_index import daily_row_asof
+
     if not rows:
         return {"rows": 0, "inserted": 0, "skipped_existing": 0, "facts_updated": 0, "snapshots_updated": 0}
 
@@ -75,10 +90,8 @@ def _persist_tushare_rows(
         )
         existing_keys = {(idx, dt) for idx, dt in existing_rows}
 
-    inserted = 0
     skipped_existing = 0
-    facts_updated = 0
-    snapshots_updated = 0
+    bulk_rows: list[dict] = []
 
     for row in rows:
         index_id = index_id_cache[row.code]
@@ -87,67 +100,43 @@ def _persist_tushare_rows(
             skipped_existing += 1
             continue
 
-        asof = daily_row_asof(row.trade_date)
-        payload = {
-            "ts_code": row.ts_code,
-            "turnover_unit": row.turnover_unit,
-            "volume": row.volume,
-            "raw": row.raw,
-        }
-
-        add_index_source_record(
-            db,
-            index_id=index_id,
-            trade_date=row.trade_date,
-            session=SessionType.FULL,
-            source="TUSHARE",
-            last=int(round(row.close * 100)),
-            change_points=int(round(row.change * 100)) if row.change is not None else None,
-            change_pct=int(round(row.pct_chg * 100)) if row.pct_chg is not None else None,
-            turnover_amount=row.turnover_amount,
-            turnover_currency=None,
-            asof_ts=asof,
-            payload=payload,
-            ok=True,
-        )
-        inserted += 1
-
-        fact = upsert_index_history_from_sources(
-            db,
-            index_id=index_id,
-            trade_date=row.trade_date,
-            session=SessionType.FULL,
+        bulk_rows.append(
+            {
+                "index_id": index_id,
+                "trade_date": row.trade_date,
+                "session": SessionType.FULL,
+                "source": "TUSHARE",
+                "last": int(round(row.close * 100)),
+                "change_points": int(round(row.change * 100)) if row.change is not None else None,
+                "change_pct": int(round(row.pct_chg * 100)) if row.pct_chg is not None else None,
+                "turnover_amount": row.turnover_amount,
+                "turnover_currency": None,
+                "snapshot_turnover_currency": "HKD" if row.code == "HSI" else "CNY",
+                "asof_ts": daily_row_asof(row.trade_date),
+                "payload": {
+                    "ts_code": row.ts_code,
+                    "turnover_unit": row.turnover_unit,
+                    "volume": row.volume,
+                    "raw": row.raw,
+                },
+            }
         )
-        if fact is not None:
-            facts_updated += 1
 
-        upsert_realtime_snapshot(
-            db,
-            index_id=index_id,
-            trade_date=row.trade_date,
-            session=SessionType.FULL,
-            last=int(round(row.close * 100)),
-            change_points=int(round(row.change * 100)) if row.change is not None else None,
-            change_pct=int(round(row.pct_chg * 100)) if row.pct_chg is not None else None,
-            turnover_amount=row.turnover_amount,
-            turnover_currency="HKD" if row.code == "HSI" else "CNY",
-            data_updated_at=asof,
-            is_closed=True,
-            source="TUSHARE",
-            payload=payload,
-        )
-        snapshots_updated += 1
+    # One multi-row insert per table and a single commit for the whole batch.
+    write_stats = bulk_ingest_index_quotes(db, bulk_rows)
 
     return {
         "rows": len(rows),
-        "inserted": inserted,
+        "inserted": write_stats["inserted"],
         "skipped_existing": skipped_existing,
-        "facts_updated": facts_updated,
-        "snapshots_updated": snapshots_updated,
+        "facts_updated": write_stats["facts_updated"],
+        "snapshots_updated": write_stats["snapshots_updated"],
     }
 
 
 def _sync_tushare_index_quotes(db: Session) -> tuple[str, dict]:
+    from app.sources.tushare_index import fetch_latest_index_daily
+
     token = (settings.TUSHARE_PRO_TOKEN or "").strip()
     if not token:
         return "skipped", {"enabled": False, "reason": "TUSHARE_PRO_TOKEN is empty"}
@@ -179,6 +168,9 @@ def _backfill_tushare_index_quotes(db: Session, *, lookback_days: int = 90) -> t
     Fallback: Tencent public kline (CN indices only) when Tushare permission is missing.
     """
 
+    from app.sources.tencent_index import fetch_index_daily_history as fetch_tencent_index_daily_history
+    from app.sources.tushare_index import daily_row_asof, fetch_index_daily_history
+
     token = (settings.TUSHARE_PRO_TOKEN or "").strip()
     index_map = settings.tushare_index_map()
 
@@ -223,9 +215,7 @@ def _backfill_tushare_index_quotes(db: Session, *, lookback_days: int = 90) -> t
         return "partial", {"enabled": True, "fallback": "TENCENT", "lookback_days": lookback_days, "rows": 0}
 
     index_id_cache: dict[str, int] = {}
-    inserted = 0
-    facts_updated = 0
-    snapshots_updated = 0
+    bulk_rows: list[dict] = []
 
     # Keep one row per (code, trade_date)
     latest: dict[tuple[str, date], object] = {}
@@ -237,48 +227,29 @@ def _backfill_tushare_index_quotes(db: Session, *, lookback_days: int = 90) -> t
             index_row = ensure_market_index(db, code)
             index_id_cache[code] = index_row.id
 
-        index_id = index_id_cache[code]
-        asof = daily_row_asof(trade_date)
-
-        add_index_source_record(
-            db,
-            index_id=index_id,
-            trade_date=trade_date,
-            session=SessionType.FULL,
-            source="TENCENT",
-            last=int(round(float(row.close) * 100)),
-            change_points=int(round(float(row.change) * 100)) if row.change is not None else None,
-            change_pct=int(round(float(row.pct_chg) * 100)) if row.pct_chg is not None else None,
-            # Tencent kline provides a `volume` field; we persist it as turnover_amount so
-            # dashboard bars (today/avg/max) are non-empty.
-            turnover_amount=int(round(float(row.volume))) if row.volume is not None else None,
-            turnover_currency="CNY",
-            asof_ts=asof,
-            payload={"symbol": row.symbol, "raw": row.raw, "volume": row.volume},
-            ok=True,
+        bulk_rows.append(
+            {
+                "index_id": index_id_cache[code],
+                "trade_date": trade_date,
+                "session": SessionType.FULL,
+                "source": "TENCENT",
+                "last": int(round(float(row.close) * 100)),
+                "change_points": int(round(float(row.change) * 100)) if row.change is not None else None,
+                "change_pct": int(round(float(row.pct_chg) * 100)) if row.pct_chg is not None else None,
+                # Tencent kline provides a `volume` field; we persist it as turnover_amount so
+                # dashboard bars (today/avg/max) are non-empty.
+                "turnover_amount": int(round(float(row.volume))) if row.volume is not None else None,
+                "turnover_currency": "CNY",
+                "snapshot_turnover_currency": "CNY",
+                "asof_ts": daily_row_asof(trade_date),
+                "payload": {"symbol": row.symbol, "raw": row.raw, "volume": row.volume},
+            }
         )
-        inserted += 1
 
-        fact = upsert_index_history_from_sources(db, index_id=index_id, trade_date=trade_date, session=SessionType.FULL)
-        if fact is not None:
-            facts_updated += 1
-
-        upsert_realtime_snapshot(
-            db,
-            index_id=index_id,
-            trade_date=trade_date,
-            session=SessionType.FULL,
-            last=int(round(float(row.close) * 100)),
-            change_points=int(round(float(row.change) * 100)) if row.change is not None else None,
-            change_pct=int(round(float(row.pct_chg) * 100)) if row.pct_chg is not None else None,
-            turnover_amount=int(round(float(row.volume))) if row.volume is not None else None,
-            turnover_currency="CNY",
-            data_updated_at=asof,
-            is_closed=True,
-            source="TENCENT",
-            payload={"symbol": row.symbol, "raw": row.raw, "volume": row.volume},
-        )
-        snapshots_updated += 1
+    write_stats = bulk_ingest_index_quotes(db, bulk_rows)
+    inserted = write_stats["inserted"]
+    facts_updated = write_stats["facts_updated"]
+    snapshots_updated = write_stats["snapshots_updated"]
 
     unique_dates = sorted({d for (_, d) in latest.keys()})
 
@@ -301,6 +272,9 @@ def _backfill_eastmoney_cn_halfday(db: Session, *, lookback_days: int = 90) -> t
     This is used to populate AM turnover bars and 5/10-day averages for SSE/SZSE.
     """
 
+    from app.sources.eastmoney_index import fetch_kline_day_totals
+    from app.sources.tushare_index import daily_row_asof
+
     index_map = settings.tushare_index_map()
     if not index_map:
         return "skipped", {"enabled": False, "reason": "TUSHARE_INDEX_CODES is empty"}
@@ -309,20 +283,19 @@ def _backfill_eastmoney_cn_halfday(db: Session, *, lookback_days: int = 90) -> t
     if not target:
         return "skipped", {"enabled": False, "reason": "No CN indices configured (need SSE/SZSE)"}
 
-    inserted_source = 0
-    facts_updated = 0
-
+    source_rows: list[dict] = []
     date_min = None
     date_max = None
 
     for code, ts_code in target.items():
-        bars = fetch_minute_kline(
+        # Parse + per-day AM/FULL totals in one pass (no per-bar objects).
+        day_totals = fetch_kline_day_totals(
             ts_code=ts_code,
             lookback_days=lookback_days,
             timeout_seconds=settings.HKEX_TIMEOUT_SECONDS,
             klt="5",
         )
-        agg = aggregate_halfday_and_fullday_amount(bars=bars)
+        agg = {d: totals.as_amounts() for d, totals in day_totals.items()}
 
         index_row = ensure_market_index(db, code)
 
@@ -332,45 +305,44 @@ def _backfill_eastmoney_cn_halfday(db: Session, *, lookback_days: int = 90) -> t
 
             # AM session
             if item.get("am_close") is not None and item.get("am_amount") is not None:
-                add_index_source_record(
-                    db,
-                    index_id=index_row.id,
-                    trade_date=d,
-                    session=SessionType.AM,
-                    source="EASTMONEY",
-                    last=int(round(float(item["am_close"]) * 100)),
-                    change_points=None,
-                    change_pct=None,
-                    turnover_amount=int(item["am_amount"]),
-                    turnover_currency="CNY",
-                    asof_ts=datetime.combine(d, time(11, 30), tzinfo=None),
-                    payload={"ts_code": ts_code, "bars": item.get("bars")},
-                    ok=True,
+                source_rows.append(
+                    {
+                        "index_id": index_row.id,
+                        "trade_date": d,
+                        "session": SessionType.AM,
+                        "source": "EASTMONEY",
+                        "last": int(round(float(item["am_close"]) * 100)),
+                        "turnover_amount": int(item["am_amount"]),
+                        "turnover_currency": "CNY",
+                        "asof_ts": datetime.combine(d, time(11, 30), tzinfo=None),
+                        "payload": {"ts_code": ts_code, "bars": item.get("bars")},
+                    }
                 )
-                inserted_source += 1
-                if upsert_index_history_from_sources(db, index_id=index_row.id, trade_date=d, session=SessionType.AM):
-                    facts_updated += 1
 
             # FULL session
             if item.get("full_close") is not None and item.get("full_amount") is not None:
-                add_index_source_record(
-                    db,
-                    index_id=index_row.id,
-                    trade_date=d,
-                    session=SessionType.FULL,
-                    source="EASTMONEY",
-                    last=int(round(float(item["full_close"]) * 100)),
-                    change_points=None,
-                    change_pct=None,
-                    turnover_amount=int(item["full_amount"]),
-                    turnover_currency="CNY",
-                    asof_ts=daily_row_asof(d),
-                    payload={"ts_code": ts_code, "bars": item.get("bars")},
-                    ok=True,
+                source_rows.append(
+                    {
+                        "index_id": index_row.id,
+                        "trade_date": d,
+                        "session": SessionType.FULL,
+                        "source": "EASTMONEY",
+                        "last": int(round(float(item["full_close"]) * 100)),
+                        "turnover_amount": int(item["full_amount"]),
+                        "turnover_currency": "CNY",
+                        "asof_ts": daily_row_asof(d),
+                        "payload": {"ts_code": ts_code, "bars": item.get("bars")},
+                    }
                 )
-                inserted_source += 1
-                if upsert_index_history_from_sources(db, index_id=index_row.id, trade_date=d, session=SessionType.FULL):
-                    facts_updated += 1
+
+    # Source records + set-based history resolution in one transaction.
+    inserted_source = len(bulk_add_index_source_records(db, source_rows))
+    resolution = resolve_index_history(
+        db,
+        keys=[(row["index_id"], row["trade_date"], row["session"]) for row in source_rows],
+        commit=True,
+    )
+    facts_updated = resolution.written
 
     return "success", {
         "enabled": True,
@@ -383,6 +355,18 @@ def _backfill_eastmoney_cn_halfday(db: Session, *, lookback_days: int = 90) -> t
     }
 
 
+def _kline_watermark(db: Session, *, index_id: int, interval: KlineInterval, source: str) -> datetime | None:
+    """Last persisted bar_time for (index, interval, source); served by ix_index_kline_lookup."""
+
+    return (
+        db.query(sa.func.max(IndexKlineSourceRecord.bar_time))
+        .filter(IndexKlineSourceRecord.index_id == index_id)
+        .filter(IndexKlineSourceRecord.interval == interval)
+        .filter(IndexKlineSourceRecord.source == source)
+        .scalar()
+    )
+
+
 def _persist_eastmoney_kline_rows(
     db: Session,
     *,
@@ -390,67 +374,91 @@ def _persist_eastmoney_kline_rows(
     ts_code: str,
     klt: str,
     lookback_days: int,
+    incremental: bool = True,
 ) -> dict[str, int | str | None]:
+    """Fetch + persist Eastmoney minute bars.
+
+    incremental=True resumes from the last persisted bar_time (watermark): only the watermark's day
+    onward is requested (Eastmoney `beg` is day-granular) and bars at/before the watermark are skipped.
+    lookback_days bounds the range when there is no watermark (or it is older than the lookback).
+    """
+
+    from app.sources.eastmoney_index import fetch_minute_kline_rows, iter_kline_rows
+
     if klt not in {"1", "5"}:
         raise ValueError(f"unsupported klt: {klt}")
 
-    bars = fetch_minute_kline(
+    index_row = ensure_market_index(db, code)
+    interval = KlineInterval.M1 if klt == "1" else KlineInterval.M5
+    cn_tz = timezone(timedelta(hours=8))
+
+    watermark = _kline_watermark(db, index_id=index_row.id, interval=interval, source="EASTMONEY") if incremental else None
+    beg_date = date.today() - timedelta(days=lookback_days)
+    if watermark is not None:
+        beg_date = max(beg_date, watermark.astimezone(cn_tz).date())
+
+    rows = fetch_minute_kline_rows(
         ts_code=ts_code,
         lookback_days=lookback_days,
         timeout_seconds=settings.HKEX_TIMEOUT_SECONDS,
         klt=klt,
+        beg=beg_date.strftime("%Y%m%d"),
     )
-    if not bars:
-        return {
-            "rows": 0,
-            "inserted": 0,
-            "interval": "1m" if klt == "1" else "5m",
-            "date_from": None,
-            "date_to": None,
-        }
-
-    index_row = ensure_market_index(db, code)
-    interval = KlineInterval.M1 if klt == "1" else KlineInterval.M5
-    cn_tz = timezone(timedelta(hours=8))
-
-    values: list[dict] = []
-    for bar in bars:
-        bar_time = bar.dt.replace(tzinfo=cn_tz)
-        values.append(
-            {
+    currency = "HKD" if code.upper() == "HSI" else "CNY"
+    span: dict[str, date] = {}
+
+    # Parse, filter and convert one row at a time: only the raw response strings and the current
+    # COPY chunk are held in memory, never a list of parsed bars.
+    def _values():
+        for day, minute, open_, close, high, low, volume, amount, raw in iter_kline_rows(rows):
+            bar_time = datetime(day.year, day.month, day.day, minute // 60, minute % 60, tzinfo=cn_tz)
+            if watermark is not None and bar_time <= watermark:
+                continue
+            if "from" not in span or day < span["from"]:
+                span["from"] = day
+            if "to" not in span or day > span["to"]:
+                span["to"] = day
+            yield {
                 "index_id": index_row.id,
                 "interval": interval.value,
                 "bar_time": bar_time,
-                "trade_date": bar.trade_date,
+                "trade_date": day,
                 "source": "EASTMONEY",
-                "open": int(round(float(bar.open) * 100)) if bar.open is not None else None,
-                "high": int(round(float(bar.high) * 100)) if bar.high is not None else None,
-                "low": int(round(float(bar.low) * 100)) if bar.low is not None else None,
-                "close": int(round(float(bar.close) * 100)) if bar.close is not None else None,
-                "volume": int(round(float(bar.volume))) if bar.volume is not None else None,
-                "turnover_amount": int(round(float(bar.amount))) if bar.amount is not None else None,
-                "turnover_currency": "HKD" if code.upper() == "HSI" else "CNY",
+                "open": int(round(open_ * 100)) if open_ is not None else None,
+                "high": int(round(high * 100)) if high is not None else None,
+                "low": int(round(low * 100)) if low is not None else None,
+                "close": int(round(close * 100)),
+                "volume": int(round(volume)) if volume is not None else None,
+                "turnover_amount": int(round(amount)) if amount is not None else None,
+                "turnover_currency": currency,
                 "asof_ts": bar_time,
-                "payload": {"ts_code": ts_code, "klt": klt, "raw": bar.raw},
+                "payload": {"ts_code": ts_code, "klt": klt, "raw": raw},
                 "ok": True,
                 "error": None,
             }
-        )
 
-    stmt = pg_insert(IndexKlineSourceRecord.__table__).values(values)
-    stmt = stmt.on_conflict_do_nothing(
-        index_elements=["index_id", "interval", "bar_time", "source"],
-    ).returning(IndexKlineSourceRecord.id)
-    inserted_ids = list(db.execute(stmt).scalars())
+    if not rows:
+        return {
+            "rows": 0,
+            "inserted": 0,
+            "interval": interval.value,
+            "watermark": watermark.isoformat() if watermark else None,
+            "date_from": None,
+            "date_to": None,
+        }
+
+    load = bulk_load_kline_rows(db, _values())
     db.commit()
 
-    dates = sorted({bar.trade_date for bar in bars})
     return {
-        "rows": len(values),
-        "inserted": len(inserted_ids),
+        "rows": load["rows"],
+        "inserted": load["inserted"],
         "interval": interval.value,
-        "date_from": str(dates[0]) if dates else None,
-        "date_to": str(dates[-1]) if dates else None,
+        "watermark": watermark.isoformat() if watermark else None,
+        "date_from": str(span["from"]) if "from" in span else None,
+        "date_to": str(span["to"]) if "to" in span else None,
+        "load_seconds": load["seconds"],
+        "rows_per_second": load["rows_per_second"],
     }
 
 
@@ -463,6 +471,8 @@ def _persist_tushare_kline_rows(
     start_date: str,
     end_date: str,
 ) -> dict[str, int | str | None]:
+    from app.sources.tushare_kline import fetch_index_kline
+
     token = (settings.TUSHARE_PRO_TOKEN or "").strip()
     if not token:
         raise RuntimeError("TUSHARE_PRO_TOKEN is empty")
@@ -483,11 +493,10 @@ def _persist_tushare_kline_rows(
     interval = KlineInterval.M1 if freq == "1min" else KlineInterval.M5
     tz8 = timezone(timedelta(hours=8))
 
-    values: list[dict] = []
-    for bar in bars:
-        bar_time = bar.trade_time.replace(tzinfo=tz8)
-        values.append(
-            {
+    def _values():
+        for bar in bars:
+            bar_time = bar.trade_time.replace(tzinfo=tz8)
+            yield {
                 "index_id": index_row.id,
                 "interval": interval.value,
                 "bar_time": bar_time,
@@ -505,22 +514,19 @@ def _persist_tushare_kline_rows(
                 "ok": True,
                 "error": None,
             }
-        )
 
-    stmt = pg_insert(IndexKlineSourceRecord.__table__).values(values)
-    stmt = stmt.on_conflict_do_nothing(
-        index_elements=["index_id", "interval", "bar_time", "source"],
-    ).returning(IndexKlineSourceRecord.id)
-    inserted_ids = list(db.execute(stmt).scalars())
+    load = bulk_load_kline_rows(db, _values())
     db.commit()
 
-    dates = sorted({v["trade_date"] for v in values})
+    dates = sorted({bar.trade_time.date() for bar in bars})
     return {
-        "rows": len(values),
-        "inserted": len(inserted_ids),
+        "rows": load["rows"],
+        "inserted": load["inserted"],
         "interval": interval.value,
         "date_from": str(dates[0]) if dates else None,
         "date_to": str(dates[-1]) if dates else None,
+        "load_seconds": load["seconds"],
+        "rows_per_second": load["rows_per_second"],
     }
 
 
@@ -537,6 +543,7 @@ def _backfill_intraday_kline_source(db: Session, *, lookback_days_5m: int = 90,
 
     written = 0
     rows = 0
+    load_seconds = 0.0
     details: dict[str, dict] = {}
     errors: dict[str, str] = {}
 
@@ -564,6 +571,7 @@ def _backfill_intraday_kline_source(db: Session, *, lookback_days_5m: int = 90,
                     per_code[key] = stats
                     written += int(stats.get("inserted") or 0)
                     rows += int(stats.get("rows") or 0)
+                    load_seconds += float(stats.get("load_seconds") or 0)
                 except Exception as e:
                     errors[f"{code}:{key}"] = str(e)
 
@@ -582,6 +590,7 @@ def _backfill_intraday_kline_source(db: Session, *, lookback_days_5m: int = 90,
                 per_code[key] = stats
                 written += int(stats.get("inserted") or 0)
                 rows += int(stats.get("rows") or 0)
+                load_seconds += float(stats.get("load_seconds") or 0)
             except Exception as e:
                 errors[f"{code}:{key}"] = str(e)
 
@@ -593,6 +602,8 @@ def _backfill_intraday_kline_source(db: Session, *, lookback_days_5m: int = 90,
         "sources": ["EASTMONEY", "TUSHARE"],
         "rows": rows,
         "inserted": written,
+        "load_seconds": round(load_seconds, 3),
+        "rows_per_second": round(rows / load_seconds, 1) if load_seconds > 0 else None,
         "lookback_days_1m": lookback_days_1m,
         "lookback_days_5m": lookback_days_5m,
         "details": details,
@@ -622,575 +633,763 @@ def _refresh_home_trade_corridor(db: Session) -> tuple[str, dict]:
         return "partial", {"error": str(e)}
 
 
-def run_job(db: Session, job_name: str, params: dict | None = None) -> JobRun:
-    run = JobRun(job_name=job_name, status="running", summary={"params": params} if params else None)
-    db.add(run)
-    db.commit()
-    db.refresh(run)
+def _flush_dashboard_state(db: Session) -> None:
+    """Recompute homepage cards touched by this run (see app.services.dashboard_state)."""
 
     try:
-        if job_name == "refresh_home_global_quotes":
-            status, summary = _refresh_home_global_quotes(db)
-
-        elif job_name == "refresh_home_trade_corridor":
-            status, summary = _refresh_home_trade_corridor(db)
-
-        elif job_name == "zhi_insights_job":
-            payload, trade_date, asof_ts = build_insight_snapshot_payload(db)
-            detail: dict[str, dict] = {}
-            overall_status = "success"
-
-            for lang in ("zh", "en"):
-                prompt_row = get_active_system_prompt(db, lang=lang)
-                system_prompt = (
-                    prompt_row.system_prompt
-                    if prompt_row is not None
-                    else (
-                        "你是指数系统开发与运维分析助手。"
-                        if lang == "zh"
-                        else "You are an index system engineering and operations insight assistant."
-                    )
-                )
-                user_prompt = compose_user_prompt(lang=lang, payload=payload)
-                final_prompt = f"[SYSTEM]\n{system_prompt}\n\n[USER]\n{user_prompt}"
-
-                provider = (settings.INSIGHT_LLM_PROVIDER or "openai").strip().lower()
-                model = (
-                    settings.INSIGHT_OPENAI_MODEL
-                    if provider == "openai"
-                    else settings.INSIGHT_GEMINI_MODEL
-                )
-                status_lang = "success"
-                error_message = None
-                try:
-                    response_text, provider, model = call_insight_llm(
-                        system_prompt=system_prompt,
-                        user_prompt=user_prompt,
-                    )
-                    if not response_text:
-                        raise RuntimeError("LLM returned empty response")
-                except Exception as e:
-                    response_text = get_fallback_insight_text(lang)
-                    status_lang = "fallback"
-                    error_message = str(e)
-                    if overall_status == "success":
-                        overall_status = "partial"
+        refresh_dashboard_state(db)
+    except Exception:
+        logger.exception("failed to refresh dashboard state")
+
+
+@job("refresh_home_global_quotes", timeout_seconds=300)
+def _job_refresh_home_global_quotes(db: Session, params: dict | None) -> tuple[str, dict]:
+    status, summary = _refresh_home_global_quotes(db)
+    return status, summary
+
+
+@job("refresh_home_trade_corridor", timeout_seconds=300)
+def _job_refresh_home_trade_corridor(db: Session, params: dict | None) -> tuple[str, dict]:
+    status, summary = _refresh_home_trade_corridor(db)
+    return status, summary
+
+
+@job("zhi_insights_job", timeout_seconds=600)
+def _job_zhi_insights_job(db: Session, params: dict | None) -> tuple[str, dict]:
+    payload, trade_date, asof_ts = build_insight_snapshot_payload(db)
+    detail: dict[str, dict] = {}
+    overall_status = "success"
+
+    for lang in ("zh", "en"):
+        prompt_row = get_active_system_prompt(db, lang=lang)
+        system_prompt = (
+            prompt_row.system_prompt
+            if prompt_row is not None
+            else (
+                "你是指数系统开发与运维分析助手。"
+                if lang == "zh"
+                else "You are an index system engineering and operations insight assistant."
+            )
+        )
+        user_prompt = compose_user_prompt(lang=lang, payload=payload)
+        final_prompt = f"[SYSTEM]\n{system_prompt}\n\n[USER]\n{user_prompt}"
+
+        provider = (settings.INSIGHT_LLM_PROVIDER or "openai").strip().lower()
+        model = (
+            settings.INSIGHT_OPENAI_MODEL
+            if provider == "openai"
+            else settings.INSIGHT_GEMINI_MODEL
+        )
+        status_lang = "success"
+        error_message = None
+        try:
+            response_text, provider, model = call_insight_llm(
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+            )
+            if not response_text:
+                raise RuntimeError("LLM returned empty response")
+        except Exception as e:
+            response_text = get_fallback_insight_text(lang)
+            status_lang = "fallback"
+            error_message = str(e)
+            if overall_status == "success":
+                overall_status = "partial"
 
-                row = create_insight_snapshot_row(
-                    db,
-                    lang=lang,
-                    payload=payload,
-                    trade_date=trade_date,
-                    asof_ts=asof_ts,
-                    prompt=final_prompt,
-                    response=response_text,
-                    provider=provider,
-                    model=model,
-                    status=status_lang,
-                    error_message=error_message,
-                )
-                detail[lang] = {
-                    "id": row.id,
-                    "status": status_lang,
-                    "provider": provider,
-                    "model": model,
-                    "error": error_message,
-                }
-
-            status = overall_status
-            summary = {
-                "trade_date": str(trade_date),
-                "asof_ts": asof_ts.isoformat(),
-                "peak_policy": "all_time",
-                "langs": detail,
-            }
+        row = create_insight_snapshot_row(
+            db,
+            lang=lang,
+            payload=payload,
+            trade_date=trade_date,
+            asof_ts=asof_ts,
+            prompt=final_prompt,
+            response=response_text,
+            provider=provider,
+            model=model,
+            status=status_lang,
+            error_message=error_message,
+        )
+        detail[lang] = {
+            "id": row.id,
+            "status": status_lang,
+            "provider": provider,
+            "model": model,
+            "error": error_message,
+        }
 
-        elif job_name == "fetch_am":
-            # Use HK timezone trading date when possible; fallback to local date.
-            today = date.today()
+    status = overall_status
+    summary = {
+        "trade_date": str(trade_date),
+        "asof_ts": asof_ts.isoformat(),
+        "peak_policy": "all_time",
+        "langs": detail,
+    }
+    return status, summary
 
-            # 1) Turnover (best-effort)
-            t_error: str | None = None
-            try:
-                mid = fetch_midday_turnover()
-                t_source = "AASTOCKS"
-                turnover = mid.turnover_hkd
-                asof = mid.asof
-                if asof is not None:
-                    today = asof.date()
-                t_payload = {"raw": mid.raw_turnover_text}
-                rec = TurnoverSourceRecord(
-                    trade_date=today,
-                    session=SessionType.AM,
-                    source=t_source,
-                    turnover_hkd=turnover,
-                    asof_ts=asof,
-                    payload=t_payload,
-                    ok=True,
-                )
-                db.add(rec)
-                db.commit()
-                upsert_fact_from_sources(db, today, SessionType.AM)
-                t_status = "success"
-            except Exception as e:
-                t_source = "AASTOCKS"
-                turnover = None
-                asof = None
-                t_error = str(e)
-                t_status = "partial"
-
-            # 2) HSI price snapshot
-            h_error: str | None = None
-            try:
-                snap = fetch_hsi_snapshot()
-                if snap.asof is not None:
-                    today = snap.asof.date()
-                hsi = HsiQuoteFact(
-                    trade_date=today,
-                    session=SessionType.AM,
-                    last=int(round(snap.last * 100)),
-                    change=int(round(snap.change * 100)) if snap.change is not None else None,
-                    change_pct=int(round(snap.change_pct * 100)) if snap.change_pct is not None else None,
-                    turnover_hkd=snap.turnover_hkd,
-                    asof_ts=snap.asof,
-                    source="AASTOCKS",
-                    payload={"raw": snap.raw},
-                )
-                db.add(hsi)
-                db.commit()
-                h_status = "success"
-            except Exception as e:
-                h_status = "partial"
-                h_error = str(e)
-                # do not fail the whole job
-
-            status = "success" if (t_status == "success" and h_status == "success") else "partial"
-            ts_status, ts_summary = _sync_tushare_index_quotes(db)
-            if ts_status == "partial" and status == "success":
-                status = "partial"
-            summary = {
-                "today": str(today),
-                "turnover_hkd": turnover,
-                "turnover_source": t_source,
-                "turnover_asof": str(asof),
-                "turnover_error": t_error,
-                "hsi_status": h_status,
-                "hsi_error": h_error,
-                "tushare": ts_summary,
-            }
 
-        elif job_name == "backfill_hkex":
-            """Backfill HK market FULL-day turnover from HKEX official statistics archive.
+@job("fetch_am", timeout_seconds=600)
+def _job_fetch_am(db: Session, params: dict | None) -> tuple[str, dict]:
+    # Use HK timezone trading date when possible; fallback to local date.
+    from app.sources.aastocks import fetch_midday_turnover
+    from app.sources.aastocks_index import fetch_hsi_snapshot
 
-            This job must be accurate: it will NOT generate mock data.
-            """
+    today = date.today()
 
-            rows: list = []
-            try:
-                rows = fetch_hkex_latest_table()
-            except Exception as e:
-                summary = {"mode": "hkex", "error": str(e)}
-                status = "failed"
-                raise
+    # 1) Turnover (best-effort)
+    t_error: str | None = None
+    try:
+        mid = fetch_midday_turnover()
+        t_source = "AASTOCKS"
+        turnover = mid.turnover_hkd
+        asof = mid.asof
+        if asof is not None:
+            today = asof.date()
+        t_payload = {"raw": mid.raw_turnover_text}
+        rec = TurnoverSourceRecord(
+            trade_date=today,
+            session=SessionType.AM,
+            source=t_source,
+            turnover_hkd=turnover,
+            asof_ts=asof,
+            payload=t_payload,
+            ok=True,
+        )
+        db.add(rec)
+        db.commit()
+        upsert_fact_from_sources(db, today, SessionType.AM)
+        t_status = "success"
+    except Exception as e:
+        t_source = "AASTOCKS"
+        turnover = None
+        asof = None
+        t_error = str(e)
+        t_status = "partial"
+
+    # 2) HSI price snapshot
+    h_error: str | None = None
+    try:
+        snap = fetch_hsi_snapshot()
+        if snap.asof is not None:
+            today = snap.asof.date()
+        hsi = HsiQuoteFact(
+            trade_date=today,
+            session=SessionType.AM,
+            last=int(round(snap.last * 100)),
+            change=int(round(snap.change * 100)) if snap.change is not None else None,
+            change_pct=int(round(snap.change_pct * 100)) if snap.change_pct is not None else None,
+            turnover_hkd=snap.turnover_hkd,
+            asof_ts=snap.asof,
+            source="AASTOCKS",
+            payload={"raw": snap.raw},
+        )
+        db.add(hsi)
+        db.commit()
+        mark_dashboard_dirty(code="HSI")
+        h_status = "success"
+    except Exception as e:
+        h_status = "partial"
+        h_error = str(e)
+        # do not fail the whole job
+
+    status = "success" if (t_status == "success" and h_status == "success") else "partial"
+    ts_status, ts_summary = _sync_tushare_index_quotes(db)
+    if ts_status == "partial" and status == "success":
+        status = "partial"
+    summary = {
+        "today": str(today),
+        "turnover_hkd": turnover,
+        "turnover_source": t_source,
+        "turnover_asof": str(asof),
+        "turnover_error": t_error,
+        "hsi_status": h_status,
+        "hsi_error": h_error,
+        "tushare": ts_summary,
+    }
+    return status, summary
 
-            if not rows:
-                summary = {"mode": "hkex", "rows": 0}
-                status = "failed"
-                raise RuntimeError("HKEX archive returned 0 rows")
 
-            # only keep latest ~1 year trading days (approx 252) for UI/history
-            rows = rows[-260:]
+@job("backfill_hkex", retries=2, retry_backoff_seconds=60)
+def _job_backfill_hkex(db: Session, params: dict | None) -> tuple[str, dict]:
+    """Backfill HK market FULL-day turnover from HKEX official statistics archive.
 
-            inserted = 0
-            updated = 0
+    This job must be accurate: it will NOT generate mock data.
+    """
 
-            for r in rows:
-                rec = TurnoverSourceRecord(
-                    trade_date=r.trade_date,
-                    session=SessionType.FULL,
-                    source="HKEX",
-                    turnover_hkd=r.turnover_hkd,
-                    payload={"is_half_day": r.is_half_day},
-                    ok=True,
-                )
-                db.add(rec)
-                inserted += 1
+    from app.sources.hkex import fetch_hkex_latest_table
+
+    rows: list = []
+    try:
+        rows = fetch_hkex_latest_table()
+    except Exception as e:
+        summary = {"mode": "hkex", "error": str(e)}
+        status = "failed"
+        raise
+
+    if not rows:
+        summary = {"mode": "hkex", "rows": 0}
+        status = "failed"
+        raise RuntimeError("HKEX archive returned 0 rows")
+
+    # only keep latest ~1 year trading days (approx 252) for UI/history
+    rows = rows[-260:]
+
+    inserted = 0
+
+    for r in rows:
+        rec = TurnoverSourceRecord(
+            trade_date=r.trade_date,
+            session=SessionType.FULL,
+            source="HKEX",
+            turnover_hkd=r.turnover_hkd,
+            payload={"is_half_day": r.is_half_day},
+            ok=True,
+        )
+        db.add(rec)
+        inserted += 1
+    db.flush()
+
+    # All ~260 FULL facts resolved in one statement, committed together with the source rows.
+    resolution = resolve_turnover_facts(
+        db,
+        keys=[(r.trade_date, SessionType.FULL) for r in rows],
+        commit=True,
+    )
+    updated = resolution.written
+
+    summary = {
+        "mode": "hkex",
+        "rows": len(rows),
+        "inserted": inserted,
+        "facts_updated": updated,
+        "date_from": str(rows[0].trade_date),
+        "date_to": str(rows[-1].trade_date),
+    }
+    status = "success"
+    return status, summary
+
+
+@job("fetch_full", timeout_seconds=600)
+def _job_fetch_full(db: Session, params: dict | None) -> tuple[str, dict]:
+    # Use HK timezone trading date when possible; fallback to local date.
+    from app.sources.aastocks_index import fetch_hsi_snapshot
+
+    today = date.today()
+
+    # For POC: use the same AASTOCKS index feed turnover as end-of-day turnover proxy.
+    # (Not official; HKEX backfill remains the official baseline when available.)
+    fetch_error: str | None = None
+    try:
+        snap = fetch_hsi_snapshot()
+        turnover = snap.turnover_hkd
+        source = "AASTOCKS"
+        asof = snap.asof
+        if asof is not None:
+            today = asof.date()
+        payload = {"raw": snap.raw}
+        status = "success"
+    except Exception as e:
+        source = "AASTOCKS"
+        turnover = None
+        asof = None
+        payload = None
+        fetch_error = str(e)
+        status = "partial"
+
+    if turnover is not None:
+        rec = TurnoverSourceRecord(
+            trade_date=today,
+            session=SessionType.FULL,
+            source=source,
+            turnover_hkd=turnover,
+            asof_ts=asof,
+            payload=payload,
+            ok=True,
+        )
+        db.add(rec)
+        db.commit()
+        upsert_fact_from_sources(db, today, SessionType.FULL)
+
+    # HSI price snapshot (close-ish)
+    if source == "AASTOCKS" and turnover is not None:
+        try:
+            hsi = HsiQuoteFact(
+                trade_date=today,
+                session=SessionType.FULL,
+                last=int(round(snap.last * 100)),
+                change=int(round(snap.change * 100)) if snap.change is not None else None,
+                change_pct=int(round(snap.change_pct * 100)) if snap.change_pct is not None else None,
+                turnover_hkd=snap.turnover_hkd,
+                asof_ts=snap.asof,
+                source="AASTOCKS",
+                payload={"raw": snap.raw},
+            )
+            db.add(hsi)
             db.commit()
+            mark_dashboard_dirty(code="HSI")
+        except Exception:
+            pass
+
+    ts_status, ts_summary = _sync_tushare_index_quotes(db)
+    if ts_status == "partial" and status == "success":
+        status = "partial"
+    summary = {
+        "today": str(today),
+        "turnover_hkd": turnover,
+        "source": source,
+        "asof": str(asof),
+        "fetch_error": fetch_error,
+        "tushare": ts_summary,
+    }
+    return status, summary
 
-            for r in rows:
-                if upsert_fact_from_sources(db, r.trade_date, SessionType.FULL):
-                    updated += 1
-
-            summary = {
-                "mode": "hkex",
-                "rows": len(rows),
-                "inserted": inserted,
-                "facts_updated": updated,
-                "date_from": str(rows[0].trade_date),
-                "date_to": str(rows[-1].trade_date),
-            }
-            status = "success"
 
-        elif job_name == "fetch_full":
-            # Use HK timezone trading date when possible; fallback to local date.
-            today = date.today()
+@job("fetch_tushare_index", timeout_seconds=600, concurrency_key="tushare")
+def _job_fetch_tushare_index(db: Session, params: dict | None) -> tuple[str, dict]:
+    ts_status, ts_summary = _sync_tushare_index_quotes(db)
+    status = "success" if ts_status in {"success", "skipped"} else "partial"
+    summary = {"tushare": ts_summary}
+    return status, summary
 
-            # For POC: use the same AASTOCKS index feed turnover as end-of-day turnover proxy.
-            # (Not official; HKEX backfill remains the official baseline when available.)
-            fetch_error: str | None = None
-            try:
-                snap = fetch_hsi_snapshot()
-                turnover = snap.turnover_hkd
-                source = "AASTOCKS"
-                asof = snap.asof
-                if asof is not None:
-                    today = asof.date()
-                payload = {"raw": snap.raw}
-                status = "success"
-            except Exception as e:
-                source = "AASTOCKS"
-                turnover = None
-                asof = None
-                payload = None
-                fetch_error = str(e)
-                status = "partial"
-
-            if turnover is not None:
-                rec = TurnoverSourceRecord(
-                    trade_date=today,
-                    session=SessionType.FULL,
-                    source=source,
-                    turnover_hkd=turnover,
-                    asof_ts=asof,
-                    payload=payload,
-                    ok=True,
-                )
-                db.add(rec)
-                db.commit()
-                upsert_fact_from_sources(db, today, SessionType.FULL)
 
-            # HSI price snapshot (close-ish)
-            if source == "AASTOCKS" and turnover is not None:
-                try:
-                    hsi = HsiQuoteFact(
-                        trade_date=today,
-                        session=SessionType.FULL,
-                        last=int(round(snap.last * 100)),
-                        change=int(round(snap.change * 100)) if snap.change is not None else None,
-                        change_pct=int(round(snap.change_pct * 100)) if snap.change_pct is not None else None,
-                        turnover_hkd=snap.turnover_hkd,
-                        asof_ts=snap.asof,
-                        source="AASTOCKS",
-                        payload={"raw": snap.raw},
-                    )
-                    db.add(hsi)
-                    db.commit()
-                except Exception:
-                    pass
-
-            ts_status, ts_summary = _sync_tushare_index_quotes(db)
-            if ts_status == "partial" and status == "success":
-                status = "partial"
-            summary = {
-                "today": str(today),
-                "turnover_hkd": turnover,
-                "source": source,
-                "asof": str(asof),
-                "fetch_error": fetch_error,
-                "tushare": ts_summary,
-            }
+@job(
+    "fetch_intraday_bars_cn_5m",
+    params=[{"name": "lookback_days", "label": "Lookback days", "type": "number", "placeholder": "7"}],
+    timeout_seconds=1800,
+    concurrency_key="eastmoney_kline",
+)
+def _job_fetch_intraday_bars_cn_5m(db: Session, params: dict | None) -> tuple[str, dict]:
+    # Persist CN index 5-minute kline bars (raw snapshots)
+    from app.sources.eastmoney_index import fetch_minute_kline
 
-        elif job_name == "fetch_tushare_index":
-            ts_status, ts_summary = _sync_tushare_index_quotes(db)
-            status = "success" if ts_status in {"success", "skipped"} else "partial"
-            summary = {"tushare": ts_summary}
+    index_map = settings.tushare_index_map()
+    written = 0
+    errors: dict[str, str] = {}
 
-        elif job_name == "fetch_intraday_bars_cn_5m":
-            # Persist CN index 5-minute kline bars (raw snapshots)
-            index_map = settings.tushare_index_map()
-            written = 0
-            errors: dict[str, str] = {}
+    lookback_days = 7
+    try:
+        if params and params.get("lookback_days") is not None:
+            lookback_days = int(params.get("lookback_days"))
+    except Exception:
+        lookback_days = 7
 
-            lookback_days = 7
-            try:
-                if params and params.get("lookback_days") is not None:
-                    lookback_days = int(params.get("lookback_days"))
-            except Exception:
-                lookback_days = 7
+    for code in ("SSE", "SZSE"):
+        try:
+            ts_code = (index_map.get(code) or "").strip()
+            if not ts_code:
+                raise RuntimeError("missing ts_code in TUSHARE_INDEX_CODES")
 
-            for code in ("SSE", "SZSE"):
-                try:
-                    ts_code = (index_map.get(code) or "").strip()
-                    if not ts_code:
-                        raise RuntimeError("missing ts_code in TUSHARE_INDEX_CODES")
+            # klt=5 minute bars, best-effort range
+            bars = fetch_minute_kline(
+                ts_code=ts_code,
+                lookback_days=lookback_days,
+                timeout_seconds=settings.HKEX_TIMEOUT_SECONDS,
+                klt="5",
+            )
+            index_row = ensure_market_index(db, code)
 
-                    # klt=5 minute bars, best-effort range
-                    bars = fetch_minute_kline(
-                        ts_code=ts_code,
-                        lookback_days=lookback_days,
-                        timeout_seconds=settings.HKEX_TIMEOUT_SECONDS,
-                        klt="5",
-                    )
-                    index_row = ensure_market_index(db, code)
-
-                    for bar in bars:
-                        upsert_intraday_bar(
-                            db,
-                            index_id=index_row.id,
-                            interval_min=5,
-                            bar_ts=bar.dt,
-                            tz="Asia/Shanghai",
-                            open_x100=int(round(bar.open * 100)) if bar.open is not None else None,
-                            high_x100=int(round(bar.high * 100)) if bar.high is not None else None,
-                            low_x100=int(round(bar.low * 100)) if bar.low is not None else None,
-                            close_x100=int(round(bar.close * 100)),
-                            volume=int(round(bar.volume)) if bar.volume is not None else None,
-                            amount=int(round(bar.amount)) if bar.amount is not None else None,
-                            currency="CNY",
-                            source="EASTMONEY",
-                            payload={"raw": bar.raw, "ts_code": ts_code},
-                        )
-                        written += 1
-                except Exception as e:
-                    errors[code] = str(e)
+            written += upsert_intraday_bars(
+                db,
+                [
+                    {
+                        "index_id": index_row.id,
+                        "interval_min": 5,
+                        "bar_ts": bar.dt,
+                        "open": int(round(bar.open * 100)) if bar.open is not None else None,
+                        "high": int(round(bar.high * 100)) if bar.high is not None else None,
+                        "low": int(round(bar.low * 100)) if bar.low is not None else None,
+                        "close": int(round(bar.close * 100)),
+                        "volume": int(round(bar.volume)) if bar.volume is not None else None,
+                        "amount": int(round(bar.amount)) if bar.amount is not None else None,
+                        "currency": "CNY",
+                        "source": "EASTMONEY",
+                        "payload": {"raw": bar.raw, "ts_code": ts_code},
+                    }
+                    for bar in bars
+                ],
+                tz="Asia/Shanghai",
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            errors[code] = str(e)
 
-            status = "success" if not errors else ("partial" if written else "failed")
-            summary = {"written": written, "errors": errors, "interval_min": 5, "source": "EASTMONEY", "lookback_days": lookback_days}
+    status = "success" if not errors else ("partial" if written else "failed")
+    summary = {"written": written, "errors": errors, "interval_min": 5, "source": "EASTMONEY", "lookback_days": lookback_days}
+    return status, summary
 
-        elif job_name == "fetch_eastmoney_realtime_snapshot":
 
-            # Fetch realtime snapshot from Eastmoney stock/get for all 11 indices (or provided codes)
-            codes = eastmoney_realtime_default_codes()
-            if params and params.get("codes"):
-                codes = [c.strip().upper() for c in str(params.get("codes")).split(",") if c.strip()]
+@job(
+    "fetch_eastmoney_realtime_snapshot",
+    params=[{"name": "codes", "label": "Index codes (comma)", "type": "text", "placeholder": "HSI,SSE,SZSE,HS11,DJI,IXIC,SPX,N225,UKX,DAX,ESTOXX50E"}],
+    timeout_seconds=300,
+)
+def _job_fetch_eastmoney_realtime_snapshot(db: Session, params: dict | None) -> tuple[str, dict]:
+    # Fetch realtime snapshot from Eastmoney stock/get for all 11 indices (or provided codes)
+    from app.sources.eastmoney_realtime import default_codes as eastmoney_realtime_default_codes, fetch_realtime_snapshot as fetch_eastmoney_realtime_snapshot
+    from app.sources.eastmoney_secid import resolve_secids as resolve_eastmoney_secids
 
-            written = 0
-            errors: dict[str, str] = {}
+    codes = eastmoney_realtime_default_codes()
+    if params and params.get("codes"):
+        codes = [c.strip().upper() for c in str(params.get("codes")).split(",") if c.strip()]
 
-            for code in codes:
-                try:
-                    jitter_seconds = random.randint(1, 30)
-                    pytime.sleep(jitter_seconds)
+    written = 0
+    errors: dict[str, str] = {}
 
-                    snap = fetch_eastmoney_realtime_snapshot(code=code, timeout_seconds=settings.HKEX_TIMEOUT_SECONDS)
-                    index_row = ensure_market_index(db, code)
+    # Resolve every secid in one pass (memory/app_cache, suggest API only for unknown codes),
+    # then fetch all codes concurrently (paced by the eastmoney.com token bucket) and write serially.
+    fetch_started = pytime.monotonic()
+    resolve_eastmoney_secids(codes, timeout_seconds=settings.HKEX_TIMEOUT_SECONDS)
+    fetched = fan_out(
+        {
+            code: partial(fetch_eastmoney_realtime_snapshot, code=code, timeout_seconds=settings.HKEX_TIMEOUT_SECONDS)
+            for code in codes
+        }
+    )
+    fetch_seconds = round(pytime.monotonic() - fetch_started, 3)
 
-                    row = IndexRealtimeApiSnapshot(
-                        index_id=index_row.id,
-                        code=code,
-                        secid=snap.secid,
-                        trade_date=snap.asof.date(),
-                        session=SessionType.FULL,
-                        last=int(round(float(snap.last) * 100)) if snap.last is not None else None,
-                        change_points=int(round(float(snap.change) * 100)) if snap.change is not None else None,
-                        change_pct=int(round(float(snap.pct_chg) * 100)) if snap.pct_chg is not None else None,
-                        turnover_amount=int(round(float(snap.amount))) if snap.amount is not None else None,
-                        turnover_currency="HKD" if code == "HSI" else "CNY",
-                        volume=int(round(float(snap.volume))) if snap.volume is not None else None,
-                        data_updated_at=snap.asof,
-                        source="EASTMONEY_STOCK_GET",
-                        payload={"raw": snap.raw, "secid": snap.secid},
-                    )
-                    db.add(row)
-                    db.commit()
-                    written += 1
-                except Exception as e:
-                    db.rollback()
-                    errors[code] = str(e)
-
-            status = "success" if not errors else ("partial" if written else "failed")
-            summary = {
-                "source": "EASTMONEY_STOCK_GET",
-                "codes": codes,
-                "written": written,
-                "errors": errors,
-            }
+    for code in codes:
+        try:
+            snap = fetched[code].get()
+            index_row = ensure_market_index(db, code)
 
-        elif job_name == "fetch_intraday_snapshot":
+            row = IndexRealtimeApiSnapshot(
+                index_id=index_row.id,
+                code=code,
+                secid=snap.secid,
+                trade_date=snap.asof.date(),
+                session=SessionType.FULL,
+                last=int(round(float(snap.last) * 100)) if snap.last is not None else None,
+                change_points=int(round(float(snap.change) * 100)) if snap.change is not None else None,
+                change_pct=int(round(float(snap.pct_chg) * 100)) if snap.pct_chg is not None else None,
+                turnover_amount=int(round(float(snap.amount))) if snap.amount is not None else None,
+                turnover_currency="HKD" if code == "HSI" else "CNY",
+                volume=int(round(float(snap.volume))) if snap.volume is not None else None,
+                data_updated_at=snap.asof,
+                source="EASTMONEY_STOCK_GET",
+                payload=apply_raw_policy(db, {"raw": snap.raw, "secid": snap.secid}, source="EASTMONEY_STOCK_GET"),
+            )
+            db.add(row)
+            db.commit()
+            mark_dashboard_dirty(index_id=index_row.id)
+            written += 1
+        except Exception as e:
+            db.rollback()
+            errors[code] = str(e)
+
+    status = "success" if not errors else ("partial" if written else "failed")
+    summary = {
+        "source": "EASTMONEY_STOCK_GET",
+        "codes": codes,
+        "written": written,
+        "errors": errors,
+        "fetch_seconds": fetch_seconds,
+    }
+    return status, summary
 
-            # jitter: random wait 1-30 seconds before each run to reduce burst risk
-            jitter_seconds = random.randint(1, 30)
-            pytime.sleep(jitter_seconds)
 
-            # Intraday snapshot for indices (default: all 11 indices)
-            index_map = settings.tushare_index_map()
-            written = 0
-            errors: dict[str, str] = {}
+@job(
+    "fetch_intraday_snapshot",
+    params=[
+        {"name": "codes", "label": "Index codes (comma)", "type": "text", "placeholder": "HSI,SSE,SZSE,HS11,DJI,IXIC,SPX,N225,UKX,DAX,ESTOXX50E"},
+        {"name": "force_source", "label": "Force source (optional)", "type": "text", "placeholder": "AASTOCKS/EASTMONEY/TUSHARE"},
+    ],
+    timeout_seconds=600,
+)
+def _job_fetch_intraday_snapshot(db: Session, params: dict | None) -> tuple[str, dict]:
+    # Intraday snapshot for indices (default: all 11 indices)
+    from app.services.tencent_quote import fetch_quotes
+    from app.sources.aastocks_index import fetch_hsi_snapshot
+    from app.sources.eastmoney_intraday import fetch_intraday_snapshot as fetch_eastmoney_intraday_snapshot
+    from app.sources.tushare_index import daily_row_asof, fetch_latest_index_daily
 
-            # Default: HSI, SSE, SZSE, HS11 (Korea), DJI, IXIC, SPX, N225, UKX, DAX, ESTOXX50E
-            codes = ["HSI", "SSE", "SZSE", "HS11", "DJI", "IXIC", "SPX", "N225", "UKX", "DAX", "ESTOXX50E"]
-            if params and params.get("codes"):
-                codes = [c.strip().upper() for c in str(params.get("codes")).split(",") if c.strip()]
+    index_map = settings.tushare_index_map()
+    written = 0
+    errors: dict[str, str] = {}
 
-            force_source = (str(params.get("force_source")).strip().upper() if params and params.get("force_source") else "")
+    # Default: HSI, SSE, SZSE, HS11 (Korea), DJI, IXIC, SPX, N225, UKX, DAX, ESTOXX50E
+    codes = ["HSI", "SSE", "SZSE", "HS11", "DJI", "IXIC", "SPX", "N225", "UKX", "DAX", "ESTOXX50E"]
+    if params and params.get("codes"):
+        codes = [c.strip().upper() for c in str(params.get("codes")).split(",") if c.strip()]
+
+    force_source = (str(params.get("force_source")).strip().upper() if params and params.get("force_source") else "")
+
+    # Mapping for Tencent Quote symbols
+    us_symbol_map = {"DJI": "usDJI", "IXIC": "usIXIC"}
+    global_symbol_map = {
+        "SPX": "usSPX",
+        "N225": "jpN225",
+        "UKX": "ukUKX",
+        "DAX": "euDAX",
+        "ESTOXX50E": "euESTOXX50E",
+        "HS11": "krHS11",
+    }
+    us_codes = [c for c in ("DJI", "IXIC") if c in codes]
+    global_codes = [c for c in ("SPX", "N225", "UKX", "DAX", "ESTOXX50E", "HS11") if c in codes]
+
+    # Fetch stage: all upstream calls run concurrently (rate limited per host); writes below stay serial.
+    fetch_tasks: dict = {}
+    if "HSI" in codes:
+        if not force_source or force_source == "EASTMONEY":
+            fetch_tasks["HSI"] = partial(fetch_eastmoney_intraday_snapshot, ts_code="HSI", timeout_seconds=settings.HKEX_TIMEOUT_SECONDS)
+        elif force_source == "AASTOCKS":
+            fetch_tasks["HSI"] = fetch_hsi_snapshot
+    if not force_source or force_source == "EASTMONEY":
+        for code in ("SSE", "SZSE"):
+            ts_code = (index_map.get(code) or "").strip()
+            if code in codes and ts_code:
+                fetch_tasks[code] = partial(fetch_eastmoney_intraday_snapshot, ts_code=ts_code, timeout_seconds=settings.HKEX_TIMEOUT_SECONDS)
+    if us_codes:
+        fetch_tasks["US_INDICES"] = partial(fetch_quotes, [us_symbol_map[c] for c in us_codes])
+    if global_codes:
+        fetch_tasks["GLOBAL_INDICES"] = partial(fetch_quotes, [global_symbol_map[c] for c in global_codes])
+
+    fetch_started = pytime.monotonic()
+    fetched = fan_out(fetch_tasks)
+    fetch_seconds = round(pytime.monotonic() - fetch_started, 3)
+
+    # 1) HSI
+    if "HSI" in codes:
+        try:
+            index_row = ensure_market_index(db, "HSI")
 
-            # 1) HSI
-            if "HSI" in codes:
-                try:
-                    index_row = ensure_market_index(db, "HSI")
-
-                    if not force_source or force_source == "EASTMONEY":
-                        # Prefer Eastmoney for more precise last (2 decimals) and stable access.
-                        em = fetch_eastmoney_intraday_snapshot(ts_code="HSI", timeout_seconds=settings.HKEX_TIMEOUT_SECONDS)
-                        upsert_realtime_snapshot(
-                            db,
-                            index_id=index_row.id,
-                            trade_date=em.trade_date,
-                            session=SessionType.FULL,
-                            last=int(round(float(em.last) * 100)),
-                            change_points=int(round(float(em.change) * 100)) if em.change is not None else None,
-                            change_pct=int(round(float(em.pct_chg) * 100)) if em.pct_chg is not None else None,
-                            turnover_amount=int(round(float(em.amount))) if em.amount is not None else None,
-                            turnover_currency="HKD",
-                            data_updated_at=em.asof,
-                            is_closed=False,
-                            source="EASTMONEY",
-                            payload={"raw": em.raw, "ts_code": "HSI"},
-                        )
-                        written += 1
-                    else:
-                        if force_source != "AASTOCKS":
-                            raise RuntimeError(f"HSI snapshot only supports EASTMONEY/AASTOCKS (force_source={force_source})")
-
-                        snap = fetch_hsi_snapshot()
-                        if snap.asof is not None:
-                            trade_date = snap.asof.date()
-                            asof = snap.asof
-                        else:
-                            trade_date = date.today()
-                            asof = datetime.now(timezone.utc)
-
-                        upsert_realtime_snapshot(
-                            db,
-                            index_id=index_row.id,
-                            trade_date=trade_date,
-                            session=SessionType.FULL,
-                            last=int(round(float(snap.last) * 100)),
-                            change_points=int(round(float(snap.change) * 100)) if snap.change is not None else None,
-                            change_pct=int(round(float(snap.change_pct) * 100)) if snap.change_pct is not None else None,
-                            turnover_amount=int(snap.turnover_hkd) if snap.turnover_hkd is not None else None,
-                            turnover_currency="HKD",
-                            data_updated_at=asof,
-                            is_closed=False,
-                            source="AASTOCKS",
-                            payload={"raw": snap.raw},
-                        )
-                        written += 1
+            if not force_source or force_source == "EASTMONEY":
+                # Prefer Eastmoney for more precise last (2 decimals) and stable access.
+                em = fetched["HSI"].get()
+                upsert_realtime_snapshot(
+                    db,
+                    index_id=index_row.id,
+                    trade_date=em.trade_date,
+                    session=SessionType.FULL,
+                    last=int(round(float(em.last) * 100)),
+                    change_points=int(round(float(em.change) * 100)) if em.change is not None else None,
+                    change_pct=int(round(float(em.pct_chg) * 100)) if em.pct_chg is not None else None,
+                    turnover_amount=int(round(float(em.amount))) if em.amount is not None else None,
+                    turnover_currency="HKD",
+                    data_updated_at=em.asof,
+                    is_closed=False,
+                    source="EASTMONEY",
+                    payload={"raw": em.raw, "ts_code": "HSI"},
+                )
+                store_minute_kline(db, code="HSI", trade_date=em.trade_date, asof=em.asof, raw={"klines": em.klines})
+                written += 1
+            else:
+                if force_source != "AASTOCKS":
+                    raise RuntimeError(f"HSI snapshot only supports EASTMONEY/AASTOCKS (force_source={force_source})")
 
-                except Exception as e:
-                    errors["HSI"] = str(e)
+                snap = fetched["HSI"].get()
+                if snap.asof is not None:
+                    trade_date = snap.asof.date()
+                    asof = snap.asof
+                else:
+                    trade_date = date.today()
+                    asof = datetime.now(timezone.utc)
 
-            # 2) SSE/SZSE from Eastmoney intraday minute kline
-            for code in ("SSE", "SZSE"):
-                if code not in codes:
-                    continue
-                try:
-                    if force_source and force_source != "EASTMONEY":
-                        raise RuntimeError(f"{code} snapshot only supports EASTMONEY currently (force_source={force_source})")
+                upsert_realtime_snapshot(
+                    db,
+                    index_id=index_row.id,
+                    trade_date=trade_date,
+                    session=SessionType.FULL,
+                    last=int(round(float(snap.last) * 100)),
+                    change_points=int(round(float(snap.change) * 100)) if snap.change is not None else None,
+                    change_pct=int(round(float(snap.change_pct) * 100)) if snap.change_pct is not None else None,
+                    turnover_amount=int(snap.turnover_hkd) if snap.turnover_hkd is not None else None,
+                    turnover_currency="HKD",
+                    data_updated_at=asof,
+                    is_closed=False,
+                    source="AASTOCKS",
+                    payload={"raw": snap.raw},
+                )
+                written += 1
 
-                    ts_code = (index_map.get(code) or "").strip()
-                    if not ts_code:
-                        raise RuntimeError("missing ts_code in TUSHARE_INDEX_CODES")
-                    snap = fetch_eastmoney_intraday_snapshot(ts_code=ts_code, timeout_seconds=settings.HKEX_TIMEOUT_SECONDS)
-                    index_row = ensure_market_index(db, code)
+        except Exception as e:
+            errors["HSI"] = str(e)
 
-                    # FULL snapshot (latest)
-                    upsert_realtime_snapshot(
-                        db,
-                        index_id=index_row.id,
-                        trade_date=snap.trade_date,
-                        session=SessionType.FULL,
-                        last=int(round(float(snap.last) * 100)),
-                        change_points=int(round(float(snap.change) * 100)) if snap.change is not None else None,
-                        change_pct=int(round(float(snap.pct_chg) * 100)) if snap.pct_chg is not None else None,
-                        turnover_amount=int(round(float(snap.amount))) if snap.amount is not None else None,
-                        turnover_currency="CNY",
-                        data_updated_at=snap.asof,
-                        is_closed=False,
-                        source="EASTMONEY",
-                        payload={"raw": snap.raw, "ts_code": ts_code, "scope": "FULL"},
-                    )
-                    written += 1
-
-                    # AM snapshot (<=12:30), for dashboard AM turnover selection
-                    if snap.am_amount is not None and snap.am_asof is not None:
-                        upsert_realtime_snapshot(
-                            db,
-                            index_id=index_row.id,
-                            trade_date=snap.trade_date,
-                            session=SessionType.AM,
-                            last=int(round(float(snap.am_last) * 100)) if snap.am_last is not None else int(round(float(snap.last) * 100)),
-                            change_points=int(round(float(snap.change) * 100)) if snap.change is not None else None,
-                            change_pct=int(round(float(snap.pct_chg) * 100)) if snap.pct_chg is not None else None,
-                            turnover_amount=int(round(float(snap.am_amount))),
-                            turnover_currency="CNY",
-                            data_updated_at=snap.am_asof,
-                            is_closed=False,
-                            source="EASTMONEY",
-                            payload={"raw": snap.raw, "ts_code": ts_code, "scope": "AM", "cutoff": "12:30"},
-                        )
-                        written += 1
-                except Exception as e:
-                    errors[code] = str(e)
+    # 2) SSE/SZSE from Eastmoney intraday minute kline
+    for code in ("SSE", "SZSE"):
+        if code not in codes:
+            continue
+        try:
+            if force_source and force_source != "EASTMONEY":
+                raise RuntimeError(f"{code} snapshot only supports EASTMONEY currently (force_source={force_source})")
 
-            # 3) DJI/IXIC from Tencent quotes
-            us_codes = [c for c in ("DJI", "IXIC") if c in codes]
-            if us_codes:
-                try:
-                    # Mapping for Tencent Quote symbols
-                    us_symbol_map = {"DJI": "usDJI", "IXIC": "usIXIC"}
-                    fetch_syms = [us_symbol_map[c] for c in us_codes]
-                    quotes = fetch_quotes(fetch_syms)
-                    quote_by_code = {q.symbol.replace("us", ""): q for q in quotes}
-
-                    for code in us_codes:
-                        q = quote_by_code.get(code)
-                        if not q:
-                            continue
-                        
-                        index_row = ensure_market_index(db, code)
-                        asof_dt = datetime.now(timezone.utc)
-                        if q.asof:
-                            try:
-                                # US asof format: 2024-05-10 16:00:00 (EST/EDT)
-                                # For simplicity, parse and use current date if needed
-                                asof_dt = datetime.strptime(q.asof, "%Y-%m-%d %H:%M:%S").replace(tzinfo=ZoneInfo("America/New_York"))
-                            except Exception:
-                                pass
-
-                        upsert_realtime_snapshot(
-                            db,
-                            index_id=index_row.id,
-                            trade_date=asof_dt.date(),
-                            session=SessionType.FULL,
-                            last=int(round(q.last * 100)),
-                            change_points=int(round(q.change * 100)),
-                            change_pct=int(round(q.pct * 100)),
-                            turnover_amount=None,  # Tencent quote might not have accurate US turnover in simple format
-                            turnover_currency="USD",
-                            data_updated_at=asof_dt,
-                            is_closed=False,
-                            source="TENCENT",
-                            payload={"raw": vars(q), "symbol": us_symbol_map[code]},
-                        )
-                        written += 1
-                except Exception as e:
-                    errors["US_INDICES"] = str(e)
+            ts_code = (index_map.get(code) or "").strip()
+            if not ts_code:
+                raise RuntimeError("missing ts_code in TUSHARE_INDEX_CODES")
+            snap = fetched[code].get()
+            index_row = ensure_market_index(db, code)
 
-            # 4) SPX, N225, UKX, DAX, ESTOXX50E, HS11 from Tencent quotes
-            global_codes = [c for c in ("SPX", "N225", "UKX", "DAX", "ESTOXX50E", "HS11") if c in codes]
-            if global_codes:
-                try:
-                    # Mapping for Tencent Quote symbols
-                    global_symbol_map = {
-                        "SPX": "usSPX",
-                        "N225": "jpN225",
-                        "UKX": "ukUKX",
-                        "DAX": "euDAX",
-                        "ESTOXX50E": "euESTOXX50E",
-                        "HS11": "krHS11",
+            # FULL snapshot (latest)
+            upsert_realtime_snapshot(
+                db,
+                index_id=index_row.id,
+                trade_date=snap.trade_date,
+                session=SessionType.FULL,
+                last=int(round(float(snap.last) * 100)),
+                change_points=int(round(float(snap.change) * 100)) if snap.change is not None else None,
+                change_pct=int(round(float(snap.pct_chg) * 100)) if snap.pct_chg is not None else None,
+                turnover_amount=int(round(float(snap.amount))) if snap.amount is not None else None,
+                turnover_currency="CNY",
+                data_updated_at=snap.asof,
+                is_closed=False,
+                source="EASTMONEY",
+                payload={"raw": snap.raw, "ts_code": ts_code, "scope": "FULL"},
+            )
+            store_minute_kline(db, code=code, trade_date=snap.trade_date, asof=snap.asof, raw={"klines": snap.klines})
+            written += 1
+
+            # AM snapshot (<=12:30), for dashboard AM turnover selection
+            if snap.am_amount is not None and snap.am_asof is not None:
+                upsert_realtime_snapshot(
+                    db,
+                    index_id=index_row.id,
+                    trade_date=snap.trade_date,
+                    session=SessionType.AM,
+                    last=int(round(float(snap.am_last) * 100)) if snap.am_last is not None else int(round(float(snap.last) * 100)),
+                    change_points=int(round(float(snap.change) * 100)) if snap.change is not None else None,
+                    change_pct=int(round(float(snap.pct_chg) * 100)) if snap.pct_chg is not None else None,
+                    turnover_amount=int(round(float(snap.am_amount))),
+                    turnover_currency="CNY",
+                    data_updated_at=snap.am_asof,
+                    is_closed=False,
+                    source="EASTMONEY",
+                    payload={"raw": snap.raw, "ts_code": ts_code, "scope": "AM", "cutoff": "12:30"},
+                )
+                written += 1
+        except Exception as e:
+            errors[code] = str(e)
+
+    # 3) DJI/IXIC from Tencent quotes
+    if us_codes:
+        try:
+            quotes = fetched["US_INDICES"].get()
+            quote_by_code = {q.symbol.replace("us", ""): q for q in quotes}
+
+            for code in us_codes:
+                q = quote_by_code.get(code)
+                if not q:
+                    continue
+                
+                index_row = ensure_market_index(db, code)
+                asof_dt = datetime.now(timezone.utc)
+                if q.asof:
+                    try:
+                        # US asof format: 2024-05-10 16:00:00 (EST/EDT)
+                        # For simplicity, parse and use current date if needed
+                        asof_dt = datetime.strptime(q.asof, "%Y-%m-%d %H:%M:%S").replace(tzinfo=ZoneInfo("America/New_York"))
+                    except Exception:
+                        pass
+
+                upsert_realtime_snapshot(
+                    db,
+                    index_id=index_row.id,
+                    trade_date=asof_dt.date(),
+                    session=SessionType.FULL,
+                    last=int(round(q.last * 100)),
+                    change_points=int(round(q.change * 100)),
+                    change_pct=int(round(q.pct * 100)),
+                    turnover_amount=None,  # Tencent quote might not have accurate US turnover in simple format
+                    turnover_currency="USD",
+                    data_updated_at=asof_dt,
+                    is_closed=False,
+                    source="TENCENT",
+                    payload={"raw": vars(q), "symbol": us_symbol_map[code]},
+                )
+                written += 1
+        except Exception as e:
+            errors["US_INDICES"] = str(e)
+
+    # 4) SPX, N225, UKX, DAX, ESTOXX50E, HS11 from Tencent quotes
+    if global_codes:
+        try:
+            currency_map = {
+                "SPX": "USD",
+                "N225": "JPY",
+                "UKX": "GBP",
+                "DAX": "EUR",
+                "ESTOXX50E": "EUR",
+                "HS11": "KRW",
+            }
+            timezone_map = {
+                "SPX": "America/New_York",
+                "N225": "Asia/Tokyo",
+                "UKX": "Europe/London",
+                "DAX": "Europe/Berlin",
+                "ESTOXX50E": "Europe/Berlin",
+                "HS11": "Asia/Seoul",
+            }
+            quotes = fetched["GLOBAL_INDICES"].get()
+            # Tencent returns symbol with prefix, e.g. "usSPX", "jpN225"
+            quote_by_code = {}
+            for q in quotes:
+                for code, sym in global_symbol_map.items():
+                    if q.symbol == sym:
+                        quote_by_code[code] = q
+                        break
+
+            missing_codes: list[str] = []
+            for code in global_codes:
+                q = quote_by_code.get(code)
+                if not q:
+                    missing_codes.append(code)
+                    continue
+
+                index_row = ensure_market_index(db, code)
+                asof_dt = datetime.now(timezone.utc)
+                if q.asof:
+                    try:
+                        asof_dt = datetime.strptime(q.asof, "%Y-%m-%d %H:%M:%S").replace(tzinfo=ZoneInfo(timezone_map.get(code, "UTC")))
+                    except Exception:
+                        pass
+
+                upsert_realtime_snapshot(
+                    db,
+                    index_id=index_row.id,
+                    trade_date=asof_dt.date(),
+                    session=SessionType.FULL,
+                    last=int(round(q.last * 100)),
+                    change_points=int(round(q.change * 100)),
+                    change_pct=int(round(q.pct * 100)),
+                    turnover_amount=None,
+                    turnover_currency=currency_map.get(code, "USD"),
+                    data_updated_at=asof_dt,
+                    is_closed=False,
+                    source="TENCENT",
+                    payload={"raw": vars(q), "symbol": global_symbol_map[code]},
+                )
+                written += 1
+
+            # Tencent does not reliably return all global symbols.
+            # Fallback to Tushare index_global for missing codes.
+            if missing_codes:
+                token = (settings.TUSHARE_PRO_TOKEN or "").strip()
+                if not token:
+                    for code in missing_codes:
+                        errors[code] = "No quote returned from Tencent; TUSHARE_PRO_TOKEN is empty"
+                else:
+                    tushare_defaults = {
+                        "HSI": "HSI",
+                        "SSE": "000001.SH",
+                        "SZSE": "399001.SZ",
+                        "DJI": "DJI",
+                        "IXIC": "IXIC",
+                        "SPX": "SPX",
+                        "N225": "N225",
+                        "FTSE": "FTSE",
+                        "GDAXI": "GDAXI",
+                        "CSX5P": "CSX5P",
+                        "KS11": "KS11",
                     }
-                    currency_map = {
+                    cfg_map = settings.tushare_index_map()
+                    for k, v in tushare_defaults.items():
+                        cfg_map.setdefault(k, v)
+
+                    display_to_tushare = {
+                        "HS11": "KS11",
+                        "UKX": "FTSE",
+                        "DAX": "GDAXI",
+                        "ESTOXX50E": "CSX5P",
+                    }
+                    code_currency = {
                         "SPX": "USD",
                         "N225": "JPY",
                         "UKX": "GBP",
@@ -1198,408 +1397,501 @@ def run_job(db: Session, job_name: str, params: dict | None = None) -> JobRun:
                         "ESTOXX50E": "EUR",
                         "HS11": "KRW",
                     }
-                    timezone_map = {
-                        "SPX": "America/New_York",
-                        "N225": "Asia/Tokyo",
-                        "UKX": "Europe/London",
-                        "DAX": "Europe/Berlin",
-                        "ESTOXX50E": "Europe/Berlin",
-                        "HS11": "Asia/Seoul",
-                    }
-                    fetch_syms = [global_symbol_map[c] for c in global_codes]
-                    quotes = fetch_quotes(fetch_syms)
-                    # Tencent returns symbol with prefix, e.g. "usSPX", "jpN225"
-                    quote_by_code = {}
-                    for q in quotes:
-                        for code, sym in global_symbol_map.items():
-                            if q.symbol == sym:
-                                quote_by_code[code] = q
-                                break
-
-                    missing_codes: list[str] = []
-                    for code in global_codes:
-                        q = quote_by_code.get(code)
-                        if not q:
-                            missing_codes.append(code)
+
+                    fetch_map: dict[str, str] = {}
+                    request_map: dict[str, str] = {}
+                    for code in missing_codes:
+                        display_code = normalize_index_code(code)
+                        ts_key = display_to_tushare.get(display_code, display_code)
+                        ts_code = cfg_map.get(ts_key)
+                        if not ts_code:
+                            errors[display_code] = f"Missing Tushare mapping for {ts_key}"
                             continue
+                        fetch_map[ts_key] = ts_code
+                        request_map[ts_key] = display_code
 
-                        index_row = ensure_market_index(db, code)
-                        asof_dt = datetime.now(timezone.utc)
-                        if q.asof:
-                            try:
-                                asof_dt = datetime.strptime(q.asof, "%Y-%m-%d %H:%M:%S").replace(tzinfo=ZoneInfo(timezone_map.get(code, "UTC")))
-                            except Exception:
-                                pass
-
-                        upsert_realtime_snapshot(
-                            db,
-                            index_id=index_row.id,
-                            trade_date=asof_dt.date(),
-                            session=SessionType.FULL,
-                            last=int(round(q.last * 100)),
-                            change_points=int(round(q.change * 100)),
-                            change_pct=int(round(q.pct * 100)),
-                            turnover_amount=None,
-                            turnover_currency=currency_map.get(code, "USD"),
-                            data_updated_at=asof_dt,
-                            is_closed=False,
-                            source="TENCENT",
-                            payload={"raw": vars(q), "symbol": global_symbol_map[code]},
-                        )
-                        written += 1
-
-                    # Tencent does not reliably return all global symbols.
-                    # Fallback to Tushare index_global for missing codes.
-                    if missing_codes:
-                        token = (settings.TUSHARE_PRO_TOKEN or "").strip()
-                        if not token:
-                            for code in missing_codes:
-                                errors[code] = "No quote returned from Tencent; TUSHARE_PRO_TOKEN is empty"
-                        else:
-                            tushare_defaults = {
-                                "HSI": "HSI",
-                                "SSE": "000001.SH",
-                                "SZSE": "399001.SZ",
-                                "DJI": "DJI",
-                                "IXIC": "IXIC",
-                                "SPX": "SPX",
-                                "N225": "N225",
-                                "FTSE": "FTSE",
-                                "GDAXI": "GDAXI",
-                                "CSX5P": "CSX5P",
-                                "KS11": "KS11",
-                            }
-                            cfg_map = settings.tushare_index_map()
-                            for k, v in tushare_defaults.items():
-                                cfg_map.setdefault(k, v)
-
-                            display_to_tushare = {
-                                "HS11": "KS11",
-                                "UKX": "FTSE",
-                                "DAX": "GDAXI",
-                                "ESTOXX50E": "CSX5P",
-                            }
-                            code_currency = {
-                                "SPX": "USD",
-                                "N225": "JPY",
-                                "UKX": "GBP",
-                                "DAX": "EUR",
-                                "ESTOXX50E": "EUR",
-                                "HS11": "KRW",
-                            }
-
-                            fetch_map: dict[str, str] = {}
-                            request_map: dict[str, str] = {}
-                            for code in missing_codes:
-                                display_code = normalize_index_code(code)
-                                ts_key = display_to_tushare.get(display_code, display_code)
-                                ts_code = cfg_map.get(ts_key)
-                                if not ts_code:
-                                    errors[display_code] = f"Missing Tushare mapping for {ts_key}"
-                                    continue
-                                fetch_map[ts_key] = ts_code
-                                request_map[ts_key] = display_code
-
-                            if fetch_map:
-                                try:
-                                    rows = fetch_latest_index_daily(
-                                        token=token,
-                                        index_map=fetch_map,
-                                        base_url=settings.TUSHARE_PRO_BASE,
-                                        timeout_seconds=settings.TUSHARE_TIMEOUT_SECONDS,
-                                    )
-                                    row_by_code = {r.code: r for r in rows}
-                                    for ts_key, display_code in request_map.items():
-                                        row = row_by_code.get(ts_key)
-                                        if row is None:
-                                            errors[display_code] = "No quote returned from Tencent/Tushare"
-                                            continue
-                                        index_row = ensure_market_index(db, display_code)
-                                        upsert_realtime_snapshot(
-                                            db,
-                                            index_id=index_row.id,
-                                            trade_date=row.trade_date,
-                                            session=SessionType.FULL,
-                                            last=int(round(float(row.close) * 100)),
-                                            change_points=int(round(float(row.change) * 100)) if row.change is not None else None,
-                                            change_pct=int(round(float(row.pct_chg) * 100)) if row.pct_chg is not None else None,
-                                            turnover_amount=row.turnover_amount,
-                                            turnover_currency=code_currency.get(display_code, index_row.currency),
-                                            data_updated_at=daily_row_asof(row.trade_date),
-                                            is_closed=True,
-                                            source="TUSHARE",
-                                            payload={"ts_code": row.ts_code, "fallback": "tencent_missing"},
-                                        )
-                                        written += 1
-                                except Exception as e:
-                                    for code in missing_codes:
-                                        errors[code] = f"Tushare fallback failed: {e}"
-                except Exception as e:
-                    errors["GLOBAL_INDICES"] = str(e)
-
-            status = "success" if not errors else ("partial" if written else "failed")
-            summary = {"written": written, "errors": errors, "codes": codes, "force_source": force_source or None}
-
-        elif job_name == "backfill_tushare_index":
-            ts_status, ts_summary = _backfill_tushare_index_quotes(db, lookback_days=365)
-            status = "success" if ts_status in {"success", "skipped"} else "partial"
-            summary = {"tushare": ts_summary}
-
-        elif job_name == "backfill_cn_halfday":
-            em_status, em_summary = _backfill_eastmoney_cn_halfday(db, lookback_days=90)
-            status = "success" if em_status in {"success", "skipped"} else "partial"
-            summary = {"eastmoney": em_summary}
-
-        elif job_name == "backfill_intraday_kline":
-            k_status, k_summary = _backfill_intraday_kline_source(db, lookback_days_5m=90, lookback_days_1m=2)
-            status = "success" if k_status in {"success", "skipped"} else ("partial" if k_status == "partial" else "failed")
-            summary = {"kline": k_summary}
-
-        elif job_name == "persist_eastmoney_kline_all":
-            index_map = settings.tushare_index_map()
-            if not index_map:
-                status = "skipped"
-                summary = {"enabled": False, "reason": "TUSHARE_INDEX_CODES is empty"}
-            else:
-                lookback_days_1m = 365
-                lookback_days_5m = 365
-                try:
-                    if params and params.get("lookback_days_1m") is not None:
-                        lookback_days_1m = int(params.get("lookback_days_1m"))
-                    if params and params.get("lookback_days_5m") is not None:
-                        lookback_days_5m = int(params.get("lookback_days_5m"))
-                except Exception:
-                    pass
-
-                target = {k.upper(): v for k, v in index_map.items() if k.upper() in {"HSI", "SSE", "SZSE"}}
-                written = 0
-                rows = 0
-                details: dict[str, dict] = {}
-                errors: dict[str, str] = {}
-
-                for code, ts_code in target.items():
-                    per_code: dict[str, dict] = {}
-                    for klt, days in (("1", lookback_days_1m), ("5", lookback_days_5m)):
-                        key = "1m" if klt == "1" else "5m"
+                    if fetch_map:
                         try:
-                            stats = _persist_eastmoney_kline_rows(
-                                db,
-                                code=code,
-                                ts_code=ts_code if code != "HSI" else "HSI",
-                                klt=klt,
-                                lookback_days=days,
+                            rows = fetch_latest_index_daily(
+                                token=token,
+                                index_map=fetch_map,
+                                base_url=settings.TUSHARE_PRO_BASE,
+                                timeout_seconds=settings.TUSHARE_TIMEOUT_SECONDS,
                             )
-                            per_code[key] = stats
-                            written += int(stats.get("inserted") or 0)
-                            rows += int(stats.get("rows") or 0)
+                            row_by_code = {r.code: r for r in rows}
+                            for ts_key, display_code in request_map.items():
+                                row = row_by_code.get(ts_key)
+                                if row is None:
+                                    errors[display_code] = "No quote returned from Tencent/Tushare"
+                                    continue
+                                index_row = ensure_market_index(db, display_code)
+                                upsert_realtime_snapshot(
+                                    db,
+                                    index_id=index_row.id,
+                                    trade_date=row.trade_date,
+                                    session=SessionType.FULL,
+                                    last=int(round(float(row.close) * 100)),
+                                    change_points=int(round(float(row.change) * 100)) if row.change is not None else None,
+                                    change_pct=int(round(float(row.pct_chg) * 100)) if row.pct_chg is not None else None,
+                                    turnover_amount=row.turnover_amount,
+                                    turnover_currency=code_currency.get(display_code, index_row.currency),
+                                    data_updated_at=daily_row_asof(row.trade_date),
+                                    is_closed=True,
+                                    source="TUSHARE",
+                                    payload={"ts_code": row.ts_code, "fallback": "tencent_missing"},
+                                )
+                                written += 1
                         except Exception as e:
-                            errors[f"{code}:{key}"] = str(e)
-                    details[code] = per_code
-
-                status = "success" if not errors else ("partial" if written else "failed")
-                summary = {
-                    "enabled": True,
-                    "source": "EASTMONEY",
-                    "rows": rows,
-                    "inserted": written,
-                    "lookback_days_1m": lookback_days_1m,
-                    "lookback_days_5m": lookback_days_5m,
-                    "details": details,
-                    "errors": errors,
-                }
-
-        elif job_name == "backfill_hsi_turnover_from_kline":
-            # Backfill HSI AM turnover from realtime snapshots:
-            # - pick latest row whose data_updated_at is between 12:00:00 and 12:15:00
-            # - write/update AM history
-            # - update same-day FULL history turnover from latest realtime API snapshot
-            idx = ensure_market_index(db, "HSI")
-
-            date_from = None
-            date_to = None
-            if params and params.get("date_from"):
-                date_from = date.fromisoformat(str(params.get("date_from")).strip())
-            if params and params.get("date_to"):
-                date_to = date.fromisoformat(str(params.get("date_to")).strip())
-
-            if date_from is None and date_to is None:
-                target_dates = [date.today()]
-            else:
-                if date_from is None:
-                    date_from = date_to
-                if date_to is None:
-                    date_to = date_from
-                if date_from is None or date_to is None:
-                    target_dates = []
-                else:
-                    if date_from > date_to:
-                        date_from, date_to = date_to, date_from
-                    days = (date_to - date_from).days
-                    target_dates = [date_from + timedelta(days=i) for i in range(days + 1)]
-
-            tz = ZoneInfo("Asia/Shanghai")
-            updated_am = 0
-            updated_full = 0
-            skipped = 0
-            details: dict[str, dict] = {}
-
-            for d in target_dates:
-                win_start = datetime.combine(d, time(12, 0), tzinfo=tz)
-                win_end = datetime.combine(d, time(12, 15), tzinfo=tz)
-
-                snap = (
-                    db.query(IndexRealtimeSnapshot)
-                    .filter(IndexRealtimeSnapshot.index_id == idx.id)
-                    .filter(IndexRealtimeSnapshot.trade_date == d)
-                    .filter(IndexRealtimeSnapshot.data_updated_at >= win_start)
-                    .filter(IndexRealtimeSnapshot.data_updated_at <= win_end)
-                    .filter(IndexRealtimeSnapshot.turnover_amount.isnot(None))
-                    .order_by(IndexRealtimeSnapshot.id.desc())
-                    .first()
-                )
+                            for code in missing_codes:
+                                errors[code] = f"Tushare fallback failed: {e}"
+        except Exception as e:
+            errors["GLOBAL_INDICES"] = str(e)
 
-                day_detail: dict[str, object] = {"window_start": win_start.isoformat(), "window_end": win_end.isoformat()}
+    status = "success" if not errors else ("partial" if written else "failed")
+    summary = {
+        "written": written,
+        "errors": errors,
+        "codes": codes,
+        "force_source": force_source or None,
+        "fetch_seconds": fetch_seconds,
+    }
+    return status, summary
 
-                if snap is None:
-                    skipped += 1
-                    day_detail["am_status"] = "no_snapshot_in_window"
-                else:
-                    add_index_source_record(
+
+@job("backfill_tushare_index", concurrency_key="tushare")
+def _job_backfill_tushare_index(db: Session, params: dict | None) -> tuple[str, dict]:
+    ts_status, ts_summary = _backfill_tushare_index_quotes(db, lookback_days=365)
+    status = "success" if ts_status in {"success", "skipped"} else "partial"
+    summary = {"tushare": ts_summary}
+    return status, summary
+
+
+@job("backfill_cn_halfday", concurrency_key="eastmoney_kline")
+def _job_backfill_cn_halfday(db: Session, params: dict | None) -> tuple[str, dict]:
+    em_status, em_summary = _backfill_eastmoney_cn_halfday(db, lookback_days=90)
+    status = "success" if em_status in {"success", "skipped"} else "partial"
+    summary = {"eastmoney": em_summary}
+    return status, summary
+
+
+@job("backfill_intraday_kline", concurrency_key="eastmoney_kline")
+def _job_backfill_intraday_kline(db: Session, params: dict | None) -> tuple[str, dict]:
+    k_status, k_summary = _backfill_intraday_kline_source(db, lookback_days_5m=90, lookback_days_1m=2)
+    status = "success" if k_status in {"success", "skipped"} else ("partial" if k_status == "partial" else "failed")
+    summary = {"kline": k_summary}
+    return status, summary
+
+
+@job(
+    "persist_eastmoney_kline_all",
+    params=[
+        {"name": "lookback_days_1m", "label": "Lookback days (1m)", "type": "number", "placeholder": "365"},
+        {"name": "lookback_days_5m", "label": "Lookback days (5m)", "type": "number", "placeholder": "365"},
+        {"name": "full_refresh", "label": "Full refresh (true/false)", "type": "text", "placeholder": "false"},
+    ],
+    concurrency_key="eastmoney_kline",
+)
+def _job_persist_eastmoney_kline_all(db: Session, params: dict | None) -> tuple[str, dict]:
+    index_map = settings.tushare_index_map()
+    if not index_map:
+        status = "skipped"
+        summary = {"enabled": False, "reason": "TUSHARE_INDEX_CODES is empty"}
+    else:
+        lookback_days_1m = 365
+        lookback_days_5m = 365
+        try:
+            if params and params.get("lookback_days_1m") is not None:
+                lookback_days_1m = int(params.get("lookback_days_1m"))
+            if params and params.get("lookback_days_5m") is not None:
+                lookback_days_5m = int(params.get("lookback_days_5m"))
+        except Exception:
+            pass
+        # Each run resumes from the last persisted bar; full_refresh re-requests the whole lookback.
+        incremental = str((params or {}).get("full_refresh") or "").strip().lower() not in {"1", "true", "yes", "on"}
+
+        target = {k.upper(): v for k, v in index_map.items() if k.upper() in {"HSI", "SSE", "SZSE"}}
+        load_seconds = 0.0
+        written = 0
+        rows = 0
+        details: dict[str, dict] = {}
+        errors: dict[str, str] = {}
+
+        for code, ts_code in target.items():
+            per_code: dict[str, dict] = {}
+            for klt, days in (("1", lookback_days_1m), ("5", lookback_days_5m)):
+                key = "1m" if klt == "1" else "5m"
+                try:
+                    stats = _persist_eastmoney_kline_rows(
                         db,
-                        index_id=idx.id,
-                        trade_date=d,
-                        session=SessionType.AM,
-                        source="REALTIME_SNAPSHOT",
-                        last=int(snap.last) if snap.last is not None else None,
-                        change_points=snap.change_points,
-                        change_pct=snap.change_pct,
-                        turnover_amount=int(snap.turnover_amount) if snap.turnover_amount is not None else None,
-                        turnover_currency=snap.turnover_currency or "HKD",
-                        asof_ts=snap.data_updated_at,
-                        payload={
-                            "from": "index_realtime_snapshot",
-                            "window_start": win_start.isoformat(),
-                            "window_end": win_end.isoformat(),
-                            "snapshot_id": int(snap.id),
-                        },
-                        ok=True,
-                    )
-                    am_fact = upsert_index_history_from_sources(db, index_id=idx.id, trade_date=d, session=SessionType.AM)
-                    if am_fact is not None:
-                        updated_am += 1
-                        day_detail["am_status"] = "updated"
-                        day_detail["am_turnover_amount"] = int(am_fact.turnover_amount or 0)
-                    else:
-                        day_detail["am_status"] = "source_written_but_history_not_updated"
-
-                api_latest = (
-                    db.query(IndexRealtimeApiSnapshot)
-                    .filter(IndexRealtimeApiSnapshot.index_id == idx.id)
-                    .filter(IndexRealtimeApiSnapshot.trade_date == d)
-                    .filter(IndexRealtimeApiSnapshot.turnover_amount.isnot(None))
-                    .order_by(IndexRealtimeApiSnapshot.data_updated_at.desc(), IndexRealtimeApiSnapshot.id.desc())
-                    .first()
-                )
-                if api_latest is not None:
-                    full_fact = (
-                        db.query(IndexQuoteHistory)
-                        .filter(IndexQuoteHistory.index_id == idx.id)
-                        .filter(IndexQuoteHistory.trade_date == d)
-                        .filter(IndexQuoteHistory.session == SessionType.FULL)
-                        .one_or_none()
+                        code=code,
+                        ts_code=ts_code if code != "HSI" else "HSI",
+                        klt=klt,
+                        lookback_days=days,
+                        incremental=incremental,
                     )
-                    if full_fact is not None:
-                        full_fact.turnover_amount = int(api_latest.turnover_amount)
-                        db.commit()
-                        updated_full += 1
-                        day_detail["full_status"] = "updated"
-                        day_detail["full_turnover_amount"] = int(full_fact.turnover_amount or 0)
-                    else:
-                        day_detail["full_status"] = "full_history_missing"
-                else:
-                    day_detail["full_status"] = "no_realtime_api_snapshot"
+                    per_code[key] = stats
+                    written += int(stats.get("inserted") or 0)
+                    rows += int(stats.get("rows") or 0)
+                    load_seconds += float(stats.get("load_seconds") or 0)
+                except Exception as e:
+                    errors[f"{code}:{key}"] = str(e)
+            details[code] = per_code
+
+        status = "success" if not errors else ("partial" if written else "failed")
+        summary = {
+            "enabled": True,
+            "source": "EASTMONEY",
+            "rows": rows,
+            "inserted": written,
+            "load_seconds": round(load_seconds, 3),
+            "rows_per_second": round(rows / load_seconds, 1) if load_seconds > 0 else None,
+            "lookback_days_1m": lookback_days_1m,
+            "lookback_days_5m": lookback_days_5m,
+            "incremental": incremental,
+            "details": details,
+            "errors": errors,
+        }
+    return status, summary
 
-                details[str(d)] = day_detail
 
-            status = "success"
-            summary = {
-                "updated_am": updated_am,
-                "updated_full": updated_full,
-                "skipped": skipped,
-                "days": len(target_dates),
-                "details": details,
-            }
+@job(
+    "backfill_hsi_turnover_from_kline",
+    params=[
+        {"name": "date_from", "label": "Date from (YYYY-MM-DD, optional)", "type": "text", "placeholder": "2026-01-12"},
+        {"name": "date_to", "label": "Date to (YYYY-MM-DD, optional)", "type": "text", "placeholder": "2026-02-11"},
+    ],
+)
+def _job_backfill_hsi_turnover_from_kline(db: Session, params: dict | None) -> tuple[str, dict]:
+    # Backfill HSI AM turnover from realtime snapshots:
+    # - pick latest row whose data_updated_at is between 12:00:00 and 12:15:00
+    # - write/update AM history
+    # - update same-day FULL history turnover from latest realtime API snapshot
+    idx = ensure_market_index(db, "HSI")
+
+    date_from = None
+    date_to = None
+    if params and params.get("date_from"):
+        date_from = date.fromisoformat(str(params.get("date_from")).strip())
+    if params and params.get("date_to"):
+        date_to = date.fromisoformat(str(params.get("date_to")).strip())
+
+    if date_from is None and date_to is None:
+        target_dates = [date.today()]
+    else:
+        if date_from is None:
+            date_from = date_to
+        if date_to is None:
+            date_to = date_from
+        if date_from is None or date_to is None:
+            target_dates = []
+        else:
+            if date_from > date_to:
+                date_from, date_to = date_to, date_from
+            days = (date_to - date_from).days
+            target_dates = [date_from + timedelta(days=i) for i in range(days + 1)]
+
+    tz = ZoneInfo("Asia/Shanghai")
+    updated_am = 0
+    updated_full = 0
+    skipped = 0
+    details: dict[str, dict] = {}
 
-        elif job_name == "backfill_hsi_am_yesterday":
+    # Whole date range in a handful of set-based statements instead of ~5 round trips per day.
+    snaps_by_date: dict[date, IndexRealtimeSnapshot] = {}
+    api_by_date: dict[date, IndexRealtimeApiSnapshot] = {}
+    if target_dates:
+        local_ts = sa.func.timezone("Asia/Shanghai", IndexRealtimeSnapshot.data_updated_at)
+        snaps = (
+            db.query(IndexRealtimeSnapshot)
+            .options(defer(IndexRealtimeSnapshot.payload))
+            .distinct(IndexRealtimeSnapshot.trade_date)
+            .filter(IndexRealtimeSnapshot.index_id == idx.id)
+            .filter(IndexRealtimeSnapshot.trade_date.in_(target_dates))
+            .filter(sa.cast(local_ts, sa.Date) == IndexRealtimeSnapshot.trade_date)
+            .filter(sa.cast(local_ts, sa.Time).between(time(12, 0), time(12, 15)))
+            .filter(IndexRealtimeSnapshot.turnover_amount.isnot(None))
+            .order_by(IndexRealtimeSnapshot.trade_date, IndexRealtimeSnapshot.id.desc())
+            .all()
+        )
+        snaps_by_date = {snap.trade_date: snap for snap in snaps}
+
+        api_rows = (
+            db.query(IndexRealtimeApiSnapshot)
+            .options(defer(IndexRealtimeApiSnapshot.payload))
+            .distinct(IndexRealtimeApiSnapshot.trade_date)
+            .filter(IndexRealtimeApiSnapshot.index_id == idx.id)
+            .filter(IndexRealtimeApiSnapshot.trade_date.in_(target_dates))
+            .filter(IndexRealtimeApiSnapshot.turnover_amount.isnot(None))
+            .order_by(
+                IndexRealtimeApiSnapshot.trade_date,
+                IndexRealtimeApiSnapshot.data_updated_at.desc(),
+                IndexRealtimeApiSnapshot.id.desc(),
+            )
+            .all()
+        )
+        api_by_date = {row.trade_date: row for row in api_rows}
 
-            # Backfill yesterday HSI AM turnover snapshot from Eastmoney minute kline (secid=100.HSI)
-            from datetime import date as _date
+    # AM: source records for every day with a snapshot in the window, resolved in one statement.
+    am_source_rows: list[dict] = []
+    for d in target_dates:
+        snap = snaps_by_date.get(d)
+        if snap is None:
+            continue
+        win_start = datetime.combine(d, time(12, 0), tzinfo=tz)
+        win_end = datetime.combine(d, time(12, 15), tzinfo=tz)
+        am_source_rows.append(
+            {
+                "index_id": idx.id,
+                "trade_date": d,
+                "session": SessionType.AM,
+                "source": "REALTIME_SNAPSHOT",
+                "last": int(snap.last) if snap.last is not None else None,
+                "change_points": snap.change_points,
+                "change_pct": snap.change_pct,
+                "turnover_amount": int(snap.turnover_amount) if snap.turnover_amount is not None else None,
+                "turnover_currency": snap.turnover_currency or "HKD",
+                "asof_ts": snap.data_updated_at,
+                "payload": {
+                    "from": "index_realtime_snapshot",
+                    "window_start": win_start.isoformat(),
+                    "window_end": win_end.isoformat(),
+                    "snapshot_id": int(snap.id),
+                },
+            }
+        )
+    am_written: dict[date, object] = {}
+    if am_source_rows:
+        bulk_add_index_source_records(db, am_source_rows)
+        resolution = resolve_index_history(
+            db,
+            keys=[(idx.id, row["trade_date"], SessionType.AM) for row in am_source_rows],
+            commit=True,
+        )
+        am_written = {row.trade_date: row for row in resolution.rows}
+
+    full_by_date: dict[date, IndexQuoteHistory] = {}
+    if api_by_date:
+        full_rows = (
+            db.query(IndexQuoteHistory)
+            .filter(IndexQuoteHistory.index_id == idx.id)
+            .filter(IndexQuoteHistory.trade_date.in_(list(api_by_date.keys())))
+            .filter(IndexQuoteHistory.session == SessionType.FULL)
+            .all()
+        )
+        full_by_date = {row.trade_date: row for row in full_rows}
+
+    full_updated: list[IndexQuoteHistory] = []
+    for d in target_dates:
+        win_start = datetime.combine(d, time(12, 0), tzinfo=tz)
+        win_end = datetime.combine(d, time(12, 15), tzinfo=tz)
+        day_detail: dict[str, object] = {"window_start": win_start.isoformat(), "window_end": win_end.isoformat()}
+
+        if d not in snaps_by_date:
+            skipped += 1
+            day_detail["am_status"] = "no_snapshot_in_window"
+        elif d in am_written:
+            updated_am += 1
+            day_detail["am_status"] = "updated"
+            day_detail["am_turnover_amount"] = int(am_written[d].turnover_amount or 0)
+        else:
+            day_detail["am_status"] = "source_written_but_history_not_updated"
+
+        api_latest = api_by_date.get(d)
+        if api_latest is not None:
+            full_fact = full_by_date.get(d)
+            if full_fact is not None:
+                full_fact.turnover_amount = int(api_latest.turnover_amount)
+                full_updated.append(full_fact)
+                updated_full += 1
+                day_detail["full_status"] = "updated"
+                day_detail["full_turnover_amount"] = int(full_fact.turnover_amount or 0)
+            else:
+                day_detail["full_status"] = "full_history_missing"
+        else:
+            day_detail["full_status"] = "no_realtime_api_snapshot"
+
+        details[str(d)] = day_detail
 
-            trade_date = _date.today() - timedelta(days=1)
-            if params and params.get("trade_date"):
-                trade_date = _date.fromisoformat(str(params.get("trade_date")).strip())
+    if full_updated:
+        db.commit()
+        if len(full_updated) == 1:
+            update_index_turnover_stats(
+                db,
+                index_id=idx.id,
+                session=SessionType.FULL,
+                trade_date=full_updated[0].trade_date,
+                turnover=full_updated[0].turnover_amount,
+                last=full_updated[0].last,
+            )
+        else:
+            update_index_turnover_stats(db, index_id=idx.id, session=SessionType.FULL, rebuild=True)
+        mark_dashboard_dirty(index_id=idx.id)
+
+    status = "success"
+    summary = {
+        "updated_am": updated_am,
+        "updated_full": updated_full,
+        "skipped": skipped,
+        "days": len(target_dates),
+        "details": details,
+    }
+    return status, summary
 
-            beg = trade_date.strftime("%Y%m%d")
-            end = beg
-            # NOTE: For HSI, Eastmoney klt=1 often only returns the latest trading day.
-            # Use 5-minute bars to reliably cover the previous day.
-            bars = fetch_minute_kline(ts_code="HSI", lookback_days=2, timeout_seconds=settings.HKEX_TIMEOUT_SECONDS, klt="5", beg=beg, end=end)
 
-            cutoff = time(12, 30)
-            am_amount = 0.0
-            have_amount = False
-            am_close = None
-            am_asof = None
-            for bar in bars:
-                if bar.trade_date != trade_date:
-                    continue
-                if bar.dt.time() <= cutoff:
-                    if bar.amount is not None:
-                        am_amount += float(bar.amount)
-                        have_amount = True
-                    am_close = bar.close
-                    am_asof = bar.dt
-
-            if not have_amount:
-                raise RuntimeError("Eastmoney HSI AM: no amount rows")
-            if am_asof is None:
-                # fallback use cutoff timestamp
-                am_asof = datetime.combine(trade_date, cutoff)
+@job(
+    "backfill_hsi_am_yesterday",
+    params=[{"name": "trade_date", "label": "Trade date (YYYY-MM-DD, optional)", "type": "text", "placeholder": "2026-02-10"}],
+    timeout_seconds=600,
+    concurrency_key="eastmoney_kline",
+)
+def _job_backfill_hsi_am_yesterday(db: Session, params: dict | None) -> tuple[str, dict]:
+    # Backfill yesterday HSI AM turnover snapshot from Eastmoney minute kline (secid=100.HSI)
+    from app.sources.eastmoney_index import fetch_kline_day_totals
+
+    from datetime import date as _date
+
+    trade_date = _date.today() - timedelta(days=1)
+    if params and params.get("trade_date"):
+        trade_date = _date.fromisoformat(str(params.get("trade_date")).strip())
+
+    beg = trade_date.strftime("%Y%m%d")
+    end = beg
+    # NOTE: For HSI, Eastmoney klt=1 often only returns the latest trading day.
+    # Use 5-minute bars to reliably cover the previous day.
+    cutoff = time(12, 30)
+    totals = fetch_kline_day_totals(
+        ts_code="HSI", lookback_days=2, timeout_seconds=settings.HKEX_TIMEOUT_SECONDS, klt="5", beg=beg, end=end, am_end=cutoff
+    ).get(trade_date)
+    bar_count = totals.bars if totals is not None else 0
+
+    if totals is None or totals.am_amount is None:
+        raise RuntimeError("Eastmoney HSI AM: no amount rows")
+    am_amount = totals.am_amount
+    am_close = totals.am_close
+    am_asof = totals.am_asof
+    if am_asof is None:
+        # fallback use cutoff timestamp
+        am_asof = datetime.combine(trade_date, cutoff)
+
+    index_row = ensure_market_index(db, "HSI")
+    upsert_realtime_snapshot(
+        db,
+        index_id=index_row.id,
+        trade_date=trade_date,
+        session=SessionType.AM,
+        last=int(round(float(am_close) * 100)) if am_close is not None else 0,
+        change_points=None,
+        change_pct=None,
+        turnover_amount=int(round(am_amount)),
+        turnover_currency="HKD",
+        data_updated_at=am_asof.replace(tzinfo=timezone(timedelta(hours=8))),
+        is_closed=True,
+        source="EASTMONEY",
+        payload={"klt": "5", "beg": beg, "end": end, "cutoff": "12:30", "bars": bar_count},
+    )
 
-            index_row = ensure_market_index(db, "HSI")
-            upsert_realtime_snapshot(
-                db,
-                index_id=index_row.id,
-                trade_date=trade_date,
-                session=SessionType.AM,
-                last=int(round(float(am_close) * 100)) if am_close is not None else 0,
-                change_points=None,
-                change_pct=None,
-                turnover_amount=int(round(am_amount)),
-                turnover_currency="HKD",
-                data_updated_at=am_asof.replace(tzinfo=timezone(timedelta(hours=8))),
-                is_closed=True,
-                source="EASTMONEY",
-                payload={"klt": "5", "beg": beg, "end": end, "cutoff": "12:30", "bars": len(bars)},
+    status = "success"
+    summary = {"trade_date": str(trade_date), "turnover_amount": int(round(am_amount)), "bars": bar_count, "source": "EASTMONEY"}
+    return status, summary
+
+
+@job("maintain_realtime_snapshot")
+def _job_maintain_realtime_snapshot(db: Session, params: dict | None) -> tuple[str, dict]:
+    today = datetime.now(ZoneInfo(settings.TZ)).date()
+    status = "success"
+    summary = maintain_realtime_snapshots(db, today=today)
+    return status, summary
+
+
+def _add_timing_rows(db: Session, run: JobRun, timings: TimingCollector) -> None:
+    for row in timings.rows():
+        db.add(
+            JobRunTiming(
+                job_run_id=run.id,
+                job_name=run.job_name,
+                phase=row["phase"],
+                calls=row["calls"],
+                seconds=round(row["seconds"], 6),
+                http_requests=row["http_requests"],
+                http_bytes=row["http_bytes"],
+                db_statements=row["db_statements"],
+                db_commits=row["db_commits"],
+                row_count=row["rows"],
             )
+        )
 
-            status = "success"
-            summary = {"trade_date": str(trade_date), "turnover_amount": int(round(am_amount)), "bars": len(bars), "source": "EASTMONEY"}
 
-        else:
-            raise ValueError(f"Unknown job_name: {job_name}")
+def _observe_job(job_name: str, status: str, timings: TimingCollector) -> None:
+    JOB_RUNS.inc(job_name, status)
+    JOB_SECONDS.observe((timings.finished or pytime.monotonic()) - timings.started, job_name)
 
-        run.summary = summary
+
+def _finish_abandoned_run(run_id: int, worker: threading.Thread) -> None:
+    """Once a timed-out handler thread exits, move its run from "timed_out" to "failed"."""
+
+    def watch() -> None:
+        worker.join()
+        db = SessionLocal()
+        try:
+            db.query(JobRun).filter(JobRun.id == run_id, JobRun.status == "timed_out").update(
+                {JobRun.status: "failed", JobRun.finished_at: datetime.now(timezone.utc)},
+                synchronize_session=False,
+            )
+            db.commit()
+        except Exception:
+            logger.exception("Failed to close timed-out job run: id=%s", run_id)
+        finally:
+            db.close()
+
+    threading.Thread(target=watch, name=f"job-timeout-watch:{run_id}", daemon=True).start()
+
+
+def run_job(db: Session, job_name: str, params: dict | None = None, *, run: JobRun | None = None) -> JobRun:
+    # `run` is a job_run row already claimed by the job queue (status "running"), see app.services.job_queue.
+    if run is None:
+        run = JobRun(
+            job_name=job_name,
+            status="running",
+            summary={"params": params} if params else None,
+            claimed_by=PROCESS_ID,
+            heartbeat_at=datetime.now(timezone.utc),
+        )
+        db.add(run)
+        db.commit()
+        db.refresh(run)
+
+    timings = TimingCollector()
+    try:
+        spec = get_job(job_name)
+        with collect_timings(timings):
+            status, summary = run_handler(spec, db, params)
+
+        run.summary = {**summary, "timings": timings.as_summary()} if isinstance(summary, dict) else summary
         run.status = status
         run.finished_at = datetime.now(timezone.utc)
+        _add_timing_rows(db, run, timings)
         db.commit()
         db.refresh(run)
+        _observe_job(job_name, status, timings)
+        _flush_dashboard_state(db)
         return run
 
     except Exception as e:
-        run.status = "failed"
+        # A timed-out handler is still running: the row stays non-terminal ("timed_out", no finished_at) and keeps
+        # counting toward the job queue's concurrency cap until the thread exits (then "failed").
+        timed_out = isinstance(e, JobTimeoutError)
+        run.status = "timed_out" if timed_out else "failed"
         run.error = f"{e}\n\n{traceback.format_exc()}"
-        run.finished_at = datetime.now(timezone.utc)
+        if not timed_out:
+            run.finished_at = datetime.now(timezone.utc)
+        if timings.phases:
+            run.summary = {**(run.summary or {}), "timings": timings.as_summary()}
+            _add_timing_rows(db, run, timings)
         db.commit()
         db.refresh(run)
+        if timed_out:
+            _finish_abandoned_run(run.id, e.worker)
+        _observe_job(job_name, run.status, timings)
+        # partial writes committed before the failure are still reflected on the homepage
+        _flush_dashboard_state(db)
         return run
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+import threading
 from contextlib import asynccontextmanager
 from pathlib import Path
 
@@ -12,13 +13,20 @@ import signal
 faulthandler.register(signal.SIGUSR1)
 
 from fastapi import FastAPI
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 
 from app.config import settings
+from app.services.http_client import close_all_clients, http_client_stats
+from app.services.job_queue import job_queue_stats, start_job_queue, stop_job_queue
 from app.services.job_scheduler import start_scheduler, stop_scheduler
-from app.web.routes import router as web_router
-from app.web.visit_logs import add_visit_logging
+from app.services.prometheus import render_metrics
+from app.sources.eastmoney_realtime import default_codes as eastmoney_default_codes
+from app.sources.eastmoney_secid import warm_secid_cache
+from app.web.auth import session_user_cache
+from app.web.request_profiling import add_request_metrics, add_request_profiling
+from app.web.routes import dashboard_context_cache, router as web_router
+from app.web.visit_logs import add_visit_logging, stop_visit_log_writer, visit_log_stats
 
 base_path = settings.BASE_PATH.rstrip("/")
 logger = logging.getLogger(__name__)
@@ -27,18 +35,34 @@ favicon_path = Path("app/web/static/favicon.ico")
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
     if settings.ENABLE_SCHEDULED_JOBS:
+        # Load persisted Eastmoney secids (and resolve the dashboard codes) off the startup path.
+        threading.Thread(
+            target=warm_secid_cache,
+            kwargs={"codes": eastmoney_default_codes()},
+            name="secid-warmup",
+            daemon=True,
+        ).start()
         start_scheduler()
     else:
         logger.info("Scheduled jobs disabled by ENABLE_SCHEDULED_JOBS.")
+    # Manual runs from /api/jobs/run are executed here regardless of ENABLE_SCHEDULED_JOBS.
+    start_job_queue()
 
     try:
         yield
     finally:
+        stop_job_queue()
         stop_scheduler()
+        close_all_clients()
+        # Flush buffered visit logs before the process exits.
+        stop_visit_log_writer()
 
 
 app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
 add_visit_logging(app)
+# Added last so they wrap the other middleware (last added = outermost) and time the whole request.
+add_request_profiling(app)
+add_request_metrics(app)
 
 # Serve UI/API at root (/) always.
 app.include_router(web_router, prefix="")
@@ -58,12 +82,40 @@ app.mount(f"{base_path}/test", StaticFiles(directory="test"), name="test")
 
 @app.get("/healthz")
 def healthz():
-    return {"ok": True, "app": settings.APP_NAME}
+    return {
+        "ok": True,
+        "app": settings.APP_NAME,
+        "dashboard_cache": dashboard_context_cache.stats(),
+        "http_clients": http_client_stats(),
+        "job_queue": job_queue_stats(),
+        "visit_logs": visit_log_stats(),
+        "session_user_cache": session_user_cache.stats(),
+    }
 
 
 @app.get(f"{base_path}/healthz")
 def healthz_prefixed():
-    return {"ok": True, "app": settings.APP_NAME, "base_path": base_path}
+    return {
+        "ok": True,
+        "app": settings.APP_NAME,
+        "base_path": base_path,
+        "dashboard_cache": dashboard_context_cache.stats(),
+        "http_clients": http_client_stats(),
+        "job_queue": job_queue_stats(),
+        "visit_logs": visit_log_stats(),
+        "session_user_cache": session_user_cache.stats(),
+    }
+
+
+# Prometheus text exposition (per process), see app.services.prometheus.
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.get(f"{base_path}/metrics", include_in_schema=False)
+def metrics_prefixed():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/favicon.ico", include_in_schema=False)
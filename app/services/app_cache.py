@@ -20,3 +20,29 @@ def upsert_cache(db: Session, *, key: str, payload: object | None) -> None:
 
 def get_cache(db: Session, *, key: str) -> AppCache | None:
     return db.query(AppCache).filter(AppCache.key == key).first()
+
+
+def get_cache_many(db: Session, *, keys: list[str]) -> dict[str, AppCache]:
+    if not keys:
+        return {}
+    rows = db.query(AppCache).filter(AppCache.key.in_(keys)).all()
+    return {row.key: row for row in rows}
+
+
+def get_cache_prefix(db: Session, *, prefix: str) -> dict[str, AppCache]:
+    rows = db.query(AppCache).filter(AppCache.key.startswith(prefix, autoescape=True)).all()
+    return {row.key: row for row in rows}
+
+
+def upsert_cache_many(db: Session, *, items: dict[str, object | None]) -> None:
+    """Multi-row upsert of several cache keys with a single commit."""
+
+    if not items:
+        return
+    stmt = pg_insert(AppCache).values([{"key": key, "payload": payload} for key, payload in items.items()])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AppCache.key],
+        set_={"payload": stmt.excluded.payload, "updated_at": datetime.now(timezone.utc)},
+    )
+    db.execute(stmt)
+    db.commit()
@@ -0,0 +1,610 @@
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session, defer
+
+from app.db.models import (
+    HsiQuoteFact,
+    IndexQuoteHistory,
+    IndexRealtimeApiSnapshot,
+    IndexRealtimeSnapshot,
+    MarketIndex,
+    SessionType,
+    TurnoverFact,
+    TurnoverRollingStats,
+)
+from app.services.app_cache import get_cache, upsert_cache
+from app.services.formatting import format_amount_b
+from app.services.minute_kline import load_minute_kline
+from app.services.snapshot_queries import latest_api_snapshots, latest_index_histories, latest_realtime_snapshots
+from app.services.turnover_stats import HSI_FACT_SERIES_KEY, ensure_turnover_stats, index_series_key, stats_avg
+
+logger = logging.getLogger(__name__)
+
+# Precomputed homepage read model.
+# Ingest paths mark touched indices dirty; run_job refreshes only those cards at the end of a run,
+# so a dashboard render is a single app_cache lookup instead of ~25 queries per card.
+DASHBOARD_STATE_KEY = "homepage:dashboard_state"
+DASHBOARD_STATE_VERSION = 1
+DASHBOARD_CODES = ("HSI", "SSE", "SZSE")
+GLOBAL_QUOTES_LOOKBACK_DAYS = 14
+INDEX_FALLBACK_NAMES = {"HSI": "恒生指数", "SSE": "上证指数", "SZSE": "深证成指"}
+INDEX_FALLBACK_NAMES_EN = {"HSI": "Hang Seng Index", "SSE": "Shanghai Composite", "SZSE": "Shenzhen Component"}
+
+_dirty_lock = threading.Lock()
+_dirty_index_ids: set[int] = set()
+_dirty_codes: set[str] = set()
+# Bumped on every dashboard-relevant write; the web tier keys its in-process render cache on it.
+_data_version = 0
+
+
+def dashboard_data_version() -> int:
+    return _data_version
+
+
+def _bump_data_version() -> None:
+    global _data_version
+    with _dirty_lock:
+        _data_version += 1
+
+
+def mark_dashboard_dirty(*, index_id: int | None = None, code: str | None = None) -> None:
+    """Record that an ingest write touched an index (by id or by code)."""
+
+    global _data_version
+    with _dirty_lock:
+        _data_version += 1
+        if index_id is not None:
+            _dirty_index_ids.add(int(index_id))
+        if code:
+            _dirty_codes.add(code.upper())
+
+
+def _take_dirty() -> tuple[set[int], set[str]]:
+    global _dirty_index_ids, _dirty_codes
+    with _dirty_lock:
+        index_ids, codes = _dirty_index_ids, _dirty_codes
+        _dirty_index_ids, _dirty_codes = set(), set()
+    return index_ids, codes
+
+
+def _restore_dirty(index_ids: set[int], codes: set[str]) -> None:
+    with _dirty_lock:
+        _dirty_index_ids.update(index_ids)
+        _dirty_codes.update(codes)
+
+
+def _order_hsi_realtime_by_data_updated_at(
+    snap_realtime: IndexRealtimeSnapshot | None,
+    snap_api: IndexRealtimeApiSnapshot | None,
+) -> tuple[IndexRealtimeSnapshot | IndexRealtimeApiSnapshot | None, IndexRealtimeSnapshot | IndexRealtimeApiSnapshot | None]:
+    if snap_realtime is None and snap_api is None:
+        return None, None
+    if snap_realtime is None:
+        return snap_api, None
+    if snap_api is None:
+        return snap_realtime, None
+    if snap_api.data_updated_at > snap_realtime.data_updated_at:
+        return snap_api, snap_realtime
+    return snap_realtime, snap_api
+
+
+def _close_points_series(db: Session, *, index_id: int, limit: int = 300) -> list[float]:
+    rows = (
+        db.query(IndexQuoteHistory.last)
+        .filter(IndexQuoteHistory.index_id == index_id)
+        .filter(IndexQuoteHistory.session == SessionType.FULL)
+        .order_by(IndexQuoteHistory.trade_date.desc())
+        .limit(limit)
+        .all()
+    )
+    return [round(v / 100.0, 2) for (v,) in rows if v is not None]
+
+
+def _latest_turnover_fact(db: Session, *, session: SessionType) -> TurnoverFact | None:
+    return (
+        db.query(TurnoverFact)
+        .filter(TurnoverFact.session == session)
+        .order_by(TurnoverFact.trade_date.desc())
+        .first()
+    )
+
+
+def _latest_turnover_fact_before(db: Session, *, session: SessionType, before_date: date) -> TurnoverFact | None:
+    return (
+        db.query(TurnoverFact)
+        .filter(TurnoverFact.session == session)
+        .filter(TurnoverFact.trade_date < before_date)
+        .order_by(TurnoverFact.trade_date.desc())
+        .first()
+    )
+
+
+def _latest_hsi_quote(db: Session, *, session: SessionType) -> HsiQuoteFact | None:
+    return (
+        db.query(HsiQuoteFact)
+        .filter(HsiQuoteFact.session == session)
+        .order_by(HsiQuoteFact.trade_date.desc())
+        .first()
+    )
+
+
+def _hsi_quote_points_series(db: Session, *, limit: int = 300) -> list[float]:
+    rows = (
+        db.query(HsiQuoteFact.last)
+        .filter(HsiQuoteFact.session == SessionType.FULL)
+        .order_by(HsiQuoteFact.trade_date.desc())
+        .limit(limit)
+        .all()
+    )
+    return [round(v / 100.0, 2) for (v,) in rows if v is not None]
+
+
+def _avg(stats: TurnoverRollingStats | None, n: int) -> float:
+    value = stats_avg(stats, n)
+    if value is None:
+        return 0.0
+    return round(value / 1_000_000_000, 2)
+
+
+def _to_yi(value: int | None) -> float:
+    # legacy name: now returns billions (B)
+    if value is None:
+        return 0.0
+    return round(value / 1_000_000_000, 2)
+
+
+def _fmt_price(value_x100: int | None) -> str:
+    if value_x100 is None:
+        return "-"
+    return f"{value_x100 / 100:,.2f}"
+
+
+def _fmt_pct(value_x100: int | None) -> str:
+    if value_x100 is None:
+        return "--"
+    return f"{value_x100 / 100:+.2f}%"
+
+
+def fmt_sync_time(value: datetime | None) -> str:
+    if value is None:
+        return "N/A"
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _prefetch_card_rows(db: Session, *, index_rows: list[MarketIndex], today: date) -> dict[str, dict]:
+    """Latest history/snapshot rows for all card indices, one DISTINCT ON query per kind."""
+
+    ids = [row.id for row in index_rows]
+    hsi_ids = [row.id for row in index_rows if row.code.upper() == "HSI"]
+    am_cutoff = datetime.combine(today, time(12, 30), tzinfo=ZoneInfo("Asia/Shanghai"))
+    return {
+        "history": latest_index_histories(db, index_ids=ids),
+        "history_before": latest_index_histories(db, index_ids=ids, before_date=today),
+        # Today's turnover/price come from realtime snapshots.
+        "snap_full": latest_realtime_snapshots(db, index_ids=ids, trade_date=today, sessions=[SessionType.FULL]),
+        # AM turnover: latest snapshot updated at/before 12:30.
+        # - CN indices: we persist explicit session=AM rows.
+        # - HSI: we may only have session=FULL snapshots; use those as AM when <=12:30.
+        "snap_am": latest_realtime_snapshots(
+            db,
+            index_ids=ids,
+            trade_date=today,
+            sessions=[SessionType.AM, SessionType.FULL],
+            updated_before=am_cutoff,
+        ),
+        "api_full": latest_api_snapshots(db, index_ids=hsi_ids, trade_date=today, sessions=[SessionType.FULL]),
+        "stats": ensure_turnover_stats(db, index_ids=ids, include_hsi_fact=bool(hsi_ids)),
+    }
+
+
+def _build_card_state(
+    db: Session,
+    *,
+    code: str,
+    index_row: MarketIndex | None,
+    today: date,
+    prefetched: dict[str, dict],
+) -> dict:
+    """Compute one homepage card (HSI/SSE/SZSE) with the full fallback chain.
+
+    The result is language-neutral and JSON-serializable; names are localized at render time.
+    """
+
+    full = None
+    am = None
+    snap_full = None
+    snap_am = None
+    snap_api_full = None
+    hsi_primary_full = None
+    hsi_secondary_full = None
+
+    if index_row is not None:
+        full = prefetched["history"].get((index_row.id, SessionType.FULL))
+        am = prefetched["history"].get((index_row.id, SessionType.AM))
+
+        snap_full = prefetched["snap_full"].get((index_row.id, SessionType.FULL))
+        if code == "HSI":
+            snap_api_full = prefetched["api_full"].get((index_row.id, SessionType.FULL))
+            hsi_primary_full, hsi_secondary_full = _order_hsi_realtime_by_data_updated_at(snap_full, snap_api_full)
+
+        snap_am = prefetched["snap_am"].get((index_row.id, SessionType.AM))
+        if snap_am is None and code == "HSI":
+            snap_am = prefetched["snap_am"].get((index_row.id, SessionType.FULL))
+
+    # "today" turnover logic:
+    # AM: snapshot (<=12:30) -> history latest AM
+    # FULL: (HSI) newest(data_updated_at) between realtime_snapshot/api_snapshot -> the other realtime source -> history latest FULL -> turnover_fact latest FULL
+    am_turnover = (
+        snap_am.turnover_amount
+        if snap_am is not None and snap_am.turnover_amount is not None
+        else (am.turnover_amount if am is not None else None)
+    )
+    full_turnover = (
+        hsi_primary_full.turnover_amount
+        if code == "HSI" and hsi_primary_full is not None and hsi_primary_full.turnover_amount is not None
+        else (
+            hsi_secondary_full.turnover_amount
+            if code == "HSI" and hsi_secondary_full is not None and hsi_secondary_full.turnover_amount is not None
+            else (
+                snap_full.turnover_amount
+                if snap_full is not None and snap_full.turnover_amount is not None
+                else (full.turnover_amount if full is not None else None)
+            )
+        )
+        if code == "HSI"
+        else (
+            snap_full.turnover_amount
+            if snap_full is not None and snap_full.turnover_amount is not None
+            else (full.turnover_amount if full is not None else None)
+        )
+    )
+
+    # Rolling 5/10/30-day turnover aggregates (maintained on write, see app.services.turnover_stats).
+    stats = prefetched["stats"]
+    full_stats = stats.get((index_series_key(index_row.id), SessionType.FULL)) if index_row is not None else None
+    am_stats = stats.get((index_series_key(index_row.id), SessionType.AM)) if index_row is not None else None
+
+    # Yesterday turnover (previous trading day in history table)
+    yesterday_full_hist = (
+        prefetched["history_before"].get((index_row.id, SessionType.FULL)) if index_row is not None else None
+    )
+    yesterday_am_hist = (
+        prefetched["history_before"].get((index_row.id, SessionType.AM)) if index_row is not None else None
+    )
+    yesterday_full_turnover = yesterday_full_hist.turnover_amount if yesterday_full_hist is not None else None
+    yesterday_am_turnover = yesterday_am_hist.turnover_amount if yesterday_am_hist is not None else None
+
+    # HSI yesterday AM: allow backfill from realtime snapshots (append-only) when history table has no AM.
+    if code == "HSI" and index_row is not None and yesterday_am_turnover is None:
+        # Determine yesterday trading date (prefer history FULL date; else calendar yesterday)
+        y_date = yesterday_full_hist.trade_date if yesterday_full_hist is not None else (today - timedelta(days=1))
+        # Try snapshot session=AM first; fallback to session=FULL snapshot <=12:30
+        y_am_snap = (
+            db.query(IndexRealtimeSnapshot)
+            .options(defer(IndexRealtimeSnapshot.payload))
+            .filter(IndexRealtimeSnapshot.index_id == index_row.id)
+            .filter(IndexRealtimeSnapshot.trade_date == y_date)
+            .filter(IndexRealtimeSnapshot.session == SessionType.AM)
+            .order_by(IndexRealtimeSnapshot.data_updated_at.desc(), IndexRealtimeSnapshot.id.desc())
+            .first()
+        )
+        if y_am_snap is None:
+            y_cutoff = datetime.combine(y_date, time(12, 30), tzinfo=ZoneInfo("Asia/Shanghai"))
+            y_am_snap = (
+                db.query(IndexRealtimeSnapshot)
+                .options(defer(IndexRealtimeSnapshot.payload))
+                .filter(IndexRealtimeSnapshot.index_id == index_row.id)
+                .filter(IndexRealtimeSnapshot.trade_date == y_date)
+                .filter(IndexRealtimeSnapshot.session == SessionType.FULL)
+                .filter(IndexRealtimeSnapshot.data_updated_at <= y_cutoff)
+                .order_by(IndexRealtimeSnapshot.data_updated_at.desc(), IndexRealtimeSnapshot.id.desc())
+                .first()
+            )
+        if y_am_snap is not None and y_am_snap.turnover_amount is not None:
+            yesterday_am_turnover = int(y_am_snap.turnover_amount)
+
+    points_series = _close_points_series(db, index_id=index_row.id) if index_row is not None else []
+
+    # "latest price" on homepage: today's realtime snapshot first; fallback to history.
+    full_last = (
+        hsi_primary_full.last
+        if code == "HSI" and hsi_primary_full is not None and hsi_primary_full.last is not None
+        else (
+            hsi_secondary_full.last
+            if code == "HSI" and hsi_secondary_full is not None and hsi_secondary_full.last is not None
+            else (snap_full.last if snap_full is not None else (full.last if full is not None else None))
+        )
+    )
+    price_change_pct = (
+        hsi_primary_full.change_pct
+        if code == "HSI" and hsi_primary_full is not None and hsi_primary_full.change_pct is not None
+        else (
+            hsi_secondary_full.change_pct
+            if code == "HSI" and hsi_secondary_full is not None and hsi_secondary_full.change_pct is not None
+            else (
+                snap_full.change_pct
+                if snap_full is not None and snap_full.change_pct is not None
+                else (full.change_pct if full is not None else None)
+            )
+        )
+    )
+    updated_at = (
+        (
+            hsi_primary_full.data_updated_at
+            if hsi_primary_full is not None
+            else (
+                hsi_secondary_full.data_updated_at
+                if hsi_secondary_full is not None
+                else (full.asof_ts if full is not None else None)
+            )
+        )
+        if code == "HSI"
+        else (
+            snap_full.data_updated_at
+            if snap_full is not None
+            else (full.asof_ts if full is not None else None)
+        )
+    )
+    if updated_at is None and full is not None:
+        updated_at = full.updated_at
+
+    if code == "HSI":
+        fallback_quote_full = _latest_hsi_quote(db, session=SessionType.FULL)
+        fallback_turnover_full = _latest_turnover_fact(db, session=SessionType.FULL)
+
+        if full_last is None and fallback_quote_full is not None:
+            full_last = fallback_quote_full.last
+        if price_change_pct is None and fallback_quote_full is not None:
+            price_change_pct = fallback_quote_full.change_pct
+        if updated_at is None and fallback_quote_full is not None:
+            updated_at = fallback_quote_full.asof_ts or fallback_quote_full.updated_at
+
+        # FULL turnover (HSI): if still missing, fallback to turnover_fact FULL.
+        if full_turnover is None and fallback_turnover_full is not None:
+            full_turnover = fallback_turnover_full.turnover_hkd
+        if updated_at is None and fallback_turnover_full is not None:
+            updated_at = fallback_turnover_full.updated_at
+
+        # Yesterday FULL turnover (HSI): if missing, fallback to turnover_fact FULL.
+        if yesterday_full_turnover is None:
+            y_full_fact = _latest_turnover_fact_before(db, session=SessionType.FULL, before_date=today)
+            if y_full_fact is not None:
+                yesterday_full_turnover = y_full_fact.turnover_hkd
+
+        if full_stats is None or not full_stats.cnt_30:
+            full_stats = stats.get((HSI_FACT_SERIES_KEY, SessionType.FULL))
+        if am_stats is None or not am_stats.cnt_30:
+            am_stats = stats.get((HSI_FACT_SERIES_KEY, SessionType.AM))
+        if not points_series:
+            points_series = _hsi_quote_points_series(db)
+
+    today_points = round((full_last / 100.0), 2) if full_last is not None else 0.0
+    max_points = max(points_series, default=today_points)
+    if max_points <= 0:
+        max_points = max(1.0, today_points)
+
+    is_up = price_change_pct is not None and price_change_pct >= 0
+    price_class = "text-emerald-500" if is_up else "text-rose-500"
+    if price_change_pct is None:
+        price_class = "text-slate-300"
+    arrow_path = "M6 15l6-6 6 6" if is_up else "M6 9l6 6 6-6"
+
+    # Peak FULL turnover over history (not limited by series length).
+    peak_ratio = None
+    peak_turnover = None
+    if index_row is not None:
+        peak_key = HSI_FACT_SERIES_KEY if code == "HSI" else index_series_key(index_row.id)
+        peak_stats = stats.get((peak_key, SessionType.FULL))
+        peak_turnover = peak_stats.peak_turnover if peak_stats is not None else None
+
+    if full_turnover and peak_turnover:
+        peak_ratio = round(full_turnover / peak_turnover * 100)
+
+    name_en = None
+    if index_row is not None:
+        name_en = (index_row.name_en or "").strip() or None
+    if not name_en:
+        name_en = INDEX_FALLBACK_NAMES_EN.get(code, code)
+    name_zh = index_row.name_zh if index_row is not None else INDEX_FALLBACK_NAMES[code]
+
+    # Minute series is derived at ingest time (see app.services.minute_kline); no snapshot payload is loaded here.
+    minute_kline = load_minute_kline(db, code=code, index_id=index_row.id if index_row is not None else None)
+
+    return {
+        "code": code,
+        "name_zh": name_zh,
+        "name_en": name_en,
+        "ratio_to_peak": peak_ratio,
+        "updated_at": updated_at.isoformat() if updated_at is not None else None,
+        "card": {
+            "code": code,
+            "chart_id": f"{code.lower()}-chart",
+            "kline_chart_id": f"{code.lower()}-kline-chart",
+            "last_price": _fmt_price(full_last),
+            "change_pct": _fmt_pct(price_change_pct),
+            "price_class": price_class,
+            "change_class": price_class,
+            "arrow_path": arrow_path,
+            "updated_at": fmt_sync_time(updated_at),
+            "today_turnover_am": format_amount_b(am_turnover),
+            "today_turnover_day": format_amount_b(full_turnover),
+        },
+        "chart": {
+            "id": f"{code.lower()}-chart",
+            "kline_id": f"{code.lower()}-kline-chart",
+            "data": {
+                "todayPoints": today_points,
+                "maxPoints": round(max_points, 2),
+                "todayVolAM": _to_yi(am_turnover),
+                "todayVolDay": _to_yi(full_turnover),
+                "yesterdayVolAM": _to_yi(yesterday_am_turnover),
+                "yesterdayVolDay": _to_yi(yesterday_full_turnover),
+                "avgVolAM": _avg(am_stats, 5),
+                "avgVolDay": _avg(full_stats, 5),
+                "tenAvgVolAM": _avg(am_stats, 10),
+                "tenAvgVolDay": _avg(full_stats, 10),
+                "maxVolAM": _to_yi(am_stats.max_30 if am_stats is not None else None),
+                "maxVolDay": _to_yi(int(peak_turnover) if peak_turnover is not None else None),
+                "minuteKline": minute_kline,
+            },
+        },
+    }
+
+
+def _build_global_quotes(db: Session, *, indexes: list[MarketIndex], today: date) -> list[dict]:
+    active = [idx for idx in indexes if idx.is_active]
+    # Recent window first so the lookup prunes to the current partitions; indices without a
+    # recent snapshot fall back to an unbounded scan.
+    snaps = latest_realtime_snapshots(
+        db,
+        index_ids=[idx.id for idx in active],
+        since_date=today - timedelta(days=GLOBAL_QUOTES_LOOKBACK_DAYS),
+        sessions=[SessionType.FULL],
+        latest_by="id",
+    )
+    stale_ids = [idx.id for idx in active if (idx.id, SessionType.FULL) not in snaps]
+    if stale_ids:
+        snaps.update(
+            latest_realtime_snapshots(db, index_ids=stale_ids, sessions=[SessionType.FULL], latest_by="id")
+        )
+    result = []
+    for idx in active:
+        snap = snaps.get((idx.id, SessionType.FULL))
+        if snap is not None:
+            result.append(_global_quote_item(idx, snap))
+    return result
+
+
+def _global_quote_item(idx: MarketIndex, snap: IndexRealtimeSnapshot) -> dict:
+    return {
+        "index_id": idx.id,
+        "code": idx.code,
+        "display_order": idx.display_order,
+        "name_zh": idx.name_zh,
+        "name_en": idx.name_en,
+        "last": snap.last / 100.0,
+        "change": snap.change_points / 100.0 if snap.change_points is not None else 0.0,
+        "pct": snap.change_pct / 100.0 if snap.change_pct is not None else 0.0,
+        "asof": fmt_sync_time(snap.data_updated_at),
+    }
+
+
+def _active_indices(db: Session) -> list[MarketIndex]:
+    return (
+        db.query(MarketIndex)
+        .filter(sa.or_(MarketIndex.is_active.is_(True), MarketIndex.code.in_(DASHBOARD_CODES)))
+        .order_by(MarketIndex.display_order.asc())
+        .all()
+    )
+
+
+def build_dashboard_state(db: Session, *, today: date) -> dict:
+    """Full rebuild of the homepage read model."""
+
+    indexes = _active_indices(db)
+    index_by_code = {row.code.upper(): row for row in indexes}
+    card_rows = [index_by_code[code] for code in DASHBOARD_CODES if code in index_by_code]
+    prefetched = _prefetch_card_rows(db, index_rows=card_rows, today=today)
+
+    cards = {
+        code: _build_card_state(
+            db, code=code, index_row=index_by_code.get(code), today=today, prefetched=prefetched
+        )
+        for code in DASHBOARD_CODES
+    }
+
+    try:
+        global_quotes = _build_global_quotes(db, indexes=indexes, today=today)
+    except Exception:
+        logger.exception("failed to build dashboard global quotes")
+        global_quotes = []
+
+    return {
+        "version": DASHBOARD_STATE_VERSION,
+        "trade_date": today.isoformat(),
+        "built_at": datetime.now(timezone.utc).isoformat(),
+        "cards": cards,
+        "global_quotes": global_quotes,
+    }
+
+
+def _is_current(payload: object, *, today: date) -> bool:
+    return (
+        isinstance(payload, dict)
+        and payload.get("version") == DASHBOARD_STATE_VERSION
+        and payload.get("trade_date") == today.isoformat()
+        and isinstance(payload.get("cards"), dict)
+    )
+
+
+def refresh_dashboard_state(db: Session, *, today: date | None = None) -> dict | None:
+    """Apply pending dirty marks to the stored read model.
+
+    Only cards/global quotes of touched indices are recomputed. If the stored state is missing or from
+    another trade date, a full rebuild is done instead. Returns None when nothing was dirty.
+    """
+
+    index_ids, codes = _take_dirty()
+    if not index_ids and not codes:
+        return None
+
+    today = today or date.today()
+    try:
+        cached = get_cache(db, key=DASHBOARD_STATE_KEY)
+        state = cached.payload if cached is not None and _is_current(cached.payload, today=today) else None
+        if state is None:
+            state = build_dashboard_state(db, today=today)
+        else:
+            indexes = _active_indices(db)
+            touched = [row for row in indexes if row.id in index_ids or row.code.upper() in codes]
+            touched_codes = {row.code.upper() for row in touched} | codes
+            index_by_code = {row.code.upper(): row for row in indexes}
+
+            dirty_codes = [code for code in DASHBOARD_CODES if code in touched_codes]
+            prefetched = _prefetch_card_rows(
+                db,
+                index_rows=[index_by_code[code] for code in dirty_codes if code in index_by_code],
+                today=today,
+            )
+            for code in dirty_codes:
+                state["cards"][code] = _build_card_state(
+                    db, code=code, index_row=index_by_code.get(code), today=today, prefetched=prefetched
+                )
+
+            touched_ids = {row.id for row in touched}
+            quotes = [q for q in state.get("global_quotes") or [] if q.get("index_id") not in touched_ids]
+            quotes.extend(_build_global_quotes(db, indexes=touched, today=today))
+            quotes.sort(key=lambda q: (q.get("display_order") or 0, q.get("code") or ""))
+            state["global_quotes"] = quotes
+            state["built_at"] = datetime.now(timezone.utc).isoformat()
+
+        upsert_cache(db, key=DASHBOARD_STATE_KEY, payload=state)
+        # The stored read model changed after the marks were taken; drop render caches built in between.
+        _bump_data_version()
+        return state
+    except Exception:
+        db.rollback()
+        _restore_dirty(index_ids, codes)
+        raise
+
+
+def load_dashboard_state(db: Session, *, today: date) -> dict:
+    """Single keyed read for the homepage; rebuilds when the stored state is missing or stale."""
+
+    cached = get_cache(db, key=DASHBOARD_STATE_KEY)
+    if cached is not None and _is_current(cached.payload, today=today):
+        return cached.payload
+
+    state = build_dashboard_state(db, today=today)
+    try:
+        upsert_cache(db, key=DASHBOARD_STATE_KEY, payload=state)
+    except Exception:
+        db.rollback()
+        logger.exception("failed to persist dashboard state")
+    return state
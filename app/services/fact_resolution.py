@@ -0,0 +1,352 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import date, time
+from typing import NamedTuple
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.models import SessionType
+from app.services.dashboard_state import mark_dashboard_dirty
+from app.services.job_timing import timed
+from app.services.turnover_stats import update_index_turnover_stats, update_turnover_fact_stats
+
+# Set-based best-source resolution for index_quote_history and turnover_fact.
+# One INSERT ... SELECT DISTINCT ON ... ON CONFLICT DO UPDATE recomputes every fact of a key set
+# (or a date range) instead of loading source records and looping over SOURCE_PRIORITY per key.
+# Selection rule: ok records with a value, ranked by SOURCE_PRIORITY (unknown sources last),
+# then newest fetched_at, then newest id.
+
+CHUNK_SIZE = 1000
+
+
+class ResolvedHistory(NamedTuple):
+    index_id: int
+    trade_date: date
+    session: SessionType
+    last: int | None
+    turnover_amount: int | None
+    inserted: bool
+
+
+class ResolvedFact(NamedTuple):
+    trade_date: date
+    session: SessionType
+    turnover_hkd: int | None
+    inserted: bool
+
+
+@dataclass
+class Resolution:
+    rows: list = field(default_factory=list)
+
+    @property
+    def written(self) -> int:
+        return len(self.rows)
+
+    @property
+    def inserted(self) -> int:
+        return sum(1 for row in self.rows if row.inserted)
+
+    @property
+    def updated(self) -> int:
+        return self.written - self.inserted
+
+    def counts(self) -> dict[str, int]:
+        return {"written": self.written, "inserted": self.inserted, "updated": self.updated}
+
+
+def source_priority_case(alias: str = "r") -> tuple[str, dict]:
+    """SQL CASE ranking <alias>.source by SOURCE_PRIORITY, plus its bind params."""
+
+    priorities = [item.strip().upper() for item in settings.SOURCE_PRIORITY.split(",") if item.strip()]
+    params = {f"prio_{i}": source for i, source in enumerate(priorities)}
+    whens = " ".join(f"WHEN :prio_{i} THEN {i}" for i in range(len(priorities)))
+    case_sql = f"CASE upper({alias}.source) {whens} ELSE {len(priorities)} END" if whens else "0"
+    return case_sql, params
+
+
+def _chunks(items: list, size: int) -> Iterable[list]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _range_filters(
+    *,
+    date_from: date | None,
+    date_to: date | None,
+    sessions: Iterable[SessionType] | None,
+    index_ids: Iterable[int] | None = None,
+) -> tuple[str, dict]:
+    if date_from is None and date_to is None:
+        raise ValueError("either keys or date_from/date_to is required")
+
+    clauses: list[str] = []
+    params: dict = {}
+    if date_from is not None:
+        clauses.append("r.trade_date >= :date_from")
+        params["date_from"] = date_from
+    if date_to is not None:
+        clauses.append("r.trade_date <= :date_to")
+        params["date_to"] = date_to
+    if sessions is not None:
+        clauses.append("r.session = ANY(CAST(:sessions AS sessiontype[]))")
+        params["sessions"] = [SessionType(s).value for s in sessions]
+    if index_ids is not None:
+        clauses.append("r.index_id = ANY(CAST(:index_ids AS integer[]))")
+        params["index_ids"] = sorted({int(v) for v in index_ids})
+    return "".join(f" AND {c}" for c in clauses), params
+
+
+def _index_history_sql(*, by_keys: bool, filters: str, priority_case: str) -> sa.TextClause:
+    keys_cte = (
+        """
+        keys AS (
+            SELECT * FROM unnest(
+                CAST(:key_index_ids AS integer[]),
+                CAST(:key_trade_dates AS date[]),
+                CAST(:key_sessions AS sessiontype[])
+            ) AS k(index_id, trade_date, session)
+        ),"""
+        if by_keys
+        else ""
+    )
+    keys_join = (
+        "JOIN keys k ON k.index_id = r.index_id AND k.trade_date = r.trade_date AND k.session = r.session"
+        if by_keys
+        else ""
+    )
+    return sa.text(
+        f"""
+        WITH {keys_cte}
+        best AS (
+            SELECT DISTINCT ON (r.index_id, r.trade_date, r.session)
+                r.*,
+                count(*) OVER (PARTITION BY r.index_id, r.trade_date, r.session) AS source_count
+            FROM index_quote_source_record r
+            {keys_join}
+            WHERE r.ok IS TRUE AND r.last IS NOT NULL{filters}
+            ORDER BY r.index_id, r.trade_date, r.session, {priority_case}, r.fetched_at DESC, r.id DESC
+        )
+        INSERT INTO index_quote_history (
+            index_id, trade_date, session, last, change_points, change_pct,
+            turnover_amount, turnover_currency, best_source, quality, source_count, asof_ts, payload
+        )
+        SELECT
+            b.index_id, b.trade_date, b.session, b.last, b.change_points, b.change_pct,
+            b.turnover_amount, COALESCE(b.turnover_currency, mi.currency), b.source,
+            CASE WHEN upper(b.source) = 'HKEX' THEN 'official'::quality ELSE 'provisional'::quality END,
+            b.source_count, b.asof_ts, b.payload
+        FROM best b
+        JOIN market_index mi ON mi.id = b.index_id
+        ON CONFLICT (index_id, trade_date, session) DO UPDATE SET
+            last = EXCLUDED.last,
+            change_points = EXCLUDED.change_points,
+            change_pct = EXCLUDED.change_pct,
+            turnover_amount = EXCLUDED.turnover_amount,
+            turnover_currency = EXCLUDED.turnover_currency,
+            best_source = EXCLUDED.best_source,
+            quality = EXCLUDED.quality,
+            source_count = EXCLUDED.source_count,
+            asof_ts = EXCLUDED.asof_ts,
+            payload = EXCLUDED.payload,
+            updated_at = now()
+        RETURNING index_id, trade_date, session, last, turnover_amount, (xmax = 0) AS inserted
+        """
+    )
+
+
+def _turnover_fact_sql(*, by_keys: bool, filters: str, priority_case: str) -> sa.TextClause:
+    keys_cte = (
+        """
+        keys AS (
+            SELECT * FROM unnest(
+                CAST(:key_trade_dates AS date[]),
+                CAST(:key_sessions AS sessiontype[])
+            ) AS k(trade_date, session)
+        ),"""
+        if by_keys
+        else ""
+    )
+    keys_join = "JOIN keys k ON k.trade_date = r.trade_date AND k.session = r.session" if by_keys else ""
+    return sa.text(
+        f"""
+        WITH {keys_cte}
+        best AS (
+            SELECT DISTINCT ON (r.trade_date, r.session)
+                r.trade_date, r.session, r.source, r.turnover_hkd
+            FROM turnover_source_record r
+            {keys_join}
+            WHERE r.ok IS TRUE AND r.turnover_hkd IS NOT NULL{filters}
+            ORDER BY r.trade_date, r.session, {priority_case}, r.fetched_at DESC, r.id DESC
+        )
+        INSERT INTO turnover_fact (
+            trade_date, session, turnover_hkd, cutoff_time, is_half_day_market, best_source, quality
+        )
+        SELECT
+            b.trade_date, b.session, b.turnover_hkd, CAST(:cutoff_time AS time), false, b.source,
+            CASE WHEN upper(b.source) = 'HKEX' THEN 'official'::quality ELSE 'provisional'::quality END
+        FROM best b
+        ON CONFLICT (trade_date, session) DO UPDATE SET
+            turnover_hkd = EXCLUDED.turnover_hkd,
+            cutoff_time = EXCLUDED.cutoff_time,
+            best_source = EXCLUDED.best_source,
+            quality = EXCLUDED.quality,
+            updated_at = now()
+        RETURNING trade_date, session, turnover_hkd, (xmax = 0) AS inserted
+        """
+    )
+
+
+def finalize_index_history(db: Session, resolution: Resolution) -> None:
+    """Post-commit bookkeeping: rolling stats per touched series + homepage dirty marks."""
+
+    by_series: dict[tuple[int, SessionType], list[ResolvedHistory]] = {}
+    for row in resolution.rows:
+        by_series.setdefault((row.index_id, row.session), []).append(row)
+
+    for (index_id, session), rows in sorted(by_series.items(), key=lambda kv: (kv[0][0], kv[0][1].value)):
+        if len(rows) == 1:
+            row = rows[0]
+            update_index_turnover_stats(
+                db,
+                index_id=index_id,
+                session=session,
+                trade_date=row.trade_date,
+                turnover=row.turnover_amount,
+                last=row.last,
+            )
+        else:
+            update_index_turnover_stats(db, index_id=index_id, session=session, rebuild=True)
+        mark_dashboard_dirty(index_id=index_id)
+
+
+def finalize_turnover_facts(db: Session, resolution: Resolution) -> None:
+    by_session: dict[SessionType, list[ResolvedFact]] = {}
+    for row in resolution.rows:
+        by_session.setdefault(row.session, []).append(row)
+
+    for session, rows in sorted(by_session.items(), key=lambda kv: kv[0].value):
+        if len(rows) == 1:
+            update_turnover_fact_stats(db, session=session, trade_date=rows[0].trade_date, turnover=rows[0].turnover_hkd)
+        else:
+            update_turnover_fact_stats(db, session=session, rebuild=True)
+    if resolution.rows:
+        # turnover_fact feeds the HSI card fallbacks (turnover, yesterday, peak).
+        mark_dashboard_dirty(code="HSI")
+
+
+@timed("resolve.index_history")
+def resolve_index_history(
+    db: Session,
+    *,
+    keys: Iterable[tuple[int, date, SessionType]] | None = None,
+    index_ids: Iterable[int] | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    sessions: Iterable[SessionType] | None = None,
+    commit: bool = False,
+) -> Resolution:
+    """Recompute index_quote_history for a key set, or for a date range (optionally narrowed by index/session).
+
+    Keys are processed in chunks of CHUNK_SIZE, a range is one statement. With commit=False the caller
+    owns the transaction and should call finalize_index_history after committing.
+    """
+
+    priority_case, prio_params = source_priority_case()
+    statements: list[tuple[sa.TextClause, dict]] = []
+    if keys is not None:
+        unique_keys = sorted({(int(i), d, SessionType(s)) for i, d, s in keys}, key=lambda k: (k[0], k[1], k[2].value))
+        stmt = _index_history_sql(by_keys=True, filters="", priority_case=priority_case)
+        for chunk in _chunks(unique_keys, CHUNK_SIZE):
+            statements.append(
+                (
+                    stmt,
+                    {
+                        "key_index_ids": [k[0] for k in chunk],
+                        "key_trade_dates": [k[1] for k in chunk],
+                        "key_sessions": [k[2].value for k in chunk],
+                        **prio_params,
+                    },
+                )
+            )
+    else:
+        filters, params = _range_filters(date_from=date_from, date_to=date_to, sessions=sessions, index_ids=index_ids)
+        statements.append((_index_history_sql(by_keys=False, filters=filters, priority_case=priority_case), {**params, **prio_params}))
+
+    resolution = Resolution()
+    try:
+        for stmt, params in statements:
+            for index_id, trade_date, session, last, turnover, inserted in db.execute(stmt, params).all():
+                resolution.rows.append(
+                    ResolvedHistory(int(index_id), trade_date, SessionType(session), last, turnover, bool(inserted))
+                )
+        if commit:
+            db.commit()
+    except Exception:
+        if commit:
+            db.rollback()
+        raise
+
+    if commit:
+        finalize_index_history(db, resolution)
+    return resolution
+
+
+@timed("resolve.turnover_facts")
+def resolve_turnover_facts(
+    db: Session,
+    *,
+    keys: Iterable[tuple[date, SessionType]] | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    sessions: Iterable[SessionType] | None = None,
+    cutoff_time: time | None = None,
+    commit: bool = False,
+) -> Resolution:
+    """Recompute HSI turnover_fact rows for a key set or date range. Quality is official for HKEX, else provisional."""
+
+    priority_case, prio_params = source_priority_case()
+    statements: list[tuple[sa.TextClause, dict]] = []
+    if keys is not None:
+        unique_keys = sorted({(d, SessionType(s)) for d, s in keys}, key=lambda k: (k[0], k[1].value))
+        stmt = _turnover_fact_sql(by_keys=True, filters="", priority_case=priority_case)
+        for chunk in _chunks(unique_keys, CHUNK_SIZE):
+            statements.append(
+                (
+                    stmt,
+                    {
+                        "key_trade_dates": [k[0] for k in chunk],
+                        "key_sessions": [k[1].value for k in chunk],
+                        "cutoff_time": cutoff_time,
+                        **prio_params,
+                    },
+                )
+            )
+    else:
+        filters, params = _range_filters(date_from=date_from, date_to=date_to, sessions=sessions)
+        statements.append(
+            (
+                _turnover_fact_sql(by_keys=False, filters=filters, priority_case=priority_case),
+                {**params, "cutoff_time": cutoff_time, **prio_params},
+            )
+        )
+
+    resolution = Resolution()
+    try:
+        for stmt, params in statements:
+            for trade_date, session, turnover, inserted in db.execute(stmt, params).all():
+                resolution.rows.append(ResolvedFact(trade_date, SessionType(session), turnover, bool(inserted)))
+        if commit:
+            db.commit()
+    except Exception:
+        if commit:
+            db.rollback()
+        raise
+
+    if commit:
+        finalize_turnover_facts(db, resolution)
+    return resolution
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import importlib.util
+import threading
+import time
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.config import settings
+from app.services.job_timing import record_http, span
+from app.services.prometheus import SOURCE_ERRORS, SOURCE_REQUEST_SECONDS, gauge
+from app.services.rate_limit import host_slot
+
+# Process-wide pooled HTTP clients for the source fetchers.
+# One httpx.Client per (host, proxy, follow_redirects), reused across calls and threads, so repeat
+# requests skip DNS + TCP + TLS. Every request goes through the host limiter (app.services.rate_limit)
+# and is counted per host: new connections vs reused keep-alive connections (via httpcore trace events).
+# Request latency (after the limiter grants a slot) and errors per host are also exported at /metrics.
+
+# Default headers for sources that do not need browser-like headers.
+SOURCE_HEADERS = {"User-Agent": "market-turnover/0.1"}
+
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_clients: dict[tuple[str, str | None, bool], httpx.Client] = {}
+_clients_lock = threading.Lock()
+
+_stats: dict[str, dict[str, int]] = {}
+_stats_lock = threading.Lock()
+
+
+def _host_of(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+def _suffix_match(host: str, suffix: str) -> bool:
+    suffix = suffix.lower().lstrip(".")
+    return host == suffix or host.endswith("." + suffix)
+
+
+def proxy_for(host: str) -> str | None:
+    """HTTP_PROXY_MAP (host suffix -> proxy) first, then EASTMONEY_PROXY_URL for Eastmoney, then HTTP_PROXY_URL."""
+
+    for part in (settings.HTTP_PROXY_MAP or "").split(","):
+        suffix, _, proxy = part.partition("=")
+        if suffix.strip() and proxy.strip() and _suffix_match(host, suffix.strip()):
+            return proxy.strip()
+    if _suffix_match(host, "eastmoney.com"):
+        eastmoney_proxy = (settings.EASTMONEY_PROXY_URL or "").strip()
+        if eastmoney_proxy:
+            return eastmoney_proxy
+    return (settings.HTTP_PROXY_URL or "").strip() or None
+
+
+def get_client(url: str, *, follow_redirects: bool = False) -> httpx.Client:
+    host = _host_of(url)
+    proxy = proxy_for(host)
+    key = (host, proxy, follow_redirects)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            kwargs: dict[str, Any] = {
+                "limits": httpx.Limits(
+                    max_connections=settings.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+                ),
+                "follow_redirects": follow_redirects,
+                # HTTP/2 needs the optional h2 package. SOCKS proxies stay on HTTP/1.1.
+                "http2": settings.HTTP2_ENABLED and _HTTP2_AVAILABLE and not (proxy or "").startswith("socks"),
+            }
+            if proxy:
+                kwargs["proxy"] = proxy
+            client = httpx.Client(**kwargs)
+            _clients[key] = client
+        return client
+
+
+def _count(host: str, field: str, n: int = 1) -> None:
+    with _stats_lock:
+        row = _stats.setdefault(host, {"requests": 0, "new_connections": 0, "errors": 0, "http2": 0})
+        row[field] += n
+
+
+def http_request(
+    method: str,
+    url: str,
+    *,
+    timeout: float,
+    headers: dict | None = None,
+    params: dict | None = None,
+    json: Any = None,
+    follow_redirects: bool = False,
+) -> httpx.Response:
+    """Send a request on the pooled client for the URL's host. The response body is fully read."""
+
+    host = _host_of(url)
+    client = get_client(url, follow_redirects=follow_redirects)
+
+    def _trace(event_name: str, _info: dict) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            _count(host, "new_connections")
+
+    _count(host, "requests")
+    try:
+        with span(f"http:{host}"), host_slot(url):
+            started = time.perf_counter()
+            try:
+                resp = client.request(
+                    method,
+                    url,
+                    headers=headers,
+                    params=params,
+                    json=json,
+                    timeout=timeout,
+                    extensions={"trace": _trace},
+                )
+            finally:
+                SOURCE_REQUEST_SECONDS.observe(time.perf_counter() - started, host)
+            record_http(len(resp.content))
+    except Exception as e:
+        _count(host, "errors")
+        SOURCE_ERRORS.inc(host, type(e).__name__)
+        raise
+    if resp.status_code >= 400:
+        SOURCE_ERRORS.inc(host, f"http_{resp.status_code}")
+    if resp.http_version == "HTTP/2":
+        _count(host, "http2")
+    return resp
+
+
+def http_get(url: str, *, timeout: float, headers: dict | None = None, params: dict | None = None, follow_redirects: bool = False) -> httpx.Response:
+    return http_request("GET", url, timeout=timeout, headers=headers, params=params, follow_redirects=follow_redirects)
+
+
+def http_post(url: str, *, timeout: float, headers: dict | None = None, json: Any = None) -> httpx.Response:
+    return http_request("POST", url, timeout=timeout, headers=headers, json=json)
+
+
+def http_client_stats() -> dict[str, dict[str, int]]:
+    """Per-host request counts; reused = requests served on an existing keep-alive connection."""
+
+    with _stats_lock:
+        out = {}
+        for host, row in sorted(_stats.items()):
+            out[host] = {**row, "reused_connections": max(0, row["requests"] - row["errors"] - row["new_connections"])}
+    with _clients_lock:
+        out["_pool"] = {"clients": len(_clients), "http2_available": int(_HTTP2_AVAILABLE)}
+    return out
+
+
+gauge(
+    "source_http_clients",
+    "Pooled httpx clients (one per host / proxy / redirect policy).",
+    lambda: {(): len(_clients)},
+)
+
+
+def close_all_clients() -> None:
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
@@ -1,18 +1,22 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
 from datetime import date, datetime
 
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
-from app.config import settings
 from app.db.models import (
     IndexQuoteHistory,
     IndexQuoteSourceRecord,
     IndexRealtimeSnapshot,
     MarketIndex,
-    Quality,
     SessionType,
 )
+from app.services.dashboard_state import mark_dashboard_dirty
+from app.services.fact_resolution import finalize_index_history, resolve_index_history
+from app.services.job_timing import add_rows, timed
+from app.services.raw_payloads import apply_raw_policy, apply_raw_policy_many
 
 
 INDEX_META = {
@@ -118,37 +122,10 @@ def upsert_index_history_from_sources(
     trade_date: date,
     session: SessionType,
 ) -> IndexQuoteHistory | None:
-    priorities = [item.strip().upper() for item in settings.SOURCE_PRIORITY.split(",") if item.strip()]
-
-    records = (
-        db.query(IndexQuoteSourceRecord)
-        .filter(IndexQuoteSourceRecord.index_id == index_id)
-        .filter(IndexQuoteSourceRecord.trade_date == trade_date)
-        .filter(IndexQuoteSourceRecord.session == session)
-        .filter(IndexQuoteSourceRecord.ok.is_(True))
-        .filter(IndexQuoteSourceRecord.last.isnot(None))
-        .order_by(IndexQuoteSourceRecord.fetched_at.desc())
-        .all()
-    )
-    if not records:
+    resolution = resolve_index_history(db, keys=[(index_id, trade_date, session)], commit=True)
+    if not resolution.rows:
         return None
-
-    best = None
-    for source in priorities:
-        for row in records:
-            if row.source.upper() == source:
-                best = row
-                break
-        if best is not None:
-            break
-    if best is None:
-        best = records[0]
-
-    index_meta = db.query(MarketIndex).filter(MarketIndex.id == index_id).one()
-    turnover_currency = best.turnover_currency or index_meta.currency
-    quality = Quality.OFFICIAL if best.source.upper() == "HKEX" else Quality.PROVISIONAL
-
-    fact = (
+    return (
         db.query(IndexQuoteHistory)
         .filter(IndexQuoteHistory.index_id == index_id)
         .filter(IndexQuoteHistory.trade_date == trade_date)
@@ -156,40 +133,8 @@ def upsert_index_history_from_sources(
         .one_or_none()
     )
 
-    if fact is None:
-        fact = IndexQuoteHistory(
-            index_id=index_id,
-            trade_date=trade_date,
-            session=session,
-            last=int(best.last),
-            change_points=best.change_points,
-            change_pct=best.change_pct,
-            turnover_amount=best.turnover_amount,
-            turnover_currency=turnover_currency,
-            best_source=best.source,
-            quality=quality,
-            source_count=len(records),
-            asof_ts=best.asof_ts,
-            payload=best.payload,
-        )
-        db.add(fact)
-    else:
-        fact.last = int(best.last)
-        fact.change_points = best.change_points
-        fact.change_pct = best.change_pct
-        fact.turnover_amount = best.turnover_amount
-        fact.turnover_currency = turnover_currency
-        fact.best_source = best.source
-        fact.quality = quality
-        fact.source_count = len(records)
-        fact.asof_ts = best.asof_ts
-        fact.payload = best.payload
-
-    db.commit()
-    db.refresh(fact)
-    return fact
-
 
+@timed("resolve.realtime_snapshot")
 def upsert_realtime_snapshot(
     db: Session,
     *,
@@ -225,9 +170,108 @@ def upsert_realtime_snapshot(
         data_updated_at=data_updated_at,
         is_closed=is_closed,
         source=source,
-        payload=payload,
+        payload=apply_raw_policy(db, payload, source=source),
     )
     db.add(row)
     db.commit()
     db.refresh(row)
+    mark_dashboard_dirty(index_id=index_id)
     return row
+
+
+# --- Bulk ingest -------------------------------------------------------------------------------
+# Set-based counterparts of add_index_source_record / upsert_realtime_snapshot for backfills
+# (history rows are resolved by app.services.fact_resolution): a few statements and one commit
+# per batch instead of ~3 round trips + 3 commits per row.
+
+BULK_CHUNK_SIZE = 1000
+
+_SOURCE_RECORD_COLUMNS = (
+    "index_id",
+    "trade_date",
+    "session",
+    "source",
+    "last",
+    "change_points",
+    "change_pct",
+    "turnover_amount",
+    "turnover_currency",
+    "asof_ts",
+    "payload",
+    "ok",
+)
+
+
+def _chunks(items: list, size: int) -> Iterable[list]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+@timed("persist.index_source_records")
+def bulk_add_index_source_records(db: Session, rows: list[dict]) -> list[int]:
+    """Multi-row INSERT ... RETURNING id (chunked). Does not commit."""
+
+    ids: list[int] = []
+    table = IndexQuoteSourceRecord.__table__
+    for chunk in _chunks(rows, BULK_CHUNK_SIZE):
+        values = [{col: row.get(col, True if col == "ok" else None) for col in _SOURCE_RECORD_COLUMNS} for row in chunk]
+        result = db.execute(pg_insert(table).values(values).returning(table.c.id))
+        ids.extend(int(v) for v in result.scalars().all())
+    add_rows(len(ids))
+    return ids
+
+
+def bulk_insert_realtime_snapshots(db: Session, rows: list[dict]) -> int:
+    """Append-only multi-row insert of realtime snapshots. Does not commit."""
+
+    table = IndexRealtimeSnapshot.__table__
+    for chunk in _chunks(rows, BULK_CHUNK_SIZE):
+        # One blob upsert per chunk (deduplicated raw responses), then one snapshot insert.
+        payloads = apply_raw_policy_many(db, [(row.get("payload"), row["source"]) for row in chunk])
+        values = [{**row, "payload": payload} for row, payload in zip(chunk, payloads)]
+        db.execute(pg_insert(table).values(values))
+    add_rows(len(rows))
+    return len(rows)
+
+
+@timed("resolve.index_quotes")
+def bulk_ingest_index_quotes(db: Session, rows: list[dict]) -> dict[str, int]:
+    """Persist daily index quotes (source record -> history -> closed snapshot) with one commit.
+
+    Each row: index_id, trade_date, session, source, last, change_points, change_pct, turnover_amount,
+    turnover_currency (source record), snapshot_turnover_currency, asof_ts, payload.
+    """
+
+    if not rows:
+        return {"inserted": 0, "facts_updated": 0, "snapshots_updated": 0}
+
+    try:
+        inserted = len(bulk_add_index_source_records(db, rows))
+        resolution = resolve_index_history(db, keys=[(row["index_id"], row["trade_date"], row["session"]) for row in rows])
+        snapshots = bulk_insert_realtime_snapshots(
+            db,
+            [
+                {
+                    "index_id": row["index_id"],
+                    "trade_date": row["trade_date"],
+                    "session": row["session"],
+                    "last": row["last"],
+                    "change_points": row.get("change_points"),
+                    "change_pct": row.get("change_pct"),
+                    "turnover_amount": row.get("turnover_amount"),
+                    "turnover_currency": row["snapshot_turnover_currency"],
+                    "data_updated_at": row["asof_ts"],
+                    "is_closed": True,
+                    "source": row["source"],
+                    "payload": row.get("payload"),
+                }
+                for row in rows
+            ],
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    finalize_index_history(db, resolution)
+    return {"inserted": inserted, "facts_updated": resolution.written, "snapshots_updated": snapshots}
@@ -5,20 +5,19 @@ from datetime import date, datetime, time
 from zoneinfo import ZoneInfo
 
 import httpx
-import sqlalchemy as sa
 from sqlalchemy.orm import Session
 
 from app.config import settings
 from app.db.models import (
     IndexQuoteHistory,
-    IndexRealtimeApiSnapshot,
-    IndexRealtimeSnapshot,
     InsightSnapshot,
     InsightSysPrompt,
     MarketIndex,
     SessionType,
-    TurnoverFact,
+    TurnoverRollingStats,
 )
+from app.services.snapshot_queries import latest_api_snapshots, latest_index_histories, latest_realtime_snapshots
+from app.services.turnover_stats import HSI_FACT_SERIES_KEY, ensure_turnover_stats, index_series_key, stats_avg
 
 TARGET_CODES = ("HSI", "SSE", "SZSE")
 PROMPT_KEY = "market_insight"
@@ -34,74 +33,6 @@ def get_fallback_insight_text(lang: str) -> str:
     return FALLBACK_INSIGHT_TEXT.get(lang, FALLBACK_INSIGHT_TEXT["en"])
 
 
-def _latest_history(
-    db: Session,
-    *,
-    index_id: int,
-    session: SessionType,
-) -> IndexQuoteHistory | None:
-    return (
-        db.query(IndexQuoteHistory)
-        .filter(IndexQuoteHistory.index_id == index_id)
-        .filter(IndexQuoteHistory.session == session)
-        .order_by(IndexQuoteHistory.trade_date.desc())
-        .first()
-    )
-
-
-def _latest_history_before(
-    db: Session,
-    *,
-    index_id: int,
-    session: SessionType,
-    before_date: date,
-) -> IndexQuoteHistory | None:
-    return (
-        db.query(IndexQuoteHistory)
-        .filter(IndexQuoteHistory.index_id == index_id)
-        .filter(IndexQuoteHistory.session == session)
-        .filter(IndexQuoteHistory.trade_date < before_date)
-        .order_by(IndexQuoteHistory.trade_date.desc())
-        .first()
-    )
-
-
-def _latest_realtime_today(
-    db: Session,
-    *,
-    index_id: int,
-    today: date,
-    session: SessionType,
-    updated_before: datetime | None = None,
-) -> IndexRealtimeSnapshot | None:
-    q = (
-        db.query(IndexRealtimeSnapshot)
-        .filter(IndexRealtimeSnapshot.index_id == index_id)
-        .filter(IndexRealtimeSnapshot.trade_date == today)
-        .filter(IndexRealtimeSnapshot.session == session)
-    )
-    if updated_before is not None:
-        q = q.filter(IndexRealtimeSnapshot.data_updated_at <= updated_before)
-    return q.order_by(IndexRealtimeSnapshot.data_updated_at.desc(), IndexRealtimeSnapshot.id.desc()).first()
-
-
-def _latest_api_today(
-    db: Session,
-    *,
-    index_id: int,
-    today: date,
-    session: SessionType,
-) -> IndexRealtimeApiSnapshot | None:
-    return (
-        db.query(IndexRealtimeApiSnapshot)
-        .filter(IndexRealtimeApiSnapshot.index_id == index_id)
-        .filter(IndexRealtimeApiSnapshot.trade_date == today)
-        .filter(IndexRealtimeApiSnapshot.session == session)
-        .order_by(IndexRealtimeApiSnapshot.data_updated_at.desc(), IndexRealtimeApiSnapshot.id.desc())
-        .first()
-    )
-
-
 def _close_series(db: Session, *, index_id: int, n: int) -> list[int]:
     rows = (
         db.query(IndexQuoteHistory.last)
@@ -120,48 +51,9 @@ def _avg(values: list[int]) -> float | None:
     return round(sum(values) / len(values), 2)
 
 
-def _turnover_series(db: Session, *, index_id: int, session: SessionType, n: int) -> list[int]:
-    rows = (
-        db.query(IndexQuoteHistory.turnover_amount)
-        .filter(IndexQuoteHistory.index_id == index_id)
-        .filter(IndexQuoteHistory.session == session)
-        .filter(IndexQuoteHistory.turnover_amount.isnot(None))
-        .order_by(IndexQuoteHistory.trade_date.desc())
-        .limit(n)
-        .all()
-    )
-    return [int(v) for (v,) in rows if v is not None]
-
-
-def _hsi_turnover_peak(db: Session, *, session: SessionType) -> int | None:
-    v = (
-        db.query(sa.func.max(TurnoverFact.turnover_hkd))
-        .filter(TurnoverFact.session == session)
-        .scalar()
-    )
-    return int(v) if v is not None else None
-
-
-def _index_turnover_peak(db: Session, *, index_id: int, session: SessionType) -> int | None:
-    v = (
-        db.query(sa.func.max(IndexQuoteHistory.turnover_amount))
-        .filter(IndexQuoteHistory.index_id == index_id)
-        .filter(IndexQuoteHistory.session == session)
-        .scalar()
-    )
-    return int(v) if v is not None else None
-
-
-def _historical_price_high(db: Session, *, index_id: int) -> float | None:
-    v = (
-        db.query(sa.func.max(IndexQuoteHistory.last))
-        .filter(IndexQuoteHistory.index_id == index_id)
-        .filter(IndexQuoteHistory.session == SessionType.FULL)
-        .scalar()
-    )
-    if v is None:
-        return None
-    return round(int(v) / 100.0, 2)
+def _avg_turnover(stats: TurnoverRollingStats | None, n: int) -> int | None:
+    value = stats_avg(stats, n)
+    return int(round(value)) if value is not None else None
 
 
 def build_insight_snapshot_payload(db: Session) -> tuple[dict, date, datetime]:
@@ -174,26 +66,35 @@ def build_insight_snapshot_payload(db: Session) -> tuple[dict, date, datetime]:
     payload: dict[str, dict] = {}
     asof_points: list[datetime] = []
 
+    ids = [row.id for row in market_indexes]
+    hsi_ids = [row.id for row in market_indexes if row.code.upper() == "HSI"]
+    histories = latest_index_histories(db, index_ids=ids)
+    histories_before = latest_index_histories(db, index_ids=ids, before_date=today)
+    snaps_full = latest_realtime_snapshots(db, index_ids=ids, trade_date=today, sessions=[SessionType.FULL])
+    snaps_am = latest_realtime_snapshots(
+        db,
+        index_ids=ids,
+        trade_date=today,
+        sessions=[SessionType.AM, SessionType.FULL],
+        updated_before=cutoff,
+    )
+    apis_full = latest_api_snapshots(db, index_ids=hsi_ids, trade_date=today, sessions=[SessionType.FULL])
+    stats = ensure_turnover_stats(db, index_ids=ids, include_hsi_fact=bool(hsi_ids))
+
     for code in TARGET_CODES:
         idx = index_by_code.get(code)
         if idx is None:
             payload[code] = {"missing": True}
             continue
 
-        full_hist = _latest_history(db, index_id=idx.id, session=SessionType.FULL)
-        am_hist = _latest_history(db, index_id=idx.id, session=SessionType.AM)
-        y_full = _latest_history_before(db, index_id=idx.id, session=SessionType.FULL, before_date=today)
-        y_am = _latest_history_before(db, index_id=idx.id, session=SessionType.AM, before_date=today)
-
-        snap_full = _latest_realtime_today(db, index_id=idx.id, today=today, session=SessionType.FULL)
-        snap_am = _latest_realtime_today(
-            db,
-            index_id=idx.id,
-            today=today,
-            session=SessionType.AM,
-            updated_before=cutoff,
-        )
-        api_full = _latest_api_today(db, index_id=idx.id, today=today, session=SessionType.FULL) if code == "HSI" else None
+        full_hist = histories.get((idx.id, SessionType.FULL))
+        am_hist = histories.get((idx.id, SessionType.AM))
+        y_full = histories_before.get((idx.id, SessionType.FULL))
+        y_am = histories_before.get((idx.id, SessionType.AM))
+
+        snap_full = snaps_full.get((idx.id, SessionType.FULL))
+        snap_am = snaps_am.get((idx.id, SessionType.AM))
+        api_full = apis_full.get((idx.id, SessionType.FULL)) if code == "HSI" else None
 
         full_source = snap_full
         if api_full is not None and (
@@ -202,13 +103,7 @@ def build_insight_snapshot_payload(db: Session) -> tuple[dict, date, datetime]:
             full_source = api_full
 
         if snap_am is None and code == "HSI":
-            snap_am = _latest_realtime_today(
-                db,
-                index_id=idx.id,
-                today=today,
-                session=SessionType.FULL,
-                updated_before=cutoff,
-            )
+            snap_am = snaps_am.get((idx.id, SessionType.FULL))
 
         full_turnover = (
             int(full_source.turnover_amount)
@@ -232,53 +127,24 @@ def build_insight_snapshot_payload(db: Session) -> tuple[dict, date, datetime]:
 
         close5 = _close_series(db, index_id=idx.id, n=5)
         close10 = _close_series(db, index_id=idx.id, n=10)
-        am5 = _turnover_series(db, index_id=idx.id, session=SessionType.AM, n=5)
-        am10 = _turnover_series(db, index_id=idx.id, session=SessionType.AM, n=10)
-        full5 = _turnover_series(db, index_id=idx.id, session=SessionType.FULL, n=5)
-        full10 = _turnover_series(db, index_id=idx.id, session=SessionType.FULL, n=10)
+
+        # Peaks / N-day averages / price high come from incrementally maintained rolling stats.
+        am_stats = stats.get((index_series_key(idx.id), SessionType.AM))
+        full_stats = stats.get((index_series_key(idx.id), SessionType.FULL))
+        price_high = full_stats.price_high if full_stats is not None else None
 
         if code == "HSI":
-            am_peak = _hsi_turnover_peak(db, session=SessionType.AM)
-            full_peak = _hsi_turnover_peak(db, session=SessionType.FULL)
-            if not am5:
-                rows = (
-                    db.query(TurnoverFact.turnover_hkd)
-                    .filter(TurnoverFact.session == SessionType.AM)
-                    .order_by(TurnoverFact.trade_date.desc())
-                    .limit(5)
-                    .all()
-                )
-                am5 = [int(v) for (v,) in rows if v is not None]
-            if not am10:
-                rows = (
-                    db.query(TurnoverFact.turnover_hkd)
-                    .filter(TurnoverFact.session == SessionType.AM)
-                    .order_by(TurnoverFact.trade_date.desc())
-                    .limit(10)
-                    .all()
-                )
-                am10 = [int(v) for (v,) in rows if v is not None]
-            if not full5:
-                rows = (
-                    db.query(TurnoverFact.turnover_hkd)
-                    .filter(TurnoverFact.session == SessionType.FULL)
-                    .order_by(TurnoverFact.trade_date.desc())
-                    .limit(5)
-                    .all()
-                )
-                full5 = [int(v) for (v,) in rows if v is not None]
-            if not full10:
-                rows = (
-                    db.query(TurnoverFact.turnover_hkd)
-                    .filter(TurnoverFact.session == SessionType.FULL)
-                    .order_by(TurnoverFact.trade_date.desc())
-                    .limit(10)
-                    .all()
-                )
-                full10 = [int(v) for (v,) in rows if v is not None]
+            fact_am = stats.get((HSI_FACT_SERIES_KEY, SessionType.AM))
+            fact_full = stats.get((HSI_FACT_SERIES_KEY, SessionType.FULL))
+            am_peak = fact_am.peak_turnover if fact_am is not None else None
+            full_peak = fact_full.peak_turnover if fact_full is not None else None
+            if am_stats is None or not am_stats.cnt_30:
+                am_stats = fact_am
+            if full_stats is None or not full_stats.cnt_30:
+                full_stats = fact_full
         else:
-            am_peak = _index_turnover_peak(db, index_id=idx.id, session=SessionType.AM)
-            full_peak = _index_turnover_peak(db, index_id=idx.id, session=SessionType.FULL)
+            am_peak = am_stats.peak_turnover if am_stats is not None else None
+            full_peak = full_stats.peak_turnover if full_stats is not None else None
 
         updated_at = None
         if full_source is not None:
@@ -290,7 +156,7 @@ def build_insight_snapshot_payload(db: Session) -> tuple[dict, date, datetime]:
 
         payload[code] = {
             "current_price": current_price,
-            "historical_price_high": _historical_price_high(db, index_id=idx.id),
+            "historical_price_high": round(int(price_high) / 100.0, 2) if price_high is not None else None,
             "half_day_turnover": am_turnover,
             "full_day_turnover": full_turnover,
             "half_day_turnover_peak": am_peak,
@@ -301,13 +167,13 @@ def build_insight_snapshot_payload(db: Session) -> tuple[dict, date, datetime]:
             "avg_5d_close_price": round((_avg(close5) or 0) / 100.0, 2) if close5 else None,
             "high_5d_close_price": round(max(close5) / 100.0, 2) if close5 else None,
             "low_5d_close_price": round(min(close5) / 100.0, 2) if close5 else None,
-            "avg_5d_half_day_turnover": int(round(_avg(am5))) if am5 else None,
-            "avg_5d_full_day_turnover": int(round(_avg(full5))) if full5 else None,
+            "avg_5d_half_day_turnover": _avg_turnover(am_stats, 5),
+            "avg_5d_full_day_turnover": _avg_turnover(full_stats, 5),
             "avg_10d_close_price": round((_avg(close10) or 0) / 100.0, 2) if close10 else None,
             "high_10d_close_price": round(max(close10) / 100.0, 2) if close10 else None,
             "low_10d_close_price": round(min(close10) / 100.0, 2) if close10 else None,
-            "avg_10d_half_day_turnover": int(round(_avg(am10))) if am10 else None,
-            "avg_10d_full_day_turnover": int(round(_avg(full10))) if full10 else None,
+            "avg_10d_half_day_turnover": _avg_turnover(am_stats, 10),
+            "avg_10d_full_day_turnover": _avg_turnover(full_stats, 10),
             "turnover_currency": idx.currency,
             "last_updated_at": updated_at.isoformat() if updated_at is not None else None,
         }
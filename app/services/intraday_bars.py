@@ -3,9 +3,17 @@ from __future__ import annotations
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from app.db.models import IndexIntradayBar
+from app.services.job_timing import add_rows, timed
+
+BULK_CHUNK_SIZE = 1000
+
+_BAR_KEY = ("index_id", "interval_min", "bar_ts", "source")
+_BAR_COLUMNS = ("open", "high", "low", "close", "volume", "amount", "currency", "payload", "fetched_at")
 
 
 def _as_tz(dt: datetime, tz: str) -> datetime:
@@ -80,3 +88,34 @@ def upsert_intraday_bar(
     db.commit()
     db.refresh(row)
     return row
+
+
+@timed("persist.intraday_bars")
+def upsert_intraday_bars(db: Session, rows: list[dict], *, tz: str, chunk_size: int = BULK_CHUNK_SIZE) -> int:
+    """Set-based upsert_intraday_bar: one INSERT ... ON CONFLICT (index_id, interval_min, bar_ts, source)
+    DO UPDATE per chunk. Rows use IndexIntradayBar column names (open/high/low/close are *100);
+    fetched_at is optional. Does not commit. Returns the number of rows written.
+    """
+
+    # Later rows win for a repeated key (a chunk may not update the same row twice).
+    by_key: dict[tuple, dict] = {}
+    for row in rows:
+        value = {col: row.get(col) for col in _BAR_KEY + _BAR_COLUMNS}
+        value["bar_ts"] = _as_tz(value["bar_ts"], tz)
+        if value["fetched_at"] is None:
+            value["fetched_at"] = sa.func.now()
+        else:
+            value["fetched_at"] = _as_tz(value["fetched_at"], tz)
+        by_key[tuple(value[col] for col in _BAR_KEY)] = value
+
+    values = list(by_key.values())
+    table = IndexIntradayBar.__table__
+    for start in range(0, len(values), chunk_size):
+        stmt = pg_insert(table).values(values[start : start + chunk_size])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(_BAR_KEY),
+            set_={col: stmt.excluded[col] for col in _BAR_COLUMNS},
+        )
+        db.execute(stmt)
+    add_rows(len(values))
+    return len(values)
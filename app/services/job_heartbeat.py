@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.models import JobRun
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Liveness of job_run rows (migration 0020).
+# Every run started in this process (queued or scheduled) records claimed_by = PROCESS_ID. A daemon thread
+# refreshes heartbeat_at of this process's active rows every JOB_RUN_HEARTBEAT_SECONDS and, in the same loop,
+# fails active rows whose heartbeat (started_at for rows from before the migration) is older than
+# JOB_RUN_ORPHAN_SECONDS: their process crashed or was killed, so nothing will ever finish them.
+
+# "timed_out": run_job stopped waiting at the job timeout but the handler thread is still running
+# (app.jobs.registry); the row keeps counting toward the concurrency cap until the thread exits.
+ACTIVE_STATUSES = ("running", "timed_out")
+
+# hostname:pid plus a random suffix, since containers restart with the same hostname and pid.
+PROCESS_ID = f"{socket.gethostname()[:64]}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_lock = threading.Lock()
+_stop = threading.Event()
+_thread: threading.Thread | None = None
+
+
+def orphan_cutoff() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(seconds=max(1, settings.JOB_RUN_ORPHAN_SECONDS))
+
+
+def last_seen():
+    """SQL expression: when a run was last known alive."""
+
+    return sa.func.coalesce(JobRun.heartbeat_at, JobRun.started_at)
+
+
+def touch_runs(db: Session) -> int:
+    """Refresh heartbeat_at of the active runs owned by this process. Commits."""
+
+    count = (
+        db.query(JobRun)
+        .filter(JobRun.claimed_by == PROCESS_ID)
+        .filter(JobRun.status.in_(ACTIVE_STATUSES))
+        .update({JobRun.heartbeat_at: sa.func.now()}, synchronize_session=False)
+    )
+    db.commit()
+    return count
+
+
+def reap_orphaned_runs(db: Session) -> int:
+    """Fail active runs whose process stopped heartbeating. Commits."""
+
+    count = (
+        db.query(JobRun)
+        .filter(JobRun.status.in_(ACTIVE_STATUSES))
+        .filter(last_seen() < orphan_cutoff())
+        .update(
+            {
+                JobRun.status: "failed",
+                JobRun.finished_at: sa.func.now(),
+                JobRun.error: sa.func.concat(
+                    "orphaned: process ",
+                    sa.func.coalesce(JobRun.claimed_by, "unknown"),
+                    " stopped heartbeating (crashed or killed)",
+                ),
+            },
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    if count:
+        logger.warning("Marked %s orphaned job run(s) as failed", count)
+    return count
+
+
+def fail_runs(db: Session, run_ids: list[int], *, error: str) -> int:
+    """Fail still-active runs of this process (e.g. interrupted by shutdown). Commits."""
+
+    if not run_ids:
+        return 0
+    count = (
+        db.query(JobRun)
+        .filter(JobRun.id.in_(run_ids))
+        .filter(JobRun.status.in_(ACTIVE_STATUSES))
+        .update(
+            {JobRun.status: "failed", JobRun.finished_at: sa.func.now(), JobRun.error: error},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return count
+
+
+def _heartbeat_loop() -> None:
+    while True:
+        db = SessionLocal()
+        try:
+            touch_runs(db)
+            reap_orphaned_runs(db)
+        except Exception:
+            logger.exception("Job run heartbeat failed")
+            db.rollback()
+        finally:
+            db.close()
+        if _stop.wait(max(1.0, settings.JOB_RUN_HEARTBEAT_SECONDS)):
+            return
+
+
+def start_job_heartbeat() -> None:
+    global _thread
+    with _lock:
+        if _thread is not None:
+            return
+        _stop.clear()
+        _thread = threading.Thread(target=_heartbeat_loop, name="job-run-heartbeat", daemon=True)
+        _thread.start()
+        logger.info("Job run heartbeat started. process=%s", PROCESS_ID)
+
+
+def stop_job_heartbeat() -> None:
+    global _thread
+    with _lock:
+        if _thread is None:
+            return
+        _stop.set()
+        _thread = None
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.models import JobRun
+from app.db.session import SessionLocal
+from app.jobs.registry import find_job, job_concurrency_limit, job_names_for_key
+from app.jobs.tasks import run_job
+from app.services.job_heartbeat import (
+    ACTIVE_STATUSES,
+    PROCESS_ID,
+    fail_runs,
+    last_seen,
+    orphan_cutoff,
+    start_job_heartbeat,
+    stop_job_heartbeat,
+)
+from app.services.prometheus import gauge
+
+logger = logging.getLogger(__name__)
+
+# DB-backed queue for manually triggered jobs.
+# POST /api/jobs/run only inserts a job_run row with status "queued" and returns. A dispatcher thread claims
+# queued rows with SELECT ... FOR UPDATE SKIP LOCKED (safe with several uvicorn processes) and runs them on at
+# most JOB_QUEUE_WORKERS daemon threads with their own sessions, so a long backfill never holds a request worker
+# or its pooled DB connection. Concurrency is bounded per concurrency key of the registered handler (app.jobs.registry):
+# every "running" / "timed_out" row of the jobs sharing the key counts, scheduled runs included, so a manual
+# backfill does not overlap the same cron job or another job hitting the same upstream.
+# Claimed rows record this process (claimed_by) and are kept alive by app.services.job_heartbeat; rows of a
+# crashed or killed process are failed once their heartbeat is older than JOB_RUN_ORPHAN_SECONDS.
+#
+# Shutdown: the worker threads are daemons, so a restart is never blocked by a backfill in progress.
+# stop_job_queue waits up to JOB_QUEUE_SHUTDOWN_SECONDS for running work, then marks what is still running
+# as failed ("interrupted by shutdown") before the interpreter exits and kills those threads.
+
+QUEUED = "queued"
+_CLAIM_BATCH = 20
+
+_lock = threading.Lock()
+_wakeup = threading.Event()
+_stop = threading.Event()
+_dispatcher: threading.Thread | None = None
+_workers: dict[int, threading.Thread] = {}  # run id -> worker thread, guarded by _lock
+
+
+def _concurrency_group(job_name: str) -> tuple[str, list[str]]:
+    spec = find_job(job_name)
+    if spec is None:
+        return job_name, [job_name]
+    return spec.key, job_names_for_key(spec.key)
+
+
+def enqueue_job(db: Session, job_name: str, params: dict | None = None) -> JobRun:
+    run = JobRun(
+        job_name=job_name,
+        status=QUEUED,
+        queued_at=datetime.now(timezone.utc),
+        summary={"params": params} if params else None,
+    )
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+    _wakeup.set()
+    return run
+
+
+def claim_next_run(db: Session) -> JobRun | None:
+    """Move the oldest queued run whose job is below its concurrency limit to "running". Commits."""
+
+    candidates = (
+        db.query(JobRun)
+        .filter(JobRun.status == QUEUED)
+        .order_by(JobRun.id.asc())
+        .with_for_update(skip_locked=True)
+        .limit(_CLAIM_BATCH)
+        .all()
+    )
+    alive_after = orphan_cutoff()
+    for run in candidates:
+        key, names = _concurrency_group(run.job_name)
+        # Serializes the count + claim per concurrency key across processes; a key another process is
+        # claiming right now is skipped (try-lock, so two dispatchers never wait on each other).
+        locked = db.execute(sa.select(sa.func.pg_try_advisory_xact_lock(sa.func.hashtext(f"job_run:{key}")))).scalar()
+        if not locked:
+            continue
+        running = (
+            db.query(sa.func.count(JobRun.id))
+            .filter(JobRun.job_name.in_(names))
+            .filter(JobRun.status.in_(ACTIVE_STATUSES))
+            .filter(last_seen() >= alive_after)
+            .scalar()
+        )
+        if running >= job_concurrency_limit(key):
+            continue
+        run.status = "running"
+        run.started_at = sa.func.now()
+        run.heartbeat_at = sa.func.now()
+        run.claimed_by = PROCESS_ID
+        db.commit()
+        db.refresh(run)
+        return run
+    db.rollback()
+    return None
+
+
+def _execute(run_id: int) -> None:
+    db = SessionLocal()
+    try:
+        run = db.get(JobRun, run_id)
+        params = (run.summary or {}).get("params") if isinstance(run.summary, dict) else None
+        run = run_job(db, run.job_name, params, run=run)
+        logger.info("Queued job finished: job=%s status=%s id=%s", run.job_name, run.status, run.id)
+    except Exception:
+        logger.exception("Queued job failed unexpectedly: id=%s", run_id)
+    finally:
+        db.close()
+        with _lock:
+            _workers.pop(run_id, None)
+        _wakeup.set()
+
+
+def _dispatch_loop(workers: int) -> None:
+    while not _stop.is_set():
+        _wakeup.clear()
+        run = None
+        with _lock:
+            has_slot = len(_workers) < workers
+        if has_slot:
+            db = SessionLocal()
+            try:
+                run = claim_next_run(db)
+            except Exception:
+                logger.exception("Job queue claim failed")
+            finally:
+                db.close()
+        if run is None:
+            _wakeup.wait(settings.JOB_QUEUE_POLL_SECONDS)
+            continue
+        with _lock:
+            if _stop.is_set():
+                # Stopped between claim and start: hand the run back to the queue.
+                _requeue(run.id)
+                return
+            worker = threading.Thread(target=_execute, args=(run.id,), name=f"job-queue:{run.id}", daemon=True)
+            _workers[run.id] = worker
+        logger.info("Queued job claimed: job=%s id=%s", run.job_name, run.id)
+        worker.start()
+
+
+def _requeue(run_id: int) -> None:
+    db = SessionLocal()
+    try:
+        db.query(JobRun).filter(JobRun.id == run_id).update(
+            {JobRun.status: QUEUED, JobRun.claimed_by: None, JobRun.heartbeat_at: None}
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def start_job_queue() -> None:
+    global _dispatcher
+    # Scheduled runs in this process need the heartbeat too. Its first tick (right away) fails the runs orphaned
+    # by a crashed or killed process, e.g. this one before a restart.
+    start_job_heartbeat()
+    workers = max(0, settings.JOB_QUEUE_WORKERS)
+    with _lock:
+        if _dispatcher is not None or workers == 0:
+            return
+        _stop.clear()
+        _dispatcher = threading.Thread(
+            target=_dispatch_loop,
+            args=(workers,),
+            name="job-queue-dispatcher",
+            daemon=True,
+        )
+        _dispatcher.start()
+        logger.info("Job queue started. workers=%s", workers)
+
+
+def stop_job_queue() -> None:
+    """Stop claiming, give running work JOB_QUEUE_SHUTDOWN_SECONDS to finish, fail what is left.
+
+    Queued rows stay queued for the next start (here or in another process).
+    """
+
+    global _dispatcher
+    with _lock:
+        dispatcher = _dispatcher
+        _dispatcher = None
+        _stop.set()
+        _wakeup.set()
+    if dispatcher is not None:
+        dispatcher.join(timeout=5)
+    deadline = time.monotonic() + max(0.0, settings.JOB_QUEUE_SHUTDOWN_SECONDS)
+    with _lock:
+        running = list(_workers.items())
+    for _run_id, worker in running:
+        worker.join(timeout=max(0.0, deadline - time.monotonic()))
+    with _lock:
+        interrupted = [run_id for run_id, worker in _workers.items() if worker.is_alive()]
+    if interrupted:
+        db = SessionLocal()
+        try:
+            fail_runs(db, interrupted, error=f"interrupted: process {PROCESS_ID} shut down before the run finished")
+        except Exception:
+            logger.exception("Failed to mark interrupted job runs: ids=%s", interrupted)
+        finally:
+            db.close()
+        logger.warning("Job queue stopped with %s run(s) interrupted: ids=%s", len(interrupted), interrupted)
+    stop_job_heartbeat()
+
+
+gauge("job_queue_running", "Queued job runs executing in this process.", lambda: {(): len(_workers)})
+gauge("job_queue_workers", "Job queue worker threads (JOB_QUEUE_WORKERS).", lambda: {(): max(0, settings.JOB_QUEUE_WORKERS)})
+
+
+def job_queue_stats() -> dict:
+    with _lock:
+        return {
+            "workers": max(0, settings.JOB_QUEUE_WORKERS),
+            "running": len(_workers),
+            "dispatcher": _dispatcher is not None,
+        }
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import contextvars
+import functools
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Lightweight per-run instrumentation.
+# run_job opens a collector around the handler; hot-path code marks phases with span("name") / @timed("name").
+# A phase records calls and inclusive wall time. HTTP requests + bytes (app.services.http_client), DB statements
+# and commits (engine events) and row counts (add_rows) go to the innermost open span, "(other)" outside any span.
+# The collector lives in a contextvar: outside a job run the cost is one ContextVar.get(). fan_out workers and
+# job timeout threads run in a copy of the caller's context, so their work lands in the same collector.
+
+OTHER = "(other)"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_collector: contextvars.ContextVar[TimingCollector | None] = contextvars.ContextVar("job_timing_collector", default=None)
+_span: contextvars.ContextVar[str] = contextvars.ContextVar("job_timing_span", default=OTHER)
+
+
+@dataclass(slots=True)
+class PhaseStats:
+    calls: int = 0
+    seconds: float = 0.0
+    http_requests: int = 0
+    http_bytes: int = 0
+    db_statements: int = 0
+    db_commits: int = 0
+    rows: int = 0
+
+
+class TimingCollector:
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.finished: float | None = None
+        self.phases: dict[str, PhaseStats] = {}
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, **counts: float) -> None:
+        with self._lock:
+            stats = self.phases.get(phase)
+            if stats is None:
+                stats = self.phases[phase] = PhaseStats()
+            for name, value in counts.items():
+                setattr(stats, name, getattr(stats, name) + value)
+
+    def as_summary(self) -> dict:
+        """{"total_seconds", "phases": {phase: non-zero counters}}, slowest phase first."""
+
+        total = (self.finished or time.monotonic()) - self.started
+        with self._lock:
+            items = sorted(self.phases.items(), key=lambda kv: kv[1].seconds, reverse=True)
+            phases = {}
+            for phase, stats in items:
+                row = {k: v for k, v in asdict(stats).items() if v}
+                if "seconds" in row:
+                    row["seconds"] = round(row["seconds"], 3)
+                phases[phase] = row
+        return {"total_seconds": round(total, 3), "phases": phases}
+
+    def rows(self) -> list[dict]:
+        with self._lock:
+            return [{"phase": phase[:64], **asdict(stats)} for phase, stats in sorted(self.phases.items())]
+
+
+@contextmanager
+def collect_timings(collector: TimingCollector | None = None) -> Iterator[TimingCollector]:
+    collector = collector or TimingCollector()
+    token = _collector.set(collector)
+    span_token = _span.set(OTHER)
+    try:
+        yield collector
+    finally:
+        collector.finished = time.monotonic()
+        _span.reset(span_token)
+        _collector.reset(token)
+
+
+@contextmanager
+def span(phase: str) -> Iterator[None]:
+    collector = _collector.get()
+    if collector is None:
+        yield
+        return
+    token = _span.set(phase)
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        _span.reset(token)
+        collector.add(phase, calls=1, seconds=time.monotonic() - started)
+
+
+def timed(phase: str) -> Callable[[F], F]:
+    """Decorator form of span()."""
+
+    def decorator(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _collector.get() is None:
+                return fn(*args, **kwargs)
+            with span(phase):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def _count(**counts: int) -> None:
+    collector = _collector.get()
+    if collector is not None:
+        collector.add(_span.get(), **counts)
+
+
+def add_rows(n: int) -> None:
+    if n:
+        _count(rows=int(n))
+
+
+def record_http(nbytes: int) -> None:
+    _count(http_requests=1, http_bytes=int(nbytes))
+
+
+def _on_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    _count(db_statements=1)
+
+
+def _on_commit(conn) -> None:
+    _count(db_commits=1)
+
+
+def install_db_counters(engine: Engine) -> None:
+    """Count statements (one per round trip, executemany included) and commits for the active collector."""
+
+    if not event.contains(engine, "before_cursor_execute", _on_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _on_cursor_execute)
+        event.listen(engine, "commit", _on_commit)
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import json
+import time
+from collections.abc import Iterable, Iterator
+from itertools import islice
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.services.job_timing import add_rows, timed
+
+# Bulk loader for index_kline_source_record.
+# Rows are streamed in chunks with COPY ... FROM STDIN into a session-local temp staging table and merged
+# with INSERT ... SELECT ... ON CONFLICT DO NOTHING, so a 365-day backfill (~80k bars) never becomes one
+# giant VALUES statement: statement size, and Python memory when `rows` is a generator (the Eastmoney backfill
+# streams parsed rows straight from the response strings), are bounded by KLINE_LOAD_CHUNK_SIZE.
+
+STAGE_TABLE = "kline_source_stage"
+
+KLINE_COLUMNS = (
+    "index_id",
+    "interval",
+    "bar_time",
+    "trade_date",
+    "source",
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+    "turnover_amount",
+    "turnover_currency",
+    "asof_ts",
+    "payload",
+    "ok",
+    "error",
+)
+
+_COLS = ", ".join(KLINE_COLUMNS)
+
+
+def _chunks(rows: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    it = iter(rows)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def _ensure_stage(db: Session) -> None:
+    # Temp tables live per connection; ON COMMIT DELETE ROWS keeps a pooled connection's copy empty.
+    db.execute(
+        sa.text(
+            f"CREATE TEMP TABLE IF NOT EXISTS {STAGE_TABLE} ON COMMIT DELETE ROWS AS "
+            f"SELECT {_COLS} FROM index_kline_source_record WITH NO DATA"
+        )
+    )
+
+
+def _copy_row(row: dict) -> tuple:
+    values = []
+    for col in KLINE_COLUMNS:
+        value = row.get(col)
+        if col == "payload" and value is not None:
+            value = json.dumps(value, ensure_ascii=False, default=str)
+        elif col == "ok" and value is None:
+            value = True
+        values.append(value)
+    return tuple(values)
+
+
+@timed("persist.kline_copy")
+def bulk_load_kline_rows(db: Session, rows: Iterable[dict], *, chunk_size: int | None = None) -> dict[str, float | int]:
+    """COPY `rows` (dicts keyed by KLINE_COLUMNS, may be a generator) into index_kline_source_record.
+
+    Duplicates of (index_id, interval, bar_time, source) are skipped. Does not commit.
+    Returns rows / inserted counts plus elapsed seconds and rows_per_second.
+    """
+
+    size = max(1, chunk_size or settings.KLINE_LOAD_CHUNK_SIZE)
+    started = time.monotonic()
+    total = 0
+    inserted = 0
+    chunks = 0
+
+    _ensure_stage(db)
+    cursor = db.connection().connection.cursor()
+    try:
+        for chunk in _chunks(rows, size):
+            cursor.execute(f"TRUNCATE {STAGE_TABLE}")
+            with cursor.copy(f"COPY {STAGE_TABLE} ({_COLS}) FROM STDIN") as copy:
+                for row in chunk:
+                    copy.write_row(_copy_row(row))
+            cursor.execute(
+                f"INSERT INTO index_kline_source_record ({_COLS}) "
+                f"SELECT {_COLS} FROM {STAGE_TABLE} "
+                "ON CONFLICT (index_id, interval, bar_time, source) DO NOTHING"
+            )
+            inserted += max(0, cursor.rowcount)
+            total += len(chunk)
+            chunks += 1
+    finally:
+        cursor.close()
+
+    seconds = time.monotonic() - started
+    add_rows(total)
+    return {
+        "rows": total,
+        "inserted": inserted,
+        "chunks": chunks,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(total / seconds, 1) if seconds > 0 else float(total),
+    }
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy.orm import Session
+
+from app.db.models import IndexKlineSourceRecord, KlineInterval
+from app.services.app_cache import get_cache, upsert_cache
+from app.services.job_timing import timed
+
+# Compact intraday minute series for homepage K-line charts.
+# Derived once at ingest time (fetch_intraday_snapshot) from the Eastmoney klines and kept in app_cache.
+# The snapshot payload does not carry the klines (see app.sources.eastmoney_intraday); a missing cache entry is
+# rebuilt from the persisted 1m bars in index_kline_source_record.
+MINUTE_KLINE_CACHE_PREFIX = "intraday:minute_kline:"
+MINUTE_KLINE_LIMIT = 400
+
+
+def minute_kline_cache_key(code: str) -> str:
+    return f"{MINUTE_KLINE_CACHE_PREFIX}{code.upper()}"
+
+
+def extract_minute_kline(payload: dict | None, *, limit: int = MINUTE_KLINE_LIMIT) -> dict[str, list]:
+    """Parse Eastmoney klines into columnar form: times + open/close/low/high arrays.
+
+    Accepts {"klines": rows}, a payload from before the klines were dropped ({"raw": {"resp": ...}}), the source
+    raw ({"resp": ...}) or a bare response.
+    """
+
+    empty = {"times": [], "open": [], "close": [], "low": [], "high": []}
+    if not isinstance(payload, dict):
+        return empty
+
+    raw = payload.get("raw") if isinstance(payload.get("raw"), dict) else payload
+    resp = raw.get("resp") if isinstance(raw, dict) and isinstance(raw.get("resp"), dict) else raw
+    data = resp.get("data") if isinstance(resp, dict) and isinstance(resp.get("data"), dict) else {}
+
+    rows = data.get("klines")
+    if not isinstance(rows, list):
+        rows = raw.get("klines") if isinstance(raw, dict) else None
+    if not isinstance(rows, list):
+        return empty
+
+    by_ts: dict[str, tuple[float, float, float, float]] = {}
+    for row in rows:
+        if isinstance(row, str):
+            p = row.split(",")
+            if len(p) < 5:
+                continue
+            ts = p[0].strip()
+            try:
+                o = float(p[1])
+                c = float(p[2])
+                h = float(p[3])
+                l = float(p[4])
+            except ValueError:
+                continue
+            by_ts[ts] = (o, c, l, h)
+            continue
+
+        if isinstance(row, dict):
+            ts = str(row.get("time") or row.get("ts") or row.get("dt") or "").strip()
+            if not ts:
+                continue
+            try:
+                o = float(row.get("open"))
+                c = float(row.get("close"))
+                h = float(row.get("high"))
+                l = float(row.get("low"))
+            except (TypeError, ValueError):
+                continue
+            by_ts[ts] = (o, c, l, h)
+
+    if not by_ts:
+        return empty
+
+    ordered = sorted(by_ts.items(), key=lambda x: x[0])[-limit:]
+    out = {"times": [], "open": [], "close": [], "low": [], "high": []}
+    for ts, (o, c, l, h) in ordered:
+        out["times"].append(ts.split(" ")[-1][:5] if " " in ts else ts)
+        out["open"].append(o)
+        out["close"].append(c)
+        out["low"].append(l)
+        out["high"].append(h)
+    return out
+
+
+def to_chart_series(series: dict | None) -> dict[str, list]:
+    """Columnar series -> ECharts candlestick shape {"times", "values": [[o, c, l, h], ...]}."""
+
+    if not isinstance(series, dict) or not series.get("times"):
+        return {"times": [], "values": []}
+    values = [list(v) for v in zip(series["open"], series["close"], series["low"], series["high"])]
+    return {"times": list(series["times"]), "values": values}
+
+
+@timed("persist.minute_kline")
+def store_minute_kline(
+    db: Session,
+    *,
+    code: str,
+    trade_date: date,
+    asof: datetime | None,
+    raw: dict | None,
+) -> int:
+    """Derive the minute series from kline rows ({"klines": [...]}, see extract_minute_kline) and cache it.
+    Returns the number of bars kept."""
+
+    series = extract_minute_kline(raw)
+    if not series["times"]:
+        return 0
+    upsert_cache(
+        db,
+        key=minute_kline_cache_key(code),
+        payload={
+            "code": code.upper(),
+            "trade_date": trade_date.isoformat(),
+            "asof": asof.isoformat() if asof is not None else None,
+            **series,
+        },
+    )
+    return len(series["times"])
+
+
+def _minute_rows_from_bars(db: Session, *, index_id: int) -> tuple[date, datetime, list[str]] | None:
+    """Latest trade date's persisted 1m bars as Eastmoney-style "YYYY-MM-DD HH:MM,open,close,high,low" rows."""
+
+    base = (
+        db.query(IndexKlineSourceRecord)
+        .filter(IndexKlineSourceRecord.index_id == index_id)
+        .filter(IndexKlineSourceRecord.interval == KlineInterval.M1)
+    )
+    # Newest bar via ix_index_kline_lookup (index_id, interval, bar_time DESC), then that day's bars.
+    latest_day = (
+        base.with_entities(IndexKlineSourceRecord.trade_date)
+        .order_by(IndexKlineSourceRecord.bar_time.desc())
+        .limit(1)
+        .scalar()
+    )
+    if latest_day is None:
+        return None
+    bars = (
+        base.filter(IndexKlineSourceRecord.trade_date == latest_day)
+        .filter(IndexKlineSourceRecord.close.isnot(None))
+        .order_by(IndexKlineSourceRecord.bar_time.asc())
+        .all()
+    )
+    if not bars:
+        return None
+
+    cn_tz = timezone(timedelta(hours=8))
+    rows = []
+    for bar in bars:
+        close = bar.close / 100
+        rows.append(
+            ",".join(
+                (
+                    bar.bar_time.astimezone(cn_tz).strftime("%Y-%m-%d %H:%M"),
+                    str(bar.open / 100 if bar.open is not None else close),
+                    str(close),
+                    str(bar.high / 100 if bar.high is not None else close),
+                    str(bar.low / 100 if bar.low is not None else close),
+                )
+            )
+        )
+    return latest_day, bars[-1].bar_time, rows
+
+
+def load_minute_kline(db: Session, *, code: str, index_id: int | None = None) -> dict[str, list]:
+    """Cached minute series in chart shape.
+
+    When the cache entry is missing (e.g. right after deploy), backfill it once from the latest persisted 1m bars.
+    """
+
+    cached = get_cache(db, key=minute_kline_cache_key(code))
+    if cached is not None and isinstance(cached.payload, dict):
+        return to_chart_series(cached.payload)
+    if index_id is None:
+        return {"times": [], "values": []}
+
+    found = _minute_rows_from_bars(db, index_id=index_id)
+    if found is None:
+        return {"times": [], "values": []}
+    trade_date, asof, rows = found
+    store_minute_kline(db, code=code, trade_date=trade_date, asof=asof, raw={"klines": rows})
+    return to_chart_series(extract_minute_kline({"klines": rows}))
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import abc
+import bisect
+import math
+import threading
+from collections.abc import Callable, Iterable
+
+# Minimal in-process Prometheus registry (text exposition format 0.0.4), served at GET /metrics.
+# Counters and histograms are updated on the hot path (one lock + dict lookup per observation);
+# gauges are callbacks evaluated at scrape time (pool checkouts, queue depths), so they cost nothing in between.
+# Values are per process: with several uvicorn workers, scrape each one or sum in Prometheus.
+# (app.services.metrics is unrelated: turnover distribution statistics.)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+JOB_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(abc.ABC):
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.label_names = labels
+        self._lock = threading.Lock()
+
+    def _key(self, labels: tuple) -> LabelValues:
+        if len(labels) != len(self.label_names):
+            raise ValueError(f"{self.name}: expected labels {self.label_names}, got {labels}")
+        return tuple(str(v) for v in labels)
+
+    @abc.abstractmethod
+    def samples(self) -> list[str]: ...
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> None:
+        super().__init__(name, help_text, labels)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.label_names, key)} {_num(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [count per bucket (non-cumulative, last = +Inf), sum]
+        self._values: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][idx] += 1
+            entry[1][0] += value
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = sorted((key, list(counts), total[0]) for key, (counts, total) in self._values.items())
+        out: list[str] = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                le = 'le="%s"' % _num(bound)
+                out.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            out.append(f"{self.name}_sum{_labels(self.label_names, key)} {_num(total)}")
+            out.append(f"{self.name}_count{_labels(self.label_names, key)} {cumulative}")
+        return out
+
+
+class Gauge(_Metric):
+    """Evaluated at scrape time: `fn()` returns {label values tuple: value} (use () without labels)."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        fn: Callable[[], dict[LabelValues, float]],
+        labels: tuple[str, ...] = (),
+    ) -> None:
+        super().__init__(name, help_text, labels)
+        self.fn = fn
+
+    def samples(self) -> list[str]:
+        values = self.fn()
+        return [f"{self.name}{_labels(self.label_names, key)} {_num(value)}" for key, value in sorted(values.items())]
+
+
+_registry: dict[str, _Metric] = {}
+_registry_lock = threading.Lock()
+
+
+def _register(metric: _Metric) -> _Metric:
+    with _registry_lock:
+        existing = _registry.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.label_names != metric.label_names:
+                raise ValueError(f"Metric {metric.name} already registered with another type or labels")
+            if isinstance(metric, Gauge):
+                existing.fn = metric.fn  # re-registration (reload) replaces the callback
+            return existing
+        _registry[metric.name] = metric
+        return metric
+
+
+def counter(name: str, help_text: str, labels: tuple[str, ...] = ()) -> Counter:
+    return _register(Counter(name, help_text, labels))  # type: ignore[return-value]
+
+
+def histogram(name: str, help_text: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+    return _register(Histogram(name, help_text, labels, buckets))  # type: ignore[return-value]
+
+
+def gauge(name: str, help_text: str, fn: Callable[[], dict[LabelValues, float]], labels: tuple[str, ...] = ()) -> Gauge:
+    return _register(Gauge(name, help_text, fn, labels))  # type: ignore[return-value]
+
+
+def render_metrics() -> str:
+    with _registry_lock:
+        metrics = sorted(_registry.values(), key=lambda m: m.name)
+    blocks = []
+    for metric in metrics:
+        try:
+            blocks.append(metric.render())
+        except Exception as e:  # a broken gauge callback must not take down the whole scrape
+            blocks.append(f"# {metric.name} unavailable: {type(e).__name__}")
+    return "\n".join(blocks) + "\n"
+
+
+# Metrics updated from several modules are defined here so every producer shares one instance.
+HTTP_REQUEST_SECONDS = histogram(
+    "web_request_duration_seconds",
+    "Web request latency by route template.",
+    ("method", "route", "status"),
+)
+JOB_RUNS = counter("job_runs_total", "Finished job runs by job and final status.", ("job_name", "status"))
+JOB_SECONDS = histogram("job_duration_seconds", "Job run wall time.", ("job_name",), JOB_BUCKETS)
+SOURCE_REQUEST_SECONDS = histogram(
+    "source_http_request_duration_seconds",
+    "Outbound HTTP request latency per upstream host (app.services.http_client).",
+    ("host",),
+)
+SOURCE_ERRORS = counter(
+    "source_http_errors_total",
+    "Outbound HTTP requests that raised, per upstream host and exception type.",
+    ("host", "error"),
+)
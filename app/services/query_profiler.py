@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import contextvars
+import logging
+import random
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Per-request SQL accounting (the middleware is app.web.request_profiling).
+# Engine events time every cursor execution. While a QueryStats is open in the current context, statement count,
+# DB time and rows (cursor.rowcount: rows returned by a SELECT, rows affected otherwise) are added to it.
+# Statements slower than DB_SLOW_QUERY_MS are logged anywhere (requests, jobs). Inside a request a
+# DB_EXPLAIN_SAMPLE_RATE share of slow SELECTs is re-run as EXPLAIN ANALYZE on the same connection and the plan
+# is logged, at most once per request, so sampling never doubles the cost of more than one statement.
+
+_STATEMENT_LOG_CHARS = 500
+_START_KEY = "query_profiler_start"
+
+_stats: contextvars.ContextVar[QueryStats | None] = contextvars.ContextVar("query_stats", default=None)
+
+
+@dataclass
+class QueryStats:
+    statements: int = 0
+    seconds: float = 0.0
+    rows: int = 0
+    slow: int = 0
+    explained: bool = False
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, seconds: float, rows: int, *, slow: bool) -> None:
+        with self._lock:
+            self.statements += 1
+            self.seconds += seconds
+            if rows > 0:
+                self.rows += rows
+            if slow:
+                self.slow += 1
+
+    def claim_explain(self) -> bool:
+        with self._lock:
+            if self.explained:
+                return False
+            self.explained = True
+            return True
+
+
+@contextmanager
+def profile_queries() -> Iterator[QueryStats]:
+    stats = QueryStats()
+    token = _stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _stats.reset(token)
+
+
+def _short(statement: str) -> str:
+    text = " ".join(statement.split())
+    return text if len(text) <= _STATEMENT_LOG_CHARS else text[:_STATEMENT_LOG_CHARS] + "..."
+
+
+def _explain(conn, statement: str, parameters) -> str | None:
+    # Raw DBAPI cursor: bypasses the engine events (no recursion, not counted in the request stats).
+    # The savepoint keeps a failing EXPLAIN from aborting the caller's transaction.
+    try:
+        cursor = conn.connection.dbapi_connection.cursor()
+    except Exception as e:
+        logger.warning("EXPLAIN ANALYZE skipped: %s", e)
+        return None
+    try:
+        cursor.execute("SAVEPOINT query_profiler_explain")
+        try:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+            plan = "\n".join(str(row[0]) for row in cursor.fetchall())
+        except Exception as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT query_profiler_explain")
+            logger.warning("EXPLAIN ANALYZE failed: %s", e)
+            return None
+        cursor.execute("RELEASE SAVEPOINT query_profiler_explain")
+        return plan
+    except Exception as e:
+        logger.warning("EXPLAIN ANALYZE failed: %s", e)
+        return None
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    starts = conn.info.get(_START_KEY)
+    if not starts:
+        return
+    seconds = time.perf_counter() - starts.pop()
+    slow_ms = settings.DB_SLOW_QUERY_MS
+    slow = slow_ms > 0 and seconds * 1000 >= slow_ms
+    stats = _stats.get()
+    if stats is not None:
+        stats.add(seconds, getattr(cursor, "rowcount", -1) or 0, slow=slow)
+    if not slow:
+        return
+
+    logger.warning("Slow query %.1fms: %s", seconds * 1000, _short(statement))
+    if (
+        stats is not None
+        and not executemany
+        and settings.DB_EXPLAIN_SAMPLE_RATE > 0
+        and statement.lstrip()[:6].upper() == "SELECT"
+        and random.random() < settings.DB_EXPLAIN_SAMPLE_RATE
+        and stats.claim_explain()
+    ):
+        plan = _explain(conn, statement, parameters)
+        if plan:
+            logger.warning("EXPLAIN ANALYZE (%.1fms): %s\n%s", seconds * 1000, _short(statement), plan)
+
+
+def _handle_error(exception_context) -> None:
+    # Drop the start time pushed for a statement that raised, so the stack stays balanced.
+    conn = exception_context.connection
+    if conn is not None and exception_context.cursor is not None:
+        starts = conn.info.get(_START_KEY)
+        if starts:
+            starts.pop()
+
+
+def install_query_profiler(engine: Engine) -> None:
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
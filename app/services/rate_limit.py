@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from collections.abc import Callable, Hashable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import urlsplit
+
+from app.config import settings
+from app.services.job_timing import span
+
+# Outbound request pacing for source fetchers.
+# Each upstream host family gets a token bucket (sustained rate + burst) and a concurrency cap;
+# jobs fan fetches out over a small thread pool and the limiter keeps them within the provider's
+# limits, instead of sleeping a random 1-30s before every request.
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `burst` stored."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = float(rate)
+        self.capacity = float(max(1, burst))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Block until a token is available. Returns the seconds spent waiting."""
+
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class HostLimiter:
+    def __init__(self, *, rate: float, burst: int, max_concurrency: int) -> None:
+        self.bucket = TokenBucket(rate, burst)
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.wait_seconds = 0.0
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        with self._slots:
+            waited = self.bucket.acquire()
+            with self._lock:
+                self.requests += 1
+                self.wait_seconds += waited
+            yield
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            return {"requests": self.requests, "wait_seconds": round(self.wait_seconds, 3)}
+
+
+_limiters: dict[str, HostLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _host_family(url_or_host: str) -> tuple[str, float, int, int]:
+    host = (urlsplit(url_or_host).hostname if "://" in url_or_host else url_or_host) or ""
+    host = host.lower()
+    if host == "eastmoney.com" or host.endswith(".eastmoney.com"):
+        return (
+            "eastmoney.com",
+            settings.EASTMONEY_RATE_PER_SECOND,
+            settings.EASTMONEY_RATE_BURST,
+            settings.EASTMONEY_MAX_CONCURRENCY,
+        )
+    # Other providers: concurrency cap only.
+    return host, 0.0, 1, settings.FETCH_HOST_MAX_CONCURRENCY
+
+
+def host_limiter(url_or_host: str) -> HostLimiter:
+    key, rate, burst, max_concurrency = _host_family(url_or_host)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = HostLimiter(rate=rate, burst=burst, max_concurrency=max_concurrency)
+            _limiters[key] = limiter
+        return limiter
+
+
+@contextmanager
+def host_slot(url_or_host: str) -> Iterator[None]:
+    """Hold a concurrency slot + rate token for the request's host family while the request runs."""
+
+    with host_limiter(url_or_host).slot():
+        yield
+
+
+def limiter_stats() -> dict[str, dict[str, float]]:
+    with _limiters_lock:
+        return {key: limiter.stats() for key, limiter in sorted(_limiters.items())}
+
+
+@dataclass
+class FetchOutcome:
+    value: Any = None
+    error: BaseException | None = None
+    seconds: float = 0.0
+
+    def get(self) -> Any:
+        """Return the fetched value, re-raising the fetch error in the caller's thread."""
+
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+def fan_out(
+    tasks: dict[Hashable, Callable[[], Any]],
+    *,
+    max_workers: int | None = None,
+) -> dict[Hashable, FetchOutcome]:
+    """Run independent fetch callables concurrently and collect an outcome per key.
+
+    Only network I/O belongs here: callables must not touch the caller's DB session.
+    """
+
+    if not tasks:
+        return {}
+
+    def _run(fn: Callable[[], Any]) -> FetchOutcome:
+        started = time.monotonic()
+        try:
+            return FetchOutcome(value=fn(), seconds=time.monotonic() - started)
+        except Exception as e:
+            return FetchOutcome(error=e, seconds=time.monotonic() - started)
+
+    workers = max(1, min(len(tasks), max_workers or settings.FETCH_FANOUT_WORKERS))
+    with span("fetch"), ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch") as pool:
+        # Each worker runs in a copy of the caller's context, so job timings see the fetches.
+        futures = {key: pool.submit(contextvars.copy_context().run, _run, fn) for key, fn in tasks.items()}
+        return {key: future.result() for key, future in futures.items()}
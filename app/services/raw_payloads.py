@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import zlib
+from collections.abc import Iterable
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+try:  # optional: zlib is used when zstandard is not installed
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from app.config import settings
+from app.db.models import RawPayloadBlob
+from app.services.job_timing import timed
+
+# Raw upstream responses, stored once per distinct content.
+# Snapshot rows used to embed the full response ({"raw": ...}) in every append; the Eastmoney intraday
+# response carries the whole day's minute klines, so a trading session stored it again every few minutes.
+# (That growing series is no longer part of the raw at all, see app.sources.eastmoney_intraday: a response that
+# changes every run never deduplicates, so blob mode alone would still write one copy of the day per run.)
+# Now payload["raw"] is replaced by payload["raw_ref"] (sha256 of the canonical JSON) pointing at a
+# compressed raw_payload_blob row, or dropped entirely, per source (RAW_PAYLOAD_POLICY):
+#   inline - keep the old embedded {"raw": ...}
+#   blob   - content-addressed blob (identical responses share one row)
+#   drop   - do not keep the raw response
+
+MODES = ("inline", "blob", "drop")
+_ZSTD_LEVEL = 10
+_ZLIB_LEVEL = 6
+
+
+def raw_payload_mode(source: str) -> str:
+    """Policy for a source: "SOURCE=mode" entries of RAW_PAYLOAD_POLICY, then the "*" entry, then blob."""
+
+    policy: dict[str, str] = {}
+    for part in (settings.RAW_PAYLOAD_POLICY or "").split(","):
+        key, _, mode = part.partition("=")
+        key, mode = key.strip().upper(), mode.strip().lower()
+        if key and mode in MODES:
+            policy[key] = mode
+    return policy.get((source or "").upper()) or policy.get("*") or "blob"
+
+
+def canonical_json(raw: object) -> bytes:
+    return json.dumps(raw, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _compress(data: bytes) -> tuple[str, bytes]:
+    codec = (settings.RAW_PAYLOAD_COMPRESSION or "").lower()
+    if codec == "zstd" and zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress(data)
+    if codec in {"zstd", "zlib"}:
+        # zstandard is optional: fall back to zlib.
+        return "zlib", zlib.compress(data, _ZLIB_LEVEL)
+    return "none", data
+
+
+def _decompress(encoding: str, content: bytes) -> bytes:
+    if encoding == "zstd":
+        if zstandard is None:
+            raise RuntimeError("raw payload is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(content)
+    if encoding == "zlib":
+        return zlib.decompress(content)
+    return content
+
+
+def store_raw_payload(db: Session, raw: object, *, source: str | None = None) -> str:
+    """Insert the blob if this content is new (refresh last_seen_at otherwise). Returns the sha256.
+
+    Does not commit: the blob lands in the same transaction as the row that references it.
+    """
+
+    return store_raw_payloads(db, [(raw, source)])[0]
+
+
+@timed("persist.raw_payload")
+def store_raw_payloads(db: Session, items: list[tuple[object, str | None]]) -> list[str]:
+    """Batch form of store_raw_payload: one multi-row upsert for all distinct contents of `items`
+    ((raw, source) pairs). Returns the sha256 of each item, in order. Does not commit.
+
+    Duplicates are folded first (ON CONFLICT DO UPDATE cannot touch one row twice per statement; the first
+    item's source wins) and rows are sorted by digest so concurrent writers lock blobs in the same order.
+    """
+
+    digests: list[str] = []
+    blobs: dict[str, dict] = {}
+    for raw, source in items:
+        data = canonical_json(raw)
+        digest = hashlib.sha256(data).hexdigest()
+        digests.append(digest)
+        if digest in blobs:
+            continue
+        encoding, content = _compress(data)
+        blobs[digest] = {
+            "sha256": digest,
+            "encoding": encoding,
+            "size_bytes": len(data),
+            "stored_bytes": len(content),
+            "content": content,
+            "source": source,
+        }
+    if blobs:
+        stmt = pg_insert(RawPayloadBlob).values([blobs[d] for d in sorted(blobs)])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[RawPayloadBlob.sha256],
+            set_={"last_seen_at": sa.func.now()},
+        )
+        db.execute(stmt)
+    return digests
+
+
+def apply_raw_policy(db: Session, payload: dict | None, *, source: str) -> dict | None:
+    """Rewrite a snapshot payload's "raw" entry according to the source's policy."""
+
+    return apply_raw_policy_many(db, [(payload, source)])[0]
+
+
+def apply_raw_policy_many(db: Session, items: list[tuple[dict | None, str]]) -> list[dict | None]:
+    """apply_raw_policy for a batch of (payload, source): the blobs are written with one store_raw_payloads."""
+
+    out: list[dict | None] = []
+    pending: list[int] = []  # indexes of `out` waiting for a raw_ref
+    to_store: list[tuple[object, str | None]] = []
+    for payload, source in items:
+        if not isinstance(payload, dict) or payload.get("raw") is None:
+            out.append(payload)
+            continue
+        mode = raw_payload_mode(source)
+        if mode == "inline":
+            out.append(payload)
+            continue
+        rest = {k: v for k, v in payload.items() if k != "raw"}
+        if mode == "drop":
+            out.append(rest or None)
+            continue
+        pending.append(len(out))
+        out.append(rest)
+        to_store.append((payload["raw"], source))
+    if to_store:
+        for index, digest in zip(pending, store_raw_payloads(db, to_store)):
+            out[index] = {**out[index], "raw_ref": digest}
+    return out
+
+
+def load_raw_payloads(db: Session, refs: Iterable[str]) -> dict[str, object]:
+    wanted = sorted({r for r in refs if r})
+    if not wanted:
+        return {}
+    rows = db.query(RawPayloadBlob).filter(RawPayloadBlob.sha256.in_(wanted)).all()
+    return {row.sha256: json.loads(_decompress(row.encoding, row.content)) for row in rows}
+
+
+def expand_payload(db: Session, payload: dict | None) -> dict | None:
+    """Inverse of apply_raw_policy for readers that need the raw response: {"raw_ref": h} -> {"raw": ...}."""
+
+    if not isinstance(payload, dict) or not payload.get("raw_ref"):
+        return payload
+    raw = load_raw_payloads(db, [payload["raw_ref"]]).get(payload["raw_ref"])
+    return {**{k: v for k, v in payload.items() if k != "raw_ref"}, "raw": raw}
+
+
+def prune_raw_payloads(db: Session, *, min_age_hours: int = 24) -> int:
+    """Delete blobs no snapshot row references any more (e.g. after rollup stripped payloads)."""
+
+    deleted = db.execute(
+        sa.text(
+            """
+            DELETE FROM raw_payload_blob b
+            WHERE b.last_seen_at < now() - make_interval(hours => :min_age_hours)
+              AND NOT EXISTS (
+                  SELECT 1 FROM index_realtime_snapshot s WHERE (s.payload->>'raw_ref') = b.sha256
+              )
+              AND NOT EXISTS (
+                  SELECT 1 FROM index_realtime_api_snapshot a WHERE (a.payload->>'raw_ref') = b.sha256
+              )
+            """
+        ),
+        {"min_age_hours": int(min_age_hours)},
+    ).rowcount
+    db.commit()
+    return deleted
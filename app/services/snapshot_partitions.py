@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import logging
+import re
+from datetime import date, timedelta
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.services.app_cache import get_cache, upsert_cache
+from app.services.raw_payloads import prune_raw_payloads
+
+logger = logging.getLogger(__name__)
+
+# Partition maintenance for the append-only index_realtime_snapshot table (migration 0015).
+# The table is RANGE partitioned by trade_date, one partition per month (index_realtime_snapshot_pYYYYMM)
+# plus a default partition. The daily maintain_realtime_snapshot job:
+#   1) creates the partitions for the coming months, so live inserts never land in the default partition,
+#      and one for every month that still has rows in the default partition (backfills of older trade dates),
+#   2) rolls up days older than SNAPSHOT_RAW_RETENTION_DAYS to one row per (index, session, source, interval),
+#   3) optionally drops whole monthly partitions older than SNAPSHOT_RETENTION_MONTHS,
+#   4) deletes raw_payload_blob rows no snapshot references any more.
+PARENT_TABLE = "index_realtime_snapshot"
+DEFAULT_PARTITION = "index_realtime_snapshot_default"
+ROLLUP_WATERMARK_KEY = "maintenance:realtime_snapshot_rollup"
+_PARTITION_RE = re.compile(r"^index_realtime_snapshot_p(\d{4})(\d{2})$")
+
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def add_months(d: date, months: int) -> date:
+    total = d.year * 12 + (d.month - 1) + months
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_p{month.year:04d}{month.month:02d}"
+
+
+def is_partitioned(db: Session) -> bool:
+    relkind = db.execute(
+        sa.text("SELECT c.relkind FROM pg_class c WHERE c.oid = to_regclass(:name)"),
+        {"name": PARENT_TABLE},
+    ).scalar()
+    return relkind == "p"
+
+
+def _table_exists(db: Session, name: str) -> bool:
+    return db.execute(sa.text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
+
+
+def _create_partition(db: Session, lo: date) -> str | None:
+    """Create the monthly partition starting at `lo` unless it exists. Returns its name when created.
+
+    Rows that already landed in the default partition for that month are moved into it first,
+    otherwise ATTACH would fail on the overlapping default rows.
+    """
+
+    hi = add_months(lo, 1)
+    name = partition_name(lo)
+    if _table_exists(db, name):
+        return None
+    bounds = {"lo": lo, "hi": hi}
+    spilled = db.execute(
+        sa.text(f"SELECT count(*) FROM {DEFAULT_PARTITION} WHERE trade_date >= :lo AND trade_date < :hi"),
+        bounds,
+    ).scalar()
+    if not spilled:
+        db.execute(
+            sa.text(
+                f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} "
+                f"FOR VALUES FROM ('{lo.isoformat()}') TO ('{hi.isoformat()}')"
+            )
+        )
+    else:
+        db.execute(sa.text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS)"))
+        db.execute(
+            sa.text(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE trade_date >= :lo AND trade_date < :hi RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            ),
+            bounds,
+        )
+        db.execute(
+            sa.text(
+                f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{lo.isoformat()}') TO ('{hi.isoformat()}')"
+            )
+        )
+    db.commit()
+    logger.info("created snapshot partition %s (moved %s rows from default)", name, spilled or 0)
+    return name
+
+
+def ensure_snapshot_partitions(db: Session, *, today: date, months_ahead: int) -> list[str]:
+    """Create monthly partitions from the current month through `months_ahead` months ahead."""
+
+    created: list[str] = []
+    first = month_start(today)
+    for offset in range(0, max(0, months_ahead) + 1):
+        name = _create_partition(db, add_months(first, offset))
+        if name is not None:
+            created.append(name)
+    return created
+
+
+def rehome_default_partition_rows(db: Session) -> list[str]:
+    """Create a partition for every month that has rows in the default partition (backfilled trade dates
+    older than the oldest partition, or beyond the pre-created range) and move those rows into it."""
+
+    months = db.execute(
+        sa.text(f"SELECT DISTINCT date_trunc('month', trade_date)::date FROM {DEFAULT_PARTITION} ORDER BY 1")
+    ).scalars().all()
+    created: list[str] = []
+    for month in months:
+        name = _create_partition(db, month_start(month))
+        if name is not None:
+            created.append(name)
+    return created
+
+
+def rollup_realtime_snapshots(
+    db: Session,
+    *,
+    today: date,
+    keep_days: int,
+    interval_minutes: int,
+    max_days: int = 31,
+) -> dict:
+    """Downsample trade dates older than `keep_days` to the latest row per
+    (index_id, session, source, interval bucket). Only each day's final row per (index_id, source)
+    keeps its JSONB payload.
+
+    Progress is kept in app_cache (ROLLUP_WATERMARK_KEY), so each day is rolled up once
+    and a run touches at most `max_days` days.
+    """
+
+    cutoff = today - timedelta(days=max(0, keep_days))
+    cached = get_cache(db, key=ROLLUP_WATERMARK_KEY)
+    watermark = None
+    if cached is not None and isinstance(cached.payload, dict) and cached.payload.get("rolled_through"):
+        watermark = date.fromisoformat(str(cached.payload["rolled_through"]))
+
+    days_q = f"SELECT DISTINCT trade_date FROM {PARENT_TABLE} WHERE trade_date < :cutoff"
+    params: dict = {"cutoff": cutoff, "max_days": max(1, max_days)}
+    if watermark is not None:
+        days_q += " AND trade_date > :watermark"
+        params["watermark"] = watermark
+    days = [row[0] for row in db.execute(sa.text(days_q + " ORDER BY trade_date LIMIT :max_days"), params)]
+
+    bucket_seconds = max(1, interval_minutes) * 60
+    deleted = 0
+    stripped = 0
+    for day in days:
+        deleted += db.execute(
+            sa.text(
+                f"""
+                DELETE FROM {PARENT_TABLE} s
+                USING (
+                    SELECT id FROM (
+                        SELECT
+                            id,
+                            row_number() OVER (
+                                PARTITION BY index_id, session, source,
+                                    floor(extract(epoch FROM data_updated_at) / :bucket_seconds)
+                                ORDER BY data_updated_at DESC, id DESC
+                            ) AS rn
+                        FROM {PARENT_TABLE}
+                        WHERE trade_date = :day
+                    ) ranked
+                    WHERE rn > 1
+                ) doomed
+                WHERE s.trade_date = :day AND s.id = doomed.id
+                """
+            ),
+            {"day": day, "bucket_seconds": bucket_seconds},
+        ).rowcount
+        stripped += db.execute(
+            sa.text(
+                f"""
+                UPDATE {PARENT_TABLE} s
+                SET payload = NULL
+                FROM (
+                    SELECT
+                        id,
+                        row_number() OVER (PARTITION BY index_id, source ORDER BY data_updated_at DESC, id DESC) AS rn
+                    FROM {PARENT_TABLE}
+                    WHERE trade_date = :day
+                ) ranked
+                WHERE s.trade_date = :day AND s.id = ranked.id AND ranked.rn > 1 AND s.payload IS NOT NULL
+                """
+            ),
+            {"day": day},
+        ).rowcount
+        upsert_cache(db, key=ROLLUP_WATERMARK_KEY, payload={"rolled_through": day.isoformat()})
+
+    return {
+        "cutoff": cutoff.isoformat(),
+        "days": len(days),
+        "rolled_through": days[-1].isoformat() if days else (watermark.isoformat() if watermark else None),
+        "deleted_rows": deleted,
+        "payloads_stripped": stripped,
+    }
+
+
+def drop_expired_partitions(db: Session, *, today: date, retention_months: int) -> list[str]:
+    """Drop monthly partitions that end on or before month_start(today) - retention_months.
+    retention_months <= 0 keeps everything."""
+
+    if retention_months <= 0:
+        return []
+    keep_from = add_months(month_start(today), -retention_months)
+    names = db.execute(
+        sa.text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:parent)"
+        ),
+        {"parent": PARENT_TABLE},
+    ).scalars()
+    dropped: list[str] = []
+    for name in sorted(names):
+        m = _PARTITION_RE.match(name)
+        if m is None:
+            continue
+        month = date(int(m.group(1)), int(m.group(2)), 1)
+        if add_months(month, 1) <= keep_from:
+            db.execute(sa.text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    db.commit()
+    return dropped
+
+
+def maintain_realtime_snapshots(db: Session, *, today: date) -> dict:
+    if not is_partitioned(db):
+        raise RuntimeError(f"{PARENT_TABLE} is not partitioned (run migration 0015)")
+
+    created = ensure_snapshot_partitions(db, today=today, months_ahead=settings.SNAPSHOT_PARTITION_MONTHS_AHEAD)
+    created += rehome_default_partition_rows(db)
+    rollup = rollup_realtime_snapshots(
+        db,
+        today=today,
+        keep_days=settings.SNAPSHOT_RAW_RETENTION_DAYS,
+        interval_minutes=settings.SNAPSHOT_ROLLUP_INTERVAL_MINUTES,
+    )
+    dropped = drop_expired_partitions(db, today=today, retention_months=settings.SNAPSHOT_RETENTION_MONTHS)
+    # Rollup strips payloads and dropped partitions take their rows along: release unreferenced raw blobs.
+    blobs_pruned = prune_raw_payloads(db)
+    return {
+        "partitions_created": created,
+        "rollup": rollup,
+        "partitions_dropped": dropped,
+        "raw_blobs_pruned": blobs_pruned,
+    }
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import date, datetime
+
+from sqlalchemy.orm import Session, defer
+
+from app.db.models import IndexQuoteHistory, IndexRealtimeApiSnapshot, IndexRealtimeSnapshot, SessionType
+
+# Batched "latest row per (index_id, session)" lookups.
+# Each helper is a single PostgreSQL DISTINCT ON query, so callers that need several indices
+# (homepage cards, global quotes, insight payload) do not add a round trip per index.
+# Results are keyed by (index_id, session); with per_session=False the key is (index_id, None).
+# The JSONB payload column is deferred unless asked for: readers only need the scalar fields.
+
+
+def latest_realtime_snapshots(
+    db: Session,
+    *,
+    index_ids: Iterable[int],
+    trade_date: date | None = None,
+    since_date: date | None = None,
+    sessions: Iterable[SessionType] | None = None,
+    updated_before: datetime | None = None,
+    source: str | None = None,
+    latest_by: str = "data_updated_at",
+    per_session: bool = True,
+    with_payload: bool = False,
+) -> dict[tuple[int, SessionType | None], IndexRealtimeSnapshot]:
+    """Latest IndexRealtimeSnapshot per index (and session).
+
+    latest_by="data_updated_at" orders by (data_updated_at desc, id desc);
+    latest_by="id" picks the most recently inserted row.
+    The table is partitioned by trade_date: pass trade_date or since_date so the query
+    only scans the matching monthly partitions.
+    """
+
+    ids = sorted({int(v) for v in index_ids})
+    if not ids:
+        return {}
+
+    m = IndexRealtimeSnapshot
+    keys = (m.index_id, m.session) if per_session else (m.index_id,)
+    q = db.query(m).distinct(*keys).filter(m.index_id.in_(ids))
+    if not with_payload:
+        q = q.options(defer(m.payload))
+    if trade_date is not None:
+        q = q.filter(m.trade_date == trade_date)
+    if since_date is not None:
+        q = q.filter(m.trade_date >= since_date)
+    if sessions is not None:
+        q = q.filter(m.session.in_(list(sessions)))
+    if updated_before is not None:
+        q = q.filter(m.data_updated_at <= updated_before)
+    if source is not None:
+        q = q.filter(m.source == source)
+    if latest_by == "id":
+        q = q.order_by(*keys, m.id.desc())
+    else:
+        q = q.order_by(*keys, m.data_updated_at.desc(), m.id.desc())
+
+    return {(row.index_id, row.session if per_session else None): row for row in q.all()}
+
+
+def latest_api_snapshots(
+    db: Session,
+    *,
+    index_ids: Iterable[int],
+    trade_date: date,
+    sessions: Iterable[SessionType] | None = None,
+    with_payload: bool = False,
+) -> dict[tuple[int, SessionType], IndexRealtimeApiSnapshot]:
+    """Latest IndexRealtimeApiSnapshot per (index_id, session) for a trade date."""
+
+    ids = sorted({int(v) for v in index_ids})
+    if not ids:
+        return {}
+
+    m = IndexRealtimeApiSnapshot
+    q = (
+        db.query(m)
+        .distinct(m.index_id, m.session)
+        .filter(m.index_id.in_(ids))
+        .filter(m.trade_date == trade_date)
+    )
+    if not with_payload:
+        q = q.options(defer(m.payload))
+    if sessions is not None:
+        q = q.filter(m.session.in_(list(sessions)))
+    q = q.order_by(m.index_id, m.session, m.data_updated_at.desc(), m.id.desc())
+    return {(row.index_id, row.session): row for row in q.all()}
+
+
+def latest_index_histories(
+    db: Session,
+    *,
+    index_ids: Iterable[int],
+    sessions: Iterable[SessionType] | None = None,
+    before_date: date | None = None,
+    with_payload: bool = False,
+) -> dict[tuple[int, SessionType], IndexQuoteHistory]:
+    """Latest IndexQuoteHistory per (index_id, session), optionally strictly before a date."""
+
+    ids = sorted({int(v) for v in index_ids})
+    if not ids:
+        return {}
+
+    m = IndexQuoteHistory
+    q = db.query(m).distinct(m.index_id, m.session).filter(m.index_id.in_(ids))
+    if not with_payload:
+        q = q.options(defer(m.payload))
+    if sessions is not None:
+        q = q.filter(m.session.in_(list(sessions)))
+    if before_date is not None:
+        q = q.filter(m.trade_date < before_date)
+    q = q.order_by(m.index_id, m.session, m.trade_date.desc())
+    return {(row.index_id, row.session): row for row in q.all()}
@@ -3,7 +3,8 @@ from __future__ import annotations
 import re
 from dataclasses import dataclass
 
-import httpx
+from app.services.http_client import SOURCE_HEADERS, http_get
+from app.services.job_timing import timed
 
 
 @dataclass
@@ -27,11 +28,12 @@ def _parse_line(line: str) -> tuple[str, list[str]] | None:
     return sym, fields
 
 
+@timed("tencent.quotes")
 def fetch_quotes(symbols: list[str], timeout_seconds: int = 10) -> list[Quote]:
     if not symbols:
         return []
     url = "https://qt.gtimg.cn/q=" + ",".join(symbols)
-    r = httpx.get(url, timeout=timeout_seconds, headers={"User-Agent": "market-turnover/0.1"})
+    r = http_get(url, timeout=timeout_seconds, headers=SOURCE_HEADERS)
     r.raise_for_status()
     text = r.content.decode("gbk", "ignore")
 
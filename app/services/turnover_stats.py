@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import logging
+from datetime import date
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Query, Session
+
+from app.db.models import IndexQuoteHistory, SessionType, TurnoverFact, TurnoverRollingStats
+from app.services.job_timing import timed
+
+logger = logging.getLogger(__name__)
+
+# Rolling turnover aggregates (peak / all-time high / N-day sums) per (series, session).
+# Updated on every fact write with one bounded "latest 30" query, so readers get O(1) lookups
+# instead of MAX() scans over the whole history. Peaks only need a full scan when the peak day
+# itself is rewritten lower (rare correction).
+WINDOWS = (5, 10, 20, 30)
+HSI_FACT_SERIES_KEY = "turnover_fact:HSI"
+
+
+def index_series_key(index_id: int) -> str:
+    return f"index:{int(index_id)}"
+
+
+def stats_avg(stats: TurnoverRollingStats | None, n: int) -> float | None:
+    """Average turnover over the latest n days, or None when the series is empty."""
+
+    if stats is None:
+        return None
+    count = getattr(stats, f"cnt_{n}")
+    if not count:
+        return None
+    return getattr(stats, f"sum_{n}") / count
+
+
+def get_turnover_stats(
+    db: Session,
+    *,
+    series_keys: list[str],
+) -> dict[tuple[str, SessionType], TurnoverRollingStats]:
+    if not series_keys:
+        return {}
+    rows = db.query(TurnoverRollingStats).filter(TurnoverRollingStats.series_key.in_(series_keys)).all()
+    return {(row.series_key, row.session): row for row in rows}
+
+
+def _apply_windows(stats: TurnoverRollingStats, recent: list[int]) -> None:
+    for n in WINDOWS:
+        window = recent[:n]
+        setattr(stats, f"sum_{n}", sum(window))
+        setattr(stats, f"cnt_{n}", len(window))
+    stats.max_30 = max(recent[:30]) if recent else None
+
+
+def _update_stats(
+    db: Session,
+    *,
+    series_key: str,
+    session: SessionType,
+    trade_date: date | None,
+    turnover: int | None,
+    price: int | None,
+    turnover_q: Query,
+    turnover_col,
+    price_q: Query | None,
+    price_col,
+    date_col,
+    rebuild: bool = False,
+) -> None:
+    recent = [int(v) for (v,) in turnover_q.with_entities(turnover_col).order_by(date_col.desc()).limit(30).all()]
+
+    if rebuild:
+        # Batch writes (many dates at once): recompute peaks/high once instead of per row.
+        trade_date = (price_q if price_q is not None else turnover_q).with_entities(sa.func.max(date_col)).scalar()
+        if trade_date is None:
+            return
+
+    stats = db.get(TurnoverRollingStats, (series_key, session))
+    created = stats is None or rebuild
+    if stats is None:
+        stats = TurnoverRollingStats(series_key=series_key, session=session)
+        db.add(stats)
+
+    rewrote_peak_lower = (
+        not created
+        and stats.peak_trade_date == trade_date
+        and (turnover is None or stats.peak_turnover is None or turnover < stats.peak_turnover)
+    )
+    if created or rewrote_peak_lower:
+        top = turnover_q.with_entities(turnover_col, date_col).order_by(turnover_col.desc(), date_col.desc()).first()
+        stats.peak_turnover, stats.peak_trade_date = (int(top[0]), top[1]) if top is not None else (None, None)
+    elif turnover is not None and (stats.peak_turnover is None or turnover > stats.peak_turnover):
+        stats.peak_turnover, stats.peak_trade_date = int(turnover), trade_date
+
+    if price_q is not None:
+        rewrote_high_lower = (
+            not created
+            and stats.price_high_trade_date == trade_date
+            and (price is None or stats.price_high is None or price < stats.price_high)
+        )
+        if created or rewrote_high_lower:
+            top = price_q.with_entities(price_col, date_col).order_by(price_col.desc(), date_col.desc()).first()
+            stats.price_high, stats.price_high_trade_date = (int(top[0]), top[1]) if top is not None else (None, None)
+        elif price is not None and (stats.price_high is None or price > stats.price_high):
+            stats.price_high, stats.price_high_trade_date = int(price), trade_date
+
+    if rebuild or stats.latest_trade_date is None or trade_date > stats.latest_trade_date:
+        stats.latest_trade_date = trade_date
+    _apply_windows(stats, recent)
+
+
+@timed("persist.turnover_stats")
+def update_index_turnover_stats(
+    db: Session,
+    *,
+    index_id: int,
+    session: SessionType,
+    trade_date: date | None = None,
+    turnover: int | None = None,
+    last: int | None = None,
+    rebuild: bool = False,
+    commit: bool = True,
+) -> None:
+    """Refresh stats for an index_quote_history series after a fact write. Never raises.
+
+    rebuild=True recomputes peaks from the table (use after bulk writes spanning many dates).
+    """
+
+    base = (
+        db.query(IndexQuoteHistory)
+        .filter(IndexQuoteHistory.index_id == index_id)
+        .filter(IndexQuoteHistory.session == session)
+    )
+    try:
+        _update_stats(
+            db,
+            series_key=index_series_key(index_id),
+            session=session,
+            trade_date=trade_date,
+            turnover=turnover,
+            price=last,
+            turnover_q=base.filter(IndexQuoteHistory.turnover_amount.isnot(None)),
+            turnover_col=IndexQuoteHistory.turnover_amount,
+            price_q=base,
+            price_col=IndexQuoteHistory.last,
+            date_col=IndexQuoteHistory.trade_date,
+            rebuild=rebuild,
+        )
+        if commit:
+            db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception("failed to update turnover stats: index_id=%s session=%s", index_id, session)
+
+
+def update_turnover_fact_stats(
+    db: Session,
+    *,
+    session: SessionType,
+    trade_date: date | None = None,
+    turnover: int | None = None,
+    rebuild: bool = False,
+    commit: bool = True,
+) -> None:
+    """Refresh stats for the HSI turnover_fact series after a fact write. Never raises."""
+
+    try:
+        _update_stats(
+            db,
+            series_key=HSI_FACT_SERIES_KEY,
+            session=session,
+            trade_date=trade_date,
+            turnover=turnover,
+            price=None,
+            turnover_q=db.query(TurnoverFact).filter(TurnoverFact.session == session),
+            turnover_col=TurnoverFact.turnover_hkd,
+            price_q=None,
+            price_col=None,
+            date_col=TurnoverFact.trade_date,
+            rebuild=rebuild,
+        )
+        if commit:
+            db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception("failed to update turnover_fact stats: session=%s", session)
+
+
+def ensure_turnover_stats(
+    db: Session,
+    *,
+    index_ids: list[int],
+    include_hsi_fact: bool = False,
+) -> dict[tuple[str, SessionType], TurnoverRollingStats]:
+    """Read stats for the given series; series missing a row (never written since the migration) are built once."""
+
+    keys = [index_series_key(i) for i in index_ids]
+    if include_hsi_fact:
+        keys.append(HSI_FACT_SERIES_KEY)
+    found = get_turnover_stats(db, series_keys=keys)
+
+    built = False
+    for session in (SessionType.FULL, SessionType.AM):
+        for index_id in index_ids:
+            if (index_series_key(index_id), session) in found:
+                continue
+            latest = (
+                db.query(IndexQuoteHistory.trade_date, IndexQuoteHistory.turnover_amount, IndexQuoteHistory.last)
+                .filter(IndexQuoteHistory.index_id == index_id)
+                .filter(IndexQuoteHistory.session == session)
+                .order_by(IndexQuoteHistory.trade_date.desc())
+                .first()
+            )
+            if latest is not None:
+                update_index_turnover_stats(
+                    db,
+                    index_id=index_id,
+                    session=session,
+                    trade_date=latest[0],
+                    turnover=latest[1],
+                    last=latest[2],
+                )
+                built = True
+        if include_hsi_fact and (HSI_FACT_SERIES_KEY, session) not in found:
+            latest_date = db.query(sa.func.max(TurnoverFact.trade_date)).filter(TurnoverFact.session == session).scalar()
+            if latest_date is not None:
+                update_turnover_fact_stats(db, session=session, trade_date=latest_date, turnover=None)
+                built = True
+
+    return get_turnover_stats(db, series_keys=keys) if built else found
@@ -4,9 +4,11 @@ import re
 from dataclasses import dataclass
 from datetime import datetime
 
-import httpx
 from selectolax.parser import HTMLParser
 
+from app.services.http_client import SOURCE_HEADERS, http_get
+from app.services.job_timing import timed
+
 
 # AASTOCKS pages change; this is a best-effort POC scraper.
 AASTOCKS_HSI_LOCAL_INDEX_URL = "https://www.aastocks.com/tc/stocks/market/index/hk-index-con.aspx"
@@ -35,10 +37,10 @@ def _parse_hk_turnover_to_hkd(text: str) -> int:
     raise ValueError(f"Cannot parse turnover from: {text}")
 
 
+@timed("aastocks.midday_turnover")
 def fetch_midday_turnover(timeout_seconds: int = 10) -> AastocksMidday:
-    with httpx.Client(timeout=timeout_seconds, follow_redirects=True, headers={"User-Agent": "market-turnover/0.1"}) as client:
-        r = client.get(AASTOCKS_HSI_LOCAL_INDEX_URL)
-        r.raise_for_status()
+    r = http_get(AASTOCKS_HSI_LOCAL_INDEX_URL, headers=SOURCE_HEADERS, timeout=timeout_seconds, follow_redirects=True)
+    r.raise_for_status()
 
     doc = HTMLParser(r.text)
 
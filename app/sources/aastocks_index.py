@@ -4,7 +4,8 @@ import re
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 
-import httpx
+from app.services.http_client import SOURCE_HEADERS, http_get
+from app.services.job_timing import timed
 
 
 AASTOCKS_HK_INDEX_FEED_URL = "https://www.aastocks.com/tc/resources/datafeed/getstockindex.ashx?type=5"
@@ -35,12 +36,12 @@ def _parse_turnover_to_hkd(text: str) -> int:
     raise ValueError(f"Cannot parse turnover from: {text}")
 
 
+@timed("aastocks.hsi_snapshot")
 def fetch_hsi_snapshot(timeout_seconds: int = 10) -> HsiSnapshot:
     """Fetch HSI price & turnover from AASTOCKS public JSON feed."""
-    with httpx.Client(timeout=timeout_seconds, follow_redirects=True, headers={"User-Agent": "market-turnover/0.1"}) as client:
-        r = client.get(AASTOCKS_HK_INDEX_FEED_URL)
-        r.raise_for_status()
-        data = r.json()
+    r = http_get(AASTOCKS_HK_INDEX_FEED_URL, headers=SOURCE_HEADERS, timeout=timeout_seconds, follow_redirects=True)
+    r.raise_for_status()
+    data = r.json()
 
     # data is a list of dicts
     row = None
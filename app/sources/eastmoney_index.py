@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
 from datetime import date, datetime, time, timedelta
 
-import httpx
+try:  # optional: aggregate_kline_rows uses the per-row path without numpy
+    import numpy as np
+except ImportError:
+    np = None
 
-from app.config import settings
+from app.services.http_client import http_get
+from app.services.job_timing import timed
+from app.sources.eastmoney_secid import resolve_secid
 
 
 EM_HEADERS = {
@@ -18,7 +24,7 @@ EM_HEADERS = {
 }
 
 
-@dataclass
+@dataclass(slots=True)
 class EastmoneyMinuteBar:
     trade_date: date
     dt: datetime
@@ -43,60 +49,6 @@ class EastmoneyIntradaySnapshot:
     raw: dict
 
 
-_SECID_CACHE: dict[str, str] = {}
-
-
-def _client_kwargs(timeout_seconds: int) -> dict:
-    proxy = (settings.EASTMONEY_PROXY_URL or "").strip() or None
-    kwargs = {"timeout": timeout_seconds, "headers": EM_HEADERS}
-    if proxy:
-        kwargs["proxy"] = proxy
-    return kwargs
-
-
-def _secid_from_ts_code(ts_code: str, *, timeout_seconds: int = 20) -> str:
-    """Convert symbol to Eastmoney secid.
-
-    Supported:
-      - CN index ts_code like 000001.SH / 399001.SZ -> 1.000001 / 0.399001
-      - HSI -> resolved via Eastmoney suggest API -> e.g. 100.HSI
-    """
-
-    ts_code = ts_code.strip().upper()
-
-    if ts_code in _SECID_CACHE:
-        return _SECID_CACHE[ts_code]
-
-    if ts_code.endswith(".SH"):
-        secid = "1." + ts_code.split(".")[0]
-        _SECID_CACHE[ts_code] = secid
-        return secid
-    if ts_code.endswith(".SZ"):
-        secid = "0." + ts_code.split(".")[0]
-        _SECID_CACHE[ts_code] = secid
-        return secid
-
-    # HSI (HK index) - resolve by keyword
-    if ts_code == "HSI":
-        with httpx.Client(**_client_kwargs(timeout_seconds)) as client:
-            resp = client.get(
-                "https://searchapi.eastmoney.com/api/suggest/get",
-                params={"input": "HSI", "type": "14", "count": "10"},
-            )
-            resp.raise_for_status()
-            data = resp.json() or {}
-        rows = (((data.get("QuotationCodeTable") or {}).get("Data")) or [])
-        for row in rows:
-            if (row or {}).get("Code") == "HSI":
-                quote_id = (row or {}).get("QuoteID")
-                if quote_id:
-                    _SECID_CACHE[ts_code] = str(quote_id)
-                    return str(quote_id)
-        raise ValueError("Eastmoney suggest did not return QuoteID for HSI")
-
-    raise ValueError(f"Unsupported symbol for Eastmoney: {ts_code}")
-
-
 def _to_float(v: str | None) -> float | None:
     if v is None:
         return None
@@ -109,43 +61,245 @@ def _to_float(v: str | None) -> float | None:
         return None
 
 
-def _parse_kline_rows(rows: list[str]) -> list[EastmoneyMinuteBar]:
-    out: list[EastmoneyMinuteBar] = []
-    for row in rows:
-        # Typical format:
-        # "YYYY-MM-DD HH:MM,open,close,high,low,vol,amount,..."
-        parts = str(row).split(",")
-        if not parts:
-            continue
-        dt = datetime.strptime(parts[0], "%Y-%m-%d %H:%M")
+# Single-pass kline parsing.
+# Each row "YYYY-MM-DD HH:MM,open,close,high,low,vol,amount,..." is split once; the timestamp is sliced
+# (no strptime) into (trade_date, minute of day) with one shared date object per day. Callers that only
+# need per-day totals use aggregate_kline_rows and never build per-bar objects.
 
-        open_ = _to_float(parts[1]) if len(parts) > 1 else None
-        close = float(parts[2]) if len(parts) > 2 and parts[2] not in (None, "") else None
-        high = _to_float(parts[3]) if len(parts) > 3 else None
-        low = _to_float(parts[4]) if len(parts) > 4 else None
-        volume = _to_float(parts[5]) if len(parts) > 5 else None
-        amount = _to_float(parts[6]) if len(parts) > 6 else None
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
 
+# (trade_date, minute_of_day, open, close, high, low, volume, amount, raw_row)
+KlineRow = tuple[date, int, float | None, float, float | None, float | None, float | None, float | None, str]
+
+
+def iter_kline_rows(rows: Iterable[str]) -> Iterator[KlineRow]:
+    """Yield compact tuples for well-formed rows (rows without a close are skipped)."""
+
+    days: dict[str, date] = {}
+    for row in rows:
+        row = str(row)
+        parts = row.split(",")
+        ts = parts[0]
+        if len(parts) < 3 or len(ts) < 16:
+            continue
+        try:
+            day = days.get(ts[:10])
+            if day is None:
+                day = days[ts[:10]] = date(int(ts[0:4]), int(ts[5:7]), int(ts[8:10]))
+            minute = int(ts[11:13]) * 60 + int(ts[14:16])
+        except ValueError:
+            continue
+        close = _to_float(parts[2])
         if close is None:
             continue
+        n = len(parts)
+        yield (
+            day,
+            minute,
+            _to_float(parts[1]),
+            close,
+            _to_float(parts[3]) if n > 3 else None,
+            _to_float(parts[4]) if n > 4 else None,
+            _to_float(parts[5]) if n > 5 else None,
+            _to_float(parts[6]) if n > 6 else None,
+            row,
+        )
 
-        out.append(
-            EastmoneyMinuteBar(
-                trade_date=dt.date(),
-                dt=dt,
-                open=open_,
-                close=float(close),
-                high=high,
-                low=low,
-                volume=volume,
-                amount=amount,
-                raw=row,
-            )
+
+@timed("eastmoney.kline_parse")
+def _parse_kline_rows(rows: list[str]) -> list[EastmoneyMinuteBar]:
+    return [
+        EastmoneyMinuteBar(
+            trade_date=day,
+            dt=datetime(day.year, day.month, day.day, minute // 60, minute % 60),
+            open=open_,
+            close=close,
+            high=high,
+            low=low,
+            volume=volume,
+            amount=amount,
+            raw=raw,
         )
+        for day, minute, open_, close, high, low, volume, amount, raw in iter_kline_rows(rows)
+    ]
+
+
+@dataclass(slots=True)
+class KlineDayTotals:
+    """Per-day AM / FULL totals accumulated in one pass over kline rows."""
+
+    trade_date: date
+    bars: int = 0
+    am_amount: float | None = None
+    full_amount: float | None = None
+    am_volume: float | None = None
+    full_volume: float | None = None
+    am_minute: int = -1
+    am_close: float | None = None
+    full_minute: int = -1
+    full_close: float | None = None
+
+    @property
+    def am_asof(self) -> datetime | None:
+        if self.am_minute < 0:
+            return None
+        return datetime.combine(self.trade_date, time(self.am_minute // 60, self.am_minute % 60))
+
+    @property
+    def full_asof(self) -> datetime | None:
+        if self.full_minute < 0:
+            return None
+        return datetime.combine(self.trade_date, time(self.full_minute // 60, self.full_minute % 60))
+
+    def as_amounts(self) -> dict:
+        """{"am_amount", "full_amount" (whole yuan, None unless > 0), "am_close", "full_close", "bars"}."""
+
+        return {
+            "am_amount": int(round(self.am_amount)) if self.am_amount is not None and self.am_amount > 0 else None,
+            "full_amount": int(round(self.full_amount)) if self.full_amount is not None and self.full_amount > 0 else None,
+            "am_close": self.am_close,
+            "full_close": self.full_close,
+            "bars": self.bars,
+        }
+
+
+def _kline_columns(rows: list[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray] | None:
+    """(epoch minutes int64, close, volume, amount float64) arrays for a uniform batch of rows.
+
+    All rows are split with one str.split and each column is converted in bulk. Returns None when the
+    batch is ragged or any field does not parse (blank / "-" values, other timestamp formats): the caller
+    then falls back to the per-row parser, which skips or blanks such fields.
+    """
+
+    if not rows:
+        return None
+    width = rows[0].count(",") + 1
+    if width < 7:
+        return None
+    flat = ",".join(rows).split(",")
+    if len(flat) != width * len(rows):
+        return None
+    stamps = flat[0::width]
+    if any(len(ts) != 16 for ts in stamps):
+        return None
+    try:
+        minutes = np.array(stamps, dtype="datetime64[m]").astype(np.int64)
+        closes = np.array(list(map(float, flat[2::width])), dtype=np.float64)
+        volumes = np.array(list(map(float, flat[5::width])), dtype=np.float64)
+        amounts = np.array(list(map(float, flat[6::width])), dtype=np.float64)
+    except ValueError:
+        return None
+    return minutes, closes, volumes, amounts
+
+
+def _aggregate_kline_columns(
+    minutes: np.ndarray,
+    closes: np.ndarray,
+    volumes: np.ndarray,
+    amounts: np.ndarray,
+    *,
+    am_end_minute: int,
+) -> dict[date, KlineDayTotals]:
+    """Per-day totals from column arrays: one stable sort, day segments from np.unique.
+
+    Sums are sequential in (minute, input order), like the per-row path, so both give bit-identical floats:
+    each day's bars are laid out in one row of a zero-padded (days x bars) matrix and reduced with
+    np.add.accumulate, which adds strictly left to right (np.add.reduce / reduceat may sum pairwise)."""
+
+    order = np.argsort(minutes, kind="stable")
+    minutes = minutes[order]
+    closes = closes[order]
+    volumes = volumes[order]
+    amounts = amounts[order]
+
+    days, starts, counts = np.unique(minutes // 1440, return_index=True, return_counts=True)
+    ends = starts + counts - 1
+    minute_of_day = minutes % 1440
+    is_am = minute_of_day <= am_end_minute
+
+    day_index = np.repeat(np.arange(len(days)), counts)
+    slot = np.arange(len(minutes)) - np.repeat(starts, counts)
+
+    def _day_sums(values: np.ndarray) -> np.ndarray:
+        matrix = np.zeros((len(days), int(counts.max())), dtype=np.float64)
+        matrix[day_index, slot] = values
+        return np.add.accumulate(matrix, axis=1)[:, -1]
+
+    am_bars = np.add.reduceat(is_am.astype(np.int64), starts)
+    full_amount = _day_sums(amounts)
+    am_amount = _day_sums(np.where(is_am, amounts, 0.0))
+    full_volume = _day_sums(volumes)
+    am_volume = _day_sums(np.where(is_am, volumes, 0.0))
+    # Last AM bar of each day (-1 if none). The stable sort keeps input order for equal minutes,
+    # so ties resolve to the later row as in the per-row path.
+    am_last = np.maximum.reduceat(np.where(is_am, np.arange(len(minutes)), -1), starts)
+
+    out: dict[date, KlineDayTotals] = {}
+    for i, day in enumerate(days.tolist()):
+        trade_date = date.fromordinal(_EPOCH_ORDINAL + day)
+        last = int(ends[i])
+        totals = KlineDayTotals(
+            trade_date=trade_date,
+            bars=int(counts[i]),
+            full_amount=float(full_amount[i]),
+            full_volume=float(full_volume[i]),
+            full_minute=int(minute_of_day[last]),
+            full_close=float(closes[last]),
+        )
+        if am_bars[i]:
+            am_i = int(am_last[i])
+            totals.am_amount = float(am_amount[i])
+            totals.am_volume = float(am_volume[i])
+            totals.am_minute = int(minute_of_day[am_i])
+            totals.am_close = float(closes[am_i])
+        out[trade_date] = totals
     return out
 
 
-def fetch_minute_kline(
+@timed("eastmoney.kline_aggregate")
+def aggregate_kline_rows(rows: Iterable[str], *, am_end: time = time(11, 30)) -> dict[date, KlineDayTotals]:
+    """Parse + aggregate in the same pass: AM = bars with time <= am_end, FULL = all bars of the day.
+    Closes are taken from the latest bar; sums add each day's bars in time order, so the result does not
+    depend on the input order or on numpy.
+
+    With numpy installed, well-formed batches are parsed column-wise and reduced with array ops,
+    anything else takes the per-row path below."""
+
+    am_end_minute = am_end.hour * 60 + am_end.minute
+    if np is not None:
+        rows = rows if isinstance(rows, list) else list(rows)
+        columns = _kline_columns(rows)
+        if columns is not None:
+            return _aggregate_kline_columns(*columns, am_end_minute=am_end_minute)
+
+    # Stable sort by (day, minute) so the sums add in the same order as the column path.
+    parsed = sorted(iter_kline_rows(rows), key=lambda r: (r[0], r[1]))
+    out: dict[date, KlineDayTotals] = {}
+    for day, minute, _open, close, _high, _low, volume, amount, _raw in parsed:
+        totals = out.get(day)
+        if totals is None:
+            totals = out[day] = KlineDayTotals(trade_date=day)
+        totals.bars += 1
+        is_am = minute <= am_end_minute
+        if amount is not None:
+            totals.full_amount = (totals.full_amount or 0.0) + amount
+            if is_am:
+                totals.am_amount = (totals.am_amount or 0.0) + amount
+        if volume is not None:
+            totals.full_volume = (totals.full_volume or 0.0) + volume
+            if is_am:
+                totals.am_volume = (totals.am_volume or 0.0) + volume
+        if minute >= totals.full_minute:
+            totals.full_minute = minute
+            totals.full_close = close
+        if is_am and minute >= totals.am_minute:
+            totals.am_minute = minute
+            totals.am_close = close
+    return out
+
+
+@timed("eastmoney.kline_fetch")
+def fetch_minute_kline_rows(
     *,
     ts_code: str,
     lookback_days: int = 30,
@@ -153,8 +307,8 @@ def fetch_minute_kline(
     klt: str = "5",
     beg: str | None = None,
     end: str | None = None,
-) -> list[EastmoneyMinuteBar]:
-    """Fetch intraday kline for an index from Eastmoney public API.
+) -> list[str]:
+    """Fetch intraday kline rows (unparsed strings) for an index from Eastmoney public API.
 
     Endpoint: https://push2his.eastmoney.com/api/qt/stock/kline/get
 
@@ -168,12 +322,12 @@ def fetch_minute_kline(
       - beg/end: YYYYMMDD
       - fields2: include amount
 
-    Returns intraday bars (best-effort)."""
+    Returns the raw "dt,open,close,high,low,vol,amount,..." rows."""
 
     if lookback_days <= 0:
         raise ValueError("lookback_days must be positive")
 
-    secid = _secid_from_ts_code(ts_code, timeout_seconds=timeout_seconds)
+    secid = resolve_secid(ts_code, timeout_seconds=timeout_seconds)
     if beg is None:
         beg = (date.today() - timedelta(days=lookback_days)).strftime("%Y%m%d")
     if end is None:
@@ -192,55 +346,48 @@ def fetch_minute_kline(
         "fields2": "f51,f52,f53,f54,f55,f56,f57,f58",
     }
 
-    with httpx.Client(**_client_kwargs(timeout_seconds)) as client:
-        resp = client.get("https://push2his.eastmoney.com/api/qt/stock/kline/get", params=params)
-        resp.raise_for_status()
-        data = resp.json()
+    resp = http_get(
+        "https://push2his.eastmoney.com/api/qt/stock/kline/get",
+        params=params,
+        headers=EM_HEADERS,
+        timeout=timeout_seconds,
+    )
+    resp.raise_for_status()
+    data = resp.json()
 
-    raw_rows = (((data or {}).get("data") or {}).get("klines")) or []
-    return _parse_kline_rows(raw_rows)
+    return (((data or {}).get("data") or {}).get("klines")) or []
 
 
-def aggregate_halfday_and_fullday_amount(
+def fetch_minute_kline(
     *,
-    bars: list[EastmoneyMinuteBar],
+    ts_code: str,
+    lookback_days: int = 30,
+    timeout_seconds: int = 20,
+    klt: str = "5",
+    beg: str | None = None,
+    end: str | None = None,
+) -> list[EastmoneyMinuteBar]:
+    """Intraday bars (best-effort), see fetch_minute_kline_rows."""
+
+    rows = fetch_minute_kline_rows(
+        ts_code=ts_code, lookback_days=lookback_days, timeout_seconds=timeout_seconds, klt=klt, beg=beg, end=end
+    )
+    return _parse_kline_rows(rows)
+
+
+def fetch_kline_day_totals(
+    *,
+    ts_code: str,
+    lookback_days: int = 30,
+    timeout_seconds: int = 20,
+    klt: str = "5",
+    beg: str | None = None,
+    end: str | None = None,
     am_end: time = time(11, 30),
-) -> dict[date, dict]:
-    """Aggregate minute bars into per-day AM and FULL turnover.
-
-    - AM: sum(amount) for bars with time <= 11:30
-    - FULL: sum(amount) for all bars that day
-
-    Also returns am_close (last close <= 11:30) and full_close (last close)."""
-
-    by_day: dict[date, list[EastmoneyMinuteBar]] = {}
-    for bar in bars:
-        by_day.setdefault(bar.trade_date, []).append(bar)
-
-    out: dict[date, dict] = {}
-    for d, day_bars in by_day.items():
-        day_bars.sort(key=lambda x: x.dt)
-
-        am_amount = 0.0
-        full_amount = 0.0
-        am_close = None
-        full_close = None
-
-        for bar in day_bars:
-            if bar.amount is not None:
-                full_amount += float(bar.amount)
-                if bar.dt.time() <= am_end:
-                    am_amount += float(bar.amount)
-            if bar.dt.time() <= am_end:
-                am_close = bar.close
-            full_close = bar.close
-
-        out[d] = {
-            "am_amount": int(round(am_amount)) if am_amount > 0 else None,
-            "full_amount": int(round(full_amount)) if full_amount > 0 else None,
-            "am_close": am_close,
-            "full_close": full_close,
-            "bars": len(day_bars),
-        }
+) -> dict[date, KlineDayTotals]:
+    """Per-day AM/FULL totals without building per-bar objects, see aggregate_kline_rows."""
 
-    return out
+    rows = fetch_minute_kline_rows(
+        ts_code=ts_code, lookback_days=lookback_days, timeout_seconds=timeout_seconds, klt=klt, beg=beg, end=end
+    )
+    return aggregate_kline_rows(rows, am_end=am_end)
@@ -4,9 +4,9 @@ from dataclasses import dataclass
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
-import httpx
-
-from app.config import settings
+from app.services.http_client import http_get
+from app.services.job_timing import timed
+from app.sources.eastmoney_secid import resolve_secid
 
 
 EM_HEADERS = {
@@ -19,33 +19,9 @@ EM_HEADERS = {
 }
 
 
-_CODE_TO_SECID = {
-    "SSE": "1.000001",
-    "SZSE": "0.399001",
-    "HSI": "100.HSI",
-}
-
 # Dashboard 11 indices (same logical codes as fetch_intraday_snapshot)
 _DEFAULT_CODES = ["HSI", "SSE", "SZSE", "HS11", "DJI", "IXIC", "SPX", "N225", "UKX", "DAX", "ESTOXX50E"]
 
-# Alias -> Eastmoney symbol candidates used in suggest API (Code field)
-_CODE_CANDIDATES = {
-    "HS11": ["KS11", "HS11"],
-    "UKX": ["FTSE", "UKX"],
-    "DAX": ["GDAXI", "DAX"],
-    "ESTOXX50E": ["CSX5P", "ESTOXX50E"],
-}
-
-_SECID_CACHE: dict[str, str] = {}
-
-
-def _client_kwargs(timeout_seconds: int) -> dict:
-    proxy = (settings.EASTMONEY_PROXY_URL or "").strip() or None
-    kwargs = {"timeout": timeout_seconds, "headers": EM_HEADERS}
-    if proxy:
-        kwargs["proxy"] = proxy
-    return kwargs
-
 
 @dataclass
 class EastmoneyRealtimeSnapshot:
@@ -60,41 +36,10 @@ class EastmoneyRealtimeSnapshot:
     raw: dict
 
 
-def _resolve_secid_by_suggest(code: str, timeout_seconds: int = 20) -> str:
-    code = code.upper().strip()
-    if code in _SECID_CACHE:
-        return _SECID_CACHE[code]
-
-    if code in _CODE_TO_SECID:
-        secid = _CODE_TO_SECID[code]
-        _SECID_CACHE[code] = secid
-        return secid
-
-    candidates = _CODE_CANDIDATES.get(code, [code])
-
-    with httpx.Client(**_client_kwargs(timeout_seconds)) as client:
-        for key in candidates:
-            resp = client.get(
-                "https://searchapi.eastmoney.com/api/suggest/get",
-                params={"input": key, "type": "14", "count": "10"},
-            )
-            resp.raise_for_status()
-            data = resp.json() or {}
-            rows = (((data.get("QuotationCodeTable") or {}).get("Data")) or [])
-            for row in rows:
-                row_code = str((row or {}).get("Code") or "").upper()
-                quote_id = (row or {}).get("QuoteID")
-                if quote_id and row_code == key.upper():
-                    secid = str(quote_id)
-                    _SECID_CACHE[code] = secid
-                    return secid
-
-    raise ValueError(f"Eastmoney suggest did not return QuoteID for {code}")
-
-
+@timed("eastmoney.realtime_snapshot")
 def fetch_realtime_snapshot(*, code: str, timeout_seconds: int = 20) -> EastmoneyRealtimeSnapshot:
     code = code.upper().strip()
-    secid = _resolve_secid_by_suggest(code, timeout_seconds=timeout_seconds)
+    secid = resolve_secid(code, timeout_seconds=timeout_seconds)
 
     params = {
         "secid": secid,
@@ -105,10 +50,9 @@ def fetch_realtime_snapshot(*, code: str, timeout_seconds: int = 20) -> Eastmone
         "fields": "f43,f47,f48,f57,f58,f60,f86,f169,f170",
     }
 
-    with httpx.Client(**_client_kwargs(timeout_seconds)) as client:
-        resp = client.get("https://push2.eastmoney.com/api/qt/stock/get", params=params)
-        resp.raise_for_status()
-        raw = resp.json() or {}
+    resp = http_get("https://push2.eastmoney.com/api/qt/stock/get", params=params, headers=EM_HEADERS, timeout=timeout_seconds)
+    resp.raise_for_status()
+    raw = resp.json() or {}
 
     node = (raw.get("data") or {})
     ts = node.get("f86")
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Iterable
+from datetime import datetime, timezone
+
+from app.config import settings
+from app.db.session import SessionLocal
+from app.services.app_cache import get_cache_many, get_cache_prefix, upsert_cache_many
+from app.services.http_client import http_get
+from app.services.rate_limit import fan_out
+
+logger = logging.getLogger(__name__)
+
+# Single Eastmoney secid resolver shared by the index / intraday / realtime sources.
+# Layers: static rules (CN ts_code, fixed indices) -> process memory -> app_cache rows
+# ("eastmoney:secid:<CODE>", shared by all workers and kept across restarts) -> suggest API.
+# Symbols the suggest API does not know are cached too (negative TTL) so a broken symbol is not retried on
+# every job run. Transport / HTTP / decoding errors are not cached: the next call simply retries.
+
+SECID_CACHE_PREFIX = "eastmoney:secid:"
+
+EM_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36",
+    "Accept": "application/json, text/plain, */*",
+    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+    "Referer": "https://quote.eastmoney.com/",
+    "Origin": "https://quote.eastmoney.com",
+    "Connection": "keep-alive",
+}
+
+_STATIC_SECIDS = {
+    "SSE": "1.000001",
+    "SZSE": "0.399001",
+    "HSI": "100.HSI",
+}
+
+# Alias -> Eastmoney symbol candidates used in suggest API (Code field)
+_CODE_CANDIDATES = {
+    "HS11": ["KS11", "HS11"],
+    "UKX": ["FTSE", "UKX"],
+    "DAX": ["GDAXI", "DAX"],
+    "ESTOXX50E": ["CSX5P", "ESTOXX50E"],
+}
+
+_lock = threading.Lock()
+_secids: dict[str, str] = {}
+_negative: dict[str, tuple[float, str]] = {}  # code -> (monotonic expiry, error)
+
+
+class SecidNotFound(ValueError):
+    """The suggest API answered but has no QuoteID for the code (the only negatively cached failure)."""
+
+
+def secid_cache_key(code: str) -> str:
+    return f"{SECID_CACHE_PREFIX}{code.upper()}"
+
+
+def _static_secid(code: str) -> str | None:
+    if code.endswith(".SH"):
+        return "1." + code.split(".")[0]
+    if code.endswith(".SZ"):
+        return "0." + code.split(".")[0]
+    return _STATIC_SECIDS.get(code)
+
+
+def _remember(code: str, payload: dict | None) -> None:
+    """Load one persisted entry into memory (caller holds _lock)."""
+
+    if not isinstance(payload, dict):
+        return
+    if payload.get("secid"):
+        _secids[code] = str(payload["secid"])
+        _negative.pop(code, None)
+        return
+    failed_at = payload.get("failed_at")
+    try:
+        age = (datetime.now(timezone.utc) - datetime.fromisoformat(str(failed_at))).total_seconds()
+    except (TypeError, ValueError):
+        return
+    remaining = settings.EASTMONEY_SECID_NEGATIVE_TTL_SECONDS - age
+    if remaining > 0:
+        _negative[code] = (time.monotonic() + remaining, str(payload.get("error") or "lookup failed"))
+
+
+def _lookup_memory(codes: list[str], errors: dict[str, str]) -> tuple[dict[str, str], list[str]]:
+    found: dict[str, str] = {}
+    missing: list[str] = []
+    now = time.monotonic()
+    with _lock:
+        for code in codes:
+            static = _static_secid(code)
+            if static is not None:
+                found[code] = static
+            elif code in _secids:
+                found[code] = _secids[code]
+            elif code in _negative and _negative[code][0] > now:
+                errors[code] = _negative[code][1]
+            else:
+                _negative.pop(code, None)
+                missing.append(code)
+    return found, missing
+
+
+def _load_persisted(codes: list[str] | None) -> int:
+    """Pull app_cache entries into memory (all of them when codes is None). Never raises."""
+
+    try:
+        with SessionLocal() as db:
+            if codes is None:
+                rows = get_cache_prefix(db, prefix=SECID_CACHE_PREFIX)
+            else:
+                rows = get_cache_many(db, keys=[secid_cache_key(c) for c in codes])
+    except Exception:
+        logger.exception("failed to load persisted Eastmoney secids")
+        return 0
+    with _lock:
+        for key, row in rows.items():
+            _remember(key[len(SECID_CACHE_PREFIX) :], row.payload)
+    return len(rows)
+
+
+def _persist(entries: dict[str, dict]) -> None:
+    if not entries:
+        return
+    try:
+        with SessionLocal() as db:
+            upsert_cache_many(db, items={secid_cache_key(code): payload for code, payload in entries.items()})
+    except Exception:
+        logger.exception("failed to persist Eastmoney secids")
+
+
+def _suggest_secid(code: str, timeout_seconds: int) -> str:
+    for key in _CODE_CANDIDATES.get(code, [code]):
+        resp = http_get(
+            "https://searchapi.eastmoney.com/api/suggest/get",
+            params={"input": key, "type": "14", "count": "10"},
+            headers=EM_HEADERS,
+            timeout=timeout_seconds,
+        )
+        resp.raise_for_status()
+        data = resp.json() or {}
+        rows = (((data.get("QuotationCodeTable") or {}).get("Data")) or [])
+        for row in rows:
+            row_code = str((row or {}).get("Code") or "").upper()
+            quote_id = (row or {}).get("QuoteID")
+            if quote_id and row_code == key.upper():
+                return str(quote_id)
+    raise SecidNotFound(f"Eastmoney suggest did not return QuoteID for {code}")
+
+
+def resolve_secids(
+    codes: Iterable[str],
+    *,
+    timeout_seconds: int = 15,
+    errors: dict[str, str] | None = None,
+) -> dict[str, str]:
+    """Resolve many codes in one pass: one app_cache read for the misses, concurrent suggest lookups
+    for what is still unknown, one app_cache write for the results. Unresolvable codes are left out
+    (reason in `errors` when given); only unknown symbols are negatively cached."""
+
+    errors = errors if errors is not None else {}
+    wanted = list(dict.fromkeys(c.strip().upper() for c in codes if c and c.strip()))
+    found, missing = _lookup_memory(wanted, errors)
+    if not missing:
+        return found
+
+    _load_persisted(missing)
+    more, missing = _lookup_memory(missing, errors)
+    found.update(more)
+    if not missing:
+        return found
+
+    outcomes = fan_out({code: (lambda code=code: _suggest_secid(code, timeout_seconds)) for code in missing})
+    now_iso = datetime.now(timezone.utc).isoformat()
+    persist: dict[str, dict] = {}
+    with _lock:
+        for code, outcome in outcomes.items():
+            if outcome.error is None:
+                _secids[code] = outcome.value
+                found[code] = outcome.value
+                persist[code] = {"code": code, "secid": outcome.value, "resolved_at": now_iso}
+            elif isinstance(outcome.error, SecidNotFound):
+                error = str(outcome.error)
+                _negative[code] = (time.monotonic() + settings.EASTMONEY_SECID_NEGATIVE_TTL_SECONDS, error)
+                errors[code] = error
+                persist[code] = {"code": code, "secid": None, "error": error, "failed_at": now_iso}
+            else:
+                # Network blip / 5xx / bad body: report it, but leave the code uncached so the next call retries.
+                errors[code] = f"Eastmoney secid lookup failed for {code}: {outcome.error}"
+                logger.warning("Eastmoney secid lookup failed (not cached): code=%s error=%s", code, outcome.error)
+    _persist(persist)
+    return found
+
+
+def resolve_secid(code: str, *, timeout_seconds: int = 15) -> str:
+    errors: dict[str, str] = {}
+    code = code.strip().upper()
+    secid = resolve_secids([code], timeout_seconds=timeout_seconds, errors=errors).get(code)
+    if secid is None:
+        raise ValueError(errors.get(code) or f"Unsupported symbol for Eastmoney: {code}")
+    return secid
+
+
+def warm_secid_cache(*, codes: Iterable[str] = (), timeout_seconds: int = 15) -> dict[str, int]:
+    """Startup warmup: load every persisted mapping, then resolve `codes` that are still unknown."""
+
+    loaded = _load_persisted(None)
+    errors: dict[str, str] = {}
+    resolved = resolve_secids(codes, timeout_seconds=timeout_seconds, errors=errors)
+    return {"loaded": loaded, "resolved": len(resolved), "failed": len(errors)}
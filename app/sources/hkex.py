@@ -4,7 +4,8 @@ import re
 from dataclasses import dataclass
 from datetime import date
 
-import httpx
+from app.services.http_client import SOURCE_HEADERS, http_get
+from app.services.job_timing import timed
 
 
 # HKEX provides the statistics archive as JSON tables; this is the most reliable
@@ -33,6 +34,7 @@ def _hkex_json_url_for_date(d: date) -> str:
     return HKEX_ARCHIVE_JSON_TEMPLATE.format(start=start, end=end)
 
 
+@timed("hkex.latest_table")
 def fetch_hkex_latest_table(timeout_seconds: int = 20) -> list[HkexDayRow]:
     """Fetch HKEX securities statistics archive (daily total trading value).
 
@@ -41,10 +43,9 @@ def fetch_hkex_latest_table(timeout_seconds: int = 20) -> list[HkexDayRow]:
 
     url = _hkex_json_url_for_date(date.today())
 
-    with httpx.Client(timeout=timeout_seconds, headers={"User-Agent": "market-turnover/0.1"}) as client:
-        r = client.get(url)
-        r.raise_for_status()
-        payload = r.json()
+    r = http_get(url, headers=SOURCE_HEADERS, timeout=timeout_seconds)
+    r.raise_for_status()
+    payload = r.json()
 
     tables = payload.get("tables") or []
     if not tables:
@@ -3,7 +3,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from datetime import date, datetime, time, timedelta, timezone
 
-import httpx
+from app.services.http_client import SOURCE_HEADERS, http_post
+from app.services.job_timing import timed
 
 
 @dataclass
@@ -39,10 +40,9 @@ def _request_tushare(
         "params": params,
         "fields": fields,
     }
-    with httpx.Client(timeout=timeout_seconds, headers={"User-Agent": "market-turnover/0.1"}) as client:
-        response = client.post(base_url, json=payload)
-        response.raise_for_status()
-        data = response.json()
+    response = http_post(base_url, json=payload, headers=SOURCE_HEADERS, timeout=timeout_seconds)
+    response.raise_for_status()
+    data = response.json()
 
     if data.get("code") != 0:
         raise RuntimeError(f"Tushare API error: {data.get('msg') or data.get('code')}")
@@ -77,6 +77,7 @@ def _build_daily_row(*, code: str, ts_code: str, raw_row: dict) -> TushareIndexD
     )
 
 
+@timed("tushare.index_daily_history")
 def fetch_index_daily_history(
     *,
     token: str,
@@ -132,6 +133,7 @@ def fetch_index_daily_history(
     return results
 
 
+@timed("tushare.latest_index_daily")
 def fetch_latest_index_daily(
     *,
     token: str,
@@ -6,6 +6,8 @@ from time import sleep
 
 import tushare as ts
 
+from app.services.job_timing import timed
+
 
 @dataclass
 class TushareKlineBar:
@@ -19,6 +21,7 @@ class TushareKlineBar:
     raw: dict
 
 
+@timed("tushare.index_kline")
 def fetch_index_kline(
     *,
     token: str,
@@ -1,95 +1,118 @@
 from __future__ import annotations
 
+import logging
+import random
+import threading
+import time
 from datetime import datetime, timezone
 
 import sqlalchemy as sa
 from sqlalchemy.orm import Session
 
+from app.config import settings
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Global and daily counters are sharded: each write picks one of ACTIVITY_COUNTER_SHARDS slots at random and
+# adds to that slot's row in user_activity_counter_shard and user_activity_counter_daily_shard (stat_date, slot),
+# so concurrent writers (visit log flushes of several workers, logins) rarely wait on the same tuple lock.
+# Totals are the original tables (user_activity_counter singleton, user_activity_counter_daily, no longer
+# written) plus the sum of the shards; vw_user_activity_counter_daily has the per-day totals. The homepage reads
+# the global visit total from an in-process cached value that is refreshed in a background thread once older
+# than ACTIVITY_COUNT_REFRESH_SECONDS.
+
 
 def increment_activity_counter(db: Session, *, event: str, at: datetime | None = None) -> None:
-    """Increment global counters in user_activity_counter and user_activity_counter_daily.
+    """Count one event: +1 on a random slot of user_activity_counter_shard and of user_activity_counter_daily_shard.
 
     event: "visit" or "login"
     """
     if event not in {"visit", "login"}:
         return
+    add_activity_counts(
+        db,
+        visits=1 if event == "visit" else 0,
+        logins=1 if event == "login" else 0,
+        at=at,
+    )
+
+
+def add_activity_counts(db: Session, *, visits: int = 0, logins: int = 0, at: datetime | None = None) -> None:
+    """Add `visits` / `logins` to one random slot of the global and of the daily counter shards (two statements).
+
+    Used per event by increment_activity_counter and once per flushed batch by the visit log writer
+    (app.web.visit_logs), so a burst of page views costs one counter update instead of one per view.
+    """
+    if visits <= 0 and logins <= 0:
+        return
 
     ts = at or datetime.now(timezone.utc)
-    day = ts.date()
-    visit_inc = 1 if event == "visit" else 0
-    login_inc = 1 if event == "login" else 0
+    params = {
+        "day": ts.date(),
+        "visit_inc": visits,
+        "login_inc": logins,
+        "ts": ts,
+        "last_visit_at": ts if visits > 0 else None,
+        "last_login_at": ts if logins > 0 else None,
+    }
+
+    params["slot"] = random.randrange(max(1, settings.ACTIVITY_COUNTER_SHARDS))
 
     try:
-        # Ensure singleton row exists.
+        # Shard rows (same slot in both tables): created on first use, incremented otherwise.
         db.execute(
             sa.text(
                 """
-                INSERT INTO user_activity_counter
-                  (id, visit_count, login_count, last_visit_at, last_login_at, created_at, updated_at)
+                INSERT INTO user_activity_counter_shard
+                  (slot, visit_count, login_count, last_visit_at, last_login_at, updated_at)
                 VALUES
-                  (1, 0, 0, NULL, NULL, :ts, :ts)
-                ON CONFLICT (id) DO NOTHING
+                  (:slot, :visit_inc, :login_inc, :last_visit_at, :last_login_at, :ts)
+                ON CONFLICT (slot) DO UPDATE
+                SET visit_count = user_activity_counter_shard.visit_count + EXCLUDED.visit_count,
+                    login_count = user_activity_counter_shard.login_count + EXCLUDED.login_count,
+                    last_visit_at = COALESCE(EXCLUDED.last_visit_at, user_activity_counter_shard.last_visit_at),
+                    last_login_at = COALESCE(EXCLUDED.last_login_at, user_activity_counter_shard.last_login_at),
+                    updated_at = EXCLUDED.updated_at
                 """
             ),
-            {"ts": ts},
+            params,
         )
 
-        if event == "visit":
-            db.execute(
-                sa.text(
-                    """
-                    UPDATE user_activity_counter
-                    SET visit_count = visit_count + 1,
-                        last_visit_at = :ts,
-                        updated_at = :ts
-                    WHERE id = 1
-                    """
-                ),
-                {"ts": ts},
-            )
-        else:
-            db.execute(
-                sa.text(
-                    """
-                    UPDATE user_activity_counter
-                    SET login_count = login_count + 1,
-                        last_login_at = :ts,
-                        updated_at = :ts
-                    WHERE id = 1
-                    """
-                ),
-                {"ts": ts},
-            )
-
         db.execute(
             sa.text(
                 """
-                INSERT INTO user_activity_counter_daily
-                  (stat_date, visit_count, login_count, created_at, updated_at)
+                INSERT INTO user_activity_counter_daily_shard
+                  (stat_date, slot, visit_count, login_count, created_at, updated_at)
                 VALUES
-                  (:day, :visit_inc, :login_inc, :ts, :ts)
-                ON CONFLICT (stat_date) DO UPDATE
-                SET visit_count = user_activity_counter_daily.visit_count + EXCLUDED.visit_count,
-                    login_count = user_activity_counter_daily.login_count + EXCLUDED.login_count,
+                  (:day, :slot, :visit_inc, :login_inc, :ts, :ts)
+                ON CONFLICT (stat_date, slot) DO UPDATE
+                SET visit_count = user_activity_counter_daily_shard.visit_count + EXCLUDED.visit_count,
+                    login_count = user_activity_counter_daily_shard.login_count + EXCLUDED.login_count,
                     updated_at = EXCLUDED.updated_at
                 """
             ),
-            {
-                "day": day,
-                "visit_inc": visit_inc,
-                "login_inc": login_inc,
-                "ts": ts,
-            },
+            params,
         )
     except Exception:
         # Keep request flow resilient if table is not ready.
         db.rollback()
 
 
-def get_global_visited_count(db: Session) -> int:
-    """Homepage display value: global visit count."""
+_TOTAL_VISITS_SQL = sa.text(
+    """
+    SELECT COALESCE((SELECT visit_count FROM user_activity_counter WHERE id = 1), 0)
+         + COALESCE((SELECT SUM(visit_count) FROM user_activity_counter_shard), 0)
+    """
+)
+
+_visited_lock = threading.Lock()
+_visited: dict = {"value": None, "loaded_at": 0.0, "refreshing": False}
+
+
+def _read_visited_count(db: Session) -> int:
     try:
-        value = db.execute(sa.text("SELECT visit_count FROM user_activity_counter WHERE id = 1")).scalar()
+        value = db.execute(_TOTAL_VISITS_SQL).scalar()
         return int(value or 0)
     except Exception:
         db.rollback()
@@ -99,3 +122,53 @@ def get_global_visited_count(db: Session) -> int:
         except Exception:
             db.rollback()
             return 0
+
+
+def _store_visited_count(value: int) -> None:
+    with _visited_lock:
+        _visited["value"] = value
+        _visited["loaded_at"] = time.monotonic()
+
+
+def _refresh_visited_count() -> None:
+    try:
+        db = SessionLocal()
+        try:
+            _store_visited_count(_read_visited_count(db))
+        finally:
+            db.close()
+    except Exception:
+        logger.exception("failed to refresh global visit count")
+    finally:
+        with _visited_lock:
+            _visited["refreshing"] = False
+
+
+def note_visits(n: int) -> None:
+    """Add visits just written by this process to the cached total, so it moves between refreshes."""
+    if n <= 0:
+        return
+    with _visited_lock:
+        if _visited["value"] is not None:
+            _visited["value"] += n
+
+
+def get_global_visited_count(db: Session) -> int:
+    """Homepage display value: global visit count.
+
+    The first call reads the DB; afterwards the cached value is returned and, once stale, refreshed by a
+    single background thread (the request never waits on the counter tables).
+    """
+    with _visited_lock:
+        value = _visited["value"]
+        stale = time.monotonic() - _visited["loaded_at"] >= settings.ACTIVITY_COUNT_REFRESH_SECONDS
+        start_refresh = value is not None and stale and not _visited["refreshing"]
+        if start_refresh:
+            _visited["refreshing"] = True
+    if value is None:
+        value = _read_visited_count(db)
+        _store_visited_count(value)
+        return value
+    if start_refresh:
+        threading.Thread(target=_refresh_visited_count, name="visit-count-refresh", daemon=True).start()
+    return int(value)
@@ -6,6 +6,7 @@ import hmac
 import os
 import re
 import time
+from dataclasses import dataclass
 from urllib.parse import quote, urlparse
 
 from fastapi import Depends, Request
@@ -15,6 +16,7 @@ from sqlalchemy.orm import Session
 from app.config import settings
 from app.db.models import AppUser
 from app.db.session import get_db
+from app.services.ttl_cache import TTLCache
 
 AUTH_COOKIE_NAME = "mt_session"
 _PASSWORD_SCHEME = "pbkdf2_sha256"
@@ -22,6 +24,42 @@ _PASSWORD_ITERATIONS = 260_000
 _EMAIL_RE = re.compile(r"^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$")
 
 
+@dataclass(frozen=True, slots=True)
+class SessionUser:
+    """Detached snapshot of the AppUser fields requests need (what get_current_user returns)."""
+
+    id: int
+    username: str
+    email: str
+    display_name: str | None
+    is_active: bool
+    is_superuser: bool
+
+    @classmethod
+    def from_model(cls, user: AppUser) -> SessionUser:
+        return cls(
+            id=int(user.id),
+            username=user.username,
+            email=user.email,
+            display_name=user.display_name,
+            is_active=bool(user.is_active),
+            is_superuser=bool(user.is_superuser),
+        )
+
+
+# user_id -> SessionUser, so authenticated requests skip the app_user lookup (and, when the route itself does
+# not query, the pool checkout). Invalidated on user update / login / logout in this process; the short TTL
+# bounds staleness for changes made through other workers.
+session_user_cache = TTLCache(
+    maxsize=settings.AUTH_USER_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.AUTH_USER_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_session_user(user_id: int | None = None) -> None:
+    session_user_cache.invalidate(int(user_id) if user_id is not None else None)
+
+
 def normalize_email(email: str) -> str:
     return email.strip().lower()
 
@@ -109,12 +147,18 @@ def clear_login_cookie(response: Response) -> None:
     response.delete_cookie(key=AUTH_COOKIE_NAME, path="/")
 
 
-def get_current_user(request: Request, db: Session = Depends(get_db)) -> AppUser | None:
+def get_current_user(request: Request, db: Session = Depends(get_db)) -> SessionUser | None:
     user_id = parse_session_user_id(request.cookies.get(AUTH_COOKIE_NAME))
     if user_id is None:
         return None
-    user = db.query(AppUser).filter(AppUser.id == user_id).first()
-    if user is None or not user.is_active:
+    user = session_user_cache.get(user_id)
+    if user is None:
+        row = db.query(AppUser).filter(AppUser.id == user_id).first()
+        if row is None:
+            return None
+        user = SessionUser.from_model(row)
+        session_user_cache.set(user_id, user)
+    if not user.is_active:
         return None
     return user
 
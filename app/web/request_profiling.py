@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import logging
+import time
+
+from fastapi import FastAPI, Request
+
+from app.config import settings
+from app.services.prometheus import HTTP_REQUEST_SECONDS
+from app.services.query_profiler import profile_queries
+
+logger = logging.getLogger(__name__)
+
+_EXCLUDE_PATH_PREFIXES = (
+    "/test/",
+    "/static/",
+    "/favicon.ico",
+)
+
+
+def _server_timing(*, db_ms: float, statements: int, total_ms: float) -> str:
+    return f'db;dur={db_ms:.1f};desc="{statements} queries", app;dur={total_ms:.1f}'
+
+
+def add_request_profiling(app: FastAPI) -> None:
+    """Per-request SQL statement count, DB time and rows: Server-Timing header + one log line.
+
+    Sync routes run in the threadpool with a copy of the request context, so their queries are counted too.
+    Background work (visit log writes, job queue) runs outside the request context and is not.
+    """
+
+    if not settings.DB_PROFILING_ENABLED:
+        return
+
+    @app.middleware("http")
+    async def _request_profiler(request: Request, call_next):
+        path = request.url.path or ""
+        base_path = settings.BASE_PATH.rstrip("/")
+        local_path = path[len(base_path) :] if base_path and path.startswith(base_path) else path
+        if local_path.startswith(_EXCLUDE_PATH_PREFIXES):
+            return await call_next(request)
+
+        started = time.perf_counter()
+        with profile_queries() as stats:
+            response = await call_next(request)
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = stats.seconds * 1000
+
+        response.headers.append(
+            "Server-Timing",
+            _server_timing(db_ms=db_ms, statements=stats.statements, total_ms=total_ms),
+        )
+        logger.info(
+            "request_db method=%s path=%s status=%s queries=%s db_ms=%.1f rows=%s slow=%s total_ms=%.1f",
+            request.method,
+            path,
+            response.status_code,
+            stats.statements,
+            db_ms,
+            stats.rows,
+            stats.slow,
+            total_ms,
+        )
+        return response
+
+
+class RouteMetricsMiddleware:
+    """Plain ASGI middleware: request latency per route template (web_request_duration_seconds at /metrics).
+
+    The route template ("/api/jobs/runs/{run_id}") comes from scope["route"], set by the router on match;
+    unmatched paths share one "unmatched" label so scanners cannot blow up the label set.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def _send(message) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                scope.get("method", ""),
+                getattr(route, "path", None) or "unmatched",
+                str(status["code"]),
+            )
+
+
+def add_request_metrics(app: FastAPI) -> None:
+    app.add_middleware(RouteMetricsMiddleware)
@@ -3,8 +3,7 @@ from __future__ import annotations
 import ipaddress
 import json
 from datetime import date
-from datetime import datetime, time, timedelta, timezone
-from zoneinfo import ZoneInfo
+from datetime import datetime, timezone
 
 import sqlalchemy as sa
 
@@ -20,29 +19,29 @@ from app.db.models import (
     AppUser,
     HsiQuoteFact,
     InsightSnapshot,
-    IndexQuoteHistory,
-    IndexRealtimeSnapshot,
-    IndexRealtimeApiSnapshot,
     JobDefinition,
     JobSchedule,
     JobRun,
-    MarketIndex,
-    SessionType,
     TurnoverFact,
     UserVisitLog,
 )
-from app.jobs.tasks import run_job
 from app.services.tencent_quote import fetch_quotes
 from app.services.trade_corridor import get_trade_corridor_highlights_mock
 from app.services.app_cache import get_cache, upsert_cache
+from app.services.dashboard_state import DASHBOARD_CODES, dashboard_data_version, fmt_sync_time, load_dashboard_state
+from app.services.ttl_cache import TTLCache
 from app.services.insight_service import get_fallback_insight_text, get_latest_insight_snapshot
+from app.jobs.registry import find_job
+from app.services.job_queue import enqueue_job
 from app.services.job_scheduler import reload_scheduler
 from app.web.activity_counter import get_global_visited_count, increment_activity_counter
 from app.web.auth import (
+    SessionUser,
     build_login_redirect,
     clear_login_cookie,
     get_current_user,
     hash_password,
+    invalidate_session_user,
     is_valid_email,
     normalize_email,
     safe_next_path,
@@ -61,9 +60,13 @@ VISIT_TRACKING_MAX_AGE = 7 * 24 * 3600  # 7 days in seconds
 templates.env.globals["format_yi"] = format_amount_b
 templates.env.globals["format_hsi"] = format_hsi_price_x100
 
-INDEX_CODES = ("HSI", "SSE", "SZSE")
-INDEX_FALLBACK_NAMES = {"HSI": "恒生指数", "SSE": "上证指数", "SZSE": "深证成指"}
-INDEX_FALLBACK_NAMES_EN = {"HSI": "Hang Seng Index", "SSE": "Shanghai Composite", "SZSE": "Shenzhen Component"}
+INDEX_CODES = DASHBOARD_CODES
+
+# cards/charts/global_quotes per (lang, trade_date, data version); see settings.DASHBOARD_CACHE_*
+dashboard_context_cache = TTLCache(
+    maxsize=settings.DASHBOARD_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.DASHBOARD_CACHE_TTL_SECONDS,
+)
 
 
 def _as_json_array(raw: str | None) -> list:
@@ -123,6 +126,14 @@ def _parse_job_params(params_schema: list, params: dict) -> dict:
     return normalized
 
 
+def _job_params_schema(definition: JobDefinition) -> list:
+    # The job_definition row wins; the handler's registered params fill in rows seeded without a schema.
+    if definition.params_schema:
+        return definition.params_schema
+    spec = find_job(definition.handler_name)
+    return list(spec.params) if spec is not None else []
+
+
 def _schedule_summary(rows: list[JobSchedule]) -> str:
     if not rows:
         return "手动"
@@ -133,270 +144,7 @@ def _schedule_summary(rows: list[JobSchedule]) -> str:
     return "; ".join(parts[:3]) + (" ..." if len(parts) > 3 else "")
 
 
-def _latest_index_history(db: Session, *, index_id: int, session: SessionType) -> IndexQuoteHistory | None:
-    return (
-        db.query(IndexQuoteHistory)
-        .filter(IndexQuoteHistory.index_id == index_id)
-        .filter(IndexQuoteHistory.session == session)
-        .order_by(IndexQuoteHistory.trade_date.desc())
-        .first()
-    )
-
-
-def _latest_index_history_before(
-    db: Session,
-    *,
-    index_id: int,
-    session: SessionType,
-    before_date: date,
-) -> IndexQuoteHistory | None:
-    return (
-        db.query(IndexQuoteHistory)
-        .filter(IndexQuoteHistory.index_id == index_id)
-        .filter(IndexQuoteHistory.session == session)
-        .filter(IndexQuoteHistory.trade_date < before_date)
-        .order_by(IndexQuoteHistory.trade_date.desc())
-        .first()
-    )
-
-
-def _today_realtime_snapshot(
-    db: Session,
-    *,
-    index_id: int,
-    today: date,
-    session: SessionType | None = None,
-    updated_before: datetime | None = None,
-) -> IndexRealtimeSnapshot | None:
-    q = (
-        db.query(IndexRealtimeSnapshot)
-        .filter(IndexRealtimeSnapshot.index_id == index_id)
-        .filter(IndexRealtimeSnapshot.trade_date == today)
-    )
-    if session is not None:
-        q = q.filter(IndexRealtimeSnapshot.session == session)
-    if updated_before is not None:
-        q = q.filter(IndexRealtimeSnapshot.data_updated_at <= updated_before)
-    return q.order_by(IndexRealtimeSnapshot.data_updated_at.desc(), IndexRealtimeSnapshot.id.desc()).first()
-
-
-def _latest_api_snapshot(
-    db: Session,
-    *,
-    index_id: int,
-    today: date,
-    session: SessionType | None = None,
-) -> IndexRealtimeApiSnapshot | None:
-    q = (
-        db.query(IndexRealtimeApiSnapshot)
-        .filter(IndexRealtimeApiSnapshot.index_id == index_id)
-        .filter(IndexRealtimeApiSnapshot.trade_date == today)
-    )
-    if session is not None:
-        q = q.filter(IndexRealtimeApiSnapshot.session == session)
-    return q.order_by(IndexRealtimeApiSnapshot.data_updated_at.desc(), IndexRealtimeApiSnapshot.id.desc()).first()
-
-
-def _order_hsi_realtime_by_data_updated_at(
-    snap_realtime: IndexRealtimeSnapshot | None,
-    snap_api: IndexRealtimeApiSnapshot | None,
-) -> tuple[IndexRealtimeSnapshot | IndexRealtimeApiSnapshot | None, IndexRealtimeSnapshot | IndexRealtimeApiSnapshot | None]:
-    if snap_realtime is None and snap_api is None:
-        return None, None
-    if snap_realtime is None:
-        return snap_api, None
-    if snap_api is None:
-        return snap_realtime, None
-    if snap_api.data_updated_at > snap_realtime.data_updated_at:
-        return snap_api, snap_realtime
-    return snap_realtime, snap_api
-
-
-def _turnover_series(
-    db: Session,
-    *,
-    index_id: int,
-    session: SessionType,
-    limit: int = 30,
-) -> list[int]:
-    rows = (
-        db.query(IndexQuoteHistory.turnover_amount)
-        .filter(IndexQuoteHistory.index_id == index_id)
-        .filter(IndexQuoteHistory.session == session)
-        .filter(IndexQuoteHistory.turnover_amount.isnot(None))
-        .order_by(IndexQuoteHistory.trade_date.desc())
-        .limit(limit)
-        .all()
-    )
-    return [int(v) for (v,) in rows if v is not None]
-
-
-def _close_points_series(db: Session, *, index_id: int, limit: int = 300) -> list[float]:
-    rows = (
-        db.query(IndexQuoteHistory.last)
-        .filter(IndexQuoteHistory.index_id == index_id)
-        .filter(IndexQuoteHistory.session == SessionType.FULL)
-        .order_by(IndexQuoteHistory.trade_date.desc())
-        .limit(limit)
-        .all()
-    )
-    return [round(v / 100.0, 2) for (v,) in rows if v is not None]
-
-
-def _latest_turnover_fact(db: Session, *, session: SessionType) -> TurnoverFact | None:
-    return (
-        db.query(TurnoverFact)
-        .filter(TurnoverFact.session == session)
-        .order_by(TurnoverFact.trade_date.desc())
-        .first()
-    )
-
-
-def _latest_turnover_fact_before(db: Session, *, session: SessionType, before_date: date) -> TurnoverFact | None:
-    return (
-        db.query(TurnoverFact)
-        .filter(TurnoverFact.session == session)
-        .filter(TurnoverFact.trade_date < before_date)
-        .order_by(TurnoverFact.trade_date.desc())
-        .first()
-    )
-
-
-def _latest_hsi_quote(db: Session, *, session: SessionType) -> HsiQuoteFact | None:
-    return (
-        db.query(HsiQuoteFact)
-        .filter(HsiQuoteFact.session == session)
-        .order_by(HsiQuoteFact.trade_date.desc())
-        .first()
-    )
-
-
-def _turnover_fact_series(db: Session, *, session: SessionType, limit: int = 30) -> list[int]:
-    rows = (
-        db.query(TurnoverFact.turnover_hkd)
-        .filter(TurnoverFact.session == session)
-        .order_by(TurnoverFact.trade_date.desc())
-        .limit(limit)
-        .all()
-    )
-    return [int(v) for (v,) in rows if v is not None]
-
-
-def _hsi_quote_points_series(db: Session, *, limit: int = 300) -> list[float]:
-    rows = (
-        db.query(HsiQuoteFact.last)
-        .filter(HsiQuoteFact.session == SessionType.FULL)
-        .order_by(HsiQuoteFact.trade_date.desc())
-        .limit(limit)
-        .all()
-    )
-    return [round(v / 100.0, 2) for (v,) in rows if v is not None]
-
-
-def _avg(values: list[int], n: int) -> float:
-    if not values:
-        return 0.0
-    top_n = values[:n]
-    return round(sum(top_n) / len(top_n) / 1_000_000_000, 2)
-
-
-def _to_yi(value: int | None) -> float:
-    # legacy name: now returns billions (B)
-    if value is None:
-        return 0.0
-    return round(value / 1_000_000_000, 2)
-
-
-def _fmt_price(value_x100: int | None) -> str:
-    if value_x100 is None:
-        return "-"
-    return f"{value_x100 / 100:,.2f}"
-
-
-def _fmt_pct(value_x100: int | None) -> str:
-    if value_x100 is None:
-        return "--"
-    return f"{value_x100 / 100:+.2f}%"
-
-
-def _fmt_sync_time(value: datetime | None) -> str:
-    if value is None:
-        return "N/A"
-    return value.strftime("%Y-%m-%d %H:%M:%S")
-
-
-def _latest_realtime_snapshot_for_kline(db: Session, *, index_id: int) -> IndexRealtimeSnapshot | None:
-    return (
-        db.query(IndexRealtimeSnapshot)
-        .filter(IndexRealtimeSnapshot.index_id == index_id)
-        .filter(IndexRealtimeSnapshot.source == "EASTMONEY")
-        .order_by(IndexRealtimeSnapshot.id.desc())
-        .first()
-    )
-
-
-def _extract_minute_kline_from_payload(payload: dict | None, *, limit: int = 400) -> dict[str, list]:
-    if not isinstance(payload, dict):
-        return {"times": [], "values": []}
-
-    raw = payload.get("raw") if isinstance(payload.get("raw"), dict) else payload
-    resp = raw.get("resp") if isinstance(raw, dict) and isinstance(raw.get("resp"), dict) else raw
-    data = resp.get("data") if isinstance(resp, dict) and isinstance(resp.get("data"), dict) else {}
-
-    rows = data.get("klines")
-    if not isinstance(rows, list):
-        rows = raw.get("klines") if isinstance(raw, dict) else None
-    if not isinstance(rows, list):
-        return {"times": [], "values": []}
-
-    parsed: list[tuple[str, list[float]]] = []
-    for row in rows:
-        if isinstance(row, str):
-            p = row.split(",")
-            if len(p) < 5:
-                continue
-            ts = p[0].strip()
-            try:
-                o = float(p[1])
-                c = float(p[2])
-                h = float(p[3])
-                l = float(p[4])
-            except ValueError:
-                continue
-            parsed.append((ts, [o, c, l, h]))
-            continue
-
-        if isinstance(row, dict):
-            ts = str(row.get("time") or row.get("ts") or row.get("dt") or "").strip()
-            if not ts:
-                continue
-            try:
-                o = float(row.get("open"))
-                c = float(row.get("close"))
-                h = float(row.get("high"))
-                l = float(row.get("low"))
-            except (TypeError, ValueError):
-                continue
-            parsed.append((ts, [o, c, l, h]))
-
-    if not parsed:
-        return {"times": [], "values": []}
-
-    by_ts: dict[str, list[float]] = {}
-    for ts, values in parsed:
-        by_ts[ts] = values
-
-    ordered = sorted(by_ts.items(), key=lambda x: x[0])[-limit:]
-    times = []
-    values = []
-    for ts, val in ordered:
-        times.append(ts.split(" ")[-1][:5] if " " in ts else ts)
-        values.append(val)
-
-    return {"times": times, "values": values}
-
-
-def _template_context(request: Request, *, current_user: AppUser | None, **kwargs):
+def _template_context(request: Request, *, current_user: SessionUser | None, **kwargs):
     data = {"request": request, "current_user": current_user}
     data.update(kwargs)
     return data
@@ -440,18 +188,15 @@ def _append_auth_visit_log(db: Session, request: Request, *, user_id: int, actio
         db.rollback()
 
 
-def _dashboard_impl(
-    request: Request,
-    *,
-    db: Session,
-    current_user: AppUser | None,
-    lang: str,
-):
-    today = date.today()
-    visited_count = get_global_visited_count(db)
+def _dashboard_market_context(db: Session, *, today: date, lang: str) -> dict:
+    cache_key = (lang, today.isoformat(), dashboard_data_version())
+    cached = dashboard_context_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
-    market_indexes = db.query(MarketIndex).filter(MarketIndex.code.in_(INDEX_CODES)).all()
-    index_by_code = {row.code.upper(): row for row in market_indexes}
+    # Cards/charts/global quotes come from the precomputed read model (one keyed lookup);
+    # ingest jobs refresh it incrementally, so the render only localizes names.
+    state = load_dashboard_state(db, today=today)
 
     cards: list[dict] = []
     chart_items: list[dict] = []
@@ -459,326 +204,60 @@ def _dashboard_impl(
     sync_points: list[datetime] = []
 
     for code in INDEX_CODES:
-        index_row = index_by_code.get(code)
-        full = None
-        am = None
-        snap_full = None
-        snap_am = None
-        snap_api_full = None
-        hsi_primary_full = None
-        hsi_secondary_full = None
-
-        if index_row is not None:
-            full = _latest_index_history(db, index_id=index_row.id, session=SessionType.FULL)
-            am = _latest_index_history(db, index_id=index_row.id, session=SessionType.AM)
-
-            # Today's turnover/price come from realtime snapshots.
-            snap_full = _today_realtime_snapshot(db, index_id=index_row.id, today=today, session=SessionType.FULL)
-            if code == "HSI":
-                snap_api_full = _latest_api_snapshot(db, index_id=index_row.id, today=today, session=SessionType.FULL)
-                hsi_primary_full, hsi_secondary_full = _order_hsi_realtime_by_data_updated_at(snap_full, snap_api_full)
-
-            # AM turnover: latest snapshot updated at/before 12:30.
-            # - CN indices: we persist explicit session=AM rows.
-            # - HSI: we may only have session=FULL snapshots; use those as AM when <=12:30.
-            am_cutoff = datetime.combine(today, time(12, 30), tzinfo=ZoneInfo("Asia/Shanghai"))
-            snap_am = _today_realtime_snapshot(
-                db,
-                index_id=index_row.id,
-                today=today,
-                session=SessionType.AM,
-                updated_before=am_cutoff,
-            )
-            if snap_am is None and code == "HSI":
-                snap_am = _today_realtime_snapshot(
-                    db,
-                    index_id=index_row.id,
-                    today=today,
-                    session=SessionType.FULL,
-                    updated_before=am_cutoff,
-                )
-
-        # "today" turnover logic:
-        # AM: snapshot (<=12:30) -> history latest AM
-        # FULL: (HSI) newest(data_updated_at) between realtime_snapshot/api_snapshot -> the other realtime source -> history latest FULL -> turnover_fact latest FULL
-        am_turnover = (
-            snap_am.turnover_amount
-            if snap_am is not None and snap_am.turnover_amount is not None
-            else (am.turnover_amount if am is not None else None)
-        )
-        full_turnover = (
-            hsi_primary_full.turnover_amount
-            if code == "HSI" and hsi_primary_full is not None and hsi_primary_full.turnover_amount is not None
-            else (
-                hsi_secondary_full.turnover_amount
-                if code == "HSI" and hsi_secondary_full is not None and hsi_secondary_full.turnover_amount is not None
-                else (
-                    snap_full.turnover_amount
-                    if snap_full is not None and snap_full.turnover_amount is not None
-                    else (full.turnover_amount if full is not None else None)
-                )
-            )
-            if code == "HSI"
-            else (
-                snap_full.turnover_amount
-                if snap_full is not None and snap_full.turnover_amount is not None
-                else (full.turnover_amount if full is not None else None)
-            )
-        )
-
-        full_turnover_series = (
-            _turnover_series(db, index_id=index_row.id, session=SessionType.FULL) if index_row is not None else []
-        )
-        am_turnover_series = (
-            _turnover_series(db, index_id=index_row.id, session=SessionType.AM) if index_row is not None else []
-        )
-
-        # Yesterday turnover (previous trading day in history table)
-        yesterday_full_hist = (
-            _latest_index_history_before(db, index_id=index_row.id, session=SessionType.FULL, before_date=today)
-            if index_row is not None
-            else None
-        )
-        yesterday_am_hist = (
-            _latest_index_history_before(db, index_id=index_row.id, session=SessionType.AM, before_date=today)
-            if index_row is not None
-            else None
-        )
-        yesterday_full_turnover = yesterday_full_hist.turnover_amount if yesterday_full_hist is not None else None
-        yesterday_am_turnover = yesterday_am_hist.turnover_amount if yesterday_am_hist is not None else None
-
-        # HSI yesterday AM: allow backfill from realtime snapshots (append-only) when history table has no AM.
-        if code == "HSI" and index_row is not None and yesterday_am_turnover is None:
-            # Determine yesterday trading date (prefer history FULL date; else calendar yesterday)
-            y_date = yesterday_full_hist.trade_date if yesterday_full_hist is not None else (today - timedelta(days=1))
-            # Try snapshot session=AM first; fallback to session=FULL snapshot <=12:30
-            y_am_snap = (
-                db.query(IndexRealtimeSnapshot)
-                .filter(IndexRealtimeSnapshot.index_id == index_row.id)
-                .filter(IndexRealtimeSnapshot.trade_date == y_date)
-                .filter(IndexRealtimeSnapshot.session == SessionType.AM)
-                .order_by(IndexRealtimeSnapshot.data_updated_at.desc(), IndexRealtimeSnapshot.id.desc())
-                .first()
-            )
-            if y_am_snap is None:
-                y_cutoff = datetime.combine(y_date, time(12, 30), tzinfo=ZoneInfo("Asia/Shanghai"))
-                y_am_snap = (
-                    db.query(IndexRealtimeSnapshot)
-                    .filter(IndexRealtimeSnapshot.index_id == index_row.id)
-                    .filter(IndexRealtimeSnapshot.trade_date == y_date)
-                    .filter(IndexRealtimeSnapshot.session == SessionType.FULL)
-                    .filter(IndexRealtimeSnapshot.data_updated_at <= y_cutoff)
-                    .order_by(IndexRealtimeSnapshot.data_updated_at.desc(), IndexRealtimeSnapshot.id.desc())
-                    .first()
-                )
-            if y_am_snap is not None and y_am_snap.turnover_amount is not None:
-                yesterday_am_turnover = int(y_am_snap.turnover_amount)
-
-        points_series = _close_points_series(db, index_id=index_row.id) if index_row is not None else []
-
-        # "latest price" on homepage: today's realtime snapshot first; fallback to history.
-        full_last = (
-            hsi_primary_full.last
-            if code == "HSI" and hsi_primary_full is not None and hsi_primary_full.last is not None
-            else (
-                hsi_secondary_full.last
-                if code == "HSI" and hsi_secondary_full is not None and hsi_secondary_full.last is not None
-                else (snap_full.last if snap_full is not None else (full.last if full is not None else None))
-            )
-        )
-        price_change_pct = (
-            hsi_primary_full.change_pct
-            if code == "HSI" and hsi_primary_full is not None and hsi_primary_full.change_pct is not None
-            else (
-                hsi_secondary_full.change_pct
-                if code == "HSI" and hsi_secondary_full is not None and hsi_secondary_full.change_pct is not None
-                else (
-                    snap_full.change_pct
-                    if snap_full is not None and snap_full.change_pct is not None
-                    else (full.change_pct if full is not None else None)
-                )
-            )
-        )
-        updated_at = (
-            (
-                hsi_primary_full.data_updated_at
-                if hsi_primary_full is not None
-                else (
-                    hsi_secondary_full.data_updated_at
-                    if hsi_secondary_full is not None
-                    else (full.asof_ts if full is not None else None)
-                )
-            )
-            if code == "HSI"
-            else (
-                snap_full.data_updated_at
-                if snap_full is not None
-                else (full.asof_ts if full is not None else None)
-            )
-        )
-        if updated_at is None and full is not None:
-            updated_at = full.updated_at
-
-        if code == "HSI":
-            fallback_quote_full = _latest_hsi_quote(db, session=SessionType.FULL)
-            fallback_turnover_full = _latest_turnover_fact(db, session=SessionType.FULL)
-
-            if full_last is None and fallback_quote_full is not None:
-                full_last = fallback_quote_full.last
-            if price_change_pct is None and fallback_quote_full is not None:
-                price_change_pct = fallback_quote_full.change_pct
-            if updated_at is None and fallback_quote_full is not None:
-                updated_at = fallback_quote_full.asof_ts or fallback_quote_full.updated_at
-
-            # FULL turnover (HSI): if still missing, fallback to turnover_fact FULL.
-            if full_turnover is None and fallback_turnover_full is not None:
-                full_turnover = fallback_turnover_full.turnover_hkd
-            if updated_at is None and fallback_turnover_full is not None:
-                updated_at = fallback_turnover_full.updated_at
-
-            # Yesterday FULL turnover (HSI): if missing, fallback to turnover_fact FULL.
-            if yesterday_full_turnover is None:
-                y_full_fact = _latest_turnover_fact_before(db, session=SessionType.FULL, before_date=today)
-                if y_full_fact is not None:
-                    yesterday_full_turnover = y_full_fact.turnover_hkd
-
-            if not full_turnover_series:
-                full_turnover_series = _turnover_fact_series(db, session=SessionType.FULL)
-            if not am_turnover_series:
-                am_turnover_series = _turnover_fact_series(db, session=SessionType.AM)
-            if not points_series:
-                points_series = _hsi_quote_points_series(db)
-
-        today_points = round((full_last / 100.0), 2) if full_last is not None else 0.0
-        max_points = max(points_series, default=today_points)
-        if max_points <= 0:
-            max_points = max(1.0, today_points)
-
-        is_up = price_change_pct is not None and price_change_pct >= 0
-        price_class = "text-emerald-500" if is_up else "text-rose-500"
-        if price_change_pct is None:
-            price_class = "text-slate-300"
-        arrow_path = "M6 15l6-6 6 6" if is_up else "M6 9l6 6 6-6"
-
-        if updated_at is not None:
-            sync_points.append(updated_at)
-
-        # Peak FULL turnover over history (not limited by series length).
-        peak_ratio = None
-        peak_turnover = None
-        if index_row is not None:
-            if code == "HSI":
-                peak_turnover = (
-                    db.query(sa.func.max(TurnoverFact.turnover_hkd))
-                    .filter(TurnoverFact.session == SessionType.FULL)
-                    .scalar()
-                )
-            else:
-                peak_turnover = (
-                    db.query(sa.func.max(IndexQuoteHistory.turnover_amount))
-                    .filter(IndexQuoteHistory.index_id == index_row.id)
-                    .filter(IndexQuoteHistory.session == SessionType.FULL)
-                    .scalar()
-                )
-
-        if full_turnover and peak_turnover:
-            peak_ratio = round(full_turnover / peak_turnover * 100)
-        ratio_to_peak[code] = peak_ratio
-
-        if lang == "en":
-            name = None
-            if index_row is not None:
-                name = (index_row.name_en or "").strip() or None
-            if not name:
-                name = INDEX_FALLBACK_NAMES_EN.get(code, code)
-        else:
-            name = index_row.name_zh if index_row is not None else INDEX_FALLBACK_NAMES[code]
-
-        minute_kline = {"times": [], "values": []}
-        if index_row is not None:
-            latest_any = _latest_realtime_snapshot_for_kline(db, index_id=index_row.id)
-            minute_kline = _extract_minute_kline_from_payload(latest_any.payload if latest_any is not None else None)
-
-        cards.append(
+        item = state["cards"].get(code)
+        if item is None:
+            continue
+        name = item.get("name_en") if lang == "en" else item.get("name_zh")
+        cards.append({**item["card"], "name": name or code})
+        chart_items.append(item["chart"])
+        ratio_to_peak[code] = item.get("ratio_to_peak")
+        if item.get("updated_at"):
+            sync_points.append(datetime.fromisoformat(item["updated_at"]))
+
+    # Global market quotes (consistent with top cards)
+    global_quotes = []
+    for q in state.get("global_quotes") or []:
+        idx_name = q.get("name_zh")
+        if lang == "en" and q.get("name_en"):
+            idx_name = q["name_en"]
+        global_quotes.append(
             {
-                "code": code,
-                "name": name,
-                "chart_id": f"{code.lower()}-chart",
-                "kline_chart_id": f"{code.lower()}-kline-chart",
-                "last_price": _fmt_price(full_last),
-                "change_pct": _fmt_pct(price_change_pct),
-                "price_class": price_class,
-                "change_class": price_class,
-                "arrow_path": arrow_path,
-                "updated_at": _fmt_sync_time(updated_at),
-                "today_turnover_am": format_amount_b(am_turnover),
-                "today_turnover_day": format_amount_b(full_turnover),
+                "name": idx_name,
+                "last": q["last"],
+                "change": q["change"],
+                "pct": q["pct"],
+                "asof": q["asof"],
             }
         )
 
-        chart_items.append(
-            {
-                "id": f"{code.lower()}-chart",
-                "kline_id": f"{code.lower()}-kline-chart",
-                "data": {
-                    "todayPoints": today_points,
-                    "maxPoints": round(max_points, 2),
-                    "todayVolAM": _to_yi(am_turnover),
-                    "todayVolDay": _to_yi(full_turnover),
-                    "yesterdayVolAM": _to_yi(yesterday_am_turnover),
-                    "yesterdayVolDay": _to_yi(yesterday_full_turnover),
-                    "avgVolAM": _avg(am_turnover_series, 5),
-                    "avgVolDay": _avg(full_turnover_series, 5),
-                    "tenAvgVolAM": _avg(am_turnover_series, 10),
-                    "tenAvgVolDay": _avg(full_turnover_series, 10),
-                    "maxVolAM": _to_yi(max(am_turnover_series) if am_turnover_series else None),
-                    "maxVolDay": _to_yi(int(peak_turnover) if peak_turnover is not None else None),
-                    "minuteKline": minute_kline,
-                },
-            }
-        )
+    ctx = {
+        "cards": cards,
+        "charts": chart_items,
+        "last_data_sync": fmt_sync_time(max(sync_points) if sync_points else None),
+        "hsi_ratio": ratio_to_peak.get("HSI"),
+        "sse_ratio": ratio_to_peak.get("SSE"),
+        "szse_ratio": ratio_to_peak.get("SZSE"),
+        "global_quotes": global_quotes,
+    }
+    dashboard_context_cache.set(cache_key, ctx)
+    return ctx
+
+
+def _dashboard_impl(
+    request: Request,
+    *,
+    db: Session,
+    current_user: SessionUser | None,
+    lang: str,
+):
+    today = date.today()
+    visited_count = get_global_visited_count(db)
+    ctx = _dashboard_market_context(db, today=today, lang=lang)
 
-    last_data_sync = _fmt_sync_time(max(sync_points) if sync_points else None)
-    hsi_ratio = ratio_to_peak.get("HSI")
-    sse_ratio = ratio_to_peak.get("SSE")
-    szse_ratio = ratio_to_peak.get("SZSE")
     insight_lang = "en" if lang == "en" else "zh"
     latest_insight = get_latest_insight_snapshot(db, lang=insight_lang)
     insight_text = latest_insight.response if latest_insight is not None else get_fallback_insight_text(insight_lang)
 
-    # Global market quotes from database (consistent with top cards)
-    global_quotes = []
-    try:
-        active_indices = (
-            db.query(MarketIndex)
-            .filter(MarketIndex.is_active.is_(True))
-            .order_by(MarketIndex.display_order.asc())
-            .all()
-        )
-        for idx in active_indices:
-            snap = (
-                db.query(IndexRealtimeSnapshot)
-                .filter(IndexRealtimeSnapshot.index_id == idx.id)
-                .filter(IndexRealtimeSnapshot.session == SessionType.FULL)
-                .order_by(IndexRealtimeSnapshot.id.desc())
-                .first()
-            )
-            if snap:
-                # Use name_en if lang=en (assuming lang var is available from context)
-                idx_name = idx.name_zh
-                if "lang" in locals() and lang == "en" and idx.name_en:
-                    idx_name = idx.name_en
-
-                global_quotes.append({
-                    "name": idx_name,
-                    "last": snap.last / 100.0,
-                    "change": snap.change_points / 100.0 if snap.change_points is not None else 0.0,
-                    "pct": snap.change_pct / 100.0 if snap.change_pct is not None else 0.0,
-                    "asof": _fmt_sync_time(snap.data_updated_at),
-                })
-    except Exception:
-        global_quotes = []
-
     # Trade corridor highlights (POC: mock)
     corridor = None
     cached_c = get_cache(db, key="homepage:trade_corridor")
@@ -808,16 +287,10 @@ def _dashboard_impl(
             request,
             current_user=current_user,
             today=today.isoformat(),
-            cards=cards,
-            charts=chart_items,
-            last_data_sync=last_data_sync,
             visited_count=visited_count,
             insight_text=insight_text,
-            hsi_ratio=hsi_ratio,
-            sse_ratio=sse_ratio,
-            szse_ratio=szse_ratio,
-            global_quotes=global_quotes,
             corridor=corridor,
+            **ctx,
         ),
     )
 
@@ -826,7 +299,7 @@ def _dashboard_impl(
 def dashboard_en(
     request: Request,
     db: Session = Depends(get_db),
-    current_user: AppUser | None = Depends(get_current_user),
+    current_user: SessionUser | None = Depends(get_current_user),
 ):
     return _dashboard_impl(request, db=db, current_user=current_user, lang="en")
 
@@ -835,7 +308,7 @@ def dashboard_en(
 def dashboard_cn(
     request: Request,
     db: Session = Depends(get_db),
-    current_user: AppUser | None = Depends(get_current_user),
+    current_user: SessionUser | None = Depends(get_current_user),
 ):
     return _dashboard_impl(request, db=db, current_user=current_user, lang="zh")
 
@@ -843,7 +316,7 @@ def dashboard_cn(
 @router.get("/disclaimer", response_class=HTMLResponse)
 def disclaimer(
     request: Request,
-    current_user: AppUser | None = Depends(get_current_user),
+    current_user: SessionUser | None = Depends(get_current_user),
 ):
     return templates.TemplateResponse(
         "disclaimer.html",
@@ -854,7 +327,7 @@ def disclaimer(
 @router.get("/cn/disclaimer", response_class=HTMLResponse)
 def disclaimer_cn(
     request: Request,
-    current_user: AppUser | None = Depends(get_current_user),
+    current_user: SessionUser | None = Depends(get_current_user),
 ):
     return templates.TemplateResponse(
         "disclaimer.html",
@@ -865,7 +338,7 @@ def disclaimer_cn(
 @router.get("/contact", response_class=HTMLResponse)
 def contact_page(
     request: Request,
-    current_user: AppUser | None = Depends(get_current_user),
+    current_user: SessionUser | None = Depends(get_current_user),
 ):
     return templates.TemplateResponse(
         "contact.html",
@@ -876,7 +349,7 @@ def contact_page(
 @router.get("/cn/contact", response_class=HTMLResponse)
 def contact_page_cn(
     request: Request,
-    current_user: AppUser | None = Depends(get_current_user),
+    current_user: SessionUser | None = Depends(get_current_user),
 ):
     return templates.TemplateResponse(
         "contact.html",
@@ -888,7 +361,7 @@ def contact_page_cn(
 def recent(
     request: Request,
     db: Session = Depends(get_db),
-    current_user: AppUser | None = Depends(get_current_user),
+    current_user: SessionUser | None = Depends(get_current_user),
 ):
     if current_user is None:
         return build_login_redirect(request)
@@ -920,7 +393,7 @@ def recent(
 def jobs(
     request: Request,
     db: Session = Depends(get_db),
-    current_user: AppUser | None = Depends(get_current_user),
+    current_user: SessionUser | None = Depends(get_current_user),
 ):
     if current_user is None:
         return build_login_redirect(request)
@@ -968,7 +441,7 @@ def jobs(
                 "label": row.label_zh,
                 "description": row.description_zh,
                 "targets": row.targets or [],
-                "params": row.params_schema or [],
+                "params": _job_params_schema(row),
                 "default_params": row.default_params or {},
                 "is_active": bool(row.is_active),
                 "manual_enabled": bool(row.manual_enabled),
@@ -997,7 +470,7 @@ def jobs(
 def job_page(
     request: Request,
     db: Session = Depends(get_db),
-    current_user: AppUser | None = Depends(get_current_user),
+    current_user: SessionUser | None = Depends(get_current_user),
 ):
     if current_user is None:
         return build_login_redirect(request)
@@ -1045,7 +518,7 @@ def job_page(
                 "label": row.label_zh,
                 "description": row.description_zh,
                 "targets": row.targets or [],
-                "params": row.params_schema or [],
+                "params": _job_params_schema(row),
                 "default_params": row.default_params or {},
                 "is_active": bool(row.is_active),
                 "manual_enabled": bool(row.manual_enabled),
@@ -1073,7 +546,7 @@ def job_page(
 async def save_job_definition(
     request: Request,
     db: Session = Depends(get_db),
-    current_user: AppUser | None = Depends(get_current_user),
+    current_user: SessionUser | None = Depends(get_current_user),
 ):
     form = await request.form()
     next_path = safe_next_path(str(form.get("next_path") or ""), fallback="/jobs")
@@ -1156,7 +629,7 @@ def users_update(
     is_active: str | None = Form(None),
     is_superuser: str | None = Form(None),
     db: Session = Depends(get_db),
-    current_user: AppUser | None = Depends(get_current_user),
+    current_user: SessionUser | None = Depends(get_current_user),
 ):
     if current_user is None:
         target = request.url.path.replace("/api/users/update", "/jobs")
@@ -1190,6 +663,8 @@ def users_update(
     except IntegrityError:
         db.rollback()
         return RedirectResponse(url=f"{base}/jobs", status_code=303)
+    # Deactivation / role changes apply to the user's next request (other workers: after the cache TTL).
+    invalidate_session_user(target_user.id)
 
     return RedirectResponse(url=f"{base}/jobs", status_code=303)
 
@@ -1198,7 +673,7 @@ def users_update(
 def api_latest_insight(
     lang: str = "zh",
     db: Session = Depends(get_db),
-    current_user: AppUser | None = Depends(get_current_user),
+    current_user: SessionUser | None = Depends(get_current_user),
 ):
     if current_user is None:
         return {"ok": False, "error": "unauthorized"}
@@ -1235,7 +710,7 @@ async def jobs_run(
     job_name: str = Form(...),
     next_path: str = Form("/jobs"),
     db: Session = Depends(get_db),
-    current_user: AppUser | None = Depends(get_current_user),
+    current_user: SessionUser | None = Depends(get_current_user),
 ):
     safe_next = safe_next_path(next_path, fallback="/jobs")
     if current_user is None:
@@ -1273,14 +748,42 @@ async def jobs_run(
 
     merged_params = dict(definition.default_params or {})
     merged_params.update(params)
-    parsed_params = _parse_job_params(definition.params_schema or [], merged_params)
+    parsed_params = _parse_job_params(_job_params_schema(definition), merged_params)
 
-    run_job(db, definition.handler_name, params=parsed_params or None)
+    # Executed by the job queue worker pool; the request only records the run.
+    run = enqueue_job(db, definition.handler_name, params=parsed_params or None)
+    if "application/json" in (request.headers.get("accept") or ""):
+        return {"ok": True, "run_id": run.id, "status": run.status, "status_url": f"{base}/api/jobs/runs/{run.id}"}
     return RedirectResponse(url=f"{base}{safe_next}", status_code=303)
 
 
+@router.get("/api/jobs/runs/{run_id}")
+def api_job_run_status(
+    run_id: int,
+    db: Session = Depends(get_db),
+    current_user: SessionUser | None = Depends(get_current_user),
+):
+    if current_user is None:
+        return {"ok": False, "error": "unauthorized"}
+
+    run = db.get(JobRun, run_id)
+    if run is None:
+        return {"ok": False, "error": "not_found"}
+    return {
+        "ok": True,
+        "id": run.id,
+        "job_name": run.job_name,
+        "status": run.status,
+        "queued_at": run.queued_at.isoformat() if run.queued_at is not None else None,
+        "started_at": run.started_at.isoformat() if run.started_at is not None and run.status != "queued" else None,
+        "finished_at": run.finished_at.isoformat() if run.finished_at is not None else None,
+        "summary": run.summary,
+        "error": run.error,
+    }
+
+
 @router.get("/register", response_class=HTMLResponse)
-def register_page(request: Request, current_user: AppUser | None = Depends(get_current_user)):
+def register_page(request: Request, current_user: SessionUser | None = Depends(get_current_user)):
     next_path = safe_next_path(request.query_params.get("next"), fallback="/jobs")
     if current_user is not None:
         return RedirectResponse(url=next_path, status_code=303)
@@ -1306,7 +809,7 @@ def register_submit(
     display_name: str = Form(""),
     next_path: str = Form("/jobs"),
     db: Session = Depends(get_db),
-    current_user: AppUser | None = Depends(get_current_user),
+    current_user: SessionUser | None = Depends(get_current_user),
 ):
     safe_next = safe_next_path(next_path, fallback="/jobs")
     if current_user is not None:
@@ -1379,7 +882,7 @@ def register_submit(
 
 
 @router.get("/login", response_class=HTMLResponse)
-def login_page(request: Request, current_user: AppUser | None = Depends(get_current_user)):
+def login_page(request: Request, current_user: SessionUser | None = Depends(get_current_user)):
     next_path = safe_next_path(request.query_params.get("next"), fallback="/jobs")
     if current_user is not None:
         return RedirectResponse(url=next_path, status_code=303)
@@ -1396,7 +899,7 @@ def login_submit(
     password: str = Form(...),
     next_path: str = Form("/jobs"),
     db: Session = Depends(get_db),
-    current_user: AppUser | None = Depends(get_current_user),
+    current_user: SessionUser | None = Depends(get_current_user),
 ):
     safe_next = safe_next_path(next_path, fallback="/jobs")
     if current_user is not None:
@@ -1432,6 +935,7 @@ def login_submit(
     user.last_login_at = datetime.now(timezone.utc)
     db.add(user)
     db.commit()
+    invalidate_session_user(user.id)
 
     _append_auth_visit_log(db, request, user_id=int(user.id), action_type="login")
     
@@ -1460,10 +964,11 @@ def login_submit(
 def logout(
     request: Request,
     db: Session = Depends(get_db),
-    current_user: AppUser | None = Depends(get_current_user),
+    current_user: SessionUser | None = Depends(get_current_user),
 ):
     if current_user is not None:
         _append_auth_visit_log(db, request, user_id=int(current_user.id), action_type="logout")
+        invalidate_session_user(current_user.id)
     base = (request.scope.get("root_path") or "").rstrip("/")
     response = RedirectResponse(url=f"{base}/", status_code=303)
     clear_login_cookie(response)
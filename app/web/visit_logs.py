@@ -2,26 +2,151 @@ from __future__ import annotations
 
 import ipaddress
 import logging
-from concurrent.futures import ThreadPoolExecutor
+import threading
+from collections import Counter, deque
+from datetime import datetime, timezone
 from typing import Any
 
+import sqlalchemy as sa
 from fastapi import FastAPI, Request, Response
 
+from app.config import settings
 from app.db.models import UserVisitLog
 from app.db.session import SessionLocal
-from app.web.activity_counter import increment_activity_counter
+from app.services.prometheus import counter, gauge
+from app.web.activity_counter import add_activity_counts, note_visits
 from app.web.auth import AUTH_COOKIE_NAME, parse_session_user_id
 
 logger = logging.getLogger(__name__)
 
 VISIT_TRACKING_MAX_AGE = 7 * 24 * 3600
 
-# Limit background analytics concurrency to avoid exhausting DB connections.
-_visit_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="visitlog")
+# Visit logs are buffered in memory and written in batches by one background thread.
+# The request path only appends to a bounded ring buffer (VISIT_LOG_BUFFER_SIZE); when it is full the oldest
+# pending entry is overwritten and counted as dropped, so a burst never grows memory or a task queue.
+# A flush runs every VISIT_LOG_FLUSH_INTERVAL_MS, or as soon as VISIT_LOG_BATCH_SIZE entries are waiting:
+# one multi-row INSERT into user_visit_logs, then one aggregated activity counter update per day, on a single
+# pooled connection. stop_visit_log_writer() (FastAPI lifespan) flushes what is left.
+
+VISIT_LOG_ROWS = counter(
+    "visit_log_rows_total",
+    "Visit log entries by outcome: written, dropped (buffer full) or failed (flush error).",
+    ("outcome",),
+)
+
+
+class VisitLogWriter:
+    def __init__(self, *, capacity: int, batch_size: int, interval_seconds: float) -> None:
+        self.capacity = max(1, capacity)
+        self.batch_size = max(1, batch_size)
+        self.interval_seconds = max(0.01, interval_seconds)
+        # (created_at, row, count_visit)
+        self._buffer: deque[tuple[datetime, dict[str, Any], bool]] = deque(maxlen=self.capacity)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.stats = {"written": 0, "dropped": 0, "failed": 0, "flushes": 0}
+
+    def add(self, row: dict[str, Any], *, count_visit: bool) -> None:
+        entry = (datetime.now(timezone.utc), row, count_visit)
+        with self._lock:
+            if len(self._buffer) == self.capacity:
+                self.stats["dropped"] += 1
+                VISIT_LOG_ROWS.inc("dropped")
+            self._buffer.append(entry)
+            pending = len(self._buffer)
+            if self._thread is None and not self._stop.is_set():
+                self._start_locked()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def _start_locked(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="visitlog-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wakeup.wait(self.interval_seconds)
+            self._wakeup.clear()
+            self.flush()
+
+    def _take(self) -> list[tuple[datetime, dict[str, Any], bool]]:
+        with self._lock:
+            batch = list(self._buffer)
+            self._buffer.clear()
+        return batch
+
+    def flush(self) -> int:
+        """Write everything buffered so far. Returns the number of rows written."""
+
+        with self._flush_lock:
+            batch = self._take()
+            if not batch:
+                return 0
+            visits_by_day: Counter = Counter()
+            last_visit_by_day: dict = {}
+            for created_at, _row, count_visit in batch:
+                if count_visit:
+                    visits_by_day[created_at.date()] += 1
+                    last_visit_by_day[created_at.date()] = created_at
+            try:
+                db = SessionLocal()
+                try:
+                    db.execute(sa.insert(UserVisitLog), [{**row, "created_at": created_at} for created_at, row, _ in batch])
+                    # Committed on their own: add_activity_counts rolls back on error and must not take the logs with it.
+                    db.commit()
+                    for day, visits in sorted(visits_by_day.items()):
+                        add_activity_counts(db, visits=visits, at=last_visit_by_day[day])
+                    db.commit()
+                    note_visits(sum(visits_by_day.values()))
+                finally:
+                    db.close()
+            except Exception:
+                self.stats["failed"] += len(batch)
+                VISIT_LOG_ROWS.inc("failed", amount=len(batch))
+                logger.exception("failed to write %s user visit logs", len(batch))
+                return 0
+            self.stats["written"] += len(batch)
+            self.stats["flushes"] += 1
+            VISIT_LOG_ROWS.inc("written", amount=len(batch))
+            return len(batch)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self.flush()
+        with self._lock:
+            self._thread = None
+            self._stop.clear()
+
+
+_writer = VisitLogWriter(
+    capacity=settings.VISIT_LOG_BUFFER_SIZE,
+    batch_size=settings.VISIT_LOG_BATCH_SIZE,
+    interval_seconds=settings.VISIT_LOG_FLUSH_INTERVAL_MS / 1000,
+)
+gauge("visit_log_buffer_depth", "Visit log entries waiting for the next flush.", lambda: {(): _writer.pending()})
+
+
+def stop_visit_log_writer() -> None:
+    _writer.stop()
+
+
+def visit_log_stats() -> dict[str, int]:
+    return {**_writer.stats, "pending": _writer.pending(), "capacity": _writer.capacity}
 
 
 _EXCLUDE_PATH_PREFIXES = (
     "/healthz",
+    "/metrics",
     "/docs",
     "/openapi.json",
     "/redoc",
@@ -69,26 +194,6 @@ def _safe_headers(headers: Any) -> dict[str, str]:
     return out
 
 
-def _persist_visit_log_async(payload: dict[str, Any], should_increment: bool = True) -> None:
-    """Persist visit log in a background thread.
-
-    IMPORTANT: never block the request path for analytics/logging.
-    """
-
-    try:
-        db = SessionLocal()
-        try:
-            row = UserVisitLog(**payload)
-            db.add(row)
-            if should_increment:
-                increment_activity_counter(db, event="visit")
-            db.commit()
-        finally:
-            db.close()
-    except Exception:
-        logger.exception("failed to write user visit log")
-
-
 def add_visit_logging(app: FastAPI) -> None:
     @app.middleware("http")
     async def _visit_logger(request: Request, call_next):
@@ -119,7 +224,7 @@ def add_visit_logging(app: FastAPI) -> None:
                     "referer_url": request.headers.get("referer"),
                     "request_headers": _safe_headers(request.headers),
                 }
-                _visit_executor.submit(_persist_visit_log_async, payload, should_increment)
+                _writer.add(payload, count_visit=should_increment)
 
             # Always set/refresh the cookie if we want to track this user
             # but only if it's missing or we just incremented.
@@ -0,0 +1,83 @@
+CREATE TABLE IF NOT EXISTS turnover_rolling_stats (
+    series_key VARCHAR(64) NOT NULL,
+    session sessiontype NOT NULL,
+    peak_turnover BIGINT NULL,
+    peak_trade_date DATE NULL,
+    price_high INTEGER NULL,
+    price_high_trade_date DATE NULL,
+    latest_trade_date DATE NULL,
+    sum_5 BIGINT NOT NULL DEFAULT 0,
+    cnt_5 INTEGER NOT NULL DEFAULT 0,
+    sum_10 BIGINT NOT NULL DEFAULT 0,
+    cnt_10 INTEGER NOT NULL DEFAULT 0,
+    sum_20 BIGINT NOT NULL DEFAULT 0,
+    cnt_20 INTEGER NOT NULL DEFAULT 0,
+    sum_30 BIGINT NOT NULL DEFAULT 0,
+    cnt_30 INTEGER NOT NULL DEFAULT 0,
+    max_30 BIGINT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (series_key, session)
+);
+
+-- Initial population from existing facts (afterwards maintained incrementally by the application).
+WITH src AS (
+    SELECT 'index:' || index_id AS series_key, session, trade_date, turnover_amount AS turnover, last AS price
+    FROM index_quote_history
+    UNION ALL
+    SELECT 'turnover_fact:HSI' AS series_key, session, trade_date, turnover_hkd AS turnover, NULL::integer AS price
+    FROM turnover_fact
+),
+ranked AS (
+    SELECT
+        series_key,
+        session,
+        trade_date,
+        turnover,
+        CASE
+            WHEN turnover IS NULL THEN NULL
+            ELSE row_number() OVER (PARTITION BY series_key, session, (turnover IS NULL) ORDER BY trade_date DESC)
+        END AS rn
+    FROM src
+),
+peaks AS (
+    SELECT DISTINCT ON (series_key, session) series_key, session, turnover AS peak_turnover, trade_date AS peak_trade_date
+    FROM src
+    WHERE turnover IS NOT NULL
+    ORDER BY series_key, session, turnover DESC, trade_date DESC
+),
+highs AS (
+    SELECT DISTINCT ON (series_key, session) series_key, session, price AS price_high, trade_date AS price_high_trade_date
+    FROM src
+    WHERE price IS NOT NULL
+    ORDER BY series_key, session, price DESC, trade_date DESC
+),
+agg AS (
+    SELECT
+        series_key,
+        session,
+        MAX(trade_date) AS latest_trade_date,
+        COALESCE(SUM(turnover) FILTER (WHERE rn <= 5), 0) AS sum_5,
+        COUNT(*) FILTER (WHERE rn <= 5) AS cnt_5,
+        COALESCE(SUM(turnover) FILTER (WHERE rn <= 10), 0) AS sum_10,
+        COUNT(*) FILTER (WHERE rn <= 10) AS cnt_10,
+        COALESCE(SUM(turnover) FILTER (WHERE rn <= 20), 0) AS sum_20,
+        COUNT(*) FILTER (WHERE rn <= 20) AS cnt_20,
+        COALESCE(SUM(turnover) FILTER (WHERE rn <= 30), 0) AS sum_30,
+        COUNT(*) FILTER (WHERE rn <= 30) AS cnt_30,
+        MAX(turnover) FILTER (WHERE rn <= 30) AS max_30
+    FROM ranked
+    GROUP BY series_key, session
+)
+INSERT INTO turnover_rolling_stats (
+    series_key, session,
+    peak_turnover, peak_trade_date, price_high, price_high_trade_date, latest_trade_date,
+    sum_5, cnt_5, sum_10, cnt_10, sum_20, cnt_20, sum_30, cnt_30, max_30
+)
+SELECT
+    agg.series_key, agg.session,
+    peaks.peak_turnover, peaks.peak_trade_date, highs.price_high, highs.price_high_trade_date, agg.latest_trade_date,
+    agg.sum_5, agg.cnt_5, agg.sum_10, agg.cnt_10, agg.sum_20, agg.cnt_20, agg.sum_30, agg.cnt_30, agg.max_30
+FROM agg
+LEFT JOIN peaks ON peaks.series_key = agg.series_key AND peaks.session = agg.session
+LEFT JOIN highs ON highs.series_key = agg.series_key AND highs.session = agg.session
+ON CONFLICT (series_key, session) DO NOTHING;
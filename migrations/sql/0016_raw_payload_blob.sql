@@ -0,0 +1,24 @@
+CREATE TABLE IF NOT EXISTS raw_payload_blob (
+    sha256 VARCHAR(64) PRIMARY KEY,
+    encoding VARCHAR(8) NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    stored_bytes INTEGER NOT NULL,
+    content BYTEA NOT NULL,
+    source VARCHAR(32) NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    last_seen_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Content is already compressed by the application, skip TOAST compression.
+ALTER TABLE raw_payload_blob ALTER COLUMN content SET STORAGE EXTERNAL;
+
+CREATE INDEX IF NOT EXISTS ix_raw_payload_blob_last_seen ON raw_payload_blob (last_seen_at);
+
+-- Reference lookups for unreferenced-blob cleanup (payload {"raw_ref": sha256}).
+CREATE INDEX IF NOT EXISTS ix_index_realtime_snapshot_raw_ref
+    ON index_realtime_snapshot ((payload->>'raw_ref'))
+    WHERE (payload->>'raw_ref') IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS ix_index_realtime_api_snapshot_raw_ref
+    ON index_realtime_api_snapshot ((payload->>'raw_ref'))
+    WHERE (payload->>'raw_ref') IS NOT NULL;
@@ -0,0 +1,7 @@
+ALTER TABLE job_run ADD COLUMN IF NOT EXISTS queued_at TIMESTAMPTZ NULL;
+
+-- Dispatcher claims the oldest queued run (FOR UPDATE SKIP LOCKED).
+CREATE INDEX IF NOT EXISTS ix_job_run_queued ON job_run (id) WHERE status = 'queued';
+
+-- Per-job concurrency check counts running rows.
+CREATE INDEX IF NOT EXISTS ix_job_run_running ON job_run (job_name, started_at) WHERE status = 'running';
@@ -0,0 +1,19 @@
+CREATE TABLE IF NOT EXISTS job_run_timing (
+    id BIGSERIAL PRIMARY KEY,
+    job_run_id INTEGER NOT NULL REFERENCES job_run(id) ON DELETE CASCADE,
+    job_name VARCHAR(64) NOT NULL,
+    phase VARCHAR(64) NOT NULL,
+    calls INTEGER NOT NULL DEFAULT 0,
+    seconds DOUBLE PRECISION NOT NULL DEFAULT 0,
+    http_requests INTEGER NOT NULL DEFAULT 0,
+    http_bytes BIGINT NOT NULL DEFAULT 0,
+    db_statements INTEGER NOT NULL DEFAULT 0,
+    db_commits INTEGER NOT NULL DEFAULT 0,
+    row_count BIGINT NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS ix_job_run_timing_run ON job_run_timing (job_run_id);
+
+-- Per job / phase trends, e.g. avg(seconds) of http:push2.eastmoney.com for fetch_intraday_snapshot.
+CREATE INDEX IF NOT EXISTS ix_job_run_timing_job_phase ON job_run_timing (job_name, phase, created_at DESC);
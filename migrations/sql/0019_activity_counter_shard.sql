@@ -0,0 +1,12 @@
+-- 全局访问/登录计数分片: 写入随机落到一个 slot, 读取 = user_activity_counter (旧单行, 不再写入) + SUM(分片)
+CREATE TABLE IF NOT EXISTS user_activity_counter_shard (
+    slot            SMALLINT    PRIMARY KEY,
+    visit_count     BIGINT      NOT NULL DEFAULT 0,
+    login_count     BIGINT      NOT NULL DEFAULT 0,
+    last_visit_at   TIMESTAMPTZ,
+    last_login_at   TIMESTAMPTZ,
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT now(),
+    CONSTRAINT ck_user_activity_counter_shard_slot_nonneg CHECK (slot >= 0),
+    CONSTRAINT ck_user_activity_counter_shard_visit_nonneg CHECK (visit_count >= 0),
+    CONSTRAINT ck_user_activity_counter_shard_login_nonneg CHECK (login_count >= 0)
+)
@@ -0,0 +1,5 @@
+ALTER TABLE job_run ADD COLUMN IF NOT EXISTS claimed_by VARCHAR(96) NULL;
+ALTER TABLE job_run ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMPTZ NULL;
+
+-- Heartbeat refresh (per process) and the orphan sweep scan only active rows.
+CREATE INDEX IF NOT EXISTS ix_job_run_active ON job_run (claimed_by) WHERE status IN ('running', 'timed_out');
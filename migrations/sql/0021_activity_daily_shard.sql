@@ -0,0 +1,27 @@
+-- 按日计数分片: 每次写入落到 (stat_date, slot) 一行, 读取 = user_activity_counter_daily (旧表, 不再写入) + SUM(分片)
+CREATE TABLE IF NOT EXISTS user_activity_counter_daily_shard (
+    stat_date       DATE        NOT NULL,
+    slot            SMALLINT    NOT NULL,
+    visit_count     BIGINT      NOT NULL DEFAULT 0,
+    login_count     BIGINT      NOT NULL DEFAULT 0,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT now(),
+    CONSTRAINT pk_user_activity_counter_daily_shard PRIMARY KEY (stat_date, slot),
+    CONSTRAINT ck_user_activity_daily_shard_slot_nonneg CHECK (slot >= 0),
+    CONSTRAINT ck_user_activity_daily_shard_visit_nonneg CHECK (visit_count >= 0),
+    CONSTRAINT ck_user_activity_daily_shard_login_nonneg CHECK (login_count >= 0)
+);
+
+-- 每日合计 (旧表 + 分片), 供报表读取
+CREATE OR REPLACE VIEW vw_user_activity_counter_daily AS
+SELECT stat_date,
+       SUM(visit_count)::BIGINT AS visit_count,
+       SUM(login_count)::BIGINT AS login_count,
+       MIN(created_at) AS created_at,
+       MAX(updated_at) AS updated_at
+FROM (
+    SELECT stat_date, visit_count, login_count, created_at, updated_at FROM user_activity_counter_daily
+    UNION ALL
+    SELECT stat_date, visit_count, login_count, created_at, updated_at FROM user_activity_counter_daily_shard
+) parts
+GROUP BY stat_date
@@ -0,0 +1,37 @@
+"""add turnover_rolling_stats table
+
+Revision ID: 0014_turnover_rolling_stats
+Revises: 0013_rename_hsi_turnover_job
+Create Date: 2026-10-16
+
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from alembic import op
+
+
+revision = "0014_turnover_rolling_stats"
+down_revision = "0013_rename_hsi_turnover_job"
+branch_labels = None
+depends_on = None
+
+
+def _execute_sql_file(filename: str) -> None:
+    base = Path(__file__).resolve().parents[1] / "sql"
+    sql_text = (base / filename).read_text(encoding="utf-8")
+    for statement in sql_text.split(";"):
+        stmt = statement.strip()
+        if not stmt:
+            continue
+        op.execute(stmt)
+
+
+def upgrade() -> None:
+    _execute_sql_file("0014_turnover_rolling_stats.sql")
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS turnover_rolling_stats")
@@ -0,0 +1,223 @@
+"""partition index_realtime_snapshot by trade_date (monthly)
+
+Revision ID: 0015_realtime_snapshot_partitioning
+Revises: 0014_turnover_rolling_stats
+Create Date: 2026-10-16
+
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from pathlib import Path
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0015_realtime_snapshot_partitioning"
+down_revision = "0014_turnover_rolling_stats"
+branch_labels = None
+depends_on = None
+
+TABLE = "index_realtime_snapshot"
+LEGACY = "index_realtime_snapshot_legacy"
+MONTHS_AHEAD = 2
+
+COLUMNS = (
+    "id, index_id, trade_date, session, last, change_points, change_pct, turnover_amount, "
+    "turnover_currency, data_updated_at, is_closed, source, payload, created_at, updated_at"
+)
+
+COLUMN_DDL = """
+    index_id          INTEGER      NOT NULL REFERENCES market_index(id) ON DELETE CASCADE,
+    trade_date        DATE         NOT NULL,
+    session           sessiontype  NOT NULL,
+    last              INTEGER      NOT NULL,
+    change_points     INTEGER,
+    change_pct        INTEGER,
+    turnover_amount   BIGINT,
+    turnover_currency VARCHAR(8)   NOT NULL DEFAULT 'HKD',
+    data_updated_at   TIMESTAMPTZ  NOT NULL,
+    is_closed         BOOLEAN      NOT NULL DEFAULT FALSE,
+    source            VARCHAR(32)  NOT NULL,
+    payload           JSONB,
+    created_at        TIMESTAMPTZ  NOT NULL DEFAULT now(),
+    updated_at        TIMESTAMPTZ  NOT NULL DEFAULT now(),
+"""
+
+# Views from migrations/sql/0004_index_quote_views.sql depend on the table (dependents first).
+VIEWS = ("vw_index_data_sync_status", "vw_index_turnover_chart_metrics", "vw_index_latest_snapshot")
+
+JOB_NAME = "maintain_realtime_snapshot"
+
+
+def _add_months(d: date, months: int) -> date:
+    total = d.year * 12 + (d.month - 1) + months
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def _existing_views() -> list[str]:
+    bind = op.get_bind()
+    return [v for v in VIEWS if bind.execute(sa.text("SELECT to_regclass(:name)"), {"name": v}).scalar()]
+
+
+def _drop_views() -> None:
+    for view in VIEWS:
+        op.execute(f"DROP VIEW IF EXISTS {view}")
+
+
+def _recreate_views() -> None:
+    # Same statements as the standalone SQL file, minus its BEGIN/COMMIT wrapper.
+    base = Path(__file__).resolve().parents[1] / "sql"
+    sql_text = (base / "0004_index_quote_views.sql").read_text(encoding="utf-8")
+    for statement in sql_text.split(";"):
+        body = "\n".join(line for line in statement.splitlines() if not line.strip().startswith("--")).strip()
+        if not body or body.upper() in {"BEGIN", "COMMIT"}:
+            continue
+        op.execute(statement.strip())
+
+
+def _create_indexes() -> None:
+    op.execute(f"CREATE INDEX IF NOT EXISTS ix_index_realtime_snapshot_date ON {TABLE} (trade_date DESC)")
+    op.execute(f"CREATE INDEX IF NOT EXISTS ix_index_realtime_snapshot_index ON {TABLE} (index_id)")
+    op.execute(
+        f"CREATE INDEX IF NOT EXISTS ix_index_realtime_snapshot_latest ON {TABLE} (index_id, trade_date, id DESC)"
+    )
+
+
+def _detach_legacy() -> None:
+    """Rename the current table out of the way and free its index / constraint names."""
+
+    op.execute(f"ALTER TABLE {TABLE} RENAME TO {LEGACY}")
+    op.execute(f"ALTER TABLE {LEGACY} RENAME CONSTRAINT index_realtime_snapshot_pkey TO index_realtime_snapshot_legacy_pkey")
+    op.execute("DROP INDEX IF EXISTS ix_index_realtime_snapshot_date")
+    op.execute("DROP INDEX IF EXISTS ix_index_realtime_snapshot_index")
+    op.execute("DROP INDEX IF EXISTS ix_index_realtime_snapshot_latest")
+    op.execute("ALTER SEQUENCE index_realtime_snapshot_id_seq OWNED BY NONE")
+
+
+def _attach_sequence() -> None:
+    op.execute(f"ALTER SEQUENCE index_realtime_snapshot_id_seq OWNED BY {TABLE}.id")
+    op.execute(f"SELECT setval('index_realtime_snapshot_id_seq', COALESCE((SELECT max(id) FROM {TABLE}), 0) + 1, false)")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    relkind = bind.execute(sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": TABLE}).scalar()
+    if relkind != "p":
+        views = _existing_views()
+        _drop_views()
+        _detach_legacy()
+
+        op.execute(
+            f"""
+            CREATE TABLE {TABLE} (
+                id                INTEGER      NOT NULL DEFAULT nextval('index_realtime_snapshot_id_seq'::regclass),
+                {COLUMN_DDL}
+                CONSTRAINT index_realtime_snapshot_pkey PRIMARY KEY (id, trade_date)
+            ) PARTITION BY RANGE (trade_date)
+            """
+        )
+        op.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+
+        # One partition per month from the oldest stored trade date through MONTHS_AHEAD months ahead.
+        oldest = bind.execute(sa.text(f"SELECT min(trade_date) FROM {LEGACY}")).scalar()
+        this_month = date.today().replace(day=1)
+        month = (oldest or this_month).replace(day=1)
+        while month <= _add_months(this_month, MONTHS_AHEAD):
+            upper = _add_months(month, 1)
+            op.execute(
+                f"CREATE TABLE {TABLE}_p{month.year:04d}{month.month:02d} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+            )
+            month = upper
+
+        _create_indexes()
+        op.execute(f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {LEGACY}")
+        op.execute(f"DROP TABLE {LEGACY}")
+        _attach_sequence()
+
+        if views:
+            _recreate_views()
+
+    op.execute(
+        f"""
+        INSERT INTO job_definition (
+            job_name,
+            handler_name,
+            label_zh,
+            description_zh,
+            targets,
+            params_schema,
+            default_params,
+            is_active,
+            manual_enabled,
+            schedule_enabled,
+            ui_order
+        ) VALUES (
+            '{JOB_NAME}',
+            '{JOB_NAME}',
+            '维护实时快照分区',
+            '为 index_realtime_snapshot 预建月度分区；超过保留天数的快照按时间间隔降采样（每个间隔保留最后一条），可选删除过期月分区。',
+            '["index_realtime_snapshot"]'::jsonb,
+            '[]'::jsonb,
+            '{{}}'::jsonb,
+            TRUE, TRUE, TRUE, 160
+        )
+        ON CONFLICT (job_name) DO NOTHING
+        """
+    )
+    op.execute(
+        f"""
+        INSERT INTO job_schedule (
+            job_name,
+            schedule_code,
+            trigger_type,
+            timezone,
+            second,
+            minute,
+            hour,
+            day,
+            month,
+            day_of_week,
+            jitter_seconds,
+            misfire_grace_time,
+            coalesce,
+            max_instances,
+            is_active,
+            description
+        ) VALUES
+        ('{JOB_NAME}', '0330', 'cron', 'Asia/Shanghai', '0', '30', '3', '*', '*', '*', NULL, 3600, TRUE, 1, TRUE, '每日 03:30')
+        ON CONFLICT (job_name, schedule_code) DO NOTHING
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(f"DELETE FROM job_schedule WHERE job_name = '{JOB_NAME}'")
+    op.execute(f"DELETE FROM job_definition WHERE job_name = '{JOB_NAME}'")
+
+    bind = op.get_bind()
+    relkind = bind.execute(sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": TABLE}).scalar()
+    if relkind != "p":
+        return
+
+    views = _existing_views()
+    _drop_views()
+    _detach_legacy()
+    op.execute(
+        f"""
+        CREATE TABLE {TABLE} (
+            id                INTEGER      NOT NULL DEFAULT nextval('index_realtime_snapshot_id_seq'::regclass),
+            {COLUMN_DDL}
+            CONSTRAINT index_realtime_snapshot_pkey PRIMARY KEY (id)
+        )
+        """
+    )
+    _create_indexes()
+    op.execute(f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {LEGACY}")
+    op.execute(f"DROP TABLE {LEGACY}")
+    _attach_sequence()
+    if views:
+        _recreate_views()
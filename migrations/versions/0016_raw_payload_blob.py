@@ -0,0 +1,39 @@
+"""add content-addressed raw_payload_blob table
+
+Revision ID: 0016_raw_payload_blob
+Revises: 0015_realtime_snapshot_partitioning
+Create Date: 2026-10-16
+
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from alembic import op
+
+
+revision = "0016_raw_payload_blob"
+down_revision = "0015_realtime_snapshot_partitioning"
+branch_labels = None
+depends_on = None
+
+
+def _execute_sql_file(filename: str) -> None:
+    base = Path(__file__).resolve().parents[1] / "sql"
+    sql_text = (base / filename).read_text(encoding="utf-8")
+    for statement in sql_text.split(";"):
+        stmt = statement.strip()
+        if not stmt:
+            continue
+        op.execute(stmt)
+
+
+def upgrade() -> None:
+    _execute_sql_file("0016_raw_payload_blob.sql")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_index_realtime_api_snapshot_raw_ref")
+    op.execute("DROP INDEX IF EXISTS ix_index_realtime_snapshot_raw_ref")
+    op.execute("DROP TABLE IF EXISTS raw_payload_blob")
@@ -0,0 +1,41 @@
+"""queue manual job runs in job_run (queued_at + claim indexes)
+
+Revision ID: 0017_job_run_queue
+Revises: 0016_raw_payload_blob
+Create Date: 2026-10-16
+
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from alembic import op
+
+
+revision = "0017_job_run_queue"
+down_revision = "0016_raw_payload_blob"
+branch_labels = None
+depends_on = None
+
+
+def _execute_sql_file(filename: str) -> None:
+    base = Path(__file__).resolve().parents[1] / "sql"
+    sql_text = (base / filename).read_text(encoding="utf-8")
+    for statement in sql_text.split(";"):
+        stmt = statement.strip()
+        if not stmt:
+            continue
+        op.execute(stmt)
+
+
+def upgrade() -> None:
+    _execute_sql_file("0017_job_run_queue.sql")
+
+
+def downgrade() -> None:
+    # Runs still waiting in the queue would never be picked up by the old synchronous endpoint.
+    op.execute("UPDATE job_run SET status = 'failed', error = 'queue removed by downgrade', finished_at = now() WHERE status = 'queued'")
+    op.execute("DROP INDEX IF EXISTS ix_job_run_running")
+    op.execute("DROP INDEX IF EXISTS ix_job_run_queued")
+    op.execute("ALTER TABLE job_run DROP COLUMN IF EXISTS queued_at")
@@ -0,0 +1,37 @@
+"""add job_run_timing (per-phase timings of job runs)
+
+Revision ID: 0018_job_run_timing
+Revises: 0017_job_run_queue
+Create Date: 2026-10-16
+
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from alembic import op
+
+
+revision = "0018_job_run_timing"
+down_revision = "0017_job_run_queue"
+branch_labels = None
+depends_on = None
+
+
+def _execute_sql_file(filename: str) -> None:
+    base = Path(__file__).resolve().parents[1] / "sql"
+    sql_text = (base / filename).read_text(encoding="utf-8")
+    for statement in sql_text.split(";"):
+        stmt = statement.strip()
+        if not stmt:
+            continue
+        op.execute(stmt)
+
+
+def upgrade() -> None:
+    _execute_sql_file("0018_job_run_timing.sql")
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS job_run_timing")
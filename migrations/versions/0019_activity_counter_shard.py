@@ -0,0 +1,58 @@
+"""add user_activity_counter_shard (sharded global visit/login counters)
+
+Revision ID: 0019_activity_counter_shard
+Revises: 0018_job_run_timing
+Create Date: 2026-10-16
+
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from alembic import op
+
+
+revision = "0019_activity_counter_shard"
+down_revision = "0018_job_run_timing"
+branch_labels = None
+depends_on = None
+
+
+def _execute_sql_file(filename: str) -> None:
+    base = Path(__file__).resolve().parents[1] / "sql"
+    sql_text = (base / filename).read_text(encoding="utf-8")
+    for statement in sql_text.split(";"):
+        stmt = statement.strip()
+        if not stmt:
+            continue
+        op.execute(stmt)
+
+
+def upgrade() -> None:
+    _execute_sql_file("0019_activity_counter_shard.sql")
+
+
+def downgrade() -> None:
+    # Fold the shards back into the singleton row before dropping them.
+    op.execute(
+        """
+        INSERT INTO user_activity_counter
+          (id, visit_count, login_count, last_visit_at, last_login_at, created_at, updated_at)
+        SELECT 1,
+               COALESCE(SUM(visit_count), 0),
+               COALESCE(SUM(login_count), 0),
+               MAX(last_visit_at),
+               MAX(last_login_at),
+               now(),
+               now()
+        FROM user_activity_counter_shard
+        ON CONFLICT (id) DO UPDATE
+        SET visit_count = user_activity_counter.visit_count + EXCLUDED.visit_count,
+            login_count = user_activity_counter.login_count + EXCLUDED.login_count,
+            last_visit_at = GREATEST(user_activity_counter.last_visit_at, EXCLUDED.last_visit_at),
+            last_login_at = GREATEST(user_activity_counter.last_login_at, EXCLUDED.last_login_at),
+            updated_at = now()
+        """
+    )
+    op.execute("DROP TABLE IF EXISTS user_activity_counter_shard")
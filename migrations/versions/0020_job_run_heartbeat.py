@@ -0,0 +1,39 @@
+"""job_run claimed_by + heartbeat_at (orphaned run detection)
+
+Revision ID: 0020_job_run_heartbeat
+Revises: 0019_activity_counter_shard
+Create Date: 2026-10-16
+
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from alembic import op
+
+
+revision = "0020_job_run_heartbeat"
+down_revision = "0019_activity_counter_shard"
+branch_labels = None
+depends_on = None
+
+
+def _execute_sql_file(filename: str) -> None:
+    base = Path(__file__).resolve().parents[1] / "sql"
+    sql_text = (base / filename).read_text(encoding="utf-8")
+    for statement in sql_text.split(";"):
+        stmt = statement.strip()
+        if not stmt:
+            continue
+        op.execute(stmt)
+
+
+def upgrade() -> None:
+    _execute_sql_file("0020_job_run_heartbeat.sql")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_job_run_active")
+    op.execute("ALTER TABLE job_run DROP COLUMN IF EXISTS heartbeat_at")
+    op.execute("ALTER TABLE job_run DROP COLUMN IF EXISTS claimed_by")
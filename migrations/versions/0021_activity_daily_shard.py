@@ -0,0 +1,51 @@
+"""add user_activity_counter_daily_shard (sharded daily visit/login counters)
+
+Revision ID: 0021_activity_daily_shard
+Revises: 0020_job_run_heartbeat
+Create Date: 2026-10-16
+
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from alembic import op
+
+
+revision = "0021_activity_daily_shard"
+down_revision = "0020_job_run_heartbeat"
+branch_labels = None
+depends_on = None
+
+
+def _execute_sql_file(filename: str) -> None:
+    base = Path(__file__).resolve().parents[1] / "sql"
+    sql_text = (base / filename).read_text(encoding="utf-8")
+    for statement in sql_text.split(";"):
+        stmt = statement.strip()
+        if not stmt:
+            continue
+        op.execute(stmt)
+
+
+def upgrade() -> None:
+    _execute_sql_file("0021_activity_daily_shard.sql")
+
+
+def downgrade() -> None:
+    # Fold the shards back into the one-row-per-day table before dropping them.
+    op.execute("DROP VIEW IF EXISTS vw_user_activity_counter_daily")
+    op.execute(
+        """
+        INSERT INTO user_activity_counter_daily (stat_date, visit_count, login_count, created_at, updated_at)
+        SELECT stat_date, SUM(visit_count), SUM(login_count), MIN(created_at), MAX(updated_at)
+        FROM user_activity_counter_daily_shard
+        GROUP BY stat_date
+        ON CONFLICT (stat_date) DO UPDATE
+        SET visit_count = user_activity_counter_daily.visit_count + EXCLUDED.visit_count,
+            login_count = user_activity_counter_daily.login_count + EXCLUDED.login_count,
+            updated_at = GREATEST(user_activity_counter_daily.updated_at, EXCLUDED.updated_at)
+        """
+    )
+    op.execute("DROP TABLE IF EXISTS user_activity_counter_daily_shard")
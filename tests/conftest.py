@@ -0,0 +1,6 @@
+from __future__ import annotations
+
+import os
+
+# app.config requires a database URL at import time; unit tests never connect.
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg://test@localhost/test")
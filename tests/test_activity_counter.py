@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from app.config import settings
+from app.web import activity_counter
+
+
+class _FakeSession:
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, dict]] = []
+
+    def execute(self, statement, params=None):
+        self.calls.append((" ".join(str(statement).split()), params))
+
+    def rollback(self) -> None:
+        raise AssertionError("unexpected rollback")
+
+
+def test_both_writes_go_to_the_same_random_slot(monkeypatch):
+    monkeypatch.setattr(settings, "ACTIVITY_COUNTER_SHARDS", 8)
+    monkeypatch.setattr(activity_counter.random, "randrange", lambda n: 5)
+    db = _FakeSession()
+
+    activity_counter.add_activity_counts(db, visits=3, at=datetime(2026, 10, 16, 2, 0, tzinfo=timezone.utc))
+
+    (shard_sql, shard_params), (daily_sql, daily_params) = db.calls
+    assert shard_sql.startswith("INSERT INTO user_activity_counter_shard")
+    assert daily_sql.startswith("INSERT INTO user_activity_counter_daily_shard")
+    assert "ON CONFLICT (stat_date, slot)" in daily_sql
+    assert "user_activity_counter_daily " not in daily_sql  # the one-row-per-day table is no longer written
+    assert shard_params["slot"] == daily_params["slot"] == 5
+    assert daily_params["visit_inc"] == 3 and daily_params["login_inc"] == 0
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from app.services.minute_kline import extract_minute_kline
+from app.sources import eastmoney_intraday
+
+KLINES = [
+    "2026-10-16 09:31,3000.0,3001.0,3002.0,2999.0,100,1000000.00",
+    "2026-10-16 09:32,3001.0,3003.0,3004.0,3000.0,200,2000000.00",
+]
+
+
+class _Resp:
+    def raise_for_status(self) -> None:
+        pass
+
+    def json(self):
+        return {"rc": 0, "data": {"code": "000001", "preKPrice": 2990.0, "klines": list(KLINES)}}
+
+
+def test_snapshot_raw_leaves_out_the_day_klines(monkeypatch):
+    monkeypatch.setattr(eastmoney_intraday, "resolve_secid", lambda ts_code, timeout_seconds: "1.000001")
+    monkeypatch.setattr(eastmoney_intraday, "http_get", lambda *a, **kw: _Resp())
+
+    snap = eastmoney_intraday.fetch_intraday_snapshot(ts_code="000001.SH")
+
+    assert "klines" not in snap.raw["resp"]["data"]
+    assert snap.raw["resp"]["data"]["preKPrice"] == 2990.0
+    assert snap.raw["row"] == KLINES[-1]
+    assert snap.klines == KLINES
+    assert snap.amount == 3000000.0 and snap.last == 3003.0
+    assert extract_minute_kline({"klines": snap.klines})["times"] == ["09:31", "09:32"]
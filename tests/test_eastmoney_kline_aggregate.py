@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import random
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from app.sources import eastmoney_index
+from app.sources.eastmoney_index import EastmoneyMinuteBar, _parse_kline_rows, aggregate_kline_rows
+
+
+def aggregate_halfday_and_fullday_amount(*, bars: list[EastmoneyMinuteBar], am_end: time = time(11, 30)) -> dict[date, dict]:
+    """Oracle: the per-bar aggregation backfill_cn_halfday used before aggregate_kline_rows."""
+
+    by_day: dict[date, list[EastmoneyMinuteBar]] = {}
+    for bar in bars:
+        by_day.setdefault(bar.trade_date, []).append(bar)
+
+    out: dict[date, dict] = {}
+    for d, day_bars in by_day.items():
+        day_bars.sort(key=lambda x: x.dt)
+
+        am_amount = 0.0
+        full_amount = 0.0
+        am_close = None
+        full_close = None
+
+        for bar in day_bars:
+            if bar.amount is not None:
+                full_amount += float(bar.amount)
+                if bar.dt.time() <= am_end:
+                    am_amount += float(bar.amount)
+            if bar.dt.time() <= am_end:
+                am_close = bar.close
+            full_close = bar.close
+
+        out[d] = {
+            "am_amount": int(round(am_amount)) if am_amount > 0 else None,
+            "full_amount": int(round(full_amount)) if full_amount > 0 else None,
+            "am_close": am_close,
+            "full_close": full_close,
+            "bars": len(day_bars),
+        }
+    return out
+
+
+def _session_minutes(step: int) -> list[int]:
+    am = list(range(9 * 60 + 30 + step, 11 * 60 + 30 + 1, step))
+    pm = list(range(13 * 60 + step, 15 * 60 + 1, step))
+    return am + pm
+
+
+def _rows(rng: random.Random, *, days: int = 90, step: int = 5, afternoon_only_every: int = 0) -> list[str]:
+    rows: list[str] = []
+    day = date(2026, 1, 5)
+    for n in range(days):
+        minutes = _session_minutes(step)
+        if afternoon_only_every and n % afternoon_only_every == 0:
+            minutes = [m for m in minutes if m >= 13 * 60]
+        for minute in minutes:
+            close = round(rng.uniform(3000, 3500), 2)
+            amount = round(rng.uniform(1e8, 9e9), 2)  # yuan with cents: sums often land near .5
+            volume = float(rng.randint(10**6, 10**8))
+            ts = datetime.combine(day, time(minute // 60, minute % 60)).strftime("%Y-%m-%d %H:%M")
+            rows.append(f"{ts},{close},{close},{close},{close},{volume},{amount},0.1")
+        day += timedelta(days=1)
+    return rows
+
+
+def _expected(rows: list[str], am_end: time) -> dict[date, dict]:
+    return aggregate_halfday_and_fullday_amount(bars=_parse_kline_rows(rows), am_end=am_end)
+
+
+def _actual(rows: list[str], am_end: time, *, use_numpy: bool, monkeypatch) -> dict[date, dict]:
+    if not use_numpy:
+        monkeypatch.setattr(eastmoney_index, "np", None)
+    return {d: totals.as_amounts() for d, totals in aggregate_kline_rows(rows, am_end=am_end).items()}
+
+
+PATHS = [
+    pytest.param(True, id="numpy", marks=pytest.mark.skipif(eastmoney_index.np is None, reason="numpy not installed")),
+    pytest.param(False, id="per-row"),
+]
+
+
+@pytest.mark.parametrize("use_numpy", PATHS)
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_per_bar_aggregation_shuffled(seed, use_numpy, monkeypatch):
+    rng = random.Random(seed)
+    rows = _rows(rng)
+    rng.shuffle(rows)
+    assert _actual(rows, time(11, 30), use_numpy=use_numpy, monkeypatch=monkeypatch) == _expected(rows, time(11, 30))
+
+
+@pytest.mark.parametrize("use_numpy", PATHS)
+@pytest.mark.parametrize("am_end", [time(9, 0), time(11, 30), time(12, 30)])
+def test_matches_with_afternoon_only_days(am_end, use_numpy, monkeypatch):
+    rows = _rows(random.Random(7), days=30, afternoon_only_every=3)
+    result = _actual(rows, am_end, use_numpy=use_numpy, monkeypatch=monkeypatch)
+    assert result == _expected(rows, am_end)
+    assert result[date(2026, 1, 5)]["am_amount"] is None
+
+
+def test_dash_fields_take_per_row_path_and_match(monkeypatch):
+    rows = _rows(random.Random(3), days=10)
+    rows[5] = rows[5].split(",", 1)[0] + ",-,-,-,-,-,-,-"  # no close: skipped
+    parts = rows[40].split(",")
+    parts[6] = "-"  # no amount: counted as a bar, not summed
+    rows[40] = ",".join(parts)
+    parts = rows[41].split(",")
+    parts[5] = ""
+    rows[41] = ",".join(parts)
+
+    if eastmoney_index.np is not None:
+        assert eastmoney_index._kline_columns(rows) is None
+    assert _actual(rows, time(11, 30), use_numpy=True, monkeypatch=monkeypatch) == _expected(rows, time(11, 30))
+
+
+@pytest.mark.skipif(eastmoney_index.np is None, reason="numpy not installed")
+def test_numpy_and_per_row_paths_are_identical(monkeypatch):
+    rows = _rows(random.Random(11), days=60, step=1)
+    random.Random(12).shuffle(rows)
+    with_numpy = aggregate_kline_rows(rows)
+    monkeypatch.setattr(eastmoney_index, "np", None)
+    assert aggregate_kline_rows(rows) == with_numpy
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import types
+from datetime import datetime, timedelta, timezone
+
+from app.jobs import tasks
+from app.sources import eastmoney_index
+
+CN_TZ = timezone(timedelta(hours=8))
+
+ROWS = [
+    "2026-10-14 14:59,3000.0,3001.5,3002.0,2999.0,100,1000000.00",
+    "2026-10-15 09:31,3001.0,3002.5,3003.0,3000.0,200,2000000.00",
+    "2026-10-15 09:32,3002.5,-,3003.0,3000.0,200,2000000.00",
+    "2026-10-16 09:31,3010.0,3011.0,3012.0,3009.0,300,3000000.00",
+]
+
+
+class _FakeSession:
+    commits = 0
+
+    def commit(self) -> None:
+        self.commits += 1
+
+
+def _run(monkeypatch, *, watermark):
+    loaded: dict = {}
+
+    def fake_load(db, rows):
+        assert isinstance(rows, types.GeneratorType)  # streamed, not a prebuilt list
+        loaded["rows"] = list(rows)
+        return {"rows": len(loaded["rows"]), "inserted": len(loaded["rows"]), "seconds": 0.1, "rows_per_second": 1.0}
+
+    monkeypatch.setattr(eastmoney_index, "fetch_minute_kline_rows", lambda **kw: ROWS)
+    monkeypatch.setattr(tasks, "ensure_market_index", lambda db, code: types.SimpleNamespace(id=7))
+    monkeypatch.setattr(tasks, "_kline_watermark", lambda db, **kw: watermark)
+    monkeypatch.setattr(tasks, "bulk_load_kline_rows", fake_load)
+    db = _FakeSession()
+    result = tasks._persist_eastmoney_kline_rows(db, code="SSE", ts_code="000001.SH", klt="1", lookback_days=365)
+    return result, loaded["rows"], db
+
+
+def test_streams_rows_into_loader(monkeypatch):
+    result, rows, db = _run(monkeypatch, watermark=None)
+
+    assert [r["bar_time"] for r in rows] == [
+        datetime(2026, 10, 14, 14, 59, tzinfo=CN_TZ),
+        datetime(2026, 10, 15, 9, 31, tzinfo=CN_TZ),
+        datetime(2026, 10, 16, 9, 31, tzinfo=CN_TZ),
+    ]
+    assert rows[1]["close"] == 300250 and rows[1]["turnover_amount"] == 2000000
+    assert rows[1]["payload"]["raw"] == ROWS[1]
+    assert (result["rows"], result["date_from"], result["date_to"]) == (3, "2026-10-14", "2026-10-16")
+    assert db.commits == 1
+
+
+def test_watermark_filter_and_span(monkeypatch):
+    result, rows, _ = _run(monkeypatch, watermark=datetime(2026, 10, 15, 9, 31, tzinfo=CN_TZ))
+
+    assert [r["trade_date"].isoformat() for r in rows] == ["2026-10-16"]
+    assert (result["date_from"], result["date_to"]) == ("2026-10-16", "2026-10-16")
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+
+from app.sources import eastmoney_secid
+
+
+@pytest.fixture
+def resolver(monkeypatch):
+    persisted: list[dict] = []
+    monkeypatch.setattr(eastmoney_secid, "_secids", {})
+    monkeypatch.setattr(eastmoney_secid, "_negative", {})
+    monkeypatch.setattr(eastmoney_secid, "_load_persisted", lambda codes: 0)
+    monkeypatch.setattr(eastmoney_secid, "_persist", persisted.append)
+    return persisted
+
+
+def test_only_unknown_symbols_are_negatively_cached(resolver, monkeypatch):
+    calls: list[str] = []
+
+    def suggest(code: str, timeout_seconds: int) -> str:
+        calls.append(code)
+        if code == "BLIP":
+            raise httpx.ConnectTimeout("timed out")
+        if code == "NOPE":
+            raise eastmoney_secid.SecidNotFound(f"no QuoteID for {code}")
+        return "100.N225"
+
+    monkeypatch.setattr(eastmoney_secid, "_suggest_secid", suggest)
+
+    errors: dict[str, str] = {}
+    assert eastmoney_secid.resolve_secids(["BLIP", "NOPE", "N225"], errors=errors) == {"N225": "100.N225"}
+    assert set(errors) == {"BLIP", "NOPE"}
+    assert set(eastmoney_secid._negative) == {"NOPE"}
+    assert set(resolver[0]) == {"NOPE", "N225"}
+
+    calls.clear()
+    errors.clear()
+    eastmoney_secid.resolve_secids(["BLIP", "NOPE", "N225"], errors=errors)
+    assert calls == ["BLIP"]  # transport errors retry on the next call, unknown symbols do not
+    assert set(errors) == {"BLIP", "NOPE"}
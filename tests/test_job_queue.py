@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import threading
+
+from app.config import settings
+from app.services import job_queue
+
+
+class _FakeSession:
+    def close(self) -> None:
+        pass
+
+
+def test_stop_fails_runs_still_running_after_grace(monkeypatch):
+    failed: list[tuple[list[int], str]] = []
+    monkeypatch.setattr(settings, "JOB_QUEUE_SHUTDOWN_SECONDS", 0.2)
+    monkeypatch.setattr(job_queue, "SessionLocal", _FakeSession)
+    monkeypatch.setattr(job_queue, "fail_runs", lambda db, ids, *, error: failed.append((ids, error)) or len(ids))
+    monkeypatch.setattr(job_queue, "stop_job_heartbeat", lambda: None)
+
+    release = threading.Event()
+    stuck = threading.Thread(target=release.wait, daemon=True)
+    done = threading.Thread(target=lambda: None, daemon=True)
+    stuck.start()
+    done.start()
+    monkeypatch.setattr(job_queue, "_workers", {11: stuck, 12: done})
+    try:
+        job_queue.stop_job_queue()
+    finally:
+        release.set()
+
+    assert [ids for ids, _ in failed] == [[11]]
+    assert "interrupted" in failed[0][1] and job_queue.PROCESS_ID in failed[0][1]
+
+
+def test_stop_without_running_work_fails_nothing(monkeypatch):
+    failed: list = []
+    monkeypatch.setattr(job_queue, "fail_runs", lambda *a, **kw: failed.append(a))
+    monkeypatch.setattr(job_queue, "stop_job_heartbeat", lambda: None)
+    monkeypatch.setattr(job_queue, "_workers", {})
+
+    job_queue.stop_job_queue()
+
+    assert failed == []
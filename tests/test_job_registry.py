@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from app.jobs import registry
+from app.jobs.registry import JobSpec, JobTimeoutError, abandoned_handlers, run_handler
+
+
+class _Session:
+    def close(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        pass
+
+
+@pytest.fixture(autouse=True)
+def _isolated(monkeypatch):
+    monkeypatch.setattr(registry, "SessionLocal", _Session)
+    monkeypatch.setattr(registry, "_abandoned", {})
+    monkeypatch.setattr(registry.settings, "JOB_QUEUE_CONCURRENCY", "")
+
+
+def test_timed_out_handler_blocks_its_concurrency_key_until_it_exits():
+    release = threading.Event()
+    calls: list[str] = []
+
+    def slow(db, params):
+        calls.append("slow")
+        release.wait(5)
+        return "success", {}
+
+    spec = JobSpec(name="t_slow", handler=slow, timeout_seconds=0.05, concurrency_key="t_key")
+    with pytest.raises(JobTimeoutError) as excinfo:
+        run_handler(spec, _Session(), None)
+    assert abandoned_handlers("t_key") == 1
+
+    # Same key, other job: skipped while the abandoned thread runs; the handler is never called.
+    other = JobSpec(name="t_other", handler=lambda db, params: ("success", {}), concurrency_key="t_key")
+    assert run_handler(other, _Session(), None)[0] == "skipped"
+    assert run_handler(spec, _Session(), None)[0] == "skipped"
+    assert calls == ["slow"]
+
+    release.set()
+    excinfo.value.worker.join(5)
+    assert abandoned_handlers("t_key") == 0
+    assert run_handler(other, _Session(), None) == ("success", {})
+
+
+def test_concurrency_override_allows_runs_next_to_an_abandoned_handler(monkeypatch):
+    release = threading.Event()
+    spec = JobSpec(
+        name="t_slow2",
+        handler=lambda db, params: (release.wait(5), ("success", {}))[1],
+        timeout_seconds=0.05,
+        concurrency_key="t_key2",
+    )
+    with pytest.raises(JobTimeoutError):
+        run_handler(spec, _Session(), None)
+    monkeypatch.setattr(registry.settings, "JOB_QUEUE_CONCURRENCY", "t_key2=2")
+    try:
+        other = JobSpec(name="t_fast", handler=lambda db, params: ("success", {}), concurrency_key="t_key2")
+        assert run_handler(other, _Session(), None) == ("success", {})
+    finally:
+        release.set()
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from sqlalchemy.dialects import postgresql
+
+from app.services import index_quote_resolver, raw_payloads
+
+
+class _FakeSession:
+    def __init__(self) -> None:
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(statement)
+
+
+def _blob_rows(statement) -> int:
+    params = statement.compile(dialect=postgresql.dialect()).params
+    return sum(1 for key in params if key.startswith("sha256"))
+
+
+def test_store_raw_payloads_dedupes_into_one_upsert():
+    db = _FakeSession()
+    digests = raw_payloads.store_raw_payloads(db, [({"a": 1}, "X"), ({"b": 2}, "Y"), ({"a": 1}, "Z")])
+
+    assert len(db.statements) == 1
+    assert _blob_rows(db.statements[0]) == 2
+    assert digests[0] == digests[2] != digests[1]
+    assert raw_payloads.store_raw_payload(_FakeSession(), {"a": 1}, source="X") == digests[0]
+
+
+def test_bulk_insert_writes_blobs_once_per_chunk(monkeypatch):
+    monkeypatch.setattr(raw_payloads, "raw_payload_mode", lambda source: "blob")
+    monkeypatch.setattr(index_quote_resolver, "BULK_CHUNK_SIZE", 3)
+    monkeypatch.setattr(index_quote_resolver, "add_rows", lambda n: None)
+    rows = [
+        {"index_id": 1, "trade_date": None, "source": "TENCENT", "payload": {"raw": {"q": i % 2}, "n": i}}
+        for i in range(5)
+    ]
+    db = _FakeSession()
+    index_quote_resolver.bulk_insert_realtime_snapshots(db, rows)
+
+    # chunk 1: blob upsert + snapshot insert, chunk 2: blob upsert + snapshot insert
+    assert len(db.statements) == 4
+    assert [_blob_rows(db.statements[i]) for i in (0, 2)] == [2, 2]
+    snapshot = db.statements[1].compile(dialect=postgresql.dialect()).params
+    assert all("raw" not in v and "raw_ref" in v for k, v in snapshot.items() if k.startswith("payload"))
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from datetime import date
+
+from app.services import snapshot_partitions
+
+
+class _Result:
+    def __init__(self, value) -> None:
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.value
+
+
+class _FakeSession:
+    """Answers the catalog / count queries snapshot_partitions issues, records everything else."""
+
+    def __init__(self, default_months, existing) -> None:
+        self.default_months = default_months
+        self.existing = set(existing)
+        self.statements: list[str] = []
+        self.commits = 0
+
+    def execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        self.statements.append(sql)
+        if sql.startswith("SELECT DISTINCT date_trunc"):
+            return _Result(list(self.default_months))
+        if sql.startswith("SELECT to_regclass"):
+            return _Result(params["name"] in self.existing)
+        if sql.startswith("SELECT count(*)"):
+            return _Result(sum(1 for m in self.default_months if params["lo"] <= m < params["hi"]))
+        return _Result(None)
+
+    def commit(self) -> None:
+        self.commits += 1
+
+
+def test_rehome_moves_backfilled_months_out_of_default():
+    db = _FakeSession([date(2019, 3, 1), date(2019, 5, 1)], existing={"index_realtime_snapshot_p201905"})
+
+    created = snapshot_partitions.rehome_default_partition_rows(db)
+
+    assert created == ["index_realtime_snapshot_p201903"]
+    assert any(s.startswith("CREATE TABLE index_realtime_snapshot_p201903 (LIKE") for s in db.statements)
+    assert any("INSERT INTO index_realtime_snapshot_p201903 SELECT * FROM moved" in s for s in db.statements)
+    assert any(
+        "ATTACH PARTITION index_realtime_snapshot_p201903 FOR VALUES FROM ('2019-03-01') TO ('2019-04-01')" in s
+        for s in db.statements
+    )
+    assert db.commits == 1
+
+
+def test_ensure_creates_empty_future_partitions_directly():
+    db = _FakeSession([], existing={"index_realtime_snapshot_p202610"})
+
+    created = snapshot_partitions.ensure_snapshot_partitions(db, today=date(2026, 10, 16), months_ahead=2)
+
+    assert created == ["index_realtime_snapshot_p202611", "index_realtime_snapshot_p202612"]
+    assert any(s.startswith("CREATE TABLE index_realtime_snapshot_p202612 PARTITION OF") for s in db.statements)